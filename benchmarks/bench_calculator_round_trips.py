@@ -0,0 +1,133 @@
+"""計算エージェントのLLM往復回数のベンチマーク
+
+計算の質問ごとに、2項演算のツール（add_numbers など）のみを使う場合と、
+evaluate_expression で式全体を1回で計算する場合の、モデルとの往復回数を見積もります。
+
+2項演算のツールでは、独立した部分式は同じ応答で並列に呼び出せるものとして、
+式の木の演算の深さ分だけツール呼び出しの往復が必要です。どちらの場合も最後に
+結果を文章にする往復が1回加わります。べき乗・剰余は2項演算のツールでは計算できないため、
+往復回数の比較から除き、件数のみ表示します。
+
+あわせて evaluate_expression の1回あたりの処理時間を計測します。
+
+実行方法:
+    python benchmarks/bench_calculator_round_trips.py [--repeat 2000]
+"""
+
+import argparse
+import ast
+import logging
+import os
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tools.calculator_tools import (  # noqa: E402
+    evaluate_expression,
+    normalize_expression,
+)
+
+# 計算エージェントに送られる質問の例
+QUERIES = [
+    "5 + 3",
+    "20 / 4",
+    "123×45",
+    "(3+4)*5/2",
+    "1200*1.08 + 300*1.1",
+    "(250 + 180 + 320) / 3",
+    "１５００÷４×３",
+    "(12 - 4) * (7 + 3) / 5",
+    "100 - 25 * 2 + 8 / 4",
+    "((1 + 2) * 3 - 4) * 5",
+    "3980 * 0.85 - 500",
+    "(60 * 24 * 7) / (8 * 5)",
+    "2^10",
+    "17 % 5 + 1",
+]
+
+# 2項演算のツールで計算できる演算子
+BINARY_TOOL_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+
+# 結果を文章にする往復
+FINAL_ANSWER_ROUND_TRIPS = 1
+
+
+def tool_depth(node: ast.AST) -> Optional[int]:
+    """2項演算のツールで計算する場合に必要なツール呼び出しの往復回数
+
+    Returns:
+        Optional[int]: 往復回数（2項演算のツールで計算できない場合はNone）
+    """
+    if isinstance(node, ast.Expression):
+        return tool_depth(node.body)
+    if isinstance(node, ast.Constant):
+        return 0
+    if isinstance(node, ast.UnaryOp):
+        return tool_depth(node.operand)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, BINARY_TOOL_OPERATORS):
+        left = tool_depth(node.left)
+        right = tool_depth(node.right)
+        if left is None or right is None:
+            return None
+        return max(left, right) + 1
+    return None
+
+
+def measure(queries: List[str], repeat: int) -> float:
+    """evaluate_expression の1回あたりの最短の処理時間（秒）を返す"""
+    best = float("inf")
+    for _ in range(5):
+        started_at = time.perf_counter()
+        for _ in range(repeat):
+            for query in queries:
+                evaluate_expression(query)
+        best = min(best, time.perf_counter() - started_at)
+    return best / (repeat * len(queries))
+
+
+def main(repeat: int) -> None:
+    """ベンチマークを実行して結果を表示"""
+    # 計測中のログ出力を抑える
+    logging.disable(logging.INFO)
+
+    binary_total = 0
+    expression_total = 0
+    unsupported = 0
+    print(f"{'query':<28} {'binary tools':>12} {'evaluate_expression':>20}")
+    for query in QUERIES:
+        result = evaluate_expression(query)
+        if result["status"] != "success":
+            raise SystemExit(f"Failed to evaluate {query}: {result}")
+
+        depth = tool_depth(ast.parse(normalize_expression(query), mode="eval"))
+        expression_trips = 1 + FINAL_ANSWER_ROUND_TRIPS
+        if depth is None:
+            unsupported += 1
+            binary = "unsupported"
+        else:
+            binary_trips = depth + FINAL_ANSWER_ROUND_TRIPS
+            binary_total += binary_trips
+            expression_total += expression_trips
+            binary = str(binary_trips)
+        print(f"{query:<28} {binary:>12} {expression_trips:>20}")
+
+    compared = len(QUERIES) - unsupported
+    per_call = measure(QUERIES, repeat)
+    print()
+    print(f"queries={len(QUERIES)} compared={compared} unsupported={unsupported}")
+    for label, trips in (
+        ("binary tools", binary_total),
+        ("evaluate_expression", expression_total),
+        ("saved", binary_total - expression_total),
+    ):
+        print(f"  {label:<20} {trips / compared:5.2f} round trips/query")
+    print(f"  {'evaluation time':<20} {per_call * 1e6:5.2f} us/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
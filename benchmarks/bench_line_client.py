@@ -0,0 +1,153 @@
+"""LINEクライアントのイベントループ停止時間ベンチマーク
+
+同期版 LineClient と非同期版 AsyncLineClient で返信を並行送信し、
+その間にイベントループがどれだけ止まったか（ティッカーの最大遅延）を比較します。
+LINE APIの代わりに、一定時間待ってから応答するローカルHTTPサーバーを使用します。
+
+実行方法:
+    python benchmarks/bench_line_client.py [--requests 20] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("LINE_CHANNEL_ACCESS_TOKEN", "benchmark-token")
+os.environ.setdefault("LINE_CHANNEL_SECRET", "benchmark-secret")
+
+from src.services.line_service import client as client_module  # noqa: E402
+from src.services.line_service.client import (  # noqa: E402
+    AsyncLineClient,
+    LineClient,
+)
+
+TICK_INTERVAL = 0.001
+
+
+def start_stub_server(latency: float) -> str:
+    """LINE APIを模したスタブサーバーを別スレッドで起動
+
+    Args:
+        latency: 応答までの待ち時間（秒）
+
+    Returns:
+        str: スタブサーバーのベースURL
+    """
+    async def reply(request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response(
+            {"sentMessages": [{"id": "1", "quoteToken": "q"}]}
+        )
+
+    app = web.Application()
+    app.router.add_post("/v2/bot/message/reply", reply)
+
+    ready = threading.Event()
+    ports = []
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        loop.run_until_complete(site.start())
+        ports.append(site._server.sockets[0].getsockname()[1])
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    port = ports[0]
+    return f"http://127.0.0.1:{port}"
+
+
+def point_apis_to(base_url: str) -> None:
+    """クライアントが使うAPIクラスの接続先をスタブサーバーに差し替える"""
+    for name in ("MessagingApi", "AsyncMessagingApi"):
+        original = getattr(client_module, name)
+
+        class StubbedApi(original):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.line_base_path = base_url
+
+        setattr(client_module, name, StubbedApi)
+
+
+async def measure(client: LineClient, requests: int) -> dict:
+    """返信を並行送信しながらイベントループの最大停止時間を計測
+
+    Args:
+        client: 計測対象のクライアント
+        requests: 送信する返信数
+
+    Returns:
+        dict: 所要時間と最大停止時間
+    """
+    stop = asyncio.Event()
+    max_stall = 0.0
+
+    async def ticker():
+        nonlocal max_stall
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+            max_stall = max(
+                max_stall, time.perf_counter() - before - TICK_INTERVAL
+            )
+
+    async def send(i: int):
+        result = client.reply_text(f"token-{i}", "benchmark")
+        if asyncio.iscoroutine(result):
+            await result
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK_INTERVAL * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker_task
+    return {"elapsed": elapsed, "max_stall": max_stall}
+
+
+async def main(requests: int, latency: float) -> None:
+    """ベンチマークを実行して結果を表示"""
+    base_url = start_stub_server(latency)
+    point_apis_to(base_url)
+
+    sync_client = LineClient()
+    async_client = AsyncLineClient()
+    # 接続確立のコストを除くためのウォームアップ
+    await async_client.reply_text("warmup", "warmup")
+
+    sync_result = await measure(sync_client, requests)
+    async_result = await measure(async_client, requests)
+    await async_client.close()
+
+    print(f"requests={requests} stub_latency={latency * 1000:.0f}ms")
+    for label, result in (
+        ("LineClient (sync)", sync_result),
+        ("AsyncLineClient", async_result),
+    ):
+        print(
+            f"{label:<20} total={result['elapsed'] * 1000:8.1f}ms "
+            f"max_loop_stall={result['max_stall'] * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency))
@@ -0,0 +1,210 @@
+"""MCPサーバー接続の起動時間ベンチマーク
+
+応答までに一定時間かかるスタブのMCPサーバー（SSE）を複数起動し、
+サーバーへ1つずつ接続する従来の方式と、connect_mcp_servers による並行接続の
+起動時間を比較します。1台だけ遅いサイドカーがある場合も計測します。
+
+あわせて MCPConnectionManager の起動時間を、ツールのスキーマのキャッシュがない場合
+（接続を待つ）とある場合（接続をバックグラウンドで行う）で比較します。
+
+実行方法:
+    python benchmarks/bench_mcp_startup.py [--servers 2] [--latency 0.3] [--slow 1.5]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import AsyncExitStack
+from typing import List
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tools.mcp_connection_manager import MCPConnectionManager  # noqa: E402
+from src.tools.mcp_integration import (  # noqa: E402
+    MCPServer,
+    _connect_server,
+    connect_mcp_servers,
+)
+from src.tools.mcp_schema_cache import MCPSchemaCache  # noqa: E402
+
+
+def free_port() -> int:
+    """空いているポート番号を取得"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server_loop() -> asyncio.AbstractEventLoop:
+    """スタブサーバーを動かすイベントループを別スレッドで起動
+
+    sse-starlette はプロセス全体で1つのイベントを共有するため、
+    すべてのスタブサーバーを同じイベントループで動かします。
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def start_stub_server(
+    loop: asyncio.AbstractEventLoop, name: str, latency: float
+) -> str:
+    """SSE接続の確立までに latency 秒かかるスタブのMCPサーバーを起動
+
+    Args:
+        loop: スタブサーバーを動かすイベントループ
+        name: サーバー名
+        latency: SSE接続を受け付けるまでの待ち時間（秒）
+
+    Returns:
+        str: SSEエンドポイントのURL
+    """
+    mcp = FastMCP(name)
+
+    @mcp.tool()
+    def echo(text: str) -> str:
+        """受け取った文字列を返す"""
+        return text
+
+    sse_app = mcp.sse_app()
+
+    async def app(scope, receive, send):
+        # 起動の遅いサイドカーを再現するため、SSE接続の確立を遅らせる
+        if scope["type"] == "http" and scope["path"] == "/sse":
+            await asyncio.sleep(latency)
+        await sse_app(scope, receive, send)
+
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error")
+    )
+    asyncio.run_coroutine_threadsafe(server.serve(), loop)
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/sse"
+
+
+async def connect_sequentially(servers: List[MCPServer]) -> int:
+    """従来の方式: サーバーへ1つずつ接続する"""
+    exit_stack = AsyncExitStack()
+    connected = 0
+    for server in servers:
+        result = await _connect_server(server)
+        if result is not None:
+            connected += 1
+            await exit_stack.enter_async_context(result[1])
+    await close_quietly(exit_stack)
+    return connected
+
+
+async def connect_concurrently(servers: List[MCPServer]) -> int:
+    """connect_mcp_servers で並行して接続する"""
+    tools, exit_stack = await connect_mcp_servers(servers)
+    await close_quietly(exit_stack)
+    return sum(toolset is not None for toolset in tools.values())
+
+
+async def close_quietly(exit_stack: AsyncExitStack) -> None:
+    """接続を閉じる（SSEクライアントの終了時のエラーは計測に関係しないため無視）"""
+    try:
+        await exit_stack.aclose()
+    except Exception:
+        pass
+
+
+async def start_manager(servers: List[MCPServer], cache_path: str) -> float:
+    """MCPConnectionManager を起動し、ツールを受け取るまでの秒数を返す
+
+    計測後、バックグラウンドの接続が終わるのを待ってから接続を閉じます。
+    """
+    manager = MCPConnectionManager(
+        servers=servers, schema_cache=MCPSchemaCache(cache_path)
+    )
+    started_at = time.perf_counter()
+    tools = await manager.start()
+    elapsed = time.perf_counter() - started_at
+    if not all(tools.values()):
+        raise SystemExit("Some servers returned no tools")
+    for server in servers:
+        task = manager.connection(server.name).warm_up_task
+        if task is not None:
+            await task
+    try:
+        await manager.stop()
+    except Exception:
+        pass
+    return elapsed
+
+
+async def measure_schema_cache(servers: List[MCPServer], repeat: int) -> None:
+    """スキーマのキャッシュがない場合とある場合の起動時間を表示"""
+    cold = warm = float("inf")
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(repeat):
+            cache_path = os.path.join(directory, f"cache{i}.json")
+            cold = min(cold, await start_manager(servers, cache_path))
+            warm = min(warm, await start_manager(servers, cache_path))
+    print("    schema cache")
+    print(f"      cold start  {cold:6.3f} s")
+    print(f"      warm start  {warm:6.3f} s")
+    print(f"      saved       {cold - warm:6.3f} s")
+
+
+async def measure(connect, servers: List[MCPServer], repeat: int) -> float:
+    """接続を繰り返し、最短の起動時間（秒）を返す"""
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        connected = await connect(servers)
+        best = min(best, time.perf_counter() - started_at)
+        if connected != len(servers):
+            raise SystemExit(f"Only {connected}/{len(servers)} servers connected")
+    return best
+
+
+async def run(servers: int, latency: float, slow: float, repeat: int) -> None:
+    """ベンチマークを実行して結果を表示"""
+    scenarios = {
+        "uniform": [latency] * servers,
+        "one slow sidecar": [slow] + [latency] * (servers - 1),
+    }
+    print(f"servers={servers} latency={latency}s slow={slow}s repeat={repeat}")
+    loop = start_server_loop()
+    for label, latencies in scenarios.items():
+        registry = [
+            MCPServer(
+                f"stub{i}",
+                start_stub_server(loop, f"stub{i}", delay),
+                f"Stub{i}",
+                timeout=delay + 10,
+            )
+            for i, delay in enumerate(latencies)
+        ]
+        sequential = await measure(connect_sequentially, registry, repeat)
+        concurrent = await measure(connect_concurrently, registry, repeat)
+        print(f"  {label}")
+        print(f"    sequential  {sequential:6.3f} s")
+        print(f"    concurrent  {concurrent:6.3f} s")
+        print(f"    speedup     {sequential / concurrent:6.2f}x")
+        await measure_schema_cache(registry, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    # 接続ごとのログ出力を抑える
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args.servers, args.latency, args.slow, args.repeat))
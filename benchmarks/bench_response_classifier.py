@@ -0,0 +1,113 @@
+"""応答分類のマイクロベンチマーク
+
+レシピ登録の実行で記録されるイベントテキストの並び（抽出JSON、整形JSON、
+Notion登録結果、エラー報告など）を再現したストリームに対して、
+パターン一覧ごとに走査する従来の判定と、コンパイル済みの ResponseClassifier の
+1イベントあたりの処理時間を比較します。あわせて判定結果が一致することを確認します。
+
+実行方法:
+    python benchmarks/bench_response_classifier.py [--streams 2000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.agent_service_impl import (  # noqa: E402
+    COMPLETION_INDICATORS,
+    INTERMEDIATE_PATTERNS,
+    RESPONSE_CLASSIFIER,
+)
+
+RECIPE_JSON = (
+    '{"title": "基本のカレー", "servings": 4, "ingredients": '
+    '[{"name": "玉ねぎ", "amount": "2個"}, {"name": "にんじん", "amount": "1本"}], '
+    '"steps": ["材料を切る", "炒める", "煮込む"]}'
+)
+
+# 1回の実行で記録されるイベントテキストの種類
+EVENT_TEMPLATES = [
+    "```json\n" + RECIPE_JSON + "\n```",
+    "ContentExtractionAgent: extracted_recipe_data を作成しました\n" + RECIPE_JSON,
+    "DataTransformationAgent: notion_formatted_data を作成しました",
+    "```json\n{\"status\": \"ok\"}```",
+    "レシピのページを確認しています。しばらくお待ちください。" * 3,
+    "✅ レシピ登録成功\n登録されたページID: 1a2b3c\nページURL: https://www.notion.so/1a2b3c",
+    "❌ レシピ登録エラー\n📋 **エラー詳細**\nNotion API Error: validation failed",
+    "材料と手順を整理しました。" + "玉ねぎを薄切りにして飴色になるまで炒めます。" * 20,
+    "   ",
+]
+
+
+def make_streams(count: int, seed: int = 0) -> List[List[str]]:
+    """記録済みのイベントストリームを再現"""
+    rng = random.Random(seed)
+    streams = []
+    for _ in range(count):
+        stream = [rng.choice(EVENT_TEMPLATES[:5]) for _ in range(rng.randint(3, 8))]
+        stream.append(rng.choice(EVENT_TEMPLATES[5:]))
+        streams.append(stream)
+    return streams
+
+
+def legacy_decide(text: str) -> Tuple[bool, bool, bool]:
+    """従来の判定（中間応答・空応答・最終応答）"""
+    intermediate = (
+        (text.strip().startswith("```json") and text.strip().endswith("```"))
+        or any(pattern in text for pattern in INTERMEDIATE_PATTERNS)
+        or (len(text.strip()) < 50 and "```" in text)
+    )
+    empty = not (text and text.strip())
+    completion = any(indicator in text for indicator in COMPLETION_INDICATORS)
+    return intermediate, empty, completion
+
+
+def compiled_decide(text: str) -> Tuple[bool, bool, bool]:
+    """ResponseClassifier による判定（中間応答・空応答・最終応答）"""
+    label = RESPONSE_CLASSIFIER.classify(text)
+    return label.intermediate, label.empty, label.completion
+
+
+def measure(
+    decide: Callable[[str], Tuple[bool, bool, bool]],
+    events: List[str],
+    repeat: int,
+) -> float:
+    """全イベントの判定を繰り返し、最短の1イベントあたりの時間（秒）を返す"""
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for text in events:
+            decide(text)
+        best = min(best, time.perf_counter() - started_at)
+    return best / len(events)
+
+
+def main(streams: int, repeat: int) -> None:
+    """ベンチマークを実行して結果を表示"""
+    events = [text for stream in make_streams(streams) for text in stream]
+
+    mismatches = sum(legacy_decide(t) != compiled_decide(t) for t in events)
+    if mismatches:
+        raise SystemExit(f"Decisions differ on {mismatches} events")
+
+    legacy = measure(legacy_decide, events, repeat)
+    compiled = measure(compiled_decide, events, repeat)
+    print(f"streams={streams} events={len(events)} repeat={repeat}")
+    print(f"  legacy helpers      {legacy * 1e6:7.2f} us/event")
+    print(f"  ResponseClassifier  {compiled * 1e6:7.2f} us/event")
+    print(f"  speedup             {legacy / compiled:7.2f}x")
+    print("  decisions identical: yes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.streams, args.repeat)
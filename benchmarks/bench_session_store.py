@@ -0,0 +1,138 @@
+"""セッションストアの get / append レイテンシベンチマーク
+
+InMemorySessionService と SQLiteSessionService に多数のセッションを作成し、
+ホット層に載っているセッション・載っていないセッションの取得と、
+イベント追加のレイテンシ（p50 / p99）を比較します。
+
+実行方法:
+    python benchmarks/bench_session_store.py [--sessions 10000] [--ops 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.events.event import Event  # noqa: E402
+from google.adk.events.event_actions import EventActions  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from src.services.sqlite_session_service import SQLiteSessionService  # noqa: E402
+
+APP_NAME = "benchmark"
+
+
+def make_event(index: int) -> Event:
+    """会話1ターン分程度のテキストを持つイベントを作成"""
+    return Event(
+        author="RecipeWorkflowAgent",
+        invocation_id=f"inv-{index}",
+        content=types.Content(
+            role="model",
+            parts=[types.Part(text="レシピを登録しました。" * 20)],
+        ),
+        actions=EventActions(state_delta={"step": index}),
+    )
+
+
+def populate(service, sessions: int, events: int) -> None:
+    """セッションを作成し、それぞれにイベントを追加"""
+    for i in range(sessions):
+        session = service.create_session(
+            app_name=APP_NAME, user_id=f"U{i}", session_id=f"session_U{i}"
+        )
+        for j in range(events):
+            service.append_event(session, make_event(j))
+    if hasattr(service, "flush"):
+        service.flush()
+
+
+def measure(func: Callable[[int], None], keys: List[int]) -> Dict[str, float]:
+    """各キーで処理を実行し、レイテンシの分布を返す"""
+    latencies = []
+    for key in keys:
+        started_at = time.perf_counter()
+        func(key)
+        latencies.append(time.perf_counter() - started_at)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def run(service, sessions: int, ops: int, hot_keys: int) -> Dict[str, Dict]:
+    """get（ホット/コールド）と append のレイテンシを計測"""
+    rng = random.Random(0)
+    hot = [rng.randrange(hot_keys) for _ in range(ops)]
+    cold = [rng.randrange(hot_keys, sessions) for _ in range(ops)]
+
+    def get(i: int) -> None:
+        service.get_session(
+            app_name=APP_NAME, user_id=f"U{i}", session_id=f"session_U{i}"
+        )
+
+    def append(i: int) -> None:
+        session = service.get_session(
+            app_name=APP_NAME, user_id=f"U{i}", session_id=f"session_U{i}"
+        )
+        service.append_event(session, make_event(i))
+
+    # ホット層に載せるため、先に対象セッションを読み込んでおく
+    for i in range(hot_keys):
+        get(i)
+
+    return {
+        "get (hot)": measure(get, hot),
+        "get (cold)": measure(get, cold),
+        "get+append": measure(append, hot),
+    }
+
+
+def main(sessions: int, events: int, ops: int, hot_cache_size: int) -> None:
+    """ベンチマークを実行して結果を表示"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_service = SQLiteSessionService(
+            os.path.join(tmp_dir, "sessions.db"), hot_cache_size=hot_cache_size
+        )
+        services = {
+            "InMemorySessionService": InMemorySessionService(),
+            "SQLiteSessionService": sqlite_service,
+        }
+
+        print(
+            f"sessions={sessions} events/session={events} ops={ops} "
+            f"hot_cache_size={hot_cache_size}"
+        )
+        for label, service in services.items():
+            started_at = time.perf_counter()
+            populate(service, sessions, events)
+            populate_seconds = time.perf_counter() - started_at
+
+            results = run(service, sessions, ops, min(hot_cache_size, sessions))
+            print(f"{label} (populate {populate_seconds:.1f}s)")
+            for name, result in results.items():
+                print(
+                    f"  {name:<12} p50={result['p50'] * 1000:7.3f}ms "
+                    f"p99={result['p99'] * 1000:7.3f}ms"
+                )
+
+        size = os.path.getsize(os.path.join(tmp_dir, "sessions.db"))
+        print(f"SQLite file size: {size / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--hot-cache-size", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.sessions, args.events, args.ops, args.hot_cache_size)
@@ -21,6 +21,106 @@ NOTION_HTTP_URL = os.getenv("NOTION_HTTP_URL", "http://localhost:3001")
 MCP_ENABLED = os.getenv("MCP_ENABLED", "true").lower() == "true"
 MCP_TIMEOUT_SECONDS = int(os.getenv("MCP_TIMEOUT_SECONDS", "10"))
 
+# MCPサーバーの死活監視（確認間隔・1回の確認のタイムアウト・保持する確認履歴数）
+MCP_HEALTH_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "30"))
+MCP_HEALTH_TIMEOUT_SECONDS = float(os.getenv("MCP_HEALTH_TIMEOUT_SECONDS", "3"))
+MCP_HEALTH_HISTORY_SIZE = int(os.getenv("MCP_HEALTH_HISTORY_SIZE", "20"))
+
+# MCPサーバーとの接続の管理（ツール呼び出しのタイムアウト・再接続の待ち時間・
+# サーキットブレーカーが開くまでの連続失敗回数と、開いている秒数）
+MCP_CALL_TIMEOUT_SECONDS = float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "60"))
+MCP_RECONNECT_BASE_DELAY_SECONDS = float(
+    os.getenv("MCP_RECONNECT_BASE_DELAY_SECONDS", "1")
+)
+MCP_RECONNECT_MAX_DELAY_SECONDS = float(
+    os.getenv("MCP_RECONNECT_MAX_DELAY_SECONDS", "30")
+)
+MCP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("MCP_CIRCUIT_FAILURE_THRESHOLD", "3"))
+MCP_CIRCUIT_RESET_SECONDS = float(os.getenv("MCP_CIRCUIT_RESET_SECONDS", "30"))
+
+# MCPツールのスキーマのキャッシュファイル（パス未指定時はキャッシュしない）
+MCP_SCHEMA_CACHE_PATH = os.getenv("MCP_SCHEMA_CACHE_PATH", "")
+
+# Webhook処理キューの設定
+DISPATCH_WORKER_COUNT = int(os.getenv("DISPATCH_WORKER_COUNT", "4"))
+DISPATCH_MAX_QUEUE_SIZE = int(os.getenv("DISPATCH_MAX_QUEUE_SIZE", "100"))
+DISPATCH_MAX_CONCURRENT_EVENTS = int(
+    os.getenv("DISPATCH_MAX_CONCURRENT_EVENTS", "8")
+)
+
+# Webhook重複排除の設定（DBパス未指定時はメモリのみ）
+WEBHOOK_DEDUP_TTL_SECONDS = int(os.getenv("WEBHOOK_DEDUP_TTL_SECONDS", "86400"))
+WEBHOOK_DEDUP_MAX_ENTRIES = int(os.getenv("WEBHOOK_DEDUP_MAX_ENTRIES", "10000"))
+WEBHOOK_DEDUP_DB_PATH = os.getenv("WEBHOOK_DEDUP_DB_PATH", "")
+
+# エージェントセッションの掃除設定（アイドルTTL・合計サイズ上限・実行間隔）
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+SESSION_MAX_TOTAL_BYTES = int(
+    os.getenv("SESSION_MAX_TOTAL_BYTES", str(256 * 1024 * 1024))
+)
+SESSION_SWEEP_INTERVAL_SECONDS = int(
+    os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60")
+)
+
+# セッションの保存先（memory / sqlite）とSQLiteバックエンドの設定
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_HOT_CACHE_SIZE = int(os.getenv("SESSION_HOT_CACHE_SIZE", "1000"))
+SESSION_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "1.0")
+)
+SESSION_FLUSH_BATCH_SIZE = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "100"))
+# 最終更新からSQLiteの行を削除するまでの秒数（0で無期限）
+SESSION_DB_TTL_SECONDS = int(
+    os.getenv("SESSION_DB_TTL_SECONDS", str(7 * 24 * 60 * 60))
+)
+
+# インスタンス間でセッションを共有するストアのURL（未指定時は共有しない）
+# SESSION_BACKEND が memory の場合のみ有効
+SESSION_SHARED_STORE_URL = os.getenv("SESSION_SHARED_STORE_URL", "")
+SESSION_SHARED_STORE_TIMEOUT_SECONDS = float(
+    os.getenv("SESSION_SHARED_STORE_TIMEOUT_SECONDS", "5")
+)
+
+# 会話履歴の圧縮設定（推定トークン数）
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "8000"))
+HISTORY_KEEP_RECENT_TOKENS = int(os.getenv("HISTORY_KEEP_RECENT_TOKENS", "4000"))
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "1000"))
+HISTORY_MAX_PART_TOKENS = int(os.getenv("HISTORY_MAX_PART_TOKENS", "2000"))
+
+# 1回のエージェント実行での入力トークン数の予算と、見積もりに使うエンコーディング
+MODEL_INPUT_TOKEN_BUDGET = int(os.getenv("MODEL_INPUT_TOKEN_BUDGET", "30000"))
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+# モデル呼び出しの再試行設定（指数バックオフの基準・上限と、プロセス全体の再試行予算）
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1.0"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "20"))
+RETRY_BUDGET_CAPACITY = float(os.getenv("RETRY_BUDGET_CAPACITY", "10"))
+RETRY_BUDGET_REFILL_PER_SECOND = float(
+    os.getenv("RETRY_BUDGET_REFILL_PER_SECOND", "0.5")
+)
+
+# モデルの障害時の代替モデルへの切り替え設定
+# （リクエスト内で切り替えるまでの失敗回数と、モデルごとのサーキットブレーカー）
+MODEL_FALLBACK_AFTER_FAILURES = int(os.getenv("MODEL_FALLBACK_AFTER_FAILURES", "2"))
+MODEL_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.getenv("MODEL_CIRCUIT_FAILURE_THRESHOLD", "5")
+)
+MODEL_CIRCUIT_RESET_SECONDS = float(os.getenv("MODEL_CIRCUIT_RESET_SECONDS", "30"))
+
+# モデル呼び出しの同時実行数の上限（AIMD で初期値から下限〜上限の範囲で調整）
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", "8"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "32"))
+
+# 画像のみ・URLのみのメッセージをルートエージェントを経由せずにパイプラインで実行するか
+INTENT_FAST_PATH_ENABLED = (
+    os.getenv("INTENT_FAST_PATH_ENABLED", "true").lower() == "true"
+)
+
+# LINEへの進捗通知方式（loading / push / off）
+LINE_PROGRESS_MODE = os.getenv("LINE_PROGRESS_MODE", "loading").lower()
+
 # 環境変数が設定されているか確認
 if not GOOGLE_API_KEY:
     print("Warning: GOOGLE_API_KEY environment variable is not set")
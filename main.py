@@ -11,18 +11,28 @@ from datetime import datetime
 import httpx
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import BackgroundTasks, FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from linebot.v3.webhooks import MessageEvent
 
 # 内部モジュールからのインポート
+from config import MCP_ENABLED, WEBHOOK_DEDUP_DB_PATH
 from src.services.agent_service_impl import (
     cleanup_resources,
     init_agent,
+    start_session_maintenance,
+    stop_session_maintenance,
 )
-from src.services.line_service import LineClient, LineEventHandler
-from src.tools.mcp_integration import check_mcp_server_health
+from src.services.dispatch_queue import EventDispatchQueue, QueueFullError
+from src.services.event_dispatcher import KeyedEventDispatcher
+from src.services.line_service import (
+    AsyncLineClient,
+    LineEventHandler,
+    WebhookEventDeduplicator,
+)
+from src.tools.mcp_health import mcp_health_monitor
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 # ロガーのセットアップ
 logger = setup_logger("main")
@@ -37,7 +47,7 @@ async def lifespan(app: FastAPI):
     # 起動時の処理
     logger.info("🚀 Starting application initialization")
 
-    cleanup_tasks = []
+    cleanup_tasks = [line_client.close, webhook_deduplicator.close]
 
     try:
         # エージェントの初期化
@@ -46,20 +56,33 @@ async def lifespan(app: FastAPI):
         cleanup_tasks.append(cleanup_resources)
         logger.info("✅ Agent initialization completed")
 
+        # 古いセッションの破棄と、永続化バックエンドへの書き込みを起動
+        start_session_maintenance()
+        cleanup_tasks.append(stop_session_maintenance)
+
+        # Webhook処理キューのワーカーを起動
+        dispatch_queue.start()
+        cleanup_tasks.append(dispatch_queue.stop)
+
         # ファイルシステム初期化はMCPサーバーが処理
         logger.info("Filesystem initialization handled by MCP server")
 
-        # Notion MCP サービスの初期化とヘルスチェック
-        logger.info("Checking MCP server health...")
-        try:
-            mcp_health = await check_mcp_server_health()
-            for server, is_healthy in mcp_health.items():
-                status = "✅ Online" if is_healthy else "❌ Offline"
-                logger.info(f"MCP Server ({server}): {status}")
-        except Exception as e:
-            logger.warning(f"MCP health check failed: {e}")
-            logger.info("Application will continue without MCP services")
-        logger.info("✅ MCP service check completed")
+        # MCPサーバーの死活を確認し、以降はバックグラウンドで定期的に確認
+        if MCP_ENABLED:
+            logger.info("Checking MCP server health...")
+            try:
+                mcp_health = await mcp_health_monitor.probe_all()
+                for server, is_healthy in mcp_health.items():
+                    status = "✅ Online" if is_healthy else "❌ Offline"
+                    logger.info(f"MCP Server ({server}): {status}")
+            except Exception as e:
+                logger.warning(f"MCP health check failed: {e}")
+                logger.info("Application will continue without MCP services")
+            mcp_health_monitor.start()
+            cleanup_tasks.append(mcp_health_monitor.stop)
+            logger.info("✅ MCP service check completed")
+        else:
+            logger.info("MCP is disabled by configuration")
 
         logger.info("🎉 Application startup completed successfully")
 
@@ -97,9 +120,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# LINEクライアントの準備
-line_client = LineClient()
-line_handler = LineEventHandler(line_client)
+# LINEクライアントの準備（HTTPセッションはアプリ全体で共有）
+line_client = AsyncLineClient()
+webhook_deduplicator = WebhookEventDeduplicator(
+    db_path=WEBHOOK_DEDUP_DB_PATH or None
+)
+line_handler = LineEventHandler(line_client, webhook_deduplicator)
+
+# Webhook処理キュー（同時実行数と滞留数を制限）
+dispatch_queue = EventDispatchQueue()
+
+# イベントディスパッチャー（ユーザー内は順序保証、ユーザー間は並行処理）
+event_dispatcher = KeyedEventDispatcher()
 
 
 async def process_events(body: str, signature: str) -> None:
@@ -113,25 +145,29 @@ async def process_events(body: str, signature: str) -> None:
     try:
         # イベントのパース
         events = line_client.parse_webhook_events(body, signature)
-        # 各イベントを処理
-        for event in events:
-            if isinstance(event, MessageEvent):
-                # メッセージイベントを非同期で処理
-                await line_handler.handle_event(event)
+        # メッセージイベントを送信元ごとに振り分けて並行処理
+        message_events = [
+            event for event in events if isinstance(event, MessageEvent)
+        ]
+        await event_dispatcher.dispatch_all(
+            message_events, line_handler.handle_event
+        )
     except Exception as e:
         logger.exception(f"Error in process_events: {e}")
 
 
 @app.post("/callback")
-async def callback(request: Request, background_tasks: BackgroundTasks):
+async def callback(request: Request):
     """LINE Webhookハンドラー
 
     Args:
         request: FastAPIリクエストオブジェクト
-        background_tasks: バックグラウンドタスク
 
     Returns:
         str: 応答メッセージ
+
+    Raises:
+        HTTPException: 処理キューが満杯の場合（503）
     """
     # X-Line-Signatureヘッダー値を取得
     signature = request.headers.get("X-Line-Signature", "")
@@ -141,8 +177,12 @@ async def callback(request: Request, background_tasks: BackgroundTasks):
     body_text = body.decode("utf-8")
     logger.info(f"Request body: {body_text}")
 
-    # バックグラウンドタスクでWebhookボディを処理
-    background_tasks.add_task(process_events, body_text, signature)
+    # 処理キューに積んでワーカーでWebhookボディを処理
+    try:
+        dispatch_queue.submit(process_events, body_text, signature)
+    except QueueFullError:
+        # 過負荷時は503を返してLINE側の再送に任せる
+        raise HTTPException(status_code=503, detail="Server is busy")
 
     return "OK"
 
@@ -155,14 +195,9 @@ async def health_check():
         dict: ステータス情報
     """
     try:
-        # MCPサーバーのヘルスチェック（FilesystemとNotion統合）
-        try:
-            mcp_health = await check_mcp_server_health()
-            filesystem_ok = mcp_health.get("filesystem", False)
-        except Exception as e:
-            logger.warning(f"MCP health check failed in endpoint: {e}")
-            mcp_health = {"filesystem": False, "notion": False}
-            filesystem_ok = False
+        # MCPサーバーの状態はバックグラウンドの死活監視の結果から取得
+        mcp_health = mcp_health_monitor.status()
+        filesystem_ok = mcp_health.get("filesystem", False)
 
         all_services_ok = filesystem_ok and all(mcp_health.values())
         status = "ok" if all_services_ok else "degraded"
@@ -177,11 +212,22 @@ async def health_check():
         return {
             "status": status,
             "services": services_status,
+            "mcp_probes": mcp_health_monitor.snapshot(),
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "error", "error": str(e)}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """アプリケーション内メトリクスを返すエンドポイント
+
+    Returns:
+        dict: counters / gauges / timings を含むメトリクス
+    """
+    return metrics.snapshot()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
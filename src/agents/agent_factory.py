@@ -5,18 +5,24 @@
 メインコードから分離します。
 """
 
+import asyncio
+import inspect
+import time
+import traceback
 from contextlib import AsyncExitStack
-from typing import Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from google.adk.agents import Agent, SequentialAgent
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools import agent_tool, google_search
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
 
+from src.agents.prompt_manager import PromptManager
 from src.tools.calculator_tools import calculator_tools_list
-from src.tools.mcp_integration import get_tools_async
+from src.tools.mcp_connection_manager import get_managed_tools_async
 from src.tools.web_tools import fetch_web_content
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 # ロガー
 logger = setup_logger("agent_factory")
@@ -28,31 +34,49 @@ class AgentFactory:
     各種エージェントの生成ロジックをカプセル化して提供します。
     """
 
-    def __init__(self, prompts: Dict[str, str], config: Dict):
+    def __init__(
+        self,
+        prompts: Dict[str, str],
+        config: Dict,
+        prompt_manager: Optional[PromptManager] = None,
+    ):
         self.prompts = prompts
         self.config = config
+        # 変数置換済みプロンプトの取得に使うプロンプトマネージャー（全エージェントで共有）
+        self.prompt_manager = prompt_manager or PromptManager()
         self.notion_mcp_tools: Optional[MCPToolset] = None
         self.filesystem_mcp_tools: Optional[MCPToolset] = None
         self.exit_stack = AsyncExitStack()
         self._mcp_tools_initialized = False
+        self._mcp_tools_lock = asyncio.Lock()
+        # 作成済み（作成中）のパイプライン
+        self._pipelines: Dict[str, asyncio.Task] = {}
+        # 直近の create_all_standard_agents でのエージェントごとの作成時間（秒）
+        self.build_report: Dict[str, float] = {}
 
     async def _initialize_mcp_tools(self) -> None:
-        """MCPツールを一括初期化する"""
-        if self._mcp_tools_initialized:
-            return
+        """MCPツールを一括初期化する
 
-        try:
-            (
-                self.filesystem_mcp_tools,
-                self.notion_mcp_tools,
-                self.exit_stack,
-            ) = await get_tools_async()
-            self._mcp_tools_initialized = True
-            logger.info("MCP tools initialized successfully")
-        except Exception as e:
-            logger.warning(f"Failed to initialize MCP tools: {e}")
-            logger.warning("Application will continue without MCP tools")
-            self._mcp_tools_initialized = True  # エラーでも初期化済みとする
+        ツールは MCPConnectionManager が管理し、MCPサーバーとの接続が切れても
+        同じツールのまま再接続後の接続で呼び出されます。
+        エージェントを並行して作成するため、初期化は1回だけ行います。
+        """
+        async with self._mcp_tools_lock:
+            if self._mcp_tools_initialized:
+                return
+
+            try:
+                (
+                    self.filesystem_mcp_tools,
+                    self.notion_mcp_tools,
+                    self.exit_stack,
+                ) = await get_managed_tools_async()
+                self._mcp_tools_initialized = True
+                logger.info("MCP tools initialized successfully")
+            except Exception as e:
+                logger.warning(f"Failed to initialize MCP tools: {e}")
+                logger.warning("Application will continue without MCP tools")
+                self._mcp_tools_initialized = True  # エラーでも初期化済みとする
 
     async def get_notion_mcp_tools_async(self) -> Optional[MCPToolset]:
         """Notion MCP Serverからツールを取得する（非同期版）
@@ -214,7 +238,33 @@ class AgentFactory:
             tools=mcp_tools,
         )
 
+    async def _get_pipeline(
+        self, key: str, build: Callable[[], Awaitable[SequentialAgent]]
+    ) -> SequentialAgent:
+        """パイプラインを1回だけ作成し、以降は同じインスタンスを返す
+
+        作成中に呼び出された場合は、同じ作成の完了を待ちます。
+        作成に失敗した場合は、同じ例外を送出します。
+
+        Args:
+            key: パイプラインの識別子
+            build: パイプラインを作成する関数
+
+        Returns:
+            SequentialAgent: パイプライン
+        """
+        if key not in self._pipelines:
+            self._pipelines[key] = asyncio.ensure_future(build())
+        return await asyncio.shield(self._pipelines[key])
+
     async def create_url_recipe_pipeline(self) -> SequentialAgent:
+        """URLレシピ抽出パイプラインを取得（初回のみ作成）
+
+        ワークフローエージェントと直接実行用のエントリーは、同じパイプラインを使います。
+        """
+        return await self._get_pipeline("url_recipe", self._build_url_recipe_pipeline)
+
+    async def _build_url_recipe_pipeline(self) -> SequentialAgent:
         """URLレシピ抽出パイプラインを作成"""
         url_cfg = self.config["url_recipe"]
         extract_cfg = url_cfg["extraction_agent"]
@@ -247,9 +297,6 @@ class AgentFactory:
         )
 
         # 3. Notion Registration Agent
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
         reg_vars = register_cfg.get("variables", {})
         if (
             "recipe_database_id" not in reg_vars
@@ -259,7 +306,7 @@ class AgentFactory:
                 "registration_agent.variables['recipe_database_id'] "
                 "が未設定です。config.pyを確認してください。"
             )
-        register_instruction = prompt_manager.get_prompt(
+        register_instruction = self.prompt_manager.get_prompt(
             register_cfg["prompt_key"], reg_vars
         )
 
@@ -302,6 +349,15 @@ class AgentFactory:
         )
 
     async def create_image_recipe_pipeline(self) -> SequentialAgent:
+        """画像レシピ抽出パイプラインを取得（初回のみ作成）
+
+        ワークフローエージェントと直接実行用のエントリーは、同じパイプラインを使います。
+        """
+        return await self._get_pipeline(
+            "image_recipe", self._build_image_recipe_pipeline
+        )
+
+    async def _build_image_recipe_pipeline(self) -> SequentialAgent:
         """画像レシピ抽出パイプラインを作成"""
         # 設定を取得
         img_cfg = self.config["image_recipe"]
@@ -311,10 +367,7 @@ class AgentFactory:
         pipe_cfg = img_cfg["pipeline"]
 
         # 1. Image Analysis Agent
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
-        analysis_prompt = prompt_manager.get_prompt(
+        analysis_prompt = self.prompt_manager.get_prompt(
             analysis_cfg["prompt_key"], analysis_cfg.get("variables", {})
         )
 
@@ -328,7 +381,7 @@ class AgentFactory:
         )
 
         # 2. Image Data Enhancement Agent
-        enhancement_prompt = prompt_manager.get_prompt(
+        enhancement_prompt = self.prompt_manager.get_prompt(
             enhance_cfg["prompt_key"], enhance_cfg.get("variables", {})
         )
         enhancement_prompt = enhancement_prompt.replace(
@@ -345,9 +398,6 @@ class AgentFactory:
         )
 
         # 3. Recipe Notion Agent - MCP ツール対応
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
         reg_vars = register_cfg.get("variables", {})
         if (
             "recipe_database_id" not in reg_vars
@@ -362,7 +412,7 @@ class AgentFactory:
                     )
                 )
             )
-        register_instruction = prompt_manager.get_prompt(
+        register_instruction = self.prompt_manager.get_prompt(
             register_cfg["prompt_key"], reg_vars
         )
         mcp_tools = await self.get_notion_mcp_tools_async()
@@ -442,10 +492,7 @@ class AgentFactory:
         cfg = self.config["url_recipe"]["workflow_agent"]
 
         # PromptManagerを使用して変数置換済みプロンプトを取得
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
-        instruction = prompt_manager.get_prompt(
+        instruction = self.prompt_manager.get_prompt(
             cfg["prompt_key"], cfg.get("variables", {})
         )
 
@@ -463,10 +510,7 @@ class AgentFactory:
         cfg = self.config["image_recipe"]["workflow_agent"]
 
         # PromptManagerを使用して変数置換済みプロンプトを取得
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
-        instruction = prompt_manager.get_prompt(
+        instruction = self.prompt_manager.get_prompt(
             cfg["prompt_key"], cfg.get("variables", {})
         )
 
@@ -478,106 +522,95 @@ class AgentFactory:
             sub_agents=[image_recipe_pipeline],
         )
 
-    async def create_all_standard_agents(self) -> Dict[str, Agent]:
-        """すべての標準エージェントを一括で作成"""
-        logger.info("すべての標準エージェントを作成します")
-
-        agents = {}
-
-        # 各エージェントを作成（失敗しても他のエージェントは作成を続行）
-        try:
-            agents["calc_agent"] = self.create_calculator_agent()
-            logger.info("✅ Calculator agent created")
-        except Exception as e:
-            logger.warning(f"Calculator agent creation failed: {e}")
-
-        try:
-            agents["google_search_agent"] = self.create_google_search_agent()
-            logger.info("✅ Google search agent created")
-        except Exception as e:
-            logger.warning(f"Google search agent creation failed: {e}")
-
-        try:
-            agents["vision_agent"] = self.create_vision_agent()
-            logger.info("✅ Vision agent created")
-        except Exception as e:
-            logger.warning(f"Vision agent creation failed: {e}")
-
-        # MCP依存のエージェントは慎重に作成
-        try:
-            agents["notion_agent"] = await self.create_notion_agent()
-            logger.info("✅ Notion agent created")
-        except Exception as e:
-            import traceback
-
-            logger.warning(f"Notion agent creation failed: {e}")
-            logger.warning(f"Detailed error: {traceback.format_exc()}")
-
-        try:
-            agents["filesystem_agent"] = await self.create_filesystem_agent()
-            logger.info("✅ Filesystem agent created")
-        except Exception as e:
-            import traceback
-
-            logger.warning(f"Filesystem agent creation failed: {e}")
-            logger.warning(f"Detailed error: {traceback.format_exc()}")
-
-        try:
-            agents["url_recipe_workflow_agent"] = (
-                await self.create_url_recipe_workflow_agent()
-            )
-            logger.info("✅ URL recipe workflow agent created")
-        except Exception as e:
-            import traceback
-
-            logger.warning(f"URL recipe workflow agent creation failed: {e}")
-            logger.warning(f"Detailed error: {traceback.format_exc()}")
+    def _standard_agent_builders(
+        self,
+    ) -> List[Tuple[str, Callable[[], Any]]]:
+        """標準エージェントの名前と作成関数の一覧（作成結果の辞書もこの順序）"""
+        return [
+            ("calc_agent", self.create_calculator_agent),
+            ("google_search_agent", self.create_google_search_agent),
+            ("vision_agent", self.create_vision_agent),
+            ("notion_agent", self.create_notion_agent),
+            ("filesystem_agent", self.create_filesystem_agent),
+            ("url_recipe_workflow_agent", self.create_url_recipe_workflow_agent),
+            ("image_recipe_workflow_agent", self.create_image_recipe_workflow_agent),
+            # パイプラインを直接利用可能にする（ワークフローエージェントと同じインスタンス）
+            ("RecipeExtractionPipeline", self.create_url_recipe_pipeline),
+            ("ImageRecipeExtractionPipeline", self.create_image_recipe_pipeline),
+        ]
+
+    async def _build_timed(
+        self, name: str, build: Callable[[], Any]
+    ) -> Tuple[Optional[Agent], float]:
+        """エージェントを作成し、作成にかかった時間を計測する
+
+        失敗しても例外は送出せず、ログに記録して None を返します。
 
+        Returns:
+            Tuple[Optional[Agent], float]: (エージェント, 作成時間（秒）)
+        """
+        started_at = time.perf_counter()
         try:
-            agents["image_recipe_workflow_agent"] = (
-                await self.create_image_recipe_workflow_agent()
-            )
-            logger.info("✅ Image recipe workflow agent created")
+            agent = build()
+            if inspect.isawaitable(agent):
+                agent = await agent
+            logger.info(f"✅ {name} created")
         except Exception as e:
-            import traceback
-
-            logger.warning(f"Image recipe workflow agent creation failed: {e}")
+            agent = None
+            logger.warning(f"{name} creation failed: {e}")
             logger.warning(f"Detailed error: {traceback.format_exc()}")
+        elapsed = time.perf_counter() - started_at
+        metrics.observe(f"agent_factory.build_seconds.{name}", elapsed)
+        return agent, elapsed
 
-        # パイプラインを直接利用可能にする
-        try:
-            agents["RecipeExtractionPipeline"] = (
-                await self.create_url_recipe_pipeline()
-            )
-            logger.info("✅ RecipeExtractionPipeline created")
-        except Exception as e:
-            logger.warning(f"RecipeExtractionPipeline creation failed: {e}")
+    async def create_all_standard_agents(self) -> Dict[str, Agent]:
+        """すべての標準エージェントを一括で作成
 
-        try:
-            agents["ImageRecipeExtractionPipeline"] = (
-                await self.create_image_recipe_pipeline()
-            )
-            logger.info("✅ ImageRecipeExtractionPipeline created")
-        except Exception as e:
-            import traceback
+        互いに依存しないエージェントは並行して作成します（失敗しても他のエージェントは
+        作成を続行）。MCPツールの初期化とパイプラインの作成は1回だけ行い、共有します。
+        エージェントごとの作成時間は build_report に保持し、ログに出力します。
+        """
+        logger.info("すべての標準エージェントを作成します")
 
-            logger.warning(
-                f"ImageRecipeExtractionPipeline creation failed: {e}"
-            )
-            logger.warning(f"Detailed error: {traceback.format_exc()}")
+        builders = self._standard_agent_builders()
+        started_at = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._build_timed(name, build) for name, build in builders)
+        )
+        total = time.perf_counter() - started_at
 
+        agents = {}
+        self.build_report = {}
+        for (name, _), (agent, elapsed) in zip(builders, results):
+            self.build_report[name] = elapsed
+            if agent is not None:
+                agents[name] = agent
+
+        metrics.observe("agent_factory.build_total_seconds", total)
+        self._log_build_report(total)
         logger.info(f"Created {len(agents)} agents successfully")
         return agents
 
+    def _log_build_report(self, total: float) -> None:
+        """エージェントごとの作成時間を、時間のかかった順にログに出力"""
+        lines = [
+            f"  {name:<32} {elapsed * 1000:9.1f} ms"
+            for name, elapsed in sorted(
+                self.build_report.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+        # 並行して作成するため、各エージェントの時間には他の作成を待った時間も含まれる
+        logger.info(
+            f"Agent build report (wall time {total * 1000:.1f} ms):\n"
+            + "\n".join(lines)
+        )
+
     def create_root_agent(self, sub_agents: Dict[str, Agent]) -> LlmAgent:
         """ルートエージェントを作成"""
         cfg = self.config["root"]
 
         # PromptManagerを使用して変数置換済みプロンプトを取得
-        from src.agents.prompt_manager import PromptManager
-
-        prompt_manager = PromptManager()
-        instruction = prompt_manager.get_prompt(
+        instruction = self.prompt_manager.get_prompt(
             cfg["prompt_key"], cfg.get("variables", {})
         )
 
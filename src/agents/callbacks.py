@@ -0,0 +1,73 @@
+"""モデル呼び出しのコールバック登録モジュール
+
+このモジュールは、作成済みのエージェントツリーのすべてのLLMエージェントに
+ADK の before_model_callback / after_model_callback を追加する仕組みを提供します。
+各エージェントの作成処理を変更せずに、モデル呼び出しの前後の処理を差し込めます。
+"""
+
+from typing import Any, Callable, List
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("agent_callbacks")
+
+
+def _as_list(value: Any) -> List[Any]:
+    """リスト・タプル以外（未設定・モックなど）は空リストとして扱う"""
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+
+def _append_callback(existing: Any, callback: Callable) -> Any:
+    """既存のコールバックを残したままコールバックを追加"""
+    if not existing:
+        return callback
+    callbacks = list(existing) if isinstance(existing, list) else [existing]
+    if callback not in callbacks:
+        callbacks.append(callback)
+    return callbacks
+
+
+def install_model_callbacks(
+    agent: Any,
+    before_model_callback: Callable,
+    after_model_callback: Callable,
+) -> int:
+    """エージェントツリーのすべてのLLMエージェントにコールバックを追加
+
+    サブエージェントと AgentTool のエージェントもたどります。
+    同じコールバックは重複して追加しません。
+
+    Args:
+        agent: ルートエージェント
+        before_model_callback: モデル呼び出し前のコールバック
+        after_model_callback: モデル応答後のコールバック
+
+    Returns:
+        int: コールバックを追加したエージェント数
+    """
+    installed = 0
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        if isinstance(getattr(current, "model", None), str):
+            current.before_model_callback = _append_callback(
+                current.before_model_callback, before_model_callback
+            )
+            current.after_model_callback = _append_callback(
+                current.after_model_callback, after_model_callback
+            )
+            installed += 1
+
+        for child in _as_list(getattr(current, "sub_agents", None)):
+            stack.append(child)
+        for tool in _as_list(getattr(current, "tools", None)):
+            tool_agent = getattr(tool, "agent", None)
+            if tool_agent is not None:
+                stack.append(tool_agent)
+
+    return installed
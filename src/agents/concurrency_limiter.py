@@ -0,0 +1,232 @@
+"""モデル呼び出しの同時実行数制限モジュール
+
+このモジュールは、インスタンスからモデルへの同時呼び出し数を適応的に制限する仕組みを
+提供します。AIMD（加算増加・乗算減少）で上限を調整し、成功が続けば上限を少しずつ上げ、
+レート制限・サーバーエラーが返れば上限を半分に下げます。
+
+ADK の before_model_callback で枠を取得し、after_model_callback で返却します。
+モデル呼び出しが例外で終わった場合は after_model_callback が呼ばれないため、
+リクエストの終了時（AgentService）に残った枠を返却します。
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Iterator, List, Optional
+
+from config import (
+    LLM_CONCURRENCY_INITIAL,
+    LLM_CONCURRENCY_MAX,
+    LLM_CONCURRENCY_MIN,
+)
+from src.agents.callbacks import install_model_callbacks
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("concurrency_limiter")
+
+# 上限を下げた後、次に下げるまでの秒数（同じ障害での連続した減少を防ぐ）
+DECREASE_COOLDOWN_SECONDS = 1.0
+
+# 上限を下げる比率
+DECREASE_FACTOR = 0.5
+
+# 過負荷とみなすモデル応答のエラーコード
+OVERLOAD_ERROR_CODES = frozenset(
+    {"429", "500", "503", "RESOURCE_EXHAUSTED", "INTERNAL", "UNAVAILABLE"}
+)
+
+# 実行中のリクエストが保持している枠の数
+_held_slots: ContextVar[Optional[List[int]]] = ContextVar(
+    "llm_held_slots", default=None
+)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD で上限を調整するモデル呼び出しの同時実行数制限
+
+    成功するたびに上限を 1/上限 ずつ上げ（上限分の成功でおよそ1増える）、
+    過負荷の応答では上限を DECREASE_FACTOR 倍に下げます。
+    待機中の呼び出しは到着順に枠を取得します。
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = LLM_CONCURRENCY_INITIAL,
+        min_limit: float = LLM_CONCURRENCY_MIN,
+        max_limit: float = LLM_CONCURRENCY_MAX,
+        decrease_factor: float = DECREASE_FACTOR,
+        decrease_cooldown: float = DECREASE_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初期化
+
+        Args:
+            initial_limit: 最初の上限
+            min_limit: 上限の下限
+            max_limit: 上限の上限
+            decrease_factor: 過負荷時に上限に掛ける比率
+            decrease_cooldown: 上限を下げてから次に下げるまでの秒数
+            clock: 現在時刻（秒）を返す関数
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self._clock = clock
+        self._limit = min(max(initial_limit, min_limit), max_limit)
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease: Optional[float] = None
+        self._export()
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限"""
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        """実行中の呼び出し数"""
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """枠を待っている呼び出し数"""
+        return len(self._waiters)
+
+    def _export(self) -> None:
+        """現在の状態をメトリクスに記録"""
+        metrics.set_gauge("llm_concurrency.limit", self._limit)
+        metrics.set_gauge("llm_concurrency.in_flight", self._in_flight)
+        metrics.set_gauge("llm_concurrency.waiting", len(self._waiters))
+
+    def _wake_waiters(self) -> None:
+        """空いた枠の数だけ、待機中の呼び出しを到着順に起こす"""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # 起こす時点で枠を確保し、他の呼び出しに割り込まれないようにする
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        """枠を1つ取得（空きがなければ待機）"""
+        started_at = self._clock()
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._export()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # 枠を確保した直後に取り消された場合は返却する
+                    self._in_flight -= 1
+                    self._wake_waiters()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._export()
+                raise
+        metrics.observe("llm_concurrency.wait_seconds", self._clock() - started_at)
+        self._export()
+
+    def release(self, overloaded: Optional[bool] = False) -> None:
+        """枠を1つ返却し、結果に応じて上限を調整
+
+        Args:
+            overloaded: 過負荷の応答ならTrue、成功ならFalse、
+                結果が不明（取り消しなど）で上限を変えない場合はNone
+        """
+        self._in_flight = max(self._in_flight - 1, 0)
+        if overloaded:
+            self._decrease()
+        elif overloaded is not None:
+            self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+        self._wake_waiters()
+        self._export()
+
+    def _decrease(self) -> None:
+        """上限を乗算的に下げる（冷却時間内の連続した減少は無視）"""
+        now = self._clock()
+        if (
+            self._last_decrease is not None
+            and now - self._last_decrease < self.decrease_cooldown
+        ):
+            return
+        self._last_decrease = now
+        previous = self._limit
+        self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+        metrics.increment("llm_concurrency.decreases")
+        logger.warning(
+            f"LLM concurrency limit decreased: {previous:.1f} -> {self._limit:.1f}"
+        )
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        """1リクエストの間、取得した枠を記録し、終了時に残った枠を返却する"""
+        held: List[int] = []
+        token = _held_slots.set(held)
+        try:
+            yield
+        finally:
+            _held_slots.reset(token)
+            for _ in held:
+                self.release(None)
+
+    def release_pending(self, overloaded: bool) -> None:
+        """モデル呼び出しが例外で終わり、返却されていない枠を返却する
+
+        過負荷による失敗なら上限を下げ、それ以外の失敗では上限を変えません。
+
+        Args:
+            overloaded: 過負荷（レート制限・サーバーエラー）による失敗かどうか
+        """
+        held = _held_slots.get()
+        while held:
+            held.pop()
+            self.release(True if overloaded else None)
+
+    async def before_model_callback(
+        self, callback_context: Any, llm_request: Any
+    ) -> None:
+        """モデル呼び出し前に枠を取得する（ADK のコールバック）"""
+        held = _held_slots.get()
+        if held is None:
+            # AgentService のリクエスト外では返却を保証できないため制限しない
+            return None
+        await self.acquire()
+        held.append(1)
+        return None
+
+    def after_model_callback(self, callback_context: Any, llm_response: Any) -> None:
+        """モデルの応答を受け取ったら枠を返却する（ADK のコールバック）"""
+        held = _held_slots.get()
+        if held:
+            held.pop()
+            error_code = str(getattr(llm_response, "error_code", None) or "")
+            self.release(error_code.upper() in OVERLOAD_ERROR_CODES)
+        return None
+
+    def install(self, agent: Any) -> int:
+        """エージェントツリーのすべてのLLMエージェントにコールバックを追加
+
+        Args:
+            agent: ルートエージェント
+
+        Returns:
+            int: コールバックを追加したエージェント数
+        """
+        installed = install_model_callbacks(
+            agent, self.before_model_callback, self.after_model_callback
+        )
+        logger.info(f"LLM concurrency limiter installed on {installed} agents")
+        return installed
+
+
+# プロセス全体で共有するモデル呼び出しの同時実行数制限
+concurrency_limiter = AdaptiveConcurrencyLimiter()
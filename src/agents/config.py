@@ -9,6 +9,9 @@
 DEFAULT_MODEL = "gemini-2.5-flash-preview-05-20"
 SEARCH_MODEL = "gemini-2.0-flash"  # 検索用の軽量モデル
 
+# モデルの障害時に順に切り替える代替モデル（軽量モデルへ縮退）
+FALLBACK_MODELS = [SEARCH_MODEL]
+
 # 共通の設定値
 RECIPE_DATABASE_ID = "1f79a940-1325-80d9-93c6-c33da454f18f"
 REQUIRED_TOOLS = "notion_create_page_mcp"  # MCP Serverツールに変更
@@ -22,6 +25,7 @@ AGENT_CONFIG = {
     "root": {
         "name": "root_agent",
         "model": DEFAULT_MODEL,
+        "fallback_models": FALLBACK_MODELS,
         "prompt_key": "root",
         "description": "複数のサブエージェントを管理・調整するルートエージェント",
         # 変数を明示的に追加
@@ -42,17 +46,21 @@ AGENT_CONFIG = {
     "calculator": {
         "name": "calculator_agent",
         "model": DEFAULT_MODEL,
+        "fallback_models": FALLBACK_MODELS,
         "prompt_key": "calculator",
-        "description": "2つの数字を使って四則演算（足し算、引き算、掛け算、割り算）ができる計算エージェント",
+        "description": "四則演算（足し算、引き算、掛け算、割り算）や、括弧・べき乗を含む式の計算ができる計算エージェント",
         "variables": {
             "agent_name": "計算エージェント",
-            "available_functions": "add, subtract, multiply, divide",
+            "available_functions": (
+                "add, subtract, multiply, divide, evaluate_expression"
+            ),
         },
     },
     # ファイルシステムエージェント
     "filesystem": {
         "name": "filesystem_agent",
         "model": DEFAULT_MODEL,
+        "fallback_models": FALLBACK_MODELS,
         "prompt_key": "filesystem",
         "description": (
             "ファイルシステムの操作を行います。ファイルの作成、読み込み、"
@@ -69,6 +77,7 @@ AGENT_CONFIG = {
         "extraction_agent": {
             "name": "ContentExtractionAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "recipe_extraction",
             "description": "URLからレシピ情報を抽出します。",
             "output_key": "extracted_recipe_data",
@@ -79,6 +88,7 @@ AGENT_CONFIG = {
         "transformation_agent": {
             "name": "DataTransformationAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "data_transformation",
             "description": "抽出されたレシピデータをNotion DB形式に変換します。",
             "output_key": "notion_formatted_data",
@@ -89,6 +99,7 @@ AGENT_CONFIG = {
         "registration_agent": {
             "name": "NotionMCPRegistrationAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "recipe_notion",
             "description": (
                 "変換されたデータをNotion MCP Server経由でNotion データベースに登録します。"
@@ -104,6 +115,7 @@ AGENT_CONFIG = {
         "workflow_agent": {
             "name": "RecipeWorkflowAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "recipe_workflow",
             "description": "URLからのレシピ抽出・登録ワークフローの全体を管理します。",
             "variables": {
@@ -127,6 +139,7 @@ AGENT_CONFIG = {
         "analysis_agent": {
             "name": "ImageAnalysisAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "image_analysis",
             "description": "画像を分析してレシピ情報を抽出します。",
             "output_key": "extracted_image_data",
@@ -142,6 +155,7 @@ AGENT_CONFIG = {
         "enhancement_agent": {
             "name": "ImageDataEnhancementAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "image_data_enhancement",
             "description": "抽出された画像データを実用的なレシピに強化します。",
             "output_key": "enhanced_recipe_data",
@@ -157,6 +171,7 @@ AGENT_CONFIG = {
         "registration_agent": {
             "name": "RecipeNotionMCPAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "image_notion",
             "description": (
                 "強化されたレシピデータをNotion MCP Server経由で料理レシピデータベースに登録します。"
@@ -172,6 +187,7 @@ AGENT_CONFIG = {
         "workflow_agent": {
             "name": "ImageRecipeWorkflowAgent",
             "model": DEFAULT_MODEL,
+            "fallback_models": FALLBACK_MODELS,
             "prompt_key": "image_workflow",
             "description": "画像レシピ抽出・登録ワークフローの全体を管理します。",
             "variables": {
@@ -204,6 +220,7 @@ AGENT_CONFIG = {
     "notion": {
         "name": "NotionMCPAgent",
         "model": DEFAULT_MODEL,
+        "fallback_models": FALLBACK_MODELS,
         "prompt_key": "notion",
         "description": (
             "Notion MCP Serverを通じてNotionワークスペースの包括的な操作を行うエージェントです。"
@@ -223,6 +240,7 @@ AGENT_CONFIG = {
     "vision": {
         "name": "vision_agent",
         "model": DEFAULT_MODEL,
+        "fallback_models": FALLBACK_MODELS,
         "prompt_key": "vision",
         "description": (
             "画像を分析して詳細な情報を抽出します。料理写真、製品画像、"
@@ -0,0 +1,271 @@
+"""モデルのフォールバックモジュール
+
+このモジュールは、モデルの障害時にリクエストを代替モデルへ振り分ける仕組みを提供します。
+AGENT_CONFIG の各エージェントの "fallback_models" から順序付きの代替モデル一覧を作り、
+ADK の before_model_callback で呼び出し先のモデルをリクエストごとに切り替えます。
+
+- CircuitBreaker: モデルごとの障害の検知（失敗が続くと一定時間そのモデルを避ける。
+  src.utils.circuit_breaker のモデル用の設定）
+- ModelRoute: 1リクエスト内でのモデルの切り替え状況の記録
+- ModelRouter: 代替モデル一覧とサーキットブレーカーから呼び出し先のモデルを決める
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    MODEL_CIRCUIT_FAILURE_THRESHOLD,
+    MODEL_CIRCUIT_RESET_SECONDS,
+)
+from src.agents.callbacks import install_model_callbacks
+from src.agents.config import AGENT_CONFIG
+from src.utils.circuit_breaker import CircuitBreaker as BaseCircuitBreaker
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("model_fallback")
+
+
+class CircuitBreaker(BaseCircuitBreaker):
+    """モデルごとのサーキットブレーカー
+
+    再試行対象の失敗が連続して閾値に達すると開き、一定時間そのモデルを避けます。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = MODEL_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = MODEL_CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初期化
+
+        Args:
+            name: 対象のモデル名（ログ・メトリクス用）
+            failure_threshold: 開くまでの連続失敗回数
+            reset_seconds: 開いてから試しの呼び出しを許可するまでの秒数
+            clock: 現在時刻（秒）を返す関数
+        """
+        super().__init__(
+            name,
+            failure_threshold,
+            reset_seconds,
+            clock,
+            metric_prefix="model_fallback",
+        )
+
+
+@dataclass
+class ModelRoute:
+    """1リクエスト内でのモデルの切り替え状況
+
+    Attributes:
+        level: 代替モデル一覧のうち使用を開始する位置（0は本来のモデル）
+        failures: 再試行対象の失敗回数
+        current_model: 直近に呼び出したモデル
+        fallbacks: 代替モデルで呼び出した記録（エージェント名, 本来のモデル, 使用したモデル）
+    """
+
+    level: int = 0
+    failures: int = 0
+    current_model: Optional[str] = None
+    fallbacks: List[Tuple[str, str, str]] = field(default_factory=list)
+
+    @property
+    def degraded(self) -> bool:
+        """代替モデルを使用したかどうか"""
+        return bool(self.fallbacks)
+
+
+# 実行中のリクエストのモデルの切り替え状況
+_current_route: ContextVar[Optional[ModelRoute]] = ContextVar(
+    "model_route", default=None
+)
+
+
+def build_fallback_chains(config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """エージェント設定から、エージェント名ごとの順序付きモデル一覧を作成
+
+    Args:
+        config: AGENT_CONFIG と同じ形式のエージェント設定
+
+    Returns:
+        Dict[str, List[str]]: エージェント名と、本来のモデルから始まるモデル一覧
+    """
+    chains: Dict[str, List[str]] = {}
+
+    def visit(node: Any) -> None:
+        if not isinstance(node, dict):
+            return
+        if "name" in node and node.get("model"):
+            chain = [node["model"]]
+            for model in node.get("fallback_models", []):
+                if model not in chain:
+                    chain.append(model)
+            chains[node["name"]] = chain
+            return
+        for child in node.values():
+            visit(child)
+
+    visit(config)
+    return chains
+
+
+class ModelRouter:
+    """代替モデル一覧とサーキットブレーカーから呼び出し先のモデルを決めるクラス"""
+
+    def __init__(
+        self,
+        chains: Dict[str, List[str]],
+        failure_threshold: int = MODEL_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = MODEL_CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初期化
+
+        Args:
+            chains: エージェント名ごとの順序付きモデル一覧
+            failure_threshold: サーキットブレーカーが開くまでの連続失敗回数
+            reset_seconds: サーキットブレーカーが試しの呼び出しを許可するまでの秒数
+            clock: 現在時刻（秒）を返す関数
+        """
+        self.chains = chains
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """モデルのサーキットブレーカーを取得（初回は作成）"""
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    model, self.failure_threshold, self.reset_seconds, self._clock
+                )
+                self._breakers[model] = breaker
+            return breaker
+
+    @contextmanager
+    def request(self) -> Iterator[ModelRoute]:
+        """1リクエストの間、モデルの切り替え状況を記録する
+
+        Yields:
+            ModelRoute: このリクエストのモデルの切り替え状況
+        """
+        route = ModelRoute()
+        token = _current_route.set(route)
+        try:
+            yield route
+        finally:
+            _current_route.reset(token)
+            if route.degraded:
+                metrics.increment("model_fallback.degraded_requests")
+                logger.info(
+                    "Request served with fallback models: "
+                    + ", ".join(
+                        f"{agent} {primary} -> {used}"
+                        for agent, primary, used in route.fallbacks
+                    )
+                )
+
+    def select(self, agent_name: str, primary: str) -> str:
+        """エージェントの呼び出し先のモデルを決める
+
+        リクエストの切り替え位置から順に、サーキットブレーカーが許可する最初のモデルを
+        選びます。すべて許可されない場合は切り替え位置のモデルを使用します。
+
+        Args:
+            agent_name: エージェント名
+            primary: エージェント本来のモデル
+
+        Returns:
+            str: 呼び出し先のモデル
+        """
+        chain = self.chains.get(agent_name) or [primary]
+        route = _current_route.get()
+        start = min(route.level, len(chain) - 1) if route else 0
+        for model in chain[start:]:
+            if self.breaker(model).allow():
+                return model
+        return chain[start]
+
+    def escalate(self, route: ModelRoute) -> bool:
+        """リクエストの以降の呼び出しを次の代替モデルへ切り替える
+
+        Args:
+            route: 対象リクエストのモデルの切り替え状況
+
+        Returns:
+            bool: 切り替え先の代替モデルを持つエージェントがある場合True
+        """
+        route.level += 1
+        escalated = any(len(chain) > route.level for chain in self.chains.values())
+        if escalated:
+            metrics.increment("model_fallback.escalations")
+        return escalated
+
+    def record_failure(self, route: ModelRoute) -> None:
+        """直近に呼び出したモデルの再試行対象の失敗を記録
+
+        Args:
+            route: 対象リクエストのモデルの切り替え状況
+        """
+        route.failures += 1
+        if route.current_model:
+            self.breaker(route.current_model).record_failure()
+
+    def before_model_callback(self, callback_context: Any, llm_request: Any) -> None:
+        """モデル呼び出し前に呼び出し先のモデルを切り替える（ADK のコールバック）"""
+        primary = llm_request.model
+        if not primary:
+            return None
+        agent_name = callback_context.agent_name
+        model = self.select(agent_name, primary)
+        if model != primary:
+            llm_request.model = model
+            metrics.increment(f"model_fallback.routed.{model}")
+            logger.info(f"Routing {agent_name} from {primary} to {model}")
+
+        route = _current_route.get()
+        if route is not None:
+            route.current_model = model
+            if model != primary:
+                route.fallbacks.append((agent_name, primary, model))
+        return None
+
+    def after_model_callback(self, callback_context: Any, llm_response: Any) -> None:
+        """モデルの応答を受け取ったらサーキットブレーカーに成功を記録する"""
+        route = _current_route.get()
+        if (
+            route is not None
+            and route.current_model
+            and not getattr(llm_response, "error_code", None)
+        ):
+            self.breaker(route.current_model).record_success()
+        return None
+
+    def install(self, agent: Any) -> int:
+        """エージェントツリーのすべてのLLMエージェントにコールバックを追加
+
+        Args:
+            agent: ルートエージェント
+
+        Returns:
+            int: コールバックを追加したエージェント数
+        """
+        installed = install_model_callbacks(
+            agent, self.before_model_callback, self.after_model_callback
+        )
+        logger.info(f"Model fallback installed on {installed} agents")
+        return installed
+
+
+# プロセス全体で共有するモデルの振り分け（サーキットブレーカーも共有）
+model_router = ModelRouter(build_fallback_chains(AGENT_CONFIG))
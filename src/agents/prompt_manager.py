@@ -44,7 +44,7 @@ DEFAULT_VARIABLES = {
     "agent_name": "root_agent",
     "basic_principles": "ユーザーの質問に正確かつ丁寧に答えます。",
     "available_tools": "利用可能なツールを活用して最適な支援を提供します。",
-    "available_functions": "add, subtract, multiply, divide",
+    "available_functions": "add, subtract, multiply, divide, evaluate_expression",
     
     # Notion関連
     "recipe_database_id": "1f79a940-1325-80d9-93c6-c33da454f18f",
@@ -11,21 +11,28 @@ agent_factory.pyに分離されています。
 """
 
 from contextlib import AsyncExitStack
-from typing import Tuple
+from typing import Dict, Tuple
 
+from google.adk.agents import BaseAgent
 from google.adk.agents.llm_agent import LlmAgent
 
 from src.agents.agent_factory import AgentFactory
+from src.agents.concurrency_limiter import concurrency_limiter
 from src.agents.config import AGENT_CONFIG
+from src.agents.model_fallback import model_router
 from src.agents.prompt_manager import PromptManager
 from src.utils.logger import setup_logger
 
 # ロガーを設定
 logger = setup_logger("root_agent")
 
+# ルートエージェントを経由せずに直接実行できるパイプライン
+FAST_PATH_AGENT_NAMES = ("RecipeExtractionPipeline", "ImageRecipeExtractionPipeline")
+
 # グローバル変数
 _root_agent = None
 _exit_stack = AsyncExitStack()
+_fast_path_agents: Dict[str, BaseAgent] = {}
 
 
 async def create_agent() -> Tuple[LlmAgent, AsyncExitStack]:
@@ -34,7 +41,7 @@ async def create_agent() -> Tuple[LlmAgent, AsyncExitStack]:
     Returns:
         Tuple[LlmAgent, AsyncExitStack]: ルートエージェントとリソース管理用のexitスタック
     """
-    global _root_agent, _exit_stack
+    global _root_agent, _exit_stack, _fast_path_agents
 
     # すでに作成済みの場合はそれを返す
     if _root_agent is not None:
@@ -49,10 +56,22 @@ async def create_agent() -> Tuple[LlmAgent, AsyncExitStack]:
         prompts = prompt_manager.get_all_prompts()
 
         # ファクトリークラスを初期化してエージェントを作成
-        factory = AgentFactory(prompts, AGENT_CONFIG)
+        # （プロンプトマネージャーはファクトリーと共有し、プロンプトのキャッシュを再利用する）
+        factory = AgentFactory(prompts, AGENT_CONFIG, prompt_manager=prompt_manager)
         agents = await factory.create_all_standard_agents()
         _root_agent = factory.create_root_agent(agents)
 
+        # ルートエージェントのツリーに含まれない、直接実行用のパイプライン
+        _fast_path_agents = {
+            name: agents[name] for name in FAST_PATH_AGENT_NAMES if name in agents
+        }
+
+        # モデルの障害時に代替モデルへ切り替え、同時呼び出し数を制限するコールバックを追加
+        # （呼び出し先のモデルを決めてから枠を取得する順に登録）
+        for agent in [_root_agent, *_fast_path_agents.values()]:
+            model_router.install(agent)
+            concurrency_limiter.install(agent)
+
         # MCPリソースの管理をグローバルで保持
         _exit_stack = factory.exit_stack
 
@@ -63,3 +82,14 @@ async def create_agent() -> Tuple[LlmAgent, AsyncExitStack]:
         raise
 
     return _root_agent, _exit_stack
+
+
+def get_fast_path_agents() -> Dict[str, BaseAgent]:
+    """ルートエージェントを経由せずに直接実行できるパイプラインを取得
+
+    create_agent() の実行後に有効になります。
+
+    Returns:
+        Dict[str, BaseAgent]: パイプライン名とエージェント
+    """
+    return dict(_fast_path_agents)
@@ -13,18 +13,63 @@
 
 import asyncio
 import base64
-from typing import List, Optional, Tuple
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from google.adk.artifacts.in_memory_artifact_service import (
     InMemoryArtifactService,
 )
 from google.adk.events import Event
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions import (
+    BaseSessionService,
+    InMemorySessionService,
+    Session,
+)
 from google.genai import types
 
-from src.agents.root_agent import create_agent
+from config import (
+    INTENT_FAST_PATH_ENABLED,
+    MODEL_FALLBACK_AFTER_FAILURES,
+    SESSION_BACKEND,
+    SESSION_DB_PATH,
+    SESSION_SHARED_STORE_TIMEOUT_SECONDS,
+    SESSION_SHARED_STORE_URL,
+)
+from src.agents.concurrency_limiter import concurrency_limiter
+from src.agents.config import AGENT_CONFIG
+from src.agents.model_fallback import model_router
+from src.agents.root_agent import create_agent, get_fast_path_agents
+from src.services.history_compactor import HistoryCompactor
+from src.services.intent_router import (
+    ARITHMETIC_SKIPPED_LLM_CALLS,
+    SKIPPED_LLM_CALLS,
+    detect_fast_path,
+)
+from src.services.response_classifier import ResponseClassifier
+from src.services.retry_policy import ErrorKind, RetryPolicy, classify_error
+from src.services.session_sweeper import SessionSweeper
+from src.services.shared_session_store import (
+    HttpSessionStore,
+    SessionSynchronizer,
+    SharedSessionStore,
+)
+from src.services.token_budget import TokenBudget
+from src.tools.calculator_tools import evaluate_arithmetic
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 # ロガーを設定
 logger = setup_logger("agent_service")
@@ -80,15 +125,82 @@ INTERMEDIATE_PATTERNS = [
     "notion_formatted_data",
 ]
 
+# パイプラインの完了を示す状態キー（最後に実行されるサブエージェントの output_key）
+COMPLETION_STATE_KEYS = frozenset(
+    key
+    for key in (
+        AGENT_CONFIG["url_recipe"]["registration_agent"].get("output_key"),
+        AGENT_CONFIG["image_recipe"]["registration_agent"].get("output_key"),
+        AGENT_CONFIG["notion"].get("output_key"),
+    )
+    if key
+)
+
+# 判定用パターンから1度だけコンパイルした応答分類器
+RESPONSE_CLASSIFIER = ResponseClassifier(
+    INTERMEDIATE_PATTERNS, COMPLETION_INDICATORS, ERROR_INDICATORS
+)
+
+# 進捗通知の対象となるエージェントと、その完了時のメッセージ
+PROGRESS_MILESTONES = {
+    "ContentExtractionAgent": "レシピ情報を抽出しました",
+    "DataTransformationAgent": "Notion登録用にデータを整形しました",
+    "ImageAnalysisAgent": "画像からレシピ情報を読み取りました",
+    "ImageDataEnhancementAgent": "レシピ情報を補完しました",
+}
+
+# 進捗通知コールバック（エージェント名, 進捗メッセージ）
+ProgressCallback = Callable[[str, str], Awaitable[None]]
+
 # エージェント設定
 MIN_FINAL_RESPONSE_LENGTH = 50
 MIN_STEPS_FOR_SEQUENTIAL = 2
-MAX_SESSION_HISTORY_SIZE = 3  # セッション履歴の最大保持数
+SESSION_LOCK_IDLE_SECONDS = 600  # 未使用のセッションロックを破棄するまでの秒数
 
 # Gemini API エラー対処設定
-MAX_RETRY_ATTEMPTS = 3  # リトライ最大回数
-RETRY_DELAY_SECONDS = 2  # リトライ間隔（秒）
+MAX_RETRY_ATTEMPTS = 3  # リトライ最大回数（待機時間と再試行予算は RetryPolicy が管理）
 TOKEN_LIMIT_REDUCTION_RATIO = 0.8  # トークン制限エラー時の削減比率
+TOKEN_LIMIT_HISTORY_RATIO = 0.5  # トークン制限エラー時の履歴の圧縮比率
+
+
+def create_session_service(
+    backend: str = SESSION_BACKEND, db_path: str = SESSION_DB_PATH
+) -> BaseSessionService:
+    """設定に応じたセッションサービスを作成
+
+    Args:
+        backend: セッションの保存先（"memory" または "sqlite"）
+        db_path: SQLiteファイルのパス（sqlite の場合）
+
+    Returns:
+        BaseSessionService: セッションサービス
+    """
+    if backend == "sqlite":
+        from src.services.sqlite_session_service import SQLiteSessionService
+
+        return SQLiteSessionService(db_path)
+
+    if backend != "memory":
+        logger.warning(f"Unknown session backend '{backend}', using memory")
+    return InMemorySessionService()
+
+
+def create_shared_session_store(
+    url: str = SESSION_SHARED_STORE_URL,
+) -> Optional[SharedSessionStore]:
+    """設定に応じたインスタンス間共有ストアを作成
+
+    Args:
+        url: 共有ストアのURL（空の場合は共有しない）
+
+    Returns:
+        Optional[SharedSessionStore]: 共有ストア
+    """
+    if not url:
+        return None
+    return HttpSessionStore(
+        url, timeout_seconds=SESSION_SHARED_STORE_TIMEOUT_SECONDS
+    )
 
 
 class AgentService:
@@ -98,23 +210,71 @@ class AgentService:
     以前の複数クラスの機能をすべて統合した単一クラスです。
     """
 
-    def __init__(self):
-        """初期化"""
+    def __init__(
+        self,
+        session_service: Optional[BaseSessionService] = None,
+        shared_store: Optional[SharedSessionStore] = None,
+    ):
+        """初期化
+
+        Args:
+            session_service: セッションサービス（未指定時は SESSION_BACKEND に従って作成）
+            shared_store: インスタンス間共有ストア（未指定時は設定に従って作成）
+        """
         # サービス
-        self.session_service = InMemorySessionService()
+        # （SQLiteSessionService は保持数を __len__ で返すため、空でも真偽値で判定しない）
+        self.session_service = (
+            session_service
+            if session_service is not None
+            else create_session_service()
+        )
         self.artifacts_service = InMemoryArtifactService()
 
+        # インスタンス間でのセッション同期（共有ストア未設定時は無効）
+        self.session_sync = self._create_session_sync(shared_store)
+
         # エージェント関連
         self.root_agent = None
         self.exit_stack = None
         self.runner = None
+        # パイプラインを直接実行するランナー（パイプライン名ごと）
+        self.fast_path_runners: Dict[str, Runner] = {}
+
+        # 入力トークンの予算と、推定トークン数による会話履歴の圧縮
+        self.token_budget = TokenBudget()
+        self.history_compactor = HistoryCompactor(count_text=self.token_budget.count)
+
+        # エラーの分類・指数バックオフ・プロセス全体の再試行予算による再試行
+        self.retry_policy = RetryPolicy(max_attempts=MAX_RETRY_ATTEMPTS)
+
+        # モデルの障害時に代替モデルへ切り替える振り分け（プロセス全体で共有）
+        self.model_router = model_router
+
+        # モデル呼び出しの同時実行数の適応的な制限（プロセス全体で共有）
+        self.concurrency_limiter = concurrency_limiter
+
+        # セッションごとの実行ロック（同一セッションの実行を直列化）
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_lock_holders: Dict[str, int] = {}
+        self._session_lock_last_used: Dict[str, float] = {}
+
+        # アイドルTTLと合計サイズ上限によるセッション掃除
+        self.session_sweeper = SessionSweeper(
+            self.session_service,
+            self.artifacts_service,
+            APP_NAME,
+            is_busy=self.is_session_busy,
+        )
 
     async def init_agent(self) -> None:
         """エージェントを初期化（必要時のみ実行）"""
         if self.root_agent is None:
             try:
-                # エージェントとリソース管理スタックを生成
-                self.root_agent, self.exit_stack = await create_agent()
+                # エージェントとリソース管理スタックを生成し、並行して
+                # トークン数の見積もりに使うエンコーディングを読み込む
+                (self.root_agent, self.exit_stack), _ = await asyncio.gather(
+                    create_agent(), self.token_budget.preload()
+                )
 
                 # ランナーを初期化
                 self.runner = Runner(
@@ -124,6 +284,18 @@ class AgentService:
                     session_service=self.session_service,
                 )
 
+                # 意図が明らかなメッセージ用に、パイプラインごとのランナーを用意
+                if INTENT_FAST_PATH_ENABLED:
+                    self.fast_path_runners = {
+                        name: Runner(
+                            app_name=APP_NAME,
+                            agent=agent,
+                            artifact_service=self.artifacts_service,
+                            session_service=self.session_service,
+                        )
+                        for name, agent in get_fast_path_agents().items()
+                    }
+
                 logger.info("Agent initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize agent: {e}")
@@ -145,6 +317,7 @@ class AgentService:
             session_id = f"session_{user_id}"
 
         # 既存セッションを取得
+        await self._preload_session(user_id, session_id)
         session = self._get_session(user_id, session_id)
 
         if session is None:
@@ -156,29 +329,168 @@ class AgentService:
                 app_name=APP_NAME, user_id=user_id, session_id=session_id
             )
         else:
-            # セッション履歴のサイズをチェックして制限
-            self._limit_session_history(session)
+            # 履歴が推定トークン数の上限を超えていれば古いターンを要約
+            self._compact_session_history(user_id, session_id)
             logger.debug(f"Using existing session: {session_id}")
 
         return session_id
 
-    def _limit_session_history(self, session: Session) -> None:
-        """セッション履歴のサイズを制限
+    @asynccontextmanager
+    async def session_lock(self, session_id: str) -> AsyncIterator[None]:
+        """セッション単位の実行ロックを取得
+
+        同じセッションに対するエージェント実行が並行すると、
+        履歴や状態にイベントが混在するため、到着順に1件ずつ実行します。
 
         Args:
-            session: セッションオブジェクト
+            session_id: セッションID
         """
-        if session.history and len(session.history) > MAX_SESSION_HISTORY_SIZE:
-            # 古い履歴を削除（最新のものを保持）
-            session.history = session.history[-MAX_SESSION_HISTORY_SIZE:]
-            logger.info(
-                f"Session history limited to {MAX_SESSION_HISTORY_SIZE} items"
+        self._evict_idle_session_locks()
+
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+            metrics.set_gauge(
+                "agent_service.session_locks", len(self._session_locks)
             )
 
+        if lock.locked():
+            metrics.increment("agent_service.session_lock_contended")
+            logger.info(f"Waiting for running request on session: {session_id}")
+
+        self._session_lock_holders[session_id] = (
+            self._session_lock_holders.get(session_id, 0) + 1
+        )
+        wait_started = time.monotonic()
+        try:
+            async with lock:
+                metrics.observe(
+                    "agent_service.session_lock_wait_seconds",
+                    time.monotonic() - wait_started,
+                )
+                yield
+        finally:
+            self._session_lock_holders[session_id] -= 1
+            self._session_lock_last_used[session_id] = time.monotonic()
+
+    def is_session_busy(self, session_id: str) -> bool:
+        """セッションが実行中（またはロック待ち）かどうか
+
+        Args:
+            session_id: セッションID
+
+        Returns:
+            bool: 実行中であればTrue
+        """
+        return self._session_lock_holders.get(session_id, 0) > 0
+
+    def _evict_idle_session_locks(self) -> None:
+        """一定時間使われていないセッションロックを破棄"""
+        now = time.monotonic()
+        idle = [
+            session_id
+            for session_id, last_used in self._session_lock_last_used.items()
+            if self._session_lock_holders.get(session_id, 0) == 0
+            and now - last_used > SESSION_LOCK_IDLE_SECONDS
+        ]
+        for session_id in idle:
+            del self._session_locks[session_id]
+            del self._session_lock_holders[session_id]
+            del self._session_lock_last_used[session_id]
+
+        if idle:
+            metrics.increment("agent_service.session_lock_evictions", len(idle))
+            metrics.set_gauge(
+                "agent_service.session_locks", len(self._session_locks)
+            )
+
+    async def _preload_session(self, user_id: str, session_id: str) -> None:
+        """永続化バックエンドのセッションを、イベントループの外で読み込んでおく
+
+        SQLiteSessionService などの preload_session（コルーチン）を持つ場合のみ呼び出し、
+        続く同期的な取得がディスクを読まずに済むようにします。
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+        """
+        preload_session = getattr(self.session_service, "preload_session", None)
+        if not asyncio.iscoroutinefunction(preload_session):
+            return
+        try:
+            await preload_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+        except Exception as e:
+            logger.warning(f"Failed to preload session {session_id}: {e}")
+
+    def _get_stored_session(
+        self, user_id: str, session_id: str
+    ) -> Optional[Session]:
+        """セッションサービスが保持しているセッション本体を取得
+
+        get_session はコピーを返すため、履歴を書き換える場合はこちらを使用します。
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+
+        Returns:
+            Optional[Session]: 保持中のセッション（取得できない場合はNone）
+        """
+        get_stored_session = getattr(self.session_service, "get_stored_session", None)
+        if get_stored_session is not None:
+            return get_stored_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+
+        sessions = getattr(self.session_service, "sessions", None)
+        if not isinstance(sessions, dict):
+            return None
+        return sessions.get(APP_NAME, {}).get(user_id, {}).get(session_id)
+
+    def _compact_session_history(
+        self, user_id: str, session_id: str, max_tokens: Optional[int] = None
+    ) -> bool:
+        """保持中のセッションの履歴を推定トークン数に基づいて圧縮
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+            max_tokens: 今回だけ使う上限（未指定時は設定値）
+
+        Returns:
+            bool: 圧縮した場合はTrue
+        """
+        session = self._get_stored_session(user_id, session_id)
+        if session is None:
+            return False
+
+        event_count = len(getattr(session, "events", None) or [])
+        if not self.history_compactor.compact(session, max_tokens):
+            return False
+
+        # 永続化バックエンドには書き換えたことを伝える
+        mark_session_updated = getattr(
+            self.session_service, "mark_session_updated", None
+        )
+        if mark_session_updated is not None:
+            mark_session_updated(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+        if self.session_sync is not None:
+            self.session_sync.note_compacted(
+                user_id, session_id, event_count - len(session.events)
+            )
+        return True
+
     def _get_session(self, user_id: str, session_id: str) -> Optional[Session]:
         """セッションを取得（内部メソッド）"""
         try:
-            session = self.session_service.get_session(session_id)
+            session = self.session_service.get_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
             if session and session.user_id == user_id:
                 return session
         except Exception:
@@ -229,22 +541,7 @@ class AgentService:
         Returns:
             中間応答であればTrue、そうでなければFalse
         """
-        # JSON形式のみの応答は中間結果の可能性が高い
-        if response.strip().startswith(
-            "```json"
-        ) and response.strip().endswith("```"):
-            return True
-
-        # 特定のエージェント名パターンで中間応答を検出
-        for pattern in INTERMEDIATE_PATTERNS:
-            if pattern in response:
-                return True
-
-        # 短すぎる応答（JSON断片など）
-        if len(response.strip()) < 50 and "```" in response:
-            return True
-
-        return False
+        return RESPONSE_CLASSIFIER.classify(response).intermediate
 
     @staticmethod
     def is_completion_response(response: str) -> bool:
@@ -256,10 +553,29 @@ class AgentService:
         Returns:
             最終応答であればTrue、そうでなければFalse
         """
-        for indicator in COMPLETION_INDICATORS:
-            if indicator in response:
-                return True
-        return False
+        return RESPONSE_CLASSIFIER.classify(response).completion
+
+    @staticmethod
+    def get_completion_output(event: Event) -> Optional[str]:
+        """完了を示す状態キーが書き込まれたイベントから出力を取得
+
+        Args:
+            event: イベントオブジェクト
+
+        Returns:
+            完了を示す状態キーの値（書き込まれていない場合はNone）
+        """
+        state_delta = getattr(getattr(event, "actions", None), "state_delta", None)
+        if not isinstance(state_delta, dict):
+            return None
+
+        for key in COMPLETION_STATE_KEYS:
+            if key in state_delta:
+                value = state_delta[key]
+                if isinstance(value, str):
+                    return value
+                return json.dumps(value, ensure_ascii=False, default=str)
+        return None
 
     @staticmethod
     def log_function_calls(event: Event) -> None:
@@ -272,21 +588,51 @@ class AgentService:
             func_name = event.function_call.name
             logger.info(f"Function called: {func_name}")
 
+    @staticmethod
+    async def notify_progress(
+        event: Event,
+        progress_callback: Optional[ProgressCallback],
+        reported: Set[str],
+    ) -> None:
+        """ステップ完了の進捗を通知
+
+        進捗通知対象のエージェントがテキストを出力した時点で、
+        そのステップの完了として一度だけコールバックを呼び出します。
+
+        Args:
+            event: イベントオブジェクト
+            progress_callback: 進捗通知コールバック（未指定時は何もしない）
+            reported: 通知済みのエージェント名
+        """
+        if progress_callback is None:
+            return
+
+        author = getattr(event, "author", None)
+        if author not in PROGRESS_MILESTONES or author in reported:
+            return
+
+        parts = getattr(event.content, "parts", None)
+        if not parts or not getattr(parts[0], "text", None):
+            return
+
+        reported.add(author)
+        try:
+            await progress_callback(author, PROGRESS_MILESTONES[author])
+        except Exception as e:
+            # 進捗通知の失敗でエージェント処理を止めない
+            logger.warning(f"Progress callback failed for {author}: {e}")
+
     @staticmethod
     def is_gemini_500_error(error: Exception) -> bool:
-        """Gemini 500エラーかどうかを判定
+        """Gemini の一時的なサーバーエラー（5xx）かどうかを判定
 
         Args:
             error: 例外オブジェクト
 
         Returns:
-            Gemini 500エラーであればTrue
+            一時的なサーバーエラーであればTrue
         """
-        error_str = str(error).lower()
-        return (
-            "500" in error_str
-            and ("internal" in error_str or "gemini" in error_str)
-        ) or (hasattr(error, "code") and error.code == 500)
+        return classify_error(error) is ErrorKind.TRANSIENT
 
     @staticmethod
     def is_token_limit_error(error: Exception) -> bool:
@@ -298,15 +644,7 @@ class AgentService:
         Returns:
             トークン制限エラーであればTrue
         """
-        error_str = str(error).lower()
-        return (
-            "token" in error_str
-            and (
-                "limit" in error_str
-                or "length" in error_str
-                or "too long" in error_str
-            )
-        ) or ("input_token" in error_str)
+        return classify_error(error) is ErrorKind.TOKEN_LIMIT
 
     def _truncate_message_for_retry(
         self,
@@ -325,34 +663,57 @@ class AgentService:
         if len(message) <= 100:
             return message
 
-        target_length = int(len(message) * reduction_ratio)
-        truncated = message[:target_length]
-
-        # 文の途中で切れないように調整
-        last_period = truncated.rfind("。")
-        last_exclamation = truncated.rfind("！")
-        last_question = truncated.rfind("？")
-
-        cut_point = max(last_period, last_exclamation, last_question)
-        if cut_point > target_length * 0.7:  # 70%以上の位置で見つかった場合
-            truncated = truncated[: cut_point + 1]
-
+        max_tokens = int(self.token_budget.count(message) * reduction_ratio)
+        truncated = self.token_budget.fit_message(message, max_tokens)
         logger.info(
             f"Message truncated from {len(message)} to "
             f"{len(truncated)} characters"
         )
-        return truncated + "（メッセージが長すぎるため一部省略しました）"
+        return truncated
+
+    def _fit_request_to_budget(
+        self, message: str, user_id: str, session_id: str, has_image: bool = False
+    ) -> str:
+        """実行前に入力トークン数を見積もり、予算に収まるよう調整
 
-    def _reduce_session_history_for_retry(self, session: Session) -> None:
-        """セッション履歴を大幅に削減してリトライ用に調整
+        メッセージが大きすぎる場合は文の区切りで短縮し、
+        残りの予算を超える履歴は圧縮します。
 
         Args:
-            session: セッションオブジェクト
+            message: ユーザーからのメッセージ
+            user_id: ユーザーID
+            session_id: セッションID
+            has_image: 画像を含むかどうか
+
+        Returns:
+            str: 予算に収まるメッセージ
         """
-        if session.history and len(session.history) > 3:
-            # 最新の3つのみ保持
-            session.history = session.history[-3:]
-            logger.info("Session history reduced to 3 items for retry")
+        session = self._get_stored_session(user_id, session_id)
+        events = getattr(session, "events", None)
+        history_tokens = (
+            self.history_compactor.count_tokens(events)
+            if isinstance(events, list)
+            else 0
+        )
+
+        plan = self.token_budget.plan(message, history_tokens, has_image)
+        if plan.needs_compaction:
+            self._compact_session_history(user_id, session_id, plan.history_budget)
+
+        metrics.observe(
+            "token_budget.input_tokens", plan.message_tokens + history_tokens
+        )
+        if plan.adjusted:
+            # 予算に収まるようメッセージか履歴を調整したリクエスト
+            metrics.increment("token_budget.adjustments")
+            if plan.truncated:
+                metrics.increment("token_budget.message_truncations")
+            logger.info(
+                f"Request fitted to token budget: message "
+                f"{plan.message_tokens} tokens, history {history_tokens} "
+                f"tokens (budget {plan.history_budget})"
+            )
+        return plan.message
 
     async def execute_and_get_response(
         self,
@@ -361,6 +722,8 @@ class AgentService:
         session_id: str,
         content: types.Content,
         image_data: Optional[bytes] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        runner: Optional[Runner] = None,
     ) -> str:
         """エージェントを実行し応答を取得（リトライ機能付き）
 
@@ -370,6 +733,8 @@ class AgentService:
             session_id: セッションID
             content: Content型のメッセージ
             image_data: 画像データ（ログ用）
+            progress_callback: 進捗通知コールバック（オプション）
+            runner: 実行に使うランナー（未指定時はルートエージェントのランナー）
 
         Returns:
             エージェントからの最終応答
@@ -377,37 +742,58 @@ class AgentService:
         last_error = None
         current_message = message
         current_content = content
+        # リトライ時に同じ進捗を再通知しないよう試行間で共有する
+        reported_milestones: Set[str] = set()
+
+        self.retry_policy.start()
+        with self.model_router.request() as route, self.concurrency_limiter.request():
+            for attempt in range(MAX_RETRY_ATTEMPTS):
+                try:
+                    return await self._execute_single_attempt(
+                        current_message,
+                        user_id,
+                        session_id,
+                        current_content,
+                        image_data,
+                        progress_callback,
+                        reported_milestones,
+                        runner,
+                    )
 
-        for attempt in range(MAX_RETRY_ATTEMPTS):
-            try:
-                return await self._execute_single_attempt(
-                    current_message,
-                    user_id,
-                    session_id,
-                    current_content,
-                    image_data,
-                )
-
-            except Exception as e:
-                last_error = e
-                logger.warning(
-                    f"Attempt {attempt + 1}/{MAX_RETRY_ATTEMPTS} failed: {e}"
-                )
+                except Exception as e:
+                    last_error = e
+                    logger.warning(
+                        f"Attempt {attempt + 1}/{MAX_RETRY_ATTEMPTS} failed: {e}"
+                    )
 
-                # Gemini 500エラーまたはトークン制限エラーの場合のみリトライ
-                if not (
-                    self.is_gemini_500_error(e) or self.is_token_limit_error(e)
-                ):
-                    logger.error(f"Non-retryable error: {e}")
-                    break
+                    decision = self.retry_policy.decide(e, attempt)
+                    delay = decision.delay
+                    overloaded = decision.kind in (
+                        ErrorKind.TRANSIENT,
+                        ErrorKind.RATE_LIMITED,
+                    )
+                    # 例外で終わったモデル呼び出しの枠を返却し、過負荷なら上限を下げる
+                    self.concurrency_limiter.release_pending(overloaded)
+                    if overloaded:
+                        # モデルの障害として記録し、失敗が続けば代替モデルへ切り替える
+                        self.model_router.record_failure(route)
+                        if (
+                            decision.retry
+                            and route.failures >= MODEL_FALLBACK_AFTER_FAILURES
+                            and self.model_router.escalate(route)
+                        ):
+                            # 別のモデルで再試行するため待機しない
+                            delay = 0.0
+
+                    if not decision.retry:
+                        if decision.kind is ErrorKind.PERMANENT:
+                            logger.error(f"Non-retryable error: {e}")
+                        break
 
-                # 最後の試行でない場合はリトライ準備
-                if attempt < MAX_RETRY_ATTEMPTS - 1:
                     # トークン制限エラーの場合はメッセージを短縮
-                    if self.is_token_limit_error(e):
+                    if decision.kind is ErrorKind.TOKEN_LIMIT:
                         logger.info(
-                            "Token limit error detected, "
-                            "truncating message for retry"
+                            "Token limit error detected, truncating message for retry"
                         )
                         current_message = self._truncate_message_for_retry(
                             current_message
@@ -418,23 +804,32 @@ class AgentService:
                             image_data and "image/jpeg" or None,
                         )
 
-                        # セッション履歴も削減
-                        session = self._get_session(user_id, session_id)
-                        if session:
-                            self._reduce_session_history_for_retry(session)
+                        # 履歴も通常より小さい上限で圧縮する
+                        self._compact_session_history(
+                            user_id,
+                            session_id,
+                            int(
+                                self.history_compactor.max_tokens
+                                * TOKEN_LIMIT_HISTORY_RATIO
+                            ),
+                        )
+                        metrics.increment("agent_service.token_limit_retries")
 
-                    # リトライ前に待機
-                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+                    # サーバーエラー・レート制限はジッター付きの指数バックオフで待機
+                    if delay > 0:
+                        await asyncio.sleep(delay)
                     logger.info(
-                        f"Retrying attempt {attempt + 2}/{MAX_RETRY_ATTEMPTS}"
+                        f"Retrying {decision.kind.value} error: attempt "
+                        f"{attempt + 2}/{MAX_RETRY_ATTEMPTS} after {delay:.2f}s "
+                        f"(model level {route.level})"
                     )
 
-        # すべてのリトライが失敗した場合
-        logger.error(
-            f"All {MAX_RETRY_ATTEMPTS} attempts failed. "
-            f"Last error: {last_error}"
-        )
-        return f"エラーが発生しました: {str(last_error)}"
+            # リトライしない、またはすべてのリトライが失敗した場合
+            logger.error(
+                f"Giving up after {attempt + 1}/{MAX_RETRY_ATTEMPTS} attempts. "
+                f"Last error: {last_error}"
+            )
+            return f"エラーが発生しました: {str(last_error)}"
 
     async def _execute_single_attempt(
         self,
@@ -443,6 +838,9 @@ class AgentService:
         session_id: str,
         content: types.Content,
         image_data: Optional[bytes] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        reported_milestones: Optional[Set[str]] = None,
+        runner: Optional[Runner] = None,
     ) -> str:
         """単一の実行試行（内部メソッド）
 
@@ -452,6 +850,9 @@ class AgentService:
             session_id: セッションID
             content: Content型のメッセージ
             image_data: 画像データ（ログ用）
+            progress_callback: 進捗通知コールバック（オプション）
+            reported_milestones: 通知済みのエージェント名（オプション）
+            runner: 実行に使うランナー（未指定時はルートエージェントのランナー）
 
         Returns:
             エージェントからの最終応答
@@ -459,6 +860,8 @@ class AgentService:
         final_response = ""
         all_responses = []
         sequential_step_count = 0
+        if reported_milestones is None:
+            reported_milestones = set()
 
         # ログ出力
         image_info = (
@@ -470,7 +873,7 @@ class AgentService:
         )
 
         # エージェント実行
-        events_async = self.runner.run_async(
+        events_async = (runner or self.runner).run_async(
             session_id=session_id, user_id=user_id, new_message=content
         )
 
@@ -479,6 +882,9 @@ class AgentService:
             # 関数呼び出しのログ
             if event.author != "user" and event.content:
                 self.log_function_calls(event)
+                await self.notify_progress(
+                    event, progress_callback, reported_milestones
+                )
 
             # 最終応答を処理
             result = await self._process_final_response(
@@ -515,7 +921,24 @@ class AgentService:
         Returns:
             (最終応答, 全応答リスト, ステップ数) または None
         """
-        if event.author == "user" or not event.content:
+        if event.author == "user":
+            return None
+
+        # 最後のサブエージェントが結果を状態に書き込んだら完了
+        completion_output = self.get_completion_output(event)
+        if completion_output is not None:
+            metrics.increment("agent_service.state_completions")
+            logger.info(f"Pipeline completed by state update from {event.author}")
+            if completion_output.strip():
+                all_responses.append(completion_output)
+                return completion_output, all_responses, sequential_step_count
+            return (
+                self._handle_fallback_response(all_responses),
+                all_responses,
+                sequential_step_count,
+            )
+
+        if not event.content:
             return None
 
         # event.contentの構造を安全に処理
@@ -550,9 +973,10 @@ class AgentService:
             return None
 
         author = event.author
+        label = RESPONSE_CLASSIFIER.classify(content_text)
 
         # 中間応答の場合はスキップ
-        if self.is_intermediate_response(author, content_text):
+        if label.intermediate:
             logger.debug(f"Skipping intermediate response from {author}")
             return None, all_responses, sequential_step_count
 
@@ -561,14 +985,15 @@ class AgentService:
             sequential_step_count += 1
 
         # 空でない応答のみを記録
-        if content_text and content_text.strip():
+        if not label.empty:
             all_responses.append(content_text)
         else:
             logger.debug("Skipping empty or whitespace-only response")
             return None
 
-        # 最終応答の判定
-        if self.is_completion_response(content_text):
+        # 最終応答の判定（状態キーを書き込まないエージェント向けのテキスト判定）
+        if label.completion:
+            metrics.increment("agent_service.heuristic_completions")
             return content_text, all_responses, sequential_step_count
 
         # Sequential Agentの場合は追加条件をチェック
@@ -602,7 +1027,11 @@ class AgentService:
             return "申し訳ございませんが、応答を取得できませんでした。"
 
     async def call_agent_text(
-        self, message: str, user_id: str, session_id: Optional[str] = None
+        self,
+        message: str,
+        user_id: str,
+        session_id: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> str:
         """テキストメッセージを送信して応答を取得
 
@@ -610,6 +1039,7 @@ class AgentService:
             message: ユーザーからのメッセージ
             user_id: ユーザーID
             session_id: セッションID（未指定時は新規作成）
+            progress_callback: 進捗通知コールバック（オプション）
 
         Returns:
             エージェントからの応答文字列
@@ -620,6 +1050,7 @@ class AgentService:
             session_id=session_id,
             image_data=None,
             image_mime_type=None,
+            progress_callback=progress_callback,
         )
 
     async def call_agent_with_image(
@@ -629,6 +1060,7 @@ class AgentService:
         image_mime_type: str,
         user_id: str,
         session_id: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> str:
         """画像付きメッセージを送信して応答を取得
 
@@ -638,6 +1070,7 @@ class AgentService:
             image_mime_type: 画像のMIMEタイプ（例: "image/jpeg"）
             user_id: ユーザーID
             session_id: セッションID（未指定時は新規作成）
+            progress_callback: 進捗通知コールバック（オプション）
 
         Returns:
             エージェントからの応答文字列
@@ -648,6 +1081,7 @@ class AgentService:
             session_id=session_id,
             image_data=image_data,
             image_mime_type=image_mime_type,
+            progress_callback=progress_callback,
         )
 
     async def _call_agent_internal(
@@ -657,6 +1091,7 @@ class AgentService:
         session_id: Optional[str] = None,
         image_data: Optional[bytes] = None,
         image_mime_type: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> str:
         """エージェントへの内部呼び出し（テキスト・画像両対応）
 
@@ -666,25 +1101,214 @@ class AgentService:
             session_id: セッションID（未指定時は新規作成）
             image_data: 画像のバイナリデータ（オプション）
             image_mime_type: 画像のMIMEタイプ（オプション）
+            progress_callback: 進捗通知コールバック（オプション）
 
         Returns:
             エージェントからの応答文字列
         """
+        # 計算式のみのメッセージはエージェントを経由せずに計算
+        answer = None
+        if image_data is None and INTENT_FAST_PATH_ENABLED:
+            answer = self._answer_arithmetic(message)
+
         # エージェントを初期化
-        await self.init_agent()
+        if answer is None:
+            await self.init_agent()
+
+        if session_id is None:
+            session_id = f"session_{user_id}"
 
-        # セッションを管理
-        session_id = await self.get_or_create_session(user_id, session_id)
+        # 同じセッションの実行は前の実行が終わるまで待つ
+        async with self.session_lock(session_id):
+            # 他のインスタンスでの更新を取り込む
+            if self.session_sync is not None:
+                await self._pull_session(user_id, session_id)
 
-        # メッセージをContent型に変換
-        content = self.create_message_content(
-            message, image_data, image_mime_type
+            try:
+                # セッションを管理
+                session_id = await self.get_or_create_session(
+                    user_id, session_id
+                )
+
+                # 計算した応答は、続く質問でエージェントが参照できるよう履歴に記録
+                if answer is not None:
+                    self._record_local_answer(user_id, session_id, message, answer)
+                    return answer
+
+                # 入力トークンの予算に収まるようメッセージと履歴を調整
+                message = self._fit_request_to_budget(
+                    message, user_id, session_id, image_data is not None
+                )
+
+                # メッセージをContent型に変換
+                content = self.create_message_content(
+                    message, image_data, image_mime_type
+                )
+
+                # 意図が明らかなメッセージはパイプラインを直接実行
+                runner = self._select_fast_path_runner(
+                    message, image_data is not None
+                )
+
+                # エージェントを実行して応答を取得
+                return await self.execute_and_get_response(
+                    message,
+                    user_id,
+                    session_id,
+                    content,
+                    image_data,
+                    progress_callback,
+                    runner,
+                )
+            finally:
+                if self.session_sync is not None:
+                    await self._push_session(user_id, session_id)
+
+    def _answer_arithmetic(self, message: str) -> Optional[str]:
+        """計算式のみのメッセージをLLMを使わずに計算して応答を作成
+
+        文章を含むなど計算式と判断できないメッセージはエージェントに任せます。
+        応答は _record_local_answer() でセッションの履歴に記録します。
+
+        Args:
+            message: ユーザーからのメッセージ
+
+        Returns:
+            Optional[str]: 計算結果の応答（エージェントで処理する場合はNone）
+        """
+        result = evaluate_arithmetic(message)
+        if result is None:
+            return None
+
+        logger.info(f"Fast path: answered arithmetic locally: {message[:50]}")
+        metrics.increment("intent_router.arithmetic")
+        metrics.increment(
+            "intent_router.llm_calls_saved", ARITHMETIC_SKIPPED_LLM_CALLS
         )
+        if result["status"] == "success":
+            return result["expression"]
+        return result["error_message"]
 
-        # エージェントを実行して応答を取得
-        return await self.execute_and_get_response(
-            message, user_id, session_id, content, image_data
+    def _record_local_answer(
+        self, user_id: str, session_id: str, message: str, answer: str
+    ) -> None:
+        """エージェントを経由せずに作成した応答を、やり取りとしてセッションに記録
+
+        ユーザーのメッセージとルートエージェントの応答の2つのイベントを追加し、
+        「それを2倍して」などの続く質問でエージェントが結果を参照できるようにします。
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+            message: ユーザーからのメッセージ
+            answer: 応答
+        """
+        session = self._get_session(user_id, session_id)
+        if session is None:
+            return
+
+        # ADK の Runner と同じ形式の実行ID（2つのイベントで共有）
+        invocation_id = f"e-{uuid.uuid4()}"
+        root_agent_name = (
+            self.root_agent.name
+            if self.root_agent is not None
+            else AGENT_CONFIG["root"]["name"]
         )
+        for author, role, text in (
+            ("user", "user", message),
+            (root_agent_name, "model", answer),
+        ):
+            self.session_service.append_event(
+                session,
+                Event(
+                    invocation_id=invocation_id,
+                    author=author,
+                    content=types.Content(role=role, parts=[types.Part(text=text)]),
+                ),
+            )
+
+    def _select_fast_path_runner(
+        self, message: str, has_image: bool
+    ) -> Optional[Runner]:
+        """意図が明らかなメッセージを直接実行するパイプラインのランナーを選ぶ
+
+        画像のみ・URLのみのメッセージは、ルートエージェントとワークフローエージェントの
+        振り分けを経由せずにレシピ抽出パイプラインで実行します。
+
+        Args:
+            message: ユーザーからのメッセージ
+            has_image: 画像を含むかどうか
+
+        Returns:
+            Optional[Runner]: パイプラインのランナー（ルートエージェントで実行する場合はNone）
+        """
+        pipeline = detect_fast_path(message, has_image)
+        runner = self.fast_path_runners.get(pipeline) if pipeline else None
+        if runner is None:
+            metrics.increment("intent_router.root")
+            return None
+
+        logger.info(f"Fast path: running {pipeline} directly")
+        metrics.increment(f"intent_router.fast_path.{pipeline}")
+        metrics.increment("intent_router.llm_calls_saved", SKIPPED_LLM_CALLS)
+        return runner
+
+    def _create_session_sync(
+        self, shared_store: Optional[SharedSessionStore]
+    ) -> Optional[SessionSynchronizer]:
+        """インスタンス間でのセッション同期を作成
+
+        同期はメモリ上のセッションを書き換えるため、InMemorySessionService の場合のみ
+        有効にします。それ以外のセッションサービスでは共有ストアを使いません。
+
+        Args:
+            shared_store: インスタンス間共有ストア（未指定時は設定に従って作成）
+
+        Returns:
+            Optional[SessionSynchronizer]: セッション同期（無効な場合はNone）
+        """
+        if not isinstance(self.session_service, InMemorySessionService):
+            if shared_store is not None or SESSION_SHARED_STORE_URL:
+                logger.warning(
+                    "Shared session store requires the memory session backend; "
+                    f"disabled for {type(self.session_service).__name__}"
+                )
+            return None
+
+        shared_store = shared_store or create_shared_session_store()
+        if shared_store is None:
+            return None
+        return SessionSynchronizer(self.session_service, shared_store, APP_NAME)
+
+    def start_session_maintenance(self) -> None:
+        """セッション掃除と、永続化バックエンドの定期書き込みを起動"""
+        self.session_sweeper.start()
+        if hasattr(self.session_service, "start"):
+            self.session_service.start()
+
+    async def stop_session_maintenance(self) -> None:
+        """セッション掃除を停止し、永続化バックエンドを閉じる"""
+        await self.session_sweeper.stop()
+        if hasattr(self.session_service, "close"):
+            await self.session_service.close()
+        if self.session_sync is not None:
+            await self.session_sync.store.close()
+
+    async def _pull_session(self, user_id: str, session_id: str) -> None:
+        """共有ストアからセッションを取り込む（失敗時はローカルのセッションで続行）"""
+        try:
+            await self.session_sync.pull(user_id, session_id)
+        except Exception as e:
+            metrics.increment("shared_session.pull_failures")
+            logger.error(f"Failed to pull session {session_id}: {e}")
+
+    async def _push_session(self, user_id: str, session_id: str) -> None:
+        """セッションを共有ストアに書き戻す（失敗しても応答は返す）"""
+        try:
+            await self.session_sync.push(user_id, session_id)
+        except Exception as e:
+            metrics.increment("shared_session.push_failures")
+            logger.error(f"Failed to push session {session_id}: {e}")
 
     async def cleanup_resources(self) -> None:
         """リソースをクリーンアップ（アプリケーション終了時に呼び出す）"""
@@ -708,10 +1332,15 @@ async def init_agent():
 
 
 async def call_agent_async(
-    message: str, user_id: str, session_id: Optional[str] = None
+    message: str,
+    user_id: str,
+    session_id: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
 ) -> str:
     """テキストメッセージをエージェントに送信し、応答を返す"""
-    return await _agent_service.call_agent_text(message, user_id, session_id)
+    return await _agent_service.call_agent_text(
+        message, user_id, session_id, progress_callback
+    )
 
 
 async def call_agent_with_image_async(
@@ -720,13 +1349,29 @@ async def call_agent_with_image_async(
     image_mime_type: str,
     user_id: str,
     session_id: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
 ) -> str:
     """画像付きメッセージをエージェントに送信し、応答を返す"""
     return await _agent_service.call_agent_with_image(
-        message, image_data, image_mime_type, user_id, session_id
+        message,
+        image_data,
+        image_mime_type,
+        user_id,
+        session_id,
+        progress_callback,
     )
 
 
+def start_session_maintenance():
+    """セッション掃除・永続化のバックグラウンドタスクを起動"""
+    _agent_service.start_session_maintenance()
+
+
+async def stop_session_maintenance():
+    """セッション掃除・永続化のバックグラウンドタスクを停止"""
+    await _agent_service.stop_session_maintenance()
+
+
 async def cleanup_resources():
     """リソースをクリーンアップ"""
     await _agent_service.cleanup_resources()
@@ -0,0 +1,163 @@
+"""Webhook処理用ディスパッチキューモジュール
+
+このモジュールは、Webhookで受け取った処理を上限付きのキューに積み、
+固定数のワーカーで順次実行する仕組みを提供します。
+同時に実行されるエージェント処理の数を制限し、
+キューが満杯の場合は例外で明示的に過負荷を通知します。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from config import DISPATCH_MAX_QUEUE_SIZE, DISPATCH_WORKER_COUNT
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("dispatch_queue")
+
+# 停止時にキューの消化を待つ最大秒数
+DEFAULT_DRAIN_TIMEOUT_SECONDS = 30
+
+
+class QueueFullError(Exception):
+    """ディスパッチキューが満杯で処理を受け付けられない場合の例外"""
+
+
+class EventDispatchQueue:
+    """上限付きワーカープール型のディスパッチキュー
+
+    submit() で積まれた非同期処理を、指定数のワーカーが取り出して実行します。
+    キューの深さ・待ち時間・処理時間をメトリクスとして記録します。
+    """
+
+    def __init__(
+        self,
+        worker_count: int = DISPATCH_WORKER_COUNT,
+        max_queue_size: int = DISPATCH_MAX_QUEUE_SIZE,
+        name: str = "dispatch_queue",
+    ):
+        """初期化
+
+        Args:
+            worker_count: 並行して処理を実行するワーカー数
+            max_queue_size: キューに保持できる最大件数
+            name: メトリクス名のプレフィックス
+        """
+        if worker_count < 1:
+            raise ValueError("worker_count must be at least 1")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        """ワーカーが起動しているかどうか"""
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        """現在キューに積まれている件数"""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """ワーカーを起動（起動済みの場合は何もしない）"""
+        if self.is_running:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(
+            f"Dispatch queue started with {self.worker_count} workers "
+            f"(max depth: {self.max_queue_size})"
+        )
+
+    def submit(
+        self, func: Callable[..., Awaitable[Any]], *args: Any
+    ) -> None:
+        """処理をキューに追加
+
+        Args:
+            func: 実行する非同期関数
+            *args: 関数に渡す引数
+
+        Raises:
+            QueueFullError: キューが満杯の場合
+        """
+        try:
+            self._queue.put_nowait((func, args, time.monotonic()))
+        except asyncio.QueueFull:
+            metrics.increment(f"{self.name}.rejected")
+            logger.warning(
+                f"Dispatch queue is full ({self.max_queue_size} items), "
+                "rejecting request"
+            )
+            raise QueueFullError(
+                f"Dispatch queue is full ({self.max_queue_size} items)"
+            )
+
+        metrics.increment(f"{self.name}.submitted")
+        metrics.set_gauge(f"{self.name}.depth", self.depth)
+
+    async def _worker(self, worker_id: int) -> None:
+        """キューから処理を取り出して実行するワーカー
+
+        Args:
+            worker_id: ワーカー番号（ログ用）
+        """
+        while True:
+            func, args, enqueued_at = await self._queue.get()
+            started_at = time.monotonic()
+            metrics.set_gauge(f"{self.name}.depth", self.depth)
+            metrics.observe(f"{self.name}.wait_seconds", started_at - enqueued_at)
+            try:
+                await func(*args)
+                metrics.increment(f"{self.name}.completed")
+            except Exception as e:
+                metrics.increment(f"{self.name}.failed")
+                logger.exception(f"Worker {worker_id} task failed: {e}")
+            finally:
+                metrics.observe(
+                    f"{self.name}.run_seconds", time.monotonic() - started_at
+                )
+                self._queue.task_done()
+
+    async def stop(
+        self, drain_timeout: Optional[float] = DEFAULT_DRAIN_TIMEOUT_SECONDS
+    ) -> None:
+        """キューを消化してからワーカーを停止
+
+        Args:
+            drain_timeout: キュー消化を待つ最大秒数（Noneの場合は待たない）
+        """
+        if not self.is_running:
+            return
+
+        if drain_timeout:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Dispatch queue drain timed out after {drain_timeout} "
+                    f"seconds ({self.depth} items left)"
+                )
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # 未処理分は破棄し、次回起動用にキューを作り直す
+        if self.depth:
+            metrics.increment(f"{self.name}.dropped", self.depth)
+            logger.warning(f"Dropping {self.depth} unprocessed items")
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        metrics.set_gauge(f"{self.name}.depth", 0)
+        logger.info("Dispatch queue stopped")
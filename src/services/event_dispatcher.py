@@ -0,0 +1,150 @@
+"""キー単位で順序を保証するイベントディスパッチャーモジュール
+
+このモジュールは、LINEイベントを送信元（ユーザー/グループ/ルーム）ごとに振り分け、
+異なる送信元のイベントは並行に、同じ送信元のイベントは到着順に処理する
+ディスパッチャーを提供します。全体の同時実行数はセマフォで制限します。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from config import DISPATCH_MAX_CONCURRENT_EVENTS
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("event_dispatcher")
+
+# 送信元を特定できないイベント用のキー
+UNKNOWN_SOURCE_KEY = "unknown"
+
+
+def get_event_key(event: Any) -> str:
+    """イベントの順序保証キーを取得
+
+    セッションがユーザー単位（session_{user_id}）のため user_id を優先し、
+    取得できない場合はグループID・ルームIDを使用します。
+
+    Args:
+        event: LINEイベント
+
+    Returns:
+        str: 順序保証キー
+    """
+    source = getattr(event, "source", None)
+    for attr in ("user_id", "group_id", "room_id"):
+        value = getattr(source, attr, None)
+        if value:
+            return str(value)
+    return UNKNOWN_SOURCE_KEY
+
+
+class KeyedEventDispatcher:
+    """キー単位で直列、キー間で並行にイベントを処理するディスパッチャー
+
+    キーごとに直前のタスクを保持し、新しいタスクは直前のタスクの完了を待ってから
+    実行されます。バッチをまたいでも同じキーの順序は保たれます。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DISPATCH_MAX_CONCURRENT_EVENTS,
+        name: str = "event_dispatcher",
+    ):
+        """初期化
+
+        Args:
+            max_concurrency: 全キー合計の最大同時実行数
+            name: メトリクス名のプレフィックス
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tails: Dict[str, asyncio.Task] = {}
+        self._in_flight = 0
+
+    @property
+    def active_keys(self) -> int:
+        """処理中または待機中のタスクを持つキーの数"""
+        return len(self._tails)
+
+    def dispatch(
+        self, key: str, func: Callable[..., Awaitable[Any]], *args: Any
+    ) -> asyncio.Task:
+        """キーに紐づけて処理をスケジュール
+
+        Args:
+            key: 順序保証キー
+            func: 実行する非同期関数
+            *args: 関数に渡す引数
+
+        Returns:
+            asyncio.Task: スケジュールされたタスク
+        """
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run(previous, func, args))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._release_key(key, t))
+        metrics.set_gauge(f"{self.name}.active_keys", self.active_keys)
+        return task
+
+    def _release_key(self, key: str, task: asyncio.Task) -> None:
+        """キーの最後のタスクが完了したら管理対象から外す"""
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        metrics.set_gauge(f"{self.name}.active_keys", self.active_keys)
+
+    async def _run(
+        self,
+        previous: Optional[asyncio.Task],
+        func: Callable[..., Awaitable[Any]],
+        args: tuple,
+    ) -> Any:
+        """直前のタスク完了と同時実行枠を待ってから処理を実行"""
+        queued_at = time.monotonic()
+
+        # 同じキーの直前のタスクが終わるまで待つ（成否は問わない）
+        if previous is not None and not previous.done():
+            await asyncio.wait({previous})
+
+        async with self._semaphore:
+            metrics.observe(
+                f"{self.name}.wait_seconds", time.monotonic() - queued_at
+            )
+            self._in_flight += 1
+            metrics.set_gauge(f"{self.name}.in_flight", self._in_flight)
+            try:
+                return await func(*args)
+            finally:
+                self._in_flight -= 1
+                metrics.set_gauge(f"{self.name}.in_flight", self._in_flight)
+
+    async def dispatch_all(
+        self,
+        events: Iterable[Any],
+        handler: Callable[[Any], Awaitable[Any]],
+    ) -> List[Any]:
+        """イベント群をキーごとに振り分けて処理し、すべての完了を待つ
+
+        Args:
+            events: 処理するイベント
+            handler: 各イベントを処理する非同期関数
+
+        Returns:
+            List[Any]: 各イベントの処理結果（例外は例外オブジェクト）
+        """
+        tasks = [
+            self.dispatch(get_event_key(event), handler, event)
+            for event in events
+        ]
+        if not tasks:
+            return []
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Event handling failed: {result}")
+        return results
@@ -0,0 +1,301 @@
+"""会話履歴圧縮モジュール
+
+このモジュールは、セッションの会話履歴（イベント）を推定トークン数で管理し、
+上限を超えた場合に古いターンを要約エントリーにまとめる仕組みを提供します。
+件数で切り捨てる代わりに、古いターンの要点を1件の要約として残すため、
+文脈を保ったままモデルへの入力トークン数を抑えられます。
+
+- 直近のターンは推定トークン数が一定量に収まる範囲でそのまま保持
+- それより古いターンはユーザー発言と応答の抜粋を要約エントリーに追記（ローリング要約）
+- Webページ本文などの巨大な関数応答は、保持するターンでも切り詰める
+"""
+
+import json
+import re
+import time
+from typing import Any, Callable, List, Optional
+
+from google.adk.events import Event
+from google.genai import types
+
+from config import (
+    HISTORY_KEEP_RECENT_TOKENS,
+    HISTORY_MAX_PART_TOKENS,
+    HISTORY_MAX_TOKENS,
+    HISTORY_SUMMARY_MAX_TOKENS,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("history_compactor")
+
+# 要約エントリーの作成者名と見出し
+SUMMARY_AUTHOR = "history_summary"
+SUMMARY_HEADER = "これまでの会話の要約:"
+
+# 画像1枚あたりの推定トークン数
+IMAGE_TOKENS = 258
+
+# 要約に残す発言・応答の抜粋の最大文字数
+EXCERPT_CHARS = 120
+
+# 切り詰めた関数応答に付ける注記
+TRUNCATED_NOTE = "…（長いため省略しました）"
+
+_WHITESPACE = re.compile(r"\s+")
+
+# テキストの推定トークン数を返す関数
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストの推定トークン数を取得
+
+    ASCII文字は約4文字で1トークン、日本語などそれ以外の文字は1文字1トークンとして概算します。
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        int: 推定トークン数
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _dump(value: Any) -> str:
+    """関数呼び出しの引数・応答を文字列化"""
+    try:
+        return json.dumps(value, ensure_ascii=False, default=str)
+    except Exception:
+        return str(value)
+
+
+def _part_tokens(part: Any, count_text: TokenCounter = estimate_tokens) -> int:
+    """パーツ1つ分の推定トークン数"""
+    text = getattr(part, "text", None)
+    if isinstance(text, str):
+        return count_text(text)
+
+    function_call = getattr(part, "function_call", None)
+    if function_call is not None:
+        return count_text(_dump(getattr(function_call, "args", None)))
+
+    function_response = getattr(part, "function_response", None)
+    if function_response is not None:
+        return count_text(_dump(getattr(function_response, "response", None)))
+
+    if getattr(part, "inline_data", None) is not None:
+        return IMAGE_TOKENS
+    return 0
+
+
+def estimate_event_tokens(
+    event: Any, count_text: TokenCounter = estimate_tokens
+) -> int:
+    """イベント1件分の推定トークン数を取得
+
+    Args:
+        event: ADKのイベント
+        count_text: テキストの推定トークン数を返す関数
+
+    Returns:
+        int: 推定トークン数
+    """
+    parts = getattr(getattr(event, "content", None), "parts", None) or []
+    return sum(_part_tokens(part, count_text) for part in parts)
+
+
+def _first_text(events: List[Any]) -> str:
+    """イベント群から最初のテキストを取得"""
+    for event in events:
+        parts = getattr(getattr(event, "content", None), "parts", None) or []
+        for part in parts:
+            text = getattr(part, "text", None)
+            if isinstance(text, str) and text.strip():
+                return text
+    return ""
+
+
+def _excerpt(text: str, limit: int = EXCERPT_CHARS) -> str:
+    """空白を詰めて先頭から指定文字数を抜粋"""
+    text = _WHITESPACE.sub(" ", text).strip()
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "…"
+
+
+def split_turns(events: List[Any]) -> List[List[Any]]:
+    """イベントをターン（ユーザー発言から次のユーザー発言の直前まで）に分割
+
+    Args:
+        events: イベント一覧
+
+    Returns:
+        List[List[Any]]: ターンごとのイベント一覧
+    """
+    turns: List[List[Any]] = []
+    for event in events:
+        if getattr(event, "author", None) == "user" or not turns:
+            turns.append([])
+        turns[-1].append(event)
+    return turns
+
+
+class HistoryCompactor:
+    """推定トークン数に基づいて会話履歴を圧縮するクラス"""
+
+    def __init__(
+        self,
+        max_tokens: int = HISTORY_MAX_TOKENS,
+        keep_recent_tokens: int = HISTORY_KEEP_RECENT_TOKENS,
+        summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS,
+        max_part_tokens: int = HISTORY_MAX_PART_TOKENS,
+        count_text: TokenCounter = estimate_tokens,
+    ):
+        """初期化
+
+        Args:
+            max_tokens: 履歴全体の推定トークン数の上限（超えたら圧縮）
+            keep_recent_tokens: 圧縮時にそのまま残す直近ターンの推定トークン数
+            summary_max_tokens: 要約エントリーの推定トークン数の上限
+            max_part_tokens: 関数応答1件あたりの推定トークン数の上限
+            count_text: テキストの推定トークン数を返す関数
+        """
+        self.max_tokens = max_tokens
+        self.keep_recent_tokens = keep_recent_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_part_tokens = max_part_tokens
+        self.count_text = count_text
+
+    def count_tokens(self, events: List[Any]) -> int:
+        """イベント群の推定トークン数の合計"""
+        return sum(estimate_event_tokens(event, self.count_text) for event in events)
+
+    def compact(self, session: Any, max_tokens: Optional[int] = None) -> bool:
+        """上限を超えていれば、古いターンを要約エントリーにまとめる
+
+        Args:
+            session: ADKのセッション（events を直接書き換えます）
+            max_tokens: 今回だけ使う上限（トークン制限エラー後の再試行など）
+
+        Returns:
+            bool: 圧縮した場合はTrue
+        """
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+        keep_recent_tokens = min(self.keep_recent_tokens, max_tokens)
+        events = getattr(session, "events", None)
+        if not isinstance(events, list):
+            return False
+        events = list(events)
+
+        before = self.count_tokens(events)
+        if before <= max_tokens:
+            return False
+
+        summary_lines: List[str] = []
+        if events and getattr(events[0], "author", None) == SUMMARY_AUTHOR:
+            summary_lines = self._summary_lines(events.pop(0))
+
+        # 直近のターンから、予算に収まる範囲を残す（最新のターンは必ず残す）
+        turns = split_turns(events)
+        kept: List[List[Any]] = []
+        kept_tokens = 0
+        for turn in reversed(turns):
+            for event in turn:
+                self._shrink_large_parts(event)
+            turn_tokens = self.count_tokens(turn)
+            if kept and kept_tokens + turn_tokens > keep_recent_tokens:
+                break
+            kept.insert(0, turn)
+            kept_tokens += turn_tokens
+
+        folded = turns[: len(turns) - len(kept)]
+        for turn in folded:
+            summary_lines.append(self._summarize_turn(turn))
+
+        kept_events = [event for turn in kept for event in turn]
+        if summary_lines:
+            # 要約は残したターンと合わせて上限に収まる大きさにする
+            summary_budget = min(self.summary_max_tokens, max_tokens - kept_tokens)
+            summary = self._build_summary_event(
+                summary_lines, summary_budget, kept_events
+            )
+            kept_events.insert(0, summary)
+        session.events = kept_events
+
+        after = self.count_tokens(kept_events)
+        metrics.increment("history.compactions")
+        metrics.increment("history.folded_turns", len(folded))
+        metrics.observe("history.tokens_before", before)
+        metrics.observe("history.tokens_after", after)
+        logger.info(
+            f"Compacted history of session {getattr(session, 'id', '')}: "
+            f"{before} -> {after} tokens ({len(folded)} turns summarized)"
+        )
+        return True
+
+    def _shrink_large_parts(self, event: Any) -> None:
+        """上限を超える関数応答を切り詰める"""
+        parts = getattr(getattr(event, "content", None), "parts", None) or []
+        for part in parts:
+            function_response = getattr(part, "function_response", None)
+            if function_response is None:
+                continue
+            if _part_tokens(part, self.count_text) <= self.max_part_tokens:
+                continue
+            text = _dump(function_response.response)
+            # 日本語を含む場合も上限に収まるよう、文字数＝トークン数として切り詰める
+            function_response.response = {
+                "result": text[: self.max_part_tokens] + TRUNCATED_NOTE
+            }
+            metrics.increment("history.truncated_parts")
+
+    @staticmethod
+    def _summary_lines(summary_event: Any) -> List[str]:
+        """既存の要約エントリーから要約行を取得"""
+        text = _first_text([summary_event])
+        return [
+            line for line in text.splitlines()
+            if line.strip() and line != SUMMARY_HEADER
+        ]
+
+    @staticmethod
+    def _summarize_turn(turn: List[Any]) -> str:
+        """1ターンを要約行に変換"""
+        user_events = [e for e in turn if getattr(e, "author", None) == "user"]
+        reply_events = [e for e in turn if getattr(e, "author", None) != "user"]
+        user_text = _excerpt(_first_text(user_events)) or "（画像など）"
+        reply_text = _excerpt(_first_text(list(reversed(reply_events))))
+        if reply_text:
+            return f"- ユーザー: {user_text} / 応答: {reply_text}"
+        return f"- ユーザー: {user_text}"
+
+    def _build_summary_event(
+        self, summary_lines: List[str], max_tokens: int, kept_events: List[Any]
+    ) -> Event:
+        """要約行から要約エントリー（イベント）を作成"""
+        # 上限を超える場合は古い要約行から捨てる（最新の1行は残す）
+        while (
+            len(summary_lines) > 1
+            and self.count_text("\n".join(summary_lines)) > max_tokens
+        ):
+            summary_lines.pop(0)
+
+        text = "\n".join([SUMMARY_HEADER, *summary_lines])
+        event = Event(
+            author=SUMMARY_AUTHOR,
+            invocation_id=SUMMARY_AUTHOR,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+        )
+        # 残したイベントより前の時刻にして順序を保つ
+        first_timestamp = getattr(
+            kept_events[0], "timestamp", None
+        ) if kept_events else None
+        event.timestamp = (
+            first_timestamp if isinstance(first_timestamp, (int, float))
+            else time.time()
+        )
+        return event
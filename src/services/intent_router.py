@@ -0,0 +1,54 @@
+"""意図の事前振り分けモジュール
+
+このモジュールは、エージェントを実行する前にメッセージの意図を規則で判定する仕組みを
+提供します。画像のみ・URLのみのように意図が明らかなメッセージは、ルートエージェントと
+ワークフローエージェントによる振り分け（LLM呼び出し）を経由せずに、
+レシピ抽出パイプラインを直接実行できます。
+"""
+
+import re
+from typing import Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("intent_router")
+
+# 画像レシピ・URLレシピのパイプライン名（AgentFactory が作成するエージェント名）
+IMAGE_RECIPE_PIPELINE = "ImageRecipeExtractionPipeline"
+URL_RECIPE_PIPELINE = "RecipeExtractionPipeline"
+
+# 画像のみが送られた場合にエージェントへ渡すメッセージ
+DEFAULT_IMAGE_MESSAGE = "この画像からレシピを抽出してNotionに登録してください"
+
+# ルートエージェントとワークフローエージェントを経由しないことで省けるLLM呼び出し数
+SKIPPED_LLM_CALLS = 2
+
+# 計算式をローカルで計算することで省けるLLM呼び出し数
+# （ルートエージェントの振り分け・計算エージェントのツール呼び出し・結果の文章化）
+ARITHMETIC_SKIPPED_LLM_CALLS = 3
+
+# メッセージ全体が1つのURLである場合に一致
+_URL_ONLY_PATTERN = re.compile(r"https?://[^\s]+")
+
+
+def detect_fast_path(message: str, has_image: bool) -> Optional[str]:
+    """意図が明らかなメッセージの実行先パイプラインを判定
+
+    - 画像があり、テキストがない（または既定のメッセージのみ）: 画像レシピのパイプライン
+    - 画像がなく、テキストがURL1つのみ: URLレシピのパイプライン
+
+    Args:
+        message: ユーザーからのメッセージ
+        has_image: 画像を含むかどうか
+
+    Returns:
+        Optional[str]: 実行先のパイプライン名（判定できない場合はNone）
+    """
+    text = (message or "").strip()
+    if has_image:
+        if not text or text == DEFAULT_IMAGE_MESSAGE:
+            return IMAGE_RECIPE_PIPELINE
+        return None
+    if _URL_ONLY_PATTERN.fullmatch(text):
+        return URL_RECIPE_PIPELINE
+    return None
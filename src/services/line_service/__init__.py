@@ -4,17 +4,20 @@
 Webhookの処理、メッセージの送受信、イベント処理などを担当します。
 """
 
-from src.services.line_service.client import LineClient
+from src.services.line_service.client import AsyncLineClient, LineClient
 from src.services.line_service.constants import (
     DEFAULT_THREAD_NAME_PREFIX,
     DEFAULT_THREAD_POOL_SIZE,
     ERROR_MESSAGE,
 )
+from src.services.line_service.dedup import WebhookEventDeduplicator
 from src.services.line_service.handler import LineEventHandler
 
 __all__ = [
+    "AsyncLineClient",
     "LineClient",
     "LineEventHandler",
+    "WebhookEventDeduplicator",
     "DEFAULT_THREAD_POOL_SIZE",
     "DEFAULT_THREAD_NAME_PREFIX",
     "ERROR_MESSAGE",
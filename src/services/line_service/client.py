@@ -4,13 +4,21 @@
 メッセージの送信や受信、画像データの取得などの機能を提供します。
 """
 
+import inspect
+from typing import Any, Callable, Optional
+
 from linebot.v3 import WebhookParser
 from linebot.v3.messaging import (
     ApiClient,
+    AsyncApiClient,
+    AsyncMessagingApi,
+    AsyncMessagingApiBlob,
     Configuration,
     MessagingApi,
     MessagingApiBlob,
+    PushMessageRequest,
     ReplyMessageRequest,
+    ShowLoadingAnimationRequest,
     TextMessage,
 )
 
@@ -20,6 +28,22 @@ from src.utils.logger import setup_logger
 logger = setup_logger("line_client")
 
 
+async def call_line_api(method: Callable[..., Any], *args: Any) -> Any:
+    """LINE APIを呼び出す（同期/非同期クライアント両対応）
+
+    Args:
+        method: クライアントのメソッド
+        *args: メソッドに渡す引数
+
+    Returns:
+        Any: メソッドの戻り値
+    """
+    result = method(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 class LineClient:
     """LINE APIクライアントラッパークラス
 
@@ -88,6 +112,46 @@ class LineClient:
             logger.exception(f"Failed to reply with text: {e}")
             raise
 
+    def push_text(self, to: str, text: str) -> None:
+        """テキストメッセージをプッシュ送信
+
+        Args:
+            to: 送信先（ユーザーID/グループID/ルームID）
+            text: 送信するテキスト
+        """
+        try:
+            with self.create_api_client() as api_client:
+                line_api = MessagingApi(api_client)
+                line_api.push_message(
+                    PushMessageRequest(
+                        to=to,
+                        messages=[TextMessage(text=text)],
+                    )
+                )
+            logger.info(f"Successfully pushed text: {text[:50]}...")
+        except Exception as e:
+            logger.exception(f"Failed to push text: {e}")
+            raise
+
+    def show_loading_animation(self, chat_id: str, loading_seconds: int) -> None:
+        """ローディングアニメーションを表示（1対1トークのみ）
+
+        Args:
+            chat_id: 表示先のユーザーID
+            loading_seconds: 表示秒数（5の倍数、最大60）
+        """
+        try:
+            with self.create_api_client() as api_client:
+                line_api = MessagingApi(api_client)
+                line_api.show_loading_animation(
+                    ShowLoadingAnimationRequest(
+                        chat_id=chat_id, loading_seconds=loading_seconds
+                    )
+                )
+        except Exception as e:
+            logger.exception(f"Failed to show loading animation: {e}")
+            raise
+
     def get_message_content(self, message_id: str) -> bytes:
         """メッセージの画像コンテンツを取得
 
@@ -108,3 +172,116 @@ class LineClient:
         except Exception as e:
             logger.exception(f"Failed to retrieve image content: {e}")
             raise
+
+
+class AsyncLineClient(LineClient):
+    """非同期版LINE APIクライアント
+
+    LineClientと同じメソッド名で、返信や画像取得をawait可能な形で提供します。
+    HTTPセッション（コネクションプール）はアプリケーションの生存期間中
+    1つだけ保持して再利用し、close()で明示的に閉じます。
+    """
+
+    def __init__(self):
+        """非同期LINE APIクライアントの初期化"""
+        super().__init__()
+        self._api_client: Optional[AsyncApiClient] = None
+
+    def create_api_client(self) -> AsyncApiClient:
+        """共有の非同期APIクライアントを取得（初回呼び出し時に作成）
+
+        aiohttpのセッションはイベントループ上で作成する必要があるため、
+        コンストラクタではなく最初のAPI呼び出し時に作成します。
+
+        Returns:
+            AsyncApiClient: LINE Messaging API 非同期クライアント
+        """
+        if self._api_client is None:
+            self._api_client = AsyncApiClient(self.configuration)
+            logger.info("Async LINE API session created")
+        return self._api_client
+
+    async def reply_text(self, reply_token: str, text: str) -> None:
+        """テキストメッセージで返信
+
+        Args:
+            reply_token: 返信用トークン
+            text: 送信するテキスト
+        """
+        try:
+            line_api = AsyncMessagingApi(self.create_api_client())
+            await line_api.reply_message(
+                ReplyMessageRequest(
+                    reply_token=reply_token,
+                    messages=[TextMessage(text=text)],
+                )
+            )
+            logger.info(f"Successfully sent reply with text: {text[:50]}...")
+        except Exception as e:
+            logger.exception(f"Failed to reply with text: {e}")
+            raise
+
+    async def push_text(self, to: str, text: str) -> None:
+        """テキストメッセージをプッシュ送信
+
+        Args:
+            to: 送信先（ユーザーID/グループID/ルームID）
+            text: 送信するテキスト
+        """
+        try:
+            line_api = AsyncMessagingApi(self.create_api_client())
+            await line_api.push_message(
+                PushMessageRequest(
+                    to=to,
+                    messages=[TextMessage(text=text)],
+                )
+            )
+            logger.info(f"Successfully pushed text: {text[:50]}...")
+        except Exception as e:
+            logger.exception(f"Failed to push text: {e}")
+            raise
+
+    async def show_loading_animation(
+        self, chat_id: str, loading_seconds: int
+    ) -> None:
+        """ローディングアニメーションを表示（1対1トークのみ）
+
+        Args:
+            chat_id: 表示先のユーザーID
+            loading_seconds: 表示秒数（5の倍数、最大60）
+        """
+        try:
+            line_api = AsyncMessagingApi(self.create_api_client())
+            await line_api.show_loading_animation(
+                ShowLoadingAnimationRequest(
+                    chat_id=chat_id, loading_seconds=loading_seconds
+                )
+            )
+        except Exception as e:
+            logger.exception(f"Failed to show loading animation: {e}")
+            raise
+
+    async def get_message_content(self, message_id: str) -> bytes:
+        """メッセージの画像コンテンツを取得
+
+        Args:
+            message_id: メッセージID
+
+        Returns:
+            bytes: 画像データ
+        """
+        try:
+            blob_api = AsyncMessagingApiBlob(self.create_api_client())
+            image_content = await blob_api.get_message_content(message_id)
+            logger.info(f"Successfully retrieved image content: {message_id}")
+            return image_content
+        except Exception as e:
+            logger.exception(f"Failed to retrieve image content: {e}")
+            raise
+
+    async def close(self) -> None:
+        """HTTPセッションを閉じる（アプリケーション終了時に呼び出す）"""
+        if self._api_client is not None:
+            await self._api_client.close()
+            self._api_client = None
+            logger.info("Async LINE API session closed")
@@ -15,6 +15,25 @@ ERROR_MESSAGE = (
     "しばらく時間をおいてから再試行してください。"
 )
 
+# 返信トークンの有効期限（秒）と、期限前に受付メッセージを送る余裕（秒）
+REPLY_TOKEN_TTL_SECONDS = 60
+REPLY_ACK_MARGIN_SECONDS = 10
+
+# 処理が長引いた場合に返信トークンで送る受付メッセージ
+ACK_MESSAGE = (
+    "処理に時間がかかっています。完了しましたら結果をお送りします。"
+    "しばらくお待ちください。"
+)
+
+# 進捗通知の最小送信間隔（秒）と、ローディングアニメーションの表示秒数（5の倍数・最大60）
+PROGRESS_MIN_INTERVAL_SECONDS = 10
+LOADING_ANIMATION_SECONDS = 60
+
+# 進捗通知の方式
+PROGRESS_MODE_LOADING = "loading"  # 1対1トークでローディングアニメーションを更新
+PROGRESS_MODE_PUSH = "push"  # 進捗メッセージをプッシュ送信
+PROGRESS_MODE_OFF = "off"
+
 
 # 設定読み込み用関数
 def get_line_config() -> tuple[str, str]:
@@ -0,0 +1,182 @@
+"""Webhookイベント重複排除モジュール
+
+このモジュールは、LINEから再送されたWebhookイベントを検出し、
+同じイベントに対してエージェント処理が二重に実行されることを防ぎます。
+処理済みの webhookEventId を件数上限付きのTTL/LRUキャッシュで保持し、
+オプションでSQLiteに永続化して再起動後も重複を検出できるようにします。
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config import WEBHOOK_DEDUP_MAX_ENTRIES, WEBHOOK_DEDUP_TTL_SECONDS
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("line_dedup")
+
+# 期限切れレコードをSQLiteから削除する間隔（追加件数）
+PURGE_INTERVAL = 500
+
+
+class WebhookEventDeduplicator:
+    """処理済みWebhookイベントIDの重複排除ストア
+
+    メモリ上のLRUキャッシュを常に参照し、再送フラグ（isRedelivery）が
+    立っているイベントのみ永続ストア（SQLite）も参照します。
+
+    should_process で処理中としてメモリに記録し、処理に成功したら mark_processed で
+    永続ストアにも記録します。処理に失敗した場合は release で記録を取り消し、
+    LINEからの再送を処理できるようにします。
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = WEBHOOK_DEDUP_TTL_SECONDS,
+        max_entries: int = WEBHOOK_DEDUP_MAX_ENTRIES,
+        db_path: Optional[str] = None,
+    ):
+        """初期化
+
+        Args:
+            ttl_seconds: イベントIDを保持する秒数
+            max_entries: メモリ上に保持する最大件数
+            db_path: SQLiteファイルのパス（未指定時は永続化しない）
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._adds_since_purge = 0
+
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_events ("
+                "event_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._purge_expired_rows()
+            logger.info(f"Webhook dedup store persisted to {db_path}")
+
+    def __len__(self) -> int:
+        """メモリ上に保持しているイベントID数"""
+        return len(self._entries)
+
+    def should_process(self, event: Any) -> bool:
+        """イベントを処理すべきか判定し、処理する場合は処理中としてメモリに記録
+
+        処理中の同じイベントが届いた場合も重複とみなします。
+
+        Args:
+            event: LINEイベント
+
+        Returns:
+            bool: 未処理のイベントであればTrue、重複であればFalse
+        """
+        event_id = getattr(event, "webhook_event_id", None)
+        if not event_id:
+            return True
+
+        delivery_context = getattr(event, "delivery_context", None)
+        is_redelivery = bool(getattr(delivery_context, "is_redelivery", False))
+        if is_redelivery:
+            metrics.increment("webhook_dedup.redeliveries")
+
+        with self._lock:
+            if self._contains(event_id, check_store=is_redelivery):
+                metrics.increment("webhook_dedup.hits")
+                logger.info(f"Skipping duplicate webhook event: {event_id}")
+                return False
+
+            metrics.increment("webhook_dedup.misses")
+            self._add(event_id)
+            return True
+
+    def _contains(self, event_id: str, check_store: bool) -> bool:
+        """イベントIDが期限内に記録済みか確認"""
+        now = time.time()
+        seen_at = self._entries.get(event_id)
+        if seen_at is not None:
+            if now - seen_at <= self.ttl_seconds:
+                self._entries.move_to_end(event_id)
+                return True
+            del self._entries[event_id]
+
+        if check_store and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT seen_at FROM webhook_events WHERE event_id = ?",
+                (event_id,),
+            ).fetchone()
+            if row and now - row[0] <= self.ttl_seconds:
+                return True
+
+        return False
+
+    def _add(self, event_id: str) -> None:
+        """イベントIDをメモリに記録（上限を超えた古いものから破棄）"""
+        self._entries[event_id] = time.time()
+        self._entries.move_to_end(event_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.increment("webhook_dedup.evictions")
+        metrics.set_gauge("webhook_dedup.size", len(self._entries))
+
+    def mark_processed(self, event: Any) -> None:
+        """処理に成功したイベントを永続ストアに記録
+
+        Args:
+            event: should_process で処理対象と判定したLINEイベント
+        """
+        event_id = getattr(event, "webhook_event_id", None)
+        if not event_id:
+            return
+
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO webhook_events (event_id, seen_at) "
+                "VALUES (?, ?)",
+                (event_id, time.time()),
+            )
+            self._conn.commit()
+            self._adds_since_purge += 1
+            if self._adds_since_purge >= PURGE_INTERVAL:
+                self._purge_expired_rows()
+
+    def release(self, event: Any) -> None:
+        """処理に失敗したイベントの記録を取り消し、再送を処理できるようにする
+
+        Args:
+            event: should_process で処理対象と判定したLINEイベント
+        """
+        event_id = getattr(event, "webhook_event_id", None)
+        if not event_id:
+            return
+
+        with self._lock:
+            if self._entries.pop(event_id, None) is not None:
+                metrics.increment("webhook_dedup.releases")
+                metrics.set_gauge("webhook_dedup.size", len(self._entries))
+
+    def _purge_expired_rows(self) -> None:
+        """期限切れのレコードをSQLiteから削除"""
+        self._adds_since_purge = 0
+        self._conn.execute(
+            "DELETE FROM webhook_events WHERE seen_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+        self._conn.commit()
+
+    async def close(self) -> None:
+        """永続ストアを閉じる（アプリケーション終了時に呼び出す）"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                logger.info("Webhook dedup store closed")
@@ -0,0 +1,231 @@
+"""LINE応答配信モジュール
+
+このモジュールは、返信トークンの有効期限を考慮して応答を配信する仕組みを提供します。
+エージェント処理が返信トークンの期限内に終わらない場合は、
+期限前に返信トークンで受付メッセージを送り、最終応答はプッシュメッセージで届けます。
+配信経路（reply / push / ack）ごとの送信レイテンシをメトリクスとして記録します。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional
+
+from src.services.line_service.client import LineClient, call_line_api
+from src.services.line_service.constants import (
+    ACK_MESSAGE,
+    REPLY_ACK_MARGIN_SECONDS,
+    REPLY_TOKEN_TTL_SECONDS,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("line_delivery")
+
+
+@dataclass
+class ReplyContext:
+    """返信トークンの状態
+
+    Attributes:
+        reply_token: 返信用トークン
+        push_to: プッシュ送信先（ユーザーID/グループID/ルームID）
+        issued_at: トークン発行時刻（UNIX時間・秒）
+        used: 返信トークンを使用済みかどうか
+    """
+
+    reply_token: str
+    push_to: Optional[str]
+    issued_at: float
+    used: bool = False
+
+    def remaining_seconds(self, ttl_seconds: float) -> float:
+        """返信トークンの残り有効時間（秒）"""
+        return ttl_seconds - (time.time() - self.issued_at)
+
+
+def get_push_target(event: Any) -> Optional[str]:
+    """イベントの送信元からプッシュ送信先を取得
+
+    グループ・ルームでの発言はグループ・ルームに、1対1ではユーザーに送ります。
+
+    Args:
+        event: LINEイベント
+
+    Returns:
+        Optional[str]: 送信先ID（取得できない場合はNone）
+    """
+    source = getattr(event, "source", None)
+    for attr in ("group_id", "room_id", "user_id"):
+        value = getattr(source, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+def get_issued_at(event: Any) -> float:
+    """イベントのタイムスタンプから返信トークンの発行時刻を取得
+
+    Args:
+        event: LINEイベント
+
+    Returns:
+        float: 発行時刻（UNIX時間・秒、取得できない場合は現在時刻）
+    """
+    timestamp = getattr(event, "timestamp", None)
+    if isinstance(timestamp, (int, float)) and timestamp > 0:
+        return timestamp / 1000
+    return time.time()
+
+
+class ReplyDeliveryManager:
+    """返信トークンの期限を管理して応答を配信するクラス
+
+    返信トークンごとの状態を保持し、期限内であれば返信、
+    期限切れや使用済みであればプッシュメッセージで応答を送ります。
+    """
+
+    def __init__(
+        self,
+        line_client: LineClient,
+        ttl_seconds: float = REPLY_TOKEN_TTL_SECONDS,
+        ack_margin_seconds: float = REPLY_ACK_MARGIN_SECONDS,
+        ack_message: str = ACK_MESSAGE,
+    ):
+        """初期化
+
+        Args:
+            line_client: LINE APIクライアント（同期/非同期）
+            ttl_seconds: 返信トークンの有効期限（秒）
+            ack_margin_seconds: 期限の何秒前に受付メッセージを送るか
+            ack_message: 受付メッセージ
+        """
+        self.line_client = line_client
+        self.ttl_seconds = ttl_seconds
+        self.ack_margin_seconds = ack_margin_seconds
+        self.ack_message = ack_message
+        self._contexts: Dict[str, ReplyContext] = {}
+
+    def create_context(self, event: Any) -> ReplyContext:
+        """イベントから返信トークンの状態を作成して登録
+
+        Args:
+            event: LINEイベント
+
+        Returns:
+            ReplyContext: 返信トークンの状態
+        """
+        self._prune_contexts()
+        context = ReplyContext(
+            reply_token=event.reply_token,
+            push_to=get_push_target(event),
+            issued_at=get_issued_at(event),
+        )
+        self._contexts[context.reply_token] = context
+        return context
+
+    def get_context(self, reply_token: str) -> Optional[ReplyContext]:
+        """登録済みの返信トークンの状態を取得"""
+        return self._contexts.get(reply_token)
+
+    def _prune_contexts(self) -> None:
+        """期限を大きく過ぎた返信トークンの状態を破棄"""
+        expired = [
+            token
+            for token, context in self._contexts.items()
+            if context.remaining_seconds(self.ttl_seconds) < -self.ttl_seconds
+        ]
+        for token in expired:
+            del self._contexts[token]
+
+    async def run_with_deadline(
+        self, context: ReplyContext, work: Awaitable[Any]
+    ) -> Any:
+        """処理を実行し、返信トークンの期限が迫ったら受付メッセージを送る
+
+        Args:
+            context: 返信トークンの状態
+            work: 実行する処理（エージェント呼び出しなど）
+
+        Returns:
+            Any: 処理の結果
+        """
+        task = asyncio.ensure_future(work)
+        ack_after = (
+            context.remaining_seconds(self.ttl_seconds)
+            - self.ack_margin_seconds
+        )
+
+        try:
+            if ack_after > 0:
+                done, _ = await asyncio.wait({task}, timeout=ack_after)
+                if task in done:
+                    return task.result()
+
+            # 期限が迫っているので返信トークンで受付メッセージを送る
+            if not context.used:
+                try:
+                    await self._reply(context, self.ack_message, path="ack")
+                except Exception as e:
+                    logger.warning(f"Failed to send acknowledgement: {e}")
+
+            return await task
+        except asyncio.CancelledError:
+            # 呼び出し元がキャンセルされた場合は処理も止める
+            task.cancel()
+            raise
+
+    async def send(self, context: ReplyContext, text: str) -> str:
+        """返信トークンの状態に応じて返信またはプッシュで応答を送信
+
+        Args:
+            context: 返信トークンの状態
+            text: 送信するテキスト
+
+        Returns:
+            str: 使用した配信経路（"reply" または "push"）
+
+        Raises:
+            Exception: 返信もプッシュも送信できなかった場合
+        """
+        if (
+            not context.used
+            and context.remaining_seconds(self.ttl_seconds) > 0
+        ):
+            try:
+                await self._reply(context, text, path="reply")
+                return "reply"
+            except Exception as e:
+                if not context.push_to:
+                    raise
+                logger.warning(f"Reply failed, falling back to push: {e}")
+                metrics.increment("line_delivery.reply_fallbacks")
+
+        if not context.push_to:
+            raise RuntimeError("Reply token is unavailable and no push target")
+
+        await self._push(context.push_to, text)
+        return "push"
+
+    async def _reply(self, context: ReplyContext, text: str, path: str) -> None:
+        """返信トークンで送信し、経路別のレイテンシを記録"""
+        started_at = time.monotonic()
+        # 失敗しても再利用できないため、送信前に使用済みとする
+        context.used = True
+        await call_line_api(self.line_client.reply_text, context.reply_token, text)
+        metrics.increment(f"line_delivery.{path}")
+        metrics.observe(
+            f"line_delivery.{path}_seconds", time.monotonic() - started_at
+        )
+        metrics.observe(
+            "line_delivery.token_age_seconds", time.time() - context.issued_at
+        )
+
+    async def _push(self, to: str, text: str) -> None:
+        """プッシュメッセージで送信し、レイテンシを記録"""
+        started_at = time.monotonic()
+        await call_line_api(self.line_client.push_text, to, text)
+        metrics.increment("line_delivery.push")
+        metrics.observe(
+            "line_delivery.push_seconds", time.monotonic() - started_at
+        )
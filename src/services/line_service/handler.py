@@ -16,8 +16,12 @@ from src.services.agent_service_impl import (
     call_agent_async,
     call_agent_with_image_async,
 )
-from src.services.line_service.client import LineClient
+from src.services.intent_router import DEFAULT_IMAGE_MESSAGE
+from src.services.line_service.client import LineClient, call_line_api
 from src.services.line_service.constants import ERROR_MESSAGE
+from src.services.line_service.dedup import WebhookEventDeduplicator
+from src.services.line_service.delivery import ReplyDeliveryManager
+from src.services.line_service.progress import ProgressReporter
 from src.utils.logger import setup_logger
 
 logger = setup_logger("line_handler")
@@ -30,22 +34,34 @@ class LineEventHandler:
     各種メッセージタイプに応じた処理を提供します。
     """
 
-    def __init__(self, line_client: Optional[LineClient] = None):
+    def __init__(
+        self,
+        line_client: Optional[LineClient] = None,
+        deduplicator: Optional[WebhookEventDeduplicator] = None,
+        delivery: Optional[ReplyDeliveryManager] = None,
+    ):
         """初期化
 
         Args:
-            line_client: LINE APIクライアント（未指定時は新規作成）
+            line_client: LINE APIクライアント（同期/非同期、未指定時は新規作成）
+            deduplicator: 再送イベントの重複排除ストア（未指定時は無効）
+            delivery: 応答配信マネージャー（未指定時は新規作成）
         """
         self.line_client = line_client or LineClient()
+        self.deduplicator = deduplicator
+        self.delivery = delivery or ReplyDeliveryManager(self.line_client)
 
     async def handle_text_message(
         self, event: MessageEvent, text_content: TextMessageContent
-    ) -> None:
+    ) -> bool:
         """テキストメッセージの処理
 
         Args:
             event: LINEメッセージイベント
             text_content: テキストメッセージ内容
+
+        Returns:
+            bool: 返信まで成功した場合True（失敗時はエラーメッセージを返信してFalse）
         """
         user_id = event.source.user_id
         reply_token = event.reply_token
@@ -55,11 +71,20 @@ class LineEventHandler:
             f"{text_content.text[:100]}..."
         )
 
+        context = self.delivery.create_context(event)
+        progress = ProgressReporter(self.line_client, event)
+
         try:
-            # エージェントに問い合わせ
-            reply_text = await call_agent_async(
-                text_content.text,
-                user_id=user_id,
+            await progress.start()
+
+            # エージェントに問い合わせ（返信トークンの期限が迫れば受付メッセージを送信）
+            reply_text = await self.delivery.run_with_deadline(
+                context,
+                call_agent_async(
+                    text_content.text,
+                    user_id=user_id,
+                    progress_callback=progress,
+                ),
             )
             # reply_textが文字列であることを確認
             if isinstance(reply_text, list):
@@ -69,22 +94,27 @@ class LineEventHandler:
 
             reply_text = reply_text.rstrip("\n")
 
-            # 返信を送信
-            self.line_client.reply_text(reply_token, reply_text)
-            logger.info(f"Successfully replied to {user_id}")
+            # 返信を送信（トークンが使えない場合はプッシュ）
+            path = await self.delivery.send(context, reply_text)
+            logger.info(f"Successfully replied to {user_id} via {path}")
+            return True
 
         except Exception as e:
             logger.exception(f"Error processing text message: {e}")
-            self._handle_error_reply(reply_token)
+            await self._handle_error_reply(reply_token)
+            return False
 
     async def handle_image_message(
         self, event: MessageEvent, image_content: ImageMessageContent
-    ) -> None:
+    ) -> bool:
         """画像メッセージの処理
 
         Args:
             event: LINEメッセージイベント
             image_content: 画像メッセージ内容
+
+        Returns:
+            bool: 返信まで成功した場合True（失敗時はエラーメッセージを返信してFalse）
         """
         user_id = event.source.user_id
         reply_token = event.reply_token
@@ -93,30 +123,40 @@ class LineEventHandler:
             f"Processing image message from {user_id}: {image_content.id}"
         )
 
-        try:
-            # 画像データを取得
-            image_data = self.line_client.get_message_content(image_content.id)
+        context = self.delivery.create_context(event)
+        progress = ProgressReporter(self.line_client, event)
 
-            # デフォルトメッセージ（画像のみの場合）
-            default_message = (
-                "この画像からレシピを抽出してNotionに登録してください"
+        async def extract_from_image() -> str:
+            await progress.start()
+
+            # 画像データを取得
+            image_data = await call_line_api(
+                self.line_client.get_message_content, image_content.id
             )
 
-            # エージェントに問い合わせ
-            reply_text = await call_agent_with_image_async(
-                message=default_message,
+            # エージェントに問い合わせ（画像のみのため既定のメッセージを付ける）
+            return await call_agent_with_image_async(
+                message=DEFAULT_IMAGE_MESSAGE,
                 image_data=image_data,
                 image_mime_type="image/jpeg",  # LINEは通常JPEG
                 user_id=user_id,
+                progress_callback=progress,
+            )
+
+        try:
+            reply_text = await self.delivery.run_with_deadline(
+                context, extract_from_image()
             )
             reply_text = reply_text.rstrip("\n")
 
-            # 返信を送信
-            self.line_client.reply_text(reply_token, reply_text)
+            # 返信を送信（トークンが使えない場合はプッシュ）
+            await self.delivery.send(context, reply_text)
+            return True
 
         except Exception as e:
             logger.exception(f"Error processing image message: {e}")
-            self._handle_error_reply(reply_token)
+            await self._handle_error_reply(reply_token)
+            return False
 
     async def handle_event(self, event: MessageEvent) -> None:
         """イベントハンドラのエントリーポイント
@@ -124,32 +164,55 @@ class LineEventHandler:
         Args:
             event: LINEメッセージイベント
         """
+        # 再送された処理済み（処理中）のイベントはスキップ
+        # （重複排除ストアは記録数を __len__ で返すため、空でも無効と判定しない）
+        deduplicator = self.deduplicator
+        if deduplicator is not None and not deduplicator.should_process(event):
+            return
+
+        handled = False
         try:
             # メッセージタイプに応じて処理を分岐
             if isinstance(event.message, TextMessageContent):
-                await self.handle_text_message(event, event.message)
+                handled = await self.handle_text_message(event, event.message)
 
             elif isinstance(event.message, ImageMessageContent):
-                await self.handle_image_message(event, event.message)
+                handled = await self.handle_image_message(event, event.message)
 
             else:
                 logger.info(f"Unsupported message type: {type(event.message)}")
-                self.line_client.reply_text(
+                await call_line_api(
+                    self.line_client.reply_text,
                     event.reply_token,
                     "申し訳ございません。このメッセージタイプには対応していません。",
                 )
+                handled = True
 
         except Exception as e:
             logger.exception(f"Error in handle_event: {e}")
-            self._handle_error_reply(event.reply_token)
+            await self._handle_error_reply(event.reply_token)
 
-    def _handle_error_reply(self, reply_token: str) -> None:
+        finally:
+            # 処理に失敗（中断）したイベントは、LINEからの再送を処理できるようにする
+            if deduplicator is not None:
+                if handled:
+                    deduplicator.mark_processed(event)
+                else:
+                    deduplicator.release(event)
+
+    async def _handle_error_reply(self, reply_token: str) -> None:
         """エラー時の返信処理
 
         Args:
             reply_token: 返信用トークン
         """
         try:
-            self.line_client.reply_text(reply_token, ERROR_MESSAGE)
+            context = self.delivery.get_context(reply_token)
+            if context is not None:
+                await self.delivery.send(context, ERROR_MESSAGE)
+            else:
+                await call_line_api(
+                    self.line_client.reply_text, reply_token, ERROR_MESSAGE
+                )
         except Exception as e:
             logger.exception(f"Failed to send error message: {e}")
@@ -0,0 +1,131 @@
+"""LINE進捗通知モジュール
+
+このモジュールは、エージェント処理の途中経過（ステップ完了）をLINEに通知する
+仕組みを提供します。1対1トークではローディングアニメーションを更新し、
+プッシュ方式ではステップ完了メッセージを送ります。
+いずれも最小送信間隔で間引き、APIの呼び出し回数を抑えます。
+"""
+
+import time
+from typing import Any, Optional
+
+from config import LINE_PROGRESS_MODE
+from src.services.line_service.client import LineClient, call_line_api
+from src.services.line_service.constants import (
+    LOADING_ANIMATION_SECONDS,
+    PROGRESS_MIN_INTERVAL_SECONDS,
+    PROGRESS_MODE_LOADING,
+    PROGRESS_MODE_OFF,
+    PROGRESS_MODE_PUSH,
+)
+from src.services.line_service.delivery import get_push_target
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("line_progress")
+
+
+def get_loading_chat_id(event: Any) -> Optional[str]:
+    """ローディングアニメーションの表示先を取得
+
+    ローディングアニメーションは1対1トークでのみ表示できるため、
+    グループ・ルームでの発言の場合はNoneを返します。
+
+    Args:
+        event: LINEイベント
+
+    Returns:
+        Optional[str]: 表示先のユーザーID
+    """
+    user_id = getattr(getattr(event, "source", None), "user_id", None)
+    if isinstance(user_id, str) and get_push_target(event) == user_id:
+        return user_id
+    return None
+
+
+class ProgressReporter:
+    """1件のメッセージ処理に対する進捗通知
+
+    AgentServiceの進捗通知コールバックとして呼び出されます。
+    通知の失敗はログに記録するのみで、呼び出し元には伝播しません。
+    """
+
+    def __init__(
+        self,
+        line_client: LineClient,
+        event: Any,
+        mode: str = LINE_PROGRESS_MODE,
+        min_interval_seconds: float = PROGRESS_MIN_INTERVAL_SECONDS,
+        loading_seconds: int = LOADING_ANIMATION_SECONDS,
+    ):
+        """初期化
+
+        Args:
+            line_client: LINE APIクライアント（同期/非同期）
+            event: 処理中のLINEイベント
+            mode: 通知方式（loading / push / off）
+            min_interval_seconds: 通知の最小送信間隔（秒）
+            loading_seconds: ローディングアニメーションの表示秒数
+        """
+        self.line_client = line_client
+        self.mode = mode
+        self.min_interval_seconds = min_interval_seconds
+        self.loading_seconds = loading_seconds
+        self.chat_id = get_loading_chat_id(event)
+        self.push_to = get_push_target(event)
+        self._last_sent_at: Optional[float] = None
+
+    async def start(self) -> None:
+        """処理開始時にローディングアニメーションを表示"""
+        if self.mode == PROGRESS_MODE_LOADING and self.chat_id:
+            await self._show_loading()
+
+    async def __call__(self, author: str, message: str) -> None:
+        """ステップ完了を通知（最小送信間隔内の通知は間引く）
+
+        Args:
+            author: 完了したエージェント名
+            message: 進捗メッセージ
+        """
+        if self.mode == PROGRESS_MODE_OFF:
+            return
+
+        now = time.monotonic()
+        if (
+            self._last_sent_at is not None
+            and now - self._last_sent_at < self.min_interval_seconds
+        ):
+            metrics.increment("line_progress.skipped")
+            logger.debug(f"Progress update throttled: {author}")
+            return
+
+        if self.mode == PROGRESS_MODE_LOADING and self.chat_id:
+            await self._show_loading()
+        elif self.mode == PROGRESS_MODE_PUSH and self.push_to:
+            await self._push(message)
+
+    async def _show_loading(self) -> None:
+        """ローディングアニメーションを表示（表示中の場合は延長）"""
+        self._last_sent_at = time.monotonic()
+        try:
+            await call_line_api(
+                self.line_client.show_loading_animation,
+                self.chat_id,
+                self.loading_seconds,
+            )
+            metrics.increment("line_progress.loading")
+        except Exception as e:
+            metrics.increment("line_progress.failed")
+            logger.warning(f"Failed to refresh loading animation: {e}")
+
+    async def _push(self, message: str) -> None:
+        """進捗メッセージをプッシュ送信"""
+        self._last_sent_at = time.monotonic()
+        try:
+            await call_line_api(
+                self.line_client.push_text, self.push_to, f"⏳ {message}"
+            )
+            metrics.increment("line_progress.push")
+        except Exception as e:
+            metrics.increment("line_progress.failed")
+            logger.warning(f"Failed to push progress update: {e}")
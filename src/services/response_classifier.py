@@ -0,0 +1,198 @@
+"""エージェント応答分類モジュール
+
+このモジュールは、エージェントのイベントテキストを中間応答・最終応答・エラーに
+分類する仕組みを提供します。判定用のパターン一覧を1つの正規表現に1度だけコンパイルし、
+各イベントのテキストを1回の走査で分類します。
+
+パターン一覧ごとに `in` で繰り返し走査していた従来の判定と同じ結果を返します。
+"""
+
+import re
+from typing import Dict, Iterable, NamedTuple
+
+# 分類の種類（ビットフラグ）
+INTERMEDIATE = 1
+COMPLETION = 2
+ERROR = 4
+EMPTY = 8
+
+# コードブロックの記号とJSONコードブロックの開始記号
+CODE_FENCE = "```"
+JSON_FENCE = "```json"
+
+# コードブロックを含む短い応答（JSON断片など）とみなす文字数
+SHORT_FRAGMENT_LENGTH = 50
+
+
+def build_trie_pattern(words: Iterable[str]) -> str:
+    """文字列の一覧から、共通の接頭辞をまとめた正規表現を作成
+
+    各位置では一致するもののうち最長の文字列に一致します。
+    単純に「|」でつないだ正規表現より、候補の絞り込みが速くなります。
+
+    Args:
+        words: 文字列の一覧（空文字を含まないこと）
+
+    Returns:
+        str: 正規表現のパターン
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # 途中で終わる文字列がある場合は、続きを任意にする（長い方を優先）
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class ResponseLabel(NamedTuple):
+    """応答テキストの分類結果
+
+    Attributes:
+        intermediate: Sequential Agentの中間応答かどうか
+        completion: 最終応答（完了・登録エラーの報告）かどうか
+        error: エラーを示す表現を含むかどうか
+        empty: 空白のみかどうか
+    """
+
+    intermediate: bool
+    completion: bool
+    error: bool
+    empty: bool
+
+
+# 分類結果はビットフラグの組み合わせごとに1つだけ作成して使い回す
+_LABELS = tuple(
+    ResponseLabel(
+        bool(flags & INTERMEDIATE),
+        bool(flags & COMPLETION),
+        bool(flags & ERROR),
+        bool(flags & EMPTY),
+    )
+    for flags in range(16)
+)
+
+
+class ResponseClassifier:
+    """パターン一覧から1度だけコンパイルした正規表現で応答を分類するクラス"""
+
+    def __init__(
+        self,
+        intermediate_patterns: Iterable[str],
+        completion_indicators: Iterable[str],
+        error_indicators: Iterable[str],
+    ):
+        """初期化
+
+        Args:
+            intermediate_patterns: 中間応答を示すパターン
+            completion_indicators: 最終応答を示すパターン
+            error_indicators: エラーを示すパターン
+        """
+        kinds: Dict[str, int] = {}
+        for kind, patterns in (
+            (INTERMEDIATE, intermediate_patterns),
+            (COMPLETION, completion_indicators),
+            (ERROR, error_indicators),
+        ):
+            for pattern in patterns:
+                if pattern:
+                    kinds[pattern] = kinds.get(pattern, 0) | kind
+
+        # パターンが出現すれば、その部分文字列であるパターンも出現している
+        self._kinds = {
+            pattern: self._closure(pattern, kinds) for pattern in kinds
+        }
+
+        # 共通の接頭辞をまとめた正規表現で、各位置の最長のパターンに一致させる
+        alternatives = sorted(self._kinds, key=len, reverse=True)
+        self._pattern = (
+            re.compile(build_trie_pattern(alternatives)) if alternatives else None
+        )
+
+        # 一致は重ならないように進むため、一致したパターンの途中から始まって
+        # その先まで続くパターンは見落とし得る。これらだけ個別に確認する
+        self._followers = {
+            pattern: tuple(
+                (other, self._kinds[other])
+                for other in alternatives
+                if self._may_start_inside(other, pattern)
+            )
+            for pattern in alternatives
+        }
+
+    @staticmethod
+    def _closure(pattern: str, kinds: Dict[str, int]) -> int:
+        """パターンと、その部分文字列であるパターンの種類をまとめる"""
+        result = 0
+        for other, kind in kinds.items():
+            if other in pattern:
+                result |= kind
+        return result
+
+    @staticmethod
+    def _may_start_inside(pattern: str, matched: str) -> bool:
+        """一致した文字列の途中から始まり、その先まで続く出現があり得るかどうか"""
+        for start in range(1, len(matched)):
+            suffix = matched[start:]
+            if len(suffix) < len(pattern) and pattern.startswith(suffix):
+                return True
+        return False
+
+    def match_kinds(self, text: str) -> int:
+        """テキストに含まれるパターンの種類を取得
+
+        Args:
+            text: 対象のテキスト
+
+        Returns:
+            int: 種類のビットフラグ（INTERMEDIATE / COMPLETION / ERROR）
+        """
+        if self._pattern is None:
+            return 0
+        matches = self._pattern.findall(text)
+        found = 0
+        kinds = self._kinds
+        followers = self._followers
+        for matched in matches:
+            found |= kinds[matched]
+            for pattern, kind in followers[matched]:
+                if kind & ~found and pattern in text:
+                    found |= kind
+        return found
+
+    def classify(self, text: str) -> ResponseLabel:
+        """応答テキストを分類
+
+        Args:
+            text: 応答テキスト
+
+        Returns:
+            ResponseLabel: 分類結果
+        """
+        stripped = text.strip()
+        flags = self.match_kinds(text)
+
+        if not stripped:
+            flags |= EMPTY
+        elif not flags & INTERMEDIATE and CODE_FENCE in stripped:
+            # JSON形式のみの応答、またはJSON断片などの短い応答
+            if (
+                stripped.startswith(JSON_FENCE) and stripped.endswith(CODE_FENCE)
+            ) or len(stripped) < SHORT_FRAGMENT_LENGTH:
+                flags |= INTERMEDIATE
+
+        return _LABELS[flags]
@@ -0,0 +1,305 @@
+"""再試行ポリシーモジュール
+
+このモジュールは、モデル呼び出しの失敗を再試行するかどうかを決める仕組みを提供します。
+例外の型とステータスコードでエラーを分類し、指数バックオフとジッターで待機時間を決め、
+プロセス全体で共有する再試行予算（トークンバケット）で再試行の連鎖的な増加を防ぎます。
+
+- classify_error: 例外を再試行の観点で分類
+- RetryBudget: プロセス全体の再試行予算
+- RetryPolicy: 1回の失敗ごとに再試行するかどうかと待機時間を決める
+"""
+
+import asyncio
+import random
+import threading
+import time
+from enum import Enum
+from typing import Callable, NamedTuple, Optional
+
+import httpx
+
+from config import (
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_BUDGET_CAPACITY,
+    RETRY_BUDGET_REFILL_PER_SECOND,
+    RETRY_MAX_DELAY_SECONDS,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("retry_policy")
+
+# 既定の最大試行回数（初回を含む）
+DEFAULT_MAX_ATTEMPTS = 3
+
+# 新しいリクエスト1件ごとに再試行予算へ加えるトークン数
+RETRY_BUDGET_REQUEST_RATIO = 0.2
+
+# レート制限時は待機時間の基準をこの倍率で長くする
+RATE_LIMIT_DELAY_MULTIPLIER = 2.0
+
+# 一時的な障害とみなすHTTPステータスコードとgRPCステータス
+TRANSIENT_STATUS_CODES = frozenset({500, 502, 503, 504})
+TRANSIENT_STATUSES = frozenset({"INTERNAL", "UNAVAILABLE", "DEADLINE_EXCEEDED"})
+RATE_LIMIT_STATUS_CODE = 429
+RATE_LIMIT_STATUS = "RESOURCE_EXHAUSTED"
+
+# 接続・タイムアウトなど、リクエストが処理されなかった可能性が高い例外
+TRANSIENT_EXCEPTIONS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+# トークン制限エラーのメッセージに含まれる表現
+TOKEN_LIMIT_KEYWORDS = ("limit", "length", "too long", "exceed")
+
+
+class ErrorKind(str, Enum):
+    """再試行の観点でのエラーの分類"""
+
+    TRANSIENT = "transient"  # サーバー側の一時的な障害（待機して再試行）
+    RATE_LIMITED = "rate_limited"  # レート制限（長めに待機して再試行）
+    TOKEN_LIMIT = "token_limit"  # 入力が大きすぎる（入力を縮めて即時に再試行）
+    PERMANENT = "permanent"  # 再試行しても結果が変わらない
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """例外のHTTPステータスコードを取得（google-genai の APIError.code など）"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and not isinstance(code, bool):
+        return code
+    response = getattr(error, "response", None)
+    code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _is_token_limit_message(text: str) -> bool:
+    """メッセージがトークン制限エラーを示すかどうか"""
+    return (
+        "token" in text and any(keyword in text for keyword in TOKEN_LIMIT_KEYWORDS)
+    ) or "input_token" in text
+
+
+def _classify_message(text: str) -> ErrorKind:
+    """ステータスコードを持たない例外をメッセージから分類（従来の判定）"""
+    if _is_token_limit_message(text):
+        return ErrorKind.TOKEN_LIMIT
+    if "500" in text and ("internal" in text or "gemini" in text):
+        return ErrorKind.TRANSIENT
+    return ErrorKind.PERMANENT
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """例外を再試行の観点で分類
+
+    google-genai の APIError（ClientError / ServerError）はステータスコードと
+    ステータスで分類し、接続・タイムアウトの例外は一時的な障害とします。
+    ステータスコードを持たない例外は、原因の例外を確認したうえでメッセージから判定します。
+
+    Args:
+        error: 例外オブジェクト
+
+    Returns:
+        ErrorKind: エラーの分類
+    """
+    if isinstance(error, TRANSIENT_EXCEPTIONS):
+        return ErrorKind.TRANSIENT
+
+    text = str(error).lower()
+    code = _status_code(error)
+    status = str(getattr(error, "status", "") or "").upper()
+
+    if code == RATE_LIMIT_STATUS_CODE or status == RATE_LIMIT_STATUS:
+        return ErrorKind.RATE_LIMITED
+    if code in TRANSIENT_STATUS_CODES or status in TRANSIENT_STATUSES:
+        return ErrorKind.TRANSIENT
+    if code is not None:
+        # 4xx のうち、入力の大きさが原因のものだけは縮めれば成功し得る
+        if 400 <= code < 500 and _is_token_limit_message(text):
+            return ErrorKind.TOKEN_LIMIT
+        return ErrorKind.PERMANENT
+
+    cause = error.__cause__
+    if cause is not None and cause is not error:
+        kind = classify_error(cause)
+        if kind is not ErrorKind.PERMANENT:
+            return kind
+    return _classify_message(text)
+
+
+class RetryBudget:
+    """プロセス全体で共有する再試行予算（トークンバケット）
+
+    再試行のたびにトークンを1つ消費します。トークンは時間の経過と
+    新しいリクエストの受け付けで補充され、容量を上限とします。
+    障害が続いてトークンが尽きると再試行を止め、負荷を増幅させません。
+    """
+
+    def __init__(
+        self,
+        capacity: float = RETRY_BUDGET_CAPACITY,
+        refill_per_second: float = RETRY_BUDGET_REFILL_PER_SECOND,
+        request_ratio: float = RETRY_BUDGET_REQUEST_RATIO,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初期化
+
+        Args:
+            capacity: トークンの上限（満杯から開始）
+            refill_per_second: 1秒あたりに補充するトークン数
+            request_ratio: 新しいリクエスト1件ごとに補充するトークン数
+            clock: 現在時刻（秒）を返す関数
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.request_ratio = request_ratio
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """経過時間分のトークンを補充（ロック取得済みで呼び出す）"""
+        now = self._clock()
+        elapsed = max(now - self._updated_at, 0.0)
+        self._updated_at = now
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self.refill_per_second
+        )
+
+    @property
+    def tokens(self) -> float:
+        """現在のトークン数"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def record_request(self) -> None:
+        """新しいリクエストの受け付けを記録し、トークンを補充"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + self.request_ratio)
+
+    def try_acquire(self) -> bool:
+        """再試行のためのトークンを1つ取得
+
+        Returns:
+            bool: 取得できた（再試行してよい）場合True
+        """
+        with self._lock:
+            self._refill()
+            acquired = self._tokens >= 1
+            if acquired:
+                self._tokens -= 1
+            tokens = self._tokens
+        metrics.set_gauge("retry.budget_tokens", tokens)
+        return acquired
+
+
+class RetryDecision(NamedTuple):
+    """再試行の判断結果
+
+    Attributes:
+        retry: 再試行するかどうか
+        kind: エラーの分類
+        delay: 再試行までの待機時間（秒）
+        reason: 判断の理由（メトリクス名にも使用）
+    """
+
+    retry: bool
+    kind: ErrorKind
+    delay: float
+    reason: str
+
+
+class RetryPolicy:
+    """エラーの分類と再試行予算から再試行の可否と待機時間を決めるクラス"""
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = RETRY_MAX_DELAY_SECONDS,
+        budget: Optional[RetryBudget] = None,
+        rng: Callable[[], float] = random.random,
+    ):
+        """初期化
+
+        Args:
+            max_attempts: 最大試行回数（初回を含む）
+            base_delay: 1回目の再試行の待機時間の上限（秒）
+            max_delay: 待機時間の上限（秒）
+            budget: 再試行予算（未指定時はプロセス全体で共有する予算）
+            rng: 0以上1未満の乱数を返す関数
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or retry_budget
+        self._rng = rng
+
+    def backoff_delay(
+        self, attempt: int, kind: ErrorKind = ErrorKind.TRANSIENT
+    ) -> float:
+        """指数バックオフとフルジッターで待機時間を計算
+
+        0 から min(max_delay, base_delay * 2 ** attempt) の間で一様に選び、
+        同時に失敗したリクエストの再試行が同じ時刻に集中しないようにします。
+
+        Args:
+            attempt: 失敗した試行の番号（0始まり）
+            kind: エラーの分類
+
+        Returns:
+            float: 待機時間（秒）
+        """
+        base = self.base_delay
+        if kind is ErrorKind.RATE_LIMITED:
+            base *= RATE_LIMIT_DELAY_MULTIPLIER
+        ceiling = min(self.max_delay, base * (2 ** attempt))
+        return ceiling * self._rng()
+
+    def start(self) -> None:
+        """新しいリクエストの開始を記録（再試行予算を補充）"""
+        self.budget.record_request()
+
+    def decide(self, error: BaseException, attempt: int) -> RetryDecision:
+        """失敗した試行を再試行するかどうかを決める
+
+        Args:
+            error: 発生した例外
+            attempt: 失敗した試行の番号（0始まり）
+
+        Returns:
+            RetryDecision: 再試行の判断結果
+        """
+        kind = classify_error(error)
+        metrics.increment(f"retry.errors.{kind.value}")
+
+        if kind is ErrorKind.PERMANENT:
+            decision = RetryDecision(False, kind, 0.0, "non_retryable")
+        elif attempt + 1 >= self.max_attempts:
+            decision = RetryDecision(False, kind, 0.0, "attempts_exhausted")
+        elif kind is ErrorKind.TOKEN_LIMIT:
+            # 入力を縮めて再試行するため、サーバーの負荷を待つ必要はない
+            decision = RetryDecision(True, kind, 0.0, "retried")
+        elif not self.budget.try_acquire():
+            decision = RetryDecision(False, kind, 0.0, "budget_exhausted")
+        else:
+            delay = self.backoff_delay(attempt, kind)
+            metrics.observe("retry.backoff_seconds", delay)
+            decision = RetryDecision(True, kind, delay, "retried")
+
+        metrics.increment(f"retry.decisions.{decision.reason}")
+        if decision.retry:
+            metrics.increment(f"retry.retried.{kind.value}")
+        else:
+            logger.info(f"Not retrying {kind.value} error: {decision.reason}")
+        return decision
+
+
+# プロセス全体で共有する再試行予算
+retry_budget = RetryBudget()
@@ -0,0 +1,284 @@
+"""エージェントセッション掃除モジュール
+
+このモジュールは、InMemorySessionService に蓄積されたセッションを定期的に破棄し、
+長時間稼働するインスタンスのメモリ使用量を抑える仕組みを提供します。
+一定時間使われていないセッションをTTLで破棄し、さらに推定サイズの合計が
+上限を超えている場合は最後の更新が古いものから順に破棄します。
+破棄したセッションに紐づく InMemoryArtifactService のアーティファクトも削除します。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_TOTAL_BYTES,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("session_sweeper")
+
+
+@dataclass
+class SessionEntry:
+    """掃除対象セッションの情報
+
+    Attributes:
+        user_id: ユーザーID
+        session_id: セッションID
+        last_update_time: 最終更新時刻（UNIX時間・秒）
+        size_bytes: 推定サイズ（セッション＋アーティファクト）
+    """
+
+    user_id: str
+    session_id: str
+    last_update_time: float
+    size_bytes: int
+
+
+def estimate_session_bytes(session: Any) -> int:
+    """セッションの推定サイズ（バイト）を取得
+
+    Args:
+        session: ADKのセッションオブジェクト
+
+    Returns:
+        int: JSONにシリアライズした場合のバイト数
+    """
+    try:
+        return len(session.model_dump_json().encode("utf-8"))
+    except Exception:
+        return len(repr(session).encode("utf-8"))
+
+
+def estimate_artifact_bytes(versions: List[Any]) -> int:
+    """アーティファクト（全バージョン）の推定サイズ（バイト）を取得
+
+    Args:
+        versions: アーティファクトのバージョン一覧（types.Part）
+
+    Returns:
+        int: インラインデータとテキストの合計バイト数
+    """
+    total = 0
+    for part in versions:
+        inline_data = getattr(part, "inline_data", None)
+        data = getattr(inline_data, "data", None)
+        if isinstance(data, (bytes, str)):
+            total += len(data)
+        text = getattr(part, "text", None)
+        if isinstance(text, str):
+            total += len(text.encode("utf-8"))
+    return total
+
+
+class SessionSweeper:
+    """TTL と合計サイズ上限でセッションを破棄するクラス
+
+    start() でバックグラウンドタスクを起動し、一定間隔で sweep() を実行します。
+    実行中のセッション（is_busy が True を返すもの）は破棄しません。
+    """
+
+    def __init__(
+        self,
+        session_service: Any,
+        artifact_service: Any,
+        app_name: str,
+        idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS,
+        max_total_bytes: int = SESSION_MAX_TOTAL_BYTES,
+        interval_seconds: float = SESSION_SWEEP_INTERVAL_SECONDS,
+        is_busy: Optional[Callable[[str], bool]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """初期化
+
+        Args:
+            session_service: InMemorySessionService
+            artifact_service: InMemoryArtifactService
+            app_name: アプリケーション名
+            idle_ttl_seconds: 最終更新からセッションを破棄するまでの秒数
+            max_total_bytes: セッションとアーティファクトの合計サイズ上限
+            interval_seconds: 掃除の実行間隔（秒）
+            is_busy: セッションIDを受け取り実行中かどうかを返す関数
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.session_service = session_service
+        self.artifact_service = artifact_service
+        self.app_name = app_name
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_total_bytes = max_total_bytes
+        self.interval_seconds = interval_seconds
+        self.is_busy = is_busy or (lambda session_id: False)
+        self.clock = clock
+        self._size_cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """バックグラウンドタスクが起動しているかどうか"""
+        return self._task is not None
+
+    def _stored_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """保持中のセッション（user_id -> session_id -> Session）を取得"""
+        sessions = getattr(self.session_service, "sessions", None)
+        if not isinstance(sessions, dict):
+            return {}
+        return sessions.get(self.app_name, {})
+
+    def _artifact_prefix(self, user_id: str, session_id: str) -> str:
+        """セッションに紐づくアーティファクトのパスのプレフィックス"""
+        return f"{self.app_name}/{user_id}/{session_id}/"
+
+    def _session_artifact_paths(self, user_id: str, session_id: str) -> List[str]:
+        """セッションに紐づくアーティファクトのパス一覧"""
+        artifacts = getattr(self.artifact_service, "artifacts", None)
+        if not isinstance(artifacts, dict):
+            return []
+        prefix = self._artifact_prefix(user_id, session_id)
+        return [path for path in artifacts if path.startswith(prefix)]
+
+    def _entry_size(self, user_id: str, session_id: str, session: Any) -> int:
+        """セッションとアーティファクトの推定サイズ（更新がなければキャッシュを使用）"""
+        key = (user_id, session_id)
+        last_update_time = getattr(session, "last_update_time", 0.0)
+        cached = self._size_cache.get(key)
+        if cached is not None and cached[0] == last_update_time:
+            return cached[1]
+
+        size = estimate_session_bytes(session)
+        artifacts = getattr(self.artifact_service, "artifacts", {})
+        for path in self._session_artifact_paths(user_id, session_id):
+            size += estimate_artifact_bytes(artifacts[path])
+
+        self._size_cache[key] = (last_update_time, size)
+        return size
+
+    def collect_entries(self) -> List[SessionEntry]:
+        """保持中のセッションを最終更新の古い順に取得
+
+        Returns:
+            List[SessionEntry]: セッション情報の一覧
+        """
+        entries = []
+        for user_id, user_sessions in self._stored_sessions().items():
+            for session_id, session in list(user_sessions.items()):
+                entries.append(
+                    SessionEntry(
+                        user_id=user_id,
+                        session_id=session_id,
+                        last_update_time=getattr(
+                            session, "last_update_time", 0.0
+                        ),
+                        size_bytes=self._entry_size(user_id, session_id, session),
+                    )
+                )
+        entries.sort(key=lambda entry: entry.last_update_time)
+        return entries
+
+    def evict(self, user_id: str, session_id: str) -> None:
+        """セッションと紐づくアーティファクトを破棄
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+        """
+        artifacts = getattr(self.artifact_service, "artifacts", None)
+        for path in self._session_artifact_paths(user_id, session_id):
+            artifacts.pop(path, None)
+
+        user_sessions = self._stored_sessions().get(user_id, {})
+        user_sessions.pop(session_id, None)
+        if not user_sessions:
+            self._stored_sessions().pop(user_id, None)
+
+        self._size_cache.pop((user_id, session_id), None)
+
+    def sweep(self) -> Dict[str, int]:
+        """TTL と合計サイズ上限に従ってセッションを破棄
+
+        Returns:
+            Dict[str, int]: 破棄件数（ttl / lru）と残りのセッション数・合計サイズ
+        """
+        now = self.clock()
+        entries = self.collect_entries()
+        remaining: List[SessionEntry] = []
+        ttl_evicted = 0
+        lru_evicted = 0
+
+        # アイドルTTLを過ぎたセッションを破棄
+        for entry in entries:
+            if (
+                now - entry.last_update_time > self.idle_ttl_seconds
+                and not self.is_busy(entry.session_id)
+            ):
+                self.evict(entry.user_id, entry.session_id)
+                ttl_evicted += 1
+            else:
+                remaining.append(entry)
+
+        # 合計サイズが上限を超えていれば最終更新が古い順に破棄
+        total_bytes = sum(entry.size_bytes for entry in remaining)
+        if total_bytes > self.max_total_bytes:
+            survivors = []
+            for entry in remaining:
+                if total_bytes > self.max_total_bytes and not self.is_busy(
+                    entry.session_id
+                ):
+                    self.evict(entry.user_id, entry.session_id)
+                    total_bytes -= entry.size_bytes
+                    lru_evicted += 1
+                else:
+                    survivors.append(entry)
+            remaining = survivors
+
+        if ttl_evicted:
+            metrics.increment("session_store.evictions_ttl", ttl_evicted)
+        if lru_evicted:
+            metrics.increment("session_store.evictions_lru", lru_evicted)
+        metrics.set_gauge("session_store.sessions", len(remaining))
+        metrics.set_gauge("session_store.bytes", total_bytes)
+
+        if ttl_evicted or lru_evicted:
+            logger.info(
+                f"Evicted {ttl_evicted} idle and {lru_evicted} LRU sessions "
+                f"({len(remaining)} sessions, {total_bytes} bytes resident)"
+            )
+
+        return {
+            "ttl": ttl_evicted,
+            "lru": lru_evicted,
+            "sessions": len(remaining),
+            "bytes": total_bytes,
+        }
+
+    def start(self) -> None:
+        """バックグラウンドの掃除タスクを起動（起動済みの場合は何もしない）"""
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run(), name="session_sweeper")
+        logger.info(
+            f"Session sweeper started (ttl: {self.idle_ttl_seconds}s, "
+            f"budget: {self.max_total_bytes} bytes)"
+        )
+
+    async def _run(self) -> None:
+        """一定間隔で掃除を実行"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception(f"Session sweep failed: {e}")
+
+    async def stop(self) -> None:
+        """バックグラウンドの掃除タスクを停止"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Session sweeper stopped")
@@ -0,0 +1,391 @@
+"""インスタンス間共有セッションストアモジュール
+
+このモジュールは、複数のインスタンス（Cloud Runのスケールアウトや複数のuvicornワーカー）
+でセッションを共有するためのストアと、ローカルのセッションサービスとの同期処理を提供します。
+
+- SharedSessionStore: バージョン付きでセッションを保存する抽象ストア
+- LocalSessionStore: プロセス内で完結するストア（テスト・単一インスタンス用）
+- HttpSessionStore: HTTPのキーバリューストアに接続するネットワークアダプター
+- SessionSynchronizer: エージェント実行前に共有ストアから取得し、実行後に書き戻す
+
+書き込みは楽観的ロック（バージョン一致時のみ成功）で行い、他のインスタンスが先に
+書き込んでいた場合は、最新のセッションに今回追加したイベントを積み直して再試行します。
+"""
+
+import abc
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from src.services.sqlite_session_service import (
+    deserialize_session,
+    serialize_session,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("shared_session_store")
+
+# 競合時に最新のセッションへ積み直して再試行する最大回数
+MAX_PUSH_ATTEMPTS = 3
+
+# 永続化しない一時状態のプレフィックス（ADKの State.TEMP_PREFIX）
+TEMP_STATE_PREFIX = "temp:"
+
+
+class VersionConflictError(Exception):
+    """期待したバージョンと保存済みのバージョンが一致しない場合の例外"""
+
+
+@dataclass
+class StoredSession:
+    """共有ストアに保存されたセッション
+
+    Attributes:
+        data: シリアライズしたセッション（未更新の場合はNone）
+        version: 保存済みのバージョン
+    """
+
+    data: Optional[bytes]
+    version: int
+
+
+class SharedSessionStore(abc.ABC):
+    """バージョン付きでセッションを保存する共有ストアの抽象クラス"""
+
+    @abc.abstractmethod
+    async def get(
+        self, key: str, known_version: Optional[int] = None
+    ) -> Optional[StoredSession]:
+        """セッションを取得
+
+        Args:
+            key: セッションのキー
+            known_version: 手元にあるバージョン（一致すればデータを返さない）
+
+        Returns:
+            Optional[StoredSession]: 保存済みのセッション（未保存の場合はNone、
+            known_version と一致する場合は data が None）
+        """
+
+    @abc.abstractmethod
+    async def put(
+        self, key: str, data: bytes, expected_version: Optional[int]
+    ) -> int:
+        """セッションを保存（バージョンが一致する場合のみ）
+
+        Args:
+            key: セッションのキー
+            data: シリアライズしたセッション
+            expected_version: 保存済みのはずのバージョン（Noneは未保存であること）
+
+        Returns:
+            int: 保存後のバージョン
+
+        Raises:
+            VersionConflictError: バージョンが一致しない場合
+        """
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """セッションを削除"""
+
+    async def close(self) -> None:
+        """接続を閉じる"""
+
+
+class LocalSessionStore(SharedSessionStore):
+    """プロセス内の辞書で実装した共有ストア
+
+    ネットワークストアと同じ振る舞いをするため、テストや単一インスタンスでの
+    動作確認に使用します。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._items: Dict[str, Tuple[bytes, int]] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(
+        self, key: str, known_version: Optional[int] = None
+    ) -> Optional[StoredSession]:
+        """セッションを取得"""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        data, version = item
+        if known_version == version:
+            return StoredSession(data=None, version=version)
+        return StoredSession(data=data, version=version)
+
+    async def put(
+        self, key: str, data: bytes, expected_version: Optional[int]
+    ) -> int:
+        """セッションを保存（バージョンが一致する場合のみ）"""
+        async with self._lock:
+            item = self._items.get(key)
+            current_version = item[1] if item else None
+            if current_version != expected_version:
+                raise VersionConflictError(
+                    f"Expected version {expected_version}, "
+                    f"found {current_version}: {key}"
+                )
+            version = (current_version or 0) + 1
+            self._items[key] = (data, version)
+            return version
+
+    async def delete(self, key: str) -> None:
+        """セッションを削除"""
+        self._items.pop(key, None)
+
+
+class HttpSessionStore(SharedSessionStore):
+    """HTTPのキーバリューストアに接続する共有ストア
+
+    以下のAPIを持つストア（Cloud Run上の共有ストアサービスなど）を想定します。
+    バージョンはETagで受け渡します。
+
+    - GET    {base_url}/sessions/{key}  If-None-Match で 304、未保存で 404
+    - PUT    {base_url}/sessions/{key}  If-Match（更新）/ If-None-Match: *（新規）、
+                                         不一致で 412
+    - DELETE {base_url}/sessions/{key}
+    """
+
+    def __init__(self, base_url: str, timeout_seconds: float = 5.0, **client_kwargs):
+        """初期化
+
+        Args:
+            base_url: ストアのベースURL
+            timeout_seconds: リクエストのタイムアウト（秒）
+            **client_kwargs: httpx.AsyncClient に渡す追加の引数
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(timeout=timeout_seconds, **client_kwargs)
+
+    def _url(self, key: str) -> str:
+        """セッションのURL"""
+        return f"{self.base_url}/sessions/{quote(key, safe='')}"
+
+    @staticmethod
+    def _version(response: httpx.Response) -> int:
+        """ETagからバージョンを取得"""
+        return int(response.headers["ETag"].strip('"'))
+
+    async def get(
+        self, key: str, known_version: Optional[int] = None
+    ) -> Optional[StoredSession]:
+        """セッションを取得"""
+        headers = {}
+        if known_version is not None:
+            headers["If-None-Match"] = f'"{known_version}"'
+        response = await self._client.get(self._url(key), headers=headers)
+        if response.status_code == 404:
+            return None
+        if response.status_code == 304:
+            return StoredSession(data=None, version=known_version)
+        response.raise_for_status()
+        return StoredSession(data=response.content, version=self._version(response))
+
+    async def put(
+        self, key: str, data: bytes, expected_version: Optional[int]
+    ) -> int:
+        """セッションを保存（バージョンが一致する場合のみ）"""
+        if expected_version is None:
+            headers = {"If-None-Match": "*"}
+        else:
+            headers = {"If-Match": f'"{expected_version}"'}
+        response = await self._client.put(
+            self._url(key), content=data, headers=headers
+        )
+        if response.status_code in (409, 412):
+            raise VersionConflictError(
+                f"Version conflict on {key} (expected {expected_version})"
+            )
+        response.raise_for_status()
+        return self._version(response)
+
+    async def delete(self, key: str) -> None:
+        """セッションを削除"""
+        response = await self._client.delete(self._url(key))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async def close(self) -> None:
+        """HTTPクライアントを閉じる"""
+        await self._client.aclose()
+
+
+def apply_event(session: Any, event: Any) -> None:
+    """イベントをセッションに反映（BaseSessionService.append_event と同じ規則）
+
+    Args:
+        session: セッション
+        event: 反映するイベント
+    """
+    if getattr(event, "partial", False):
+        return
+    state_delta = getattr(getattr(event, "actions", None), "state_delta", None)
+    if state_delta:
+        for key, value in state_delta.items():
+            if not key.startswith(TEMP_STATE_PREFIX):
+                session.state[key] = value
+    session.events.append(event)
+    session.last_update_time = event.timestamp
+
+
+class SessionSynchronizer:
+    """ローカルのセッションサービスと共有ストアを同期するクラス
+
+    エージェント実行前に pull() で共有ストアの最新セッションをローカルに反映し、
+    実行後に push() で今回追加されたイベントを共有ストアに書き戻します。
+    ローカルのセッションサービスは InMemorySessionService を想定します。
+    """
+
+    def __init__(self, session_service: Any, store: SharedSessionStore, app_name: str):
+        """初期化
+
+        Args:
+            session_service: ローカルのセッションサービス（InMemorySessionService）
+            store: 共有ストア
+            app_name: アプリケーション名
+        """
+        self.session_service = session_service
+        self.store = store
+        self.app_name = app_name
+        # セッションごとの（同期済みバージョン, 同期時点のイベント数）
+        self._synced: Dict[str, Tuple[Optional[int], int]] = {}
+
+    def _key(self, user_id: str, session_id: str) -> str:
+        """共有ストアのキー"""
+        return f"{self.app_name}/{user_id}/{session_id}"
+
+    def _local_sessions(self, user_id: str) -> Dict[str, Any]:
+        """ローカルに保持中のユーザーのセッション（session_id -> Session）"""
+        return self.session_service.sessions.setdefault(self.app_name, {}).setdefault(
+            user_id, {}
+        )
+
+    async def pull(self, user_id: str, session_id: str) -> None:
+        """共有ストアの最新セッションをローカルに反映
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+        """
+        key = self._key(user_id, session_id)
+        started_at = time.monotonic()
+        local_sessions = self._local_sessions(user_id)
+        known_version = (
+            self._synced.get(key, (None, 0))[0]
+            if session_id in local_sessions
+            else None
+        )
+
+        stored = await self.store.get(key, known_version)
+        metrics.observe(
+            "shared_session.pull_seconds", time.monotonic() - started_at
+        )
+
+        if stored is None:
+            # 同期済みのセッションが消えている場合は他インスタンスで削除されたもの
+            if known_version is not None:
+                local_sessions.pop(session_id, None)
+            self._synced[key] = (None, 0)
+            return
+
+        if stored.data is None:
+            metrics.increment("shared_session.not_modified")
+            return
+
+        session = deserialize_session(stored.data)
+        local_sessions[session_id] = session
+        self._synced[key] = (stored.version, len(session.events))
+        metrics.increment("shared_session.pulled")
+
+    def note_compacted(
+        self, user_id: str, session_id: str, removed_events: int
+    ) -> None:
+        """ローカルのセッションの履歴を圧縮したことを記録
+
+        圧縮で減ったイベント数だけ同期時点のイベント数を減らし、
+        以降に追加されたイベントを正しく書き戻せるようにします。
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+            removed_events: 圧縮で減ったイベント数
+        """
+        key = self._key(user_id, session_id)
+        if key in self._synced:
+            version, base_count = self._synced[key]
+            self._synced[key] = (version, max(base_count - removed_events, 0))
+
+    async def push(self, user_id: str, session_id: str) -> Optional[int]:
+        """今回追加されたイベントを共有ストアに書き戻す
+
+        他のインスタンスが先に書き込んでいた場合は、最新のセッションに
+        今回追加したイベントを積み直して再試行します。
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+
+        Returns:
+            Optional[int]: 保存後のバージョン（ローカルにセッションがない場合はNone）
+
+        Raises:
+            VersionConflictError: 再試行しても競合が解消しない場合
+        """
+        key = self._key(user_id, session_id)
+        session = self._local_sessions(user_id).get(session_id)
+        if session is None:
+            return None
+
+        version, base_count = self._synced.get(key, (None, 0))
+        new_events: List[Any] = list(session.events[base_count:])
+        if version is not None and not new_events:
+            return version
+
+        started_at = time.monotonic()
+        for attempt in range(MAX_PUSH_ATTEMPTS):
+            try:
+                version = await self.store.put(
+                    key, serialize_session(session), version
+                )
+                break
+            except VersionConflictError:
+                metrics.increment("shared_session.conflicts")
+                logger.info(
+                    f"Session {key} was updated by another instance, "
+                    f"rebasing {len(new_events)} events "
+                    f"(attempt {attempt + 1}/{MAX_PUSH_ATTEMPTS})"
+                )
+                if attempt == MAX_PUSH_ATTEMPTS - 1:
+                    raise
+                session, version = await self._rebase(key, session, new_events)
+                self._local_sessions(user_id)[session_id] = session
+
+        self._synced[key] = (version, len(session.events))
+        metrics.increment("shared_session.pushed")
+        metrics.observe(
+            "shared_session.push_seconds", time.monotonic() - started_at
+        )
+        return version
+
+    async def _rebase(
+        self, key: str, local_session: Any, new_events: List[Any]
+    ) -> Tuple[Any, Optional[int]]:
+        """共有ストアの最新セッションに今回のイベントを積み直す"""
+        stored = await self.store.get(key)
+        if stored is None:
+            # 他のインスタンスで削除された場合は新規として保存し直す
+            return local_session, None
+
+        session = deserialize_session(stored.data)
+        for event in new_events:
+            apply_event(session, event)
+        return session, stored.version
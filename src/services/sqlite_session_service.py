@@ -0,0 +1,566 @@
+"""SQLite永続化セッションサービスモジュール
+
+このモジュールは、ADKのセッションをローカルのSQLiteファイルに永続化する
+セッションサービスを提供します。再起動やスケールアウト後も会話の文脈を保持できます。
+
+- 直近に使われたセッションはメモリ上のLRU（ホット層）に保持し、読み込みを高速化
+- 更新はすぐには書き込まず、一定件数または一定時間ごとにまとめて書き込む（write-behind）
+- セッションはJSONをzlib圧縮したコンパクトな形式で保存
+- 書き込みと期限切れの行の削除は、バックグラウンドタスクからワーカースレッドで実行
+
+app:/user: プレフィックス付きの状態はセッションの状態としてそのまま保存します。
+"""
+
+import asyncio
+import copy
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListEventsResponse,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+
+from config import (
+    SESSION_DB_TTL_SECONDS,
+    SESSION_FLUSH_BATCH_SIZE,
+    SESSION_FLUSH_INTERVAL_SECONDS,
+    SESSION_HOT_CACHE_SIZE,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("sqlite_session_service")
+
+# セッションのキー（app_name, user_id, session_id）
+SessionKey = Tuple[str, str, str]
+
+
+def serialize_session(session: Session) -> bytes:
+    """セッションを保存用の圧縮バイト列に変換
+
+    Args:
+        session: セッション
+
+    Returns:
+        bytes: zlib圧縮したJSON
+    """
+    payload = session.model_dump_json(exclude_none=True)
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def deserialize_session(data: bytes) -> Session:
+    """保存用の圧縮バイト列からセッションを復元
+
+    Args:
+        data: zlib圧縮したJSON
+
+    Returns:
+        Session: 復元したセッション
+    """
+    return Session.model_validate_json(zlib.decompress(data))
+
+
+class SQLiteSessionService(BaseSessionService):
+    """SQLiteに永続化し、メモリ上のLRUを前段に置くセッションサービス
+
+    InMemorySessionService と同様に、呼び出し元にはセッションのコピーを返し、
+    append_event で保持中のセッションにもイベントを反映します。
+
+    start() でバックグラウンドタスクを起動すると、書き込みと期限切れの行の削除は
+    ワーカースレッドで実行され、イベントループを止めません。起動前は、条件を満たした
+    時点で呼び出し元のスレッドで書き込みます。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        hot_cache_size: int = SESSION_HOT_CACHE_SIZE,
+        flush_interval_seconds: float = SESSION_FLUSH_INTERVAL_SECONDS,
+        flush_batch_size: int = SESSION_FLUSH_BATCH_SIZE,
+        ttl_seconds: float = SESSION_DB_TTL_SECONDS,
+        purge_interval_seconds: float = SESSION_SWEEP_INTERVAL_SECONDS,
+    ):
+        """初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+            hot_cache_size: メモリ上に保持するセッションの最大数
+            flush_interval_seconds: 未書き込みの更新を書き込むまでの最大秒数
+            flush_batch_size: この件数の更新がたまったら書き込む
+            ttl_seconds: 最終更新から行を削除するまでの秒数（0以下で無期限）
+            purge_interval_seconds: 期限切れの行を削除する間隔（秒）
+        """
+        if hot_cache_size < 1:
+            raise ValueError("hot_cache_size must be at least 1")
+
+        self.db_path = db_path
+        self.hot_cache_size = hot_cache_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self._hot: "OrderedDict[SessionKey, Session]" = OrderedDict()
+        self._dirty: Set[SessionKey] = set()
+        # 書き込み中のセッション（書き込みが終わるまでホット層から追い出さない）
+        self._flushing: Set[SessionKey] = set()
+        self._last_flush_at = time.monotonic()
+        self._last_purge_at: Optional[float] = None
+        # メモリ上の状態を守るロックと、接続を守るロック
+        # （両方を取る場合は必ず _lock → _db_lock の順）
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "app_name TEXT NOT NULL, user_id TEXT NOT NULL, "
+            "session_id TEXT NOT NULL, data BLOB NOT NULL, "
+            "update_time REAL NOT NULL, "
+            "PRIMARY KEY (app_name, user_id, session_id))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_update_time "
+            "ON sessions (update_time)"
+        )
+        self._conn.commit()
+        logger.info(f"SQLite session store opened: {db_path}")
+
+    def __len__(self) -> int:
+        """ホット層に保持しているセッション数"""
+        return len(self._hot)
+
+    @property
+    def pending_writes(self) -> int:
+        """未書き込みのセッション数"""
+        return len(self._dirty)
+
+    def _read(self, key: SessionKey) -> Optional[Session]:
+        """SQLiteからセッションを読み込む（ホット層には追加しない）"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions "
+                "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            ).fetchone()
+        if row is None:
+            return None
+        return deserialize_session(row[0])
+
+    def _load(self, key: SessionKey) -> Optional[Session]:
+        """保持中のセッションを取得（ホット層になければSQLiteから読み込む）"""
+        session = self._hot.get(key)
+        if session is not None:
+            self._hot.move_to_end(key)
+            metrics.increment("session_store.hot_hits")
+            return session
+
+        metrics.increment("session_store.hot_misses")
+        session = self._read(key)
+        if session is None:
+            return None
+        self._put_hot(key, session)
+        return session
+
+    async def preload_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        """ホット層にないセッションを、イベントループの外でSQLiteから読み込む
+
+        続く get_session などの同期呼び出しがホット層から取得できるよう、
+        会話の処理を始める前に呼び出します。
+        """
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            if key in self._hot:
+                return
+
+        session = await asyncio.to_thread(self._read, key)
+        if session is None:
+            return
+        with self._lock:
+            # 読み込み中に作成・読み込みされていれば、そちらを優先
+            if key not in self._hot:
+                metrics.increment("session_store.preloads")
+                self._put_hot(key, session)
+
+    def _put_hot(self, key: SessionKey, session: Session) -> None:
+        """ホット層に追加し、上限を超えた古いものから追い出す"""
+        self._hot[key] = session
+        self._hot.move_to_end(key)
+        self._trim_hot()
+
+    def _trim_hot(self, allow_flush: bool = True) -> None:
+        """ホット層を上限まで追い出す
+
+        未書き込み・書き込み中のセッションは追い出しません。それらしか残っていない
+        場合、バックグラウンドタスクの起動中は書き込みを依頼して一時的に上限を超え、
+        起動前はその場で書き込んでから追い出します。
+        """
+        while len(self._hot) > self.hot_cache_size:
+            # 直前に追加・使用したセッション（末尾）は追い出さない
+            newest = next(reversed(self._hot))
+            evictable = next(
+                (
+                    key
+                    for key in self._hot
+                    if key != newest
+                    and key not in self._dirty
+                    and key not in self._flushing
+                ),
+                None,
+            )
+            if evictable is not None:
+                del self._hot[evictable]
+                metrics.increment("session_store.hot_evictions")
+                continue
+            if not allow_flush:
+                break
+            if self._flush_task is None and self._dirty:
+                allow_flush = False
+                self.flush()
+                continue
+            self._request_flush()
+            break
+        metrics.set_gauge("session_store.hot_sessions", len(self._hot))
+
+    def _request_flush(self) -> None:
+        """バックグラウンドタスクに書き込みを依頼"""
+        if self._flush_requested is not None:
+            self._flush_requested.set()
+
+    def _mark_dirty(self, key: SessionKey) -> None:
+        """更新ありとして記録し、条件を満たせばまとめて書き込む"""
+        self._dirty.add(key)
+        if (
+            len(self._dirty) >= self.flush_batch_size
+            or time.monotonic() - self._last_flush_at
+            >= self.flush_interval_seconds
+        ):
+            if self._flush_task is None:
+                self.flush()
+            else:
+                self._request_flush()
+
+    def flush(self) -> int:
+        """未書き込みのセッションを1つのトランザクションで書き込む
+
+        シリアライズと書き込みの間はメモリ上の状態のロックを解放するため、
+        ワーカースレッドから呼び出してもイベントループ側の読み書きを妨げません。
+
+        Returns:
+            int: 書き込んだセッション数
+        """
+        with self._lock:
+            self._last_flush_at = time.monotonic()
+            if not self._dirty or self._conn is None:
+                return 0
+
+            sessions = [
+                (key, self._hot[key]) for key in self._dirty if key in self._hot
+            ]
+            keys = set(self._dirty)
+            self._dirty.clear()
+            self._flushing.update(keys)
+            # 書き込み順が取り出し順と一致するよう、ロックを解放する前に接続を確保
+            self._db_lock.acquire()
+
+        started_at = time.monotonic()
+        written = False
+        try:
+            rows = [
+                (*key, serialize_session(session), session.last_update_time)
+                for key, session in sessions
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions "
+                "(app_name, user_id, session_id, data, update_time) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            written = True
+        finally:
+            self._db_lock.release()
+            with self._lock:
+                self._flushing.difference_update(keys)
+                if not written:
+                    # 次回の書き込みで再試行
+                    self._dirty.update(keys)
+                self._trim_hot(allow_flush=False)
+
+        metrics.increment("session_store.flushes")
+        metrics.observe(
+            "session_store.flush_seconds", time.monotonic() - started_at
+        )
+        return len(rows)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """最終更新から ttl_seconds を過ぎた行をSQLiteから削除
+
+        ホット層にあるセッションと未書き込みのセッションは削除しません
+        （ホット層からは LRU で追い出され、その後の削除対象になります）。
+
+        Args:
+            now: 現在時刻（UNIX時間・秒、未指定時は time.time()）
+
+        Returns:
+            int: 削除した行数
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        with self._lock:
+            self._last_purge_at = time.monotonic()
+            if self._conn is None:
+                return 0
+            resident = set(self._hot) | self._dirty | self._flushing
+            self._db_lock.acquire()
+
+        try:
+            expired = [
+                key
+                for key in self._conn.execute(
+                    "SELECT app_name, user_id, session_id FROM sessions "
+                    "WHERE update_time < ?",
+                    (cutoff,),
+                ).fetchall()
+                if key not in resident
+            ]
+            if expired:
+                self._conn.executemany(
+                    "DELETE FROM sessions "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    expired,
+                )
+                self._conn.commit()
+        finally:
+            self._db_lock.release()
+
+        if expired:
+            metrics.increment("session_store.expired", len(expired))
+            logger.info(f"Expired {len(expired)} stored sessions")
+        return len(expired)
+
+    def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        """セッションを作成"""
+        session_id = (
+            session_id.strip()
+            if session_id and session_id.strip()
+            else str(uuid.uuid4())
+        )
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=state or {},
+            last_update_time=time.time(),
+        )
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._put_hot(key, session)
+            self._mark_dirty(key)
+        return copy.deepcopy(session)
+
+    def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """セッションを取得（保持中のセッションのコピーを返す）"""
+        started_at = time.monotonic()
+        with self._lock:
+            session = self._load((app_name, user_id, session_id))
+            if session is None:
+                return None
+            copied_session = copy.deepcopy(session)
+        metrics.observe(
+            "session_store.get_seconds", time.monotonic() - started_at
+        )
+
+        if config:
+            if config.num_recent_events:
+                copied_session.events = copied_session.events[
+                    -config.num_recent_events:
+                ]
+            if config.after_timestamp:
+                copied_session.events = [
+                    event
+                    for event in copied_session.events
+                    if event.timestamp >= config.after_timestamp
+                ]
+        return copied_session
+
+    def get_stored_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> Optional[Session]:
+        """保持中のセッション本体を取得（コピーせずに返す）
+
+        履歴の圧縮など、保持中のセッションを直接書き換える場合に使用します。
+        書き換えた後は mark_session_updated を呼び出してください。
+        """
+        with self._lock:
+            return self._load((app_name, user_id, session_id))
+
+    def mark_session_updated(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        """保持中のセッションを直接書き換えたことを記録（次回の書き込み対象にする）"""
+        with self._lock:
+            self._mark_dirty((app_name, user_id, session_id))
+
+    def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        """ユーザーのセッション一覧を取得（イベントと状態は含まない）"""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT session_id, update_time FROM sessions "
+                "WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    last_update_time=update_time,
+                )
+                for session_id, update_time in rows
+            ]
+        )
+
+    def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        """セッションを削除"""
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._hot.pop(key, None)
+            self._dirty.discard(key)
+            with self._db_lock:
+                self._conn.execute(
+                    "DELETE FROM sessions "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    key,
+                )
+                self._conn.commit()
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        """イベントを追加（呼び出し元のセッションと保持中のセッションの両方に反映）"""
+        if event.partial:
+            return event
+
+        started_at = time.monotonic()
+        super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            storage_session = self._load(key)
+            if storage_session is None:
+                return event
+            super().append_event(session=storage_session, event=event)
+            storage_session.last_update_time = event.timestamp
+            self._mark_dirty(key)
+
+        metrics.observe(
+            "session_store.append_seconds", time.monotonic() - started_at
+        )
+        return event
+
+    def list_events(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+    ) -> ListEventsResponse:
+        """セッションのイベント一覧を取得"""
+        session = self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        return ListEventsResponse(events=session.events if session else [])
+
+    def start(self) -> None:
+        """書き込みと期限切れの行の削除を行うバックグラウンドタスクを起動"""
+        if self._flush_task is None:
+            self._flush_requested = asyncio.Event()
+            self._flush_task = asyncio.create_task(
+                self._run_flusher(), name="session_store_flusher"
+            )
+
+    async def _run_flusher(self) -> None:
+        """依頼または一定間隔ごとに、ワーカースレッドで書き込む
+
+        更新が途絶えても書き込みが遅れないよう定期的に書き込み、
+        purge_interval_seconds ごとに期限切れの行も削除します。
+        """
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), self.flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.exception(f"Session store flush failed: {e}")
+
+            if (
+                self._last_purge_at is None
+                or time.monotonic() - self._last_purge_at
+                >= self.purge_interval_seconds
+            ):
+                try:
+                    await asyncio.to_thread(self.purge_expired)
+                except Exception as e:
+                    logger.exception(f"Session store purge failed: {e}")
+
+    async def close(self) -> None:
+        """未書き込みの更新を書き込んでSQLiteを閉じる"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+            self._flush_requested = None
+
+        if self._conn is None:
+            return
+        await asyncio.to_thread(self.flush)
+        with self._lock, self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None
+            logger.info("SQLite session store closed")
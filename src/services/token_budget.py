@@ -0,0 +1,265 @@
+"""入力トークン予算モジュール
+
+このモジュールは、エージェント実行前にモデルへの入力トークン数を見積もり、
+予算に収まるようにメッセージと会話履歴を調整する仕組みを提供します。
+モデルに拒否されてから短縮・再試行するのではなく、初回の実行で収まる大きさにします。
+
+- TokenEstimator: tiktoken でトークン数を数える（利用できない環境では概算）
+- fit_text: 予算に収まる最長の先頭部分を文の区切りで二分探索
+- TokenBudget: メッセージと履歴に予算を割り当てる
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from config import MODEL_INPUT_TOKEN_BUDGET, TOKEN_ENCODING
+from src.services.history_compactor import IMAGE_TOKENS, estimate_tokens
+from src.utils.logger import setup_logger
+
+logger = setup_logger("token_budget")
+
+# メッセージを短縮したときに末尾に付ける注記
+TRUNCATION_NOTE = "（メッセージが長すぎるため一部省略しました）"
+
+# 文の区切りとみなす文字
+SENTENCE_ENDINGS = "。！？!?\n"
+
+# 文の区切りで切る位置が、文字単位で切れる位置のこの割合未満なら文字単位で切る
+MIN_SENTENCE_CUT_RATIO = 0.7
+
+# 履歴が残るよう、メッセージに割り当てる予算の上限割合
+MESSAGE_MAX_SHARE = 0.75
+
+
+class TokenEstimator:
+    """テキストのトークン数を数えるクラス
+
+    tiktoken のエンコーディングは preload() で起動時に読み込みます（未読み込みの場合は
+    初回使用時に読み込みます）。読み込めない場合（未インストール・オフラインなど）は
+    文字種による概算を使用します。
+    """
+
+    def __init__(self, encoding_name: str = TOKEN_ENCODING):
+        """初期化
+
+        Args:
+            encoding_name: tiktoken のエンコーディング名
+        """
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def backend(self) -> str:
+        """使用中の数え方（"tiktoken" または "heuristic"）"""
+        return "tiktoken" if self._load() is not None else "heuristic"
+
+    def _load(self):
+        """tiktoken のエンコーディングを読み込む（失敗時はNone）"""
+        if not self._loaded:
+            self._loaded = True
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+                logger.info(f"Token estimator uses tiktoken: {self.encoding_name}")
+            except Exception as e:
+                logger.warning(
+                    f"tiktoken is unavailable, using heuristic estimation: {e}"
+                )
+        return self._encoding
+
+    async def preload(self) -> None:
+        """tiktoken のエンコーディングを別スレッドで読み込む
+
+        エンコーディングの読み込み（初回はダウンロードを含む）でイベントループを
+        止めないよう、起動時に呼び出します。読み込み中の見積もりは概算を使用します。
+        """
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    def count(self, text: str) -> int:
+        """テキストのトークン数を取得
+
+        Args:
+            text: 対象のテキスト
+
+        Returns:
+            int: トークン数
+        """
+        if not text:
+            return 0
+        encoding = self._load()
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+
+def _largest_fitting(
+    candidates: Sequence[int], fits: Callable[[int], bool]
+) -> Optional[int]:
+    """昇順の候補から条件を満たす最大の値を二分探索で取得（条件は単調とする）"""
+    low, high = 0, len(candidates) - 1
+    best = None
+    while low <= high:
+        middle = (low + high) // 2
+        if fits(candidates[middle]):
+            best = candidates[middle]
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def sentence_boundaries(text: str) -> List[int]:
+    """文の区切りの直後の位置を取得
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        List[int]: 区切りの直後の位置（昇順）
+    """
+    return [index + 1 for index, char in enumerate(text) if char in SENTENCE_ENDINGS]
+
+
+def fit_text(
+    text: str,
+    max_tokens: int,
+    count: Callable[[str], int] = estimate_tokens,
+    note: str = TRUNCATION_NOTE,
+) -> str:
+    """予算に収まるようにテキストを先頭から切り詰める
+
+    予算に収まる最長の位置を二分探索し、その範囲で最後の文の区切りで切ります。
+    区切りが見つからない、または手前すぎる場合は文字単位で切ります。
+
+    Args:
+        text: 対象のテキスト
+        max_tokens: 注記を含めたトークン数の上限
+        count: テキストのトークン数を返す関数
+        note: 切り詰めた場合に末尾に付ける注記
+
+    Returns:
+        str: 予算に収まるテキスト（収まる場合は元のテキスト）
+    """
+    if count(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - count(note)
+    cut = _largest_fitting(
+        range(1, len(text)), lambda index: count(text[:index]) <= budget
+    )
+    if cut is None:
+        return note
+
+    boundaries = [index for index in sentence_boundaries(text) if index <= cut]
+    if boundaries and boundaries[-1] >= cut * MIN_SENTENCE_CUT_RATIO:
+        cut = boundaries[-1]
+    return text[:cut] + note
+
+
+@dataclass
+class BudgetPlan:
+    """予算の割り当て結果
+
+    Attributes:
+        message: 予算に収まるよう調整したメッセージ
+        message_tokens: 調整後のメッセージのトークン数
+        history_tokens: 調整前の履歴のトークン数
+        history_budget: 履歴に割り当てたトークン数
+        truncated: メッセージを短縮したかどうか
+    """
+
+    message: str
+    message_tokens: int
+    history_tokens: int
+    history_budget: int
+    truncated: bool
+
+    @property
+    def needs_compaction(self) -> bool:
+        """履歴の圧縮が必要かどうか"""
+        return self.history_tokens > self.history_budget
+
+    @property
+    def adjusted(self) -> bool:
+        """予算に収めるために調整したかどうか"""
+        return self.truncated or self.needs_compaction
+
+
+class TokenBudget:
+    """入力トークンの予算をメッセージと会話履歴に割り当てるクラス"""
+
+    def __init__(
+        self,
+        max_input_tokens: int = MODEL_INPUT_TOKEN_BUDGET,
+        estimator: Optional[TokenEstimator] = None,
+        message_max_share: float = MESSAGE_MAX_SHARE,
+    ):
+        """初期化
+
+        Args:
+            max_input_tokens: 1回の実行での入力トークン数の予算
+            estimator: トークン数の見積もり（未指定時は TokenEstimator）
+            message_max_share: メッセージに割り当てる予算の上限割合
+        """
+        self.max_input_tokens = max_input_tokens
+        self.estimator = estimator or TokenEstimator()
+        self.message_max_share = message_max_share
+
+    async def preload(self) -> None:
+        """トークン数の見積もりに使うエンコーディングを読み込む"""
+        await self.estimator.preload()
+
+    def count(self, text: str) -> int:
+        """テキストのトークン数を取得"""
+        return self.estimator.count(text)
+
+    def fit_message(self, message: str, max_tokens: int) -> str:
+        """メッセージを指定のトークン数に収まるよう文の区切りで切り詰める
+
+        Args:
+            message: 元のメッセージ
+            max_tokens: トークン数の上限
+
+        Returns:
+            str: 上限に収まるメッセージ
+        """
+        return fit_text(message, max_tokens, self.count)
+
+    def plan(
+        self, message: str, history_tokens: int, has_image: bool = False
+    ) -> BudgetPlan:
+        """メッセージと履歴に予算を割り当てる
+
+        合計が予算を超える場合、メッセージが上限割合を超えていれば短縮し、
+        残りを履歴の予算とします（履歴は呼び出し元で圧縮します）。
+
+        Args:
+            message: ユーザーからのメッセージ
+            history_tokens: 会話履歴のトークン数
+            has_image: 画像を含むかどうか
+
+        Returns:
+            BudgetPlan: 予算の割り当て結果
+        """
+        available = self.max_input_tokens - (IMAGE_TOKENS if has_image else 0)
+        message_tokens = self.count(message)
+        truncated = False
+
+        message_limit = int(available * self.message_max_share)
+        over_budget = message_tokens + history_tokens > available
+        if over_budget and message_tokens > message_limit:
+            message = self.fit_message(message, message_limit)
+            message_tokens = self.count(message)
+            truncated = True
+
+        return BudgetPlan(
+            message=message,
+            message_tokens=message_tokens,
+            history_tokens=history_tokens,
+            history_budget=max(available - message_tokens, 0),
+            truncated=truncated,
+        )
@@ -1,7 +1,267 @@
+import ast
+import math
+import re
+import unicodedata
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from typing import Optional, Union
+
 from src.utils.logger import setup_logger
 
 logger = setup_logger("calculator_tool")
 
+# 四則演算の式として受け付ける最大文字数と、式に含められる要素数の上限
+MAX_EXPRESSION_LENGTH = 200
+MAX_EXPRESSION_NODES = 100
+
+# べき乗の指数の上限と、結果の桁数の上限（巨大な計算で処理が止まらないように）
+MAX_EXPONENT = 1000
+MAX_RESULT_DIGITS = 1000
+
+# 割り切れない結果を表示する小数点以下の最大桁数
+MAX_DISPLAY_DECIMALS = 10
+
+# 日本語の演算子・全角記号の置き換え（NFKC正規化の後に適用）
+_OPERATOR_WORDS = [
+    ("たす", "+"),
+    ("足す", "+"),
+    ("プラス", "+"),
+    ("ひく", "-"),
+    ("引く", "-"),
+    ("マイナス", "-"),
+    ("かける", "*"),
+    ("掛ける", "*"),
+    ("×", "*"),
+    ("わる", "/"),
+    ("割る", "/"),
+    ("÷", "/"),
+    ("−", "-"),
+    ("^", "**"),
+]
+
+# 式の前後の問いかけ（「は？」「を計算して」など）
+_QUESTION_PREFIX = re.compile(r"^(?:計算して|けいさんして)[:：]?")
+_QUESTION_SUFFIX = re.compile(
+    r"(?:を(?:計算|けいさん)(?:して)?(?:ください)?"
+    r"|(?:は|って)?(?:いくつ|いくら|何|なに|なん)?(?:ですか|でしょう)?)"
+    r"[=?？!！。\s]*$"
+)
+
+# 数字と演算子・括弧のみからなる式
+_ARITHMETIC_PATTERN = re.compile(r"[\d.\s+\-*/%()]+")
+_OPERATOR_PATTERN = re.compile(r"\d[\s)]*(?:\*\*|[+\-*/%])[\s(+\-]*[\d.]")
+
+# 式の形だが日付・電話番号とみなすもの（2025/10/17、090-1234-5678 など）
+_NOT_ARITHMETIC_PATTERN = re.compile(r"\d{4}[/-]\d{1,2}[/-]\d{1,2}|0\d+-\d+-\d+")
+
+# 日付・番号とも計算式とも読める式。演算子の言葉や「は？」などの問いかけがない場合は
+# 計算式とみなさない
+# - 月日（10/17、12-25 など）と年月（2025-10 など）
+# - 3つ以上の数字をハイフンでつないだもの（1-800-555-1212 など）
+_AMBIGUOUS_PATTERN = re.compile(
+    r"(?:0?[1-9]|1[0-2])[/-](?:0?[1-9]|[12]\d|3[01])"
+    r"|\d{4}-(?:0?[1-9]|1[0-2])"
+    r"|\d+(?:-\d+){2,}"
+)
+
+# 桁区切りのカンマ（1,000 → 1000）
+_THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+Number = Union[int, float]
+
+
+def normalize_expression(text: str) -> str:
+    """日本語の演算子・全角の数字や記号を含む式をPythonの式に正規化
+
+    Args:
+        text: ユーザーが入力した式（例: 「１２３×４５は？」）
+
+    Returns:
+        str: 正規化した式（例: 「123*45」）
+    """
+    expression = unicodedata.normalize("NFKC", text).strip()
+    expression = _QUESTION_PREFIX.sub("", expression)
+    expression = _QUESTION_SUFFIX.sub("", expression)
+    for word, operator in _OPERATOR_WORDS:
+        expression = expression.replace(word, operator)
+    expression = _THOUSANDS_SEPARATOR.sub("", expression)
+    return expression.strip()
+
+
+def _to_fraction(value: Number) -> Fraction:
+    """数値リテラルを誤差のない分数に変換（0.1 は 1/10 として扱う）"""
+    return Fraction(repr(value)) if isinstance(value, float) else Fraction(value)
+
+
+def _power(base: Fraction, exponent: Fraction) -> Fraction:
+    """大きさを制限したべき乗"""
+    if exponent.denominator != 1:
+        # 整数でない指数は浮動小数点で計算する
+        result = float(base) ** float(exponent)
+        if isinstance(result, complex) or math.isinf(result) or math.isnan(result):
+            raise ValueError("計算結果が実数の範囲を超えています。")
+        return _to_fraction(result)
+
+    power = exponent.numerator
+    if abs(power) > MAX_EXPONENT:
+        raise ValueError(f"指数は{MAX_EXPONENT}以下にしてください。")
+    if base != 0 and abs(power) > 1:
+        digits = max(
+            abs(math.log10(abs(base.numerator))),
+            math.log10(base.denominator),
+        ) * abs(power)
+        if digits > MAX_RESULT_DIGITS:
+            raise ValueError("計算結果が大きすぎます。")
+    if base == 0 and power < 0:
+        raise ZeroDivisionError("0で割ることはできません。")
+    return base**power
+
+
+_BINARY_OPERATORS = {
+    ast.Add: lambda left, right: left + right,
+    ast.Sub: lambda left, right: left - right,
+    ast.Mult: lambda left, right: left * right,
+    ast.Div: lambda left, right: left / right,
+    ast.FloorDiv: lambda left, right: Fraction(left // right),
+    ast.Mod: lambda left, right: left % right,
+    ast.Pow: _power,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: lambda operand: operand,
+    ast.USub: lambda operand: -operand,
+}
+
+
+def _evaluate_node(node: ast.AST) -> Fraction:
+    """許可した構文のみからなる式の木を分数で評価"""
+    if isinstance(node, ast.Expression):
+        return _evaluate_node(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _to_fraction(node.value)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left = _evaluate_node(node.left)
+        right = _evaluate_node(node.right)
+        if right == 0 and isinstance(
+            node.op, (ast.Div, ast.FloorDiv, ast.Mod)
+        ):
+            raise ZeroDivisionError("0で割ることはできません。")
+        return _BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_evaluate_node(node.operand))
+    raise ValueError(f"使用できない式です: {type(node).__name__}")
+
+
+def evaluate_fraction(expression: str) -> Fraction:
+    """四則演算・べき乗・剰余の式を誤差のない分数で評価
+
+    式は構文木に変換し、数値と許可した演算子のみを評価します（eval は使用しません）。
+
+    Args:
+        expression: Pythonの構文の式（normalize_expression で正規化したもの）
+
+    Returns:
+        Fraction: 計算結果
+
+    Raises:
+        ValueError: 式が不正・大きすぎる場合
+        ZeroDivisionError: 0で割った場合
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"式は{MAX_EXPRESSION_LENGTH}文字以内にしてください。")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"式を解釈できません: {expression}") from e
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ValueError("式が長すぎます。")
+    return _evaluate_node(tree)
+
+
+def to_number(value: Fraction) -> Number:
+    """分数を整数（割り切れる場合）または浮動小数点数に変換
+
+    Raises:
+        ValueError: 浮動小数点数で表せないほど大きい場合
+    """
+    if value.denominator == 1:
+        return value.numerator
+    try:
+        return value.numerator / value.denominator
+    except OverflowError as e:
+        raise ValueError("計算結果が大きすぎます。") from e
+
+
+def format_number(value: Fraction) -> str:
+    """分数を表示用の文字列に変換（割り切れない場合は小数点以下を丸める）"""
+    if value.denominator == 1:
+        return str(value.numerator)
+    # 分数のまま丸めてから、丸めた値の全桁を表せる精度で小数に変換する
+    # （既定の28桁の精度では、整数部の大きい値を丸められない）
+    rounded = round(value, MAX_DISPLAY_DECIMALS)
+    with localcontext() as context:
+        context.prec = len(str(abs(rounded.numerator))) + MAX_DISPLAY_DECIMALS
+        decimal = Decimal(rounded.numerator) / Decimal(rounded.denominator)
+        text = format(decimal.normalize(), "f")
+    # 丸めた場合は省略記号を付ける
+    return text if rounded == value else f"{text}…"
+
+
+def parse_arithmetic(text: str) -> Optional[str]:
+    """テキストが計算式のみからなる場合に、正規化した式を取得
+
+    数字が2つ以上あり、演算子で結ばれている場合のみ計算式とみなします。
+    文章を含むなど判断できない場合は None を返します。
+
+    Args:
+        text: ユーザーからのメッセージ
+
+    Returns:
+        Optional[str]: 正規化した式（計算式でない場合はNone）
+    """
+    if not text or len(text) > MAX_EXPRESSION_LENGTH:
+        return None
+    expression = normalize_expression(text)
+    if not _ARITHMETIC_PATTERN.fullmatch(expression):
+        return None
+    if not _OPERATOR_PATTERN.search(expression):
+        return None
+    if _NOT_ARITHMETIC_PATTERN.fullmatch(expression):
+        return None
+    if _AMBIGUOUS_PATTERN.fullmatch(unicodedata.normalize("NFKC", text).strip()):
+        return None
+    return expression
+
+
+def evaluate_arithmetic(text: str) -> Optional[dict]:
+    """計算式のみのメッセージをLLMを使わずに計算
+
+    Args:
+        text: ユーザーからのメッセージ（例: 「123*45は？」「１２÷４」）
+
+    Returns:
+        Optional[dict]: 計算ツールと同じ形式の結果（計算式でない場合はNone）
+    """
+    expression = parse_arithmetic(text)
+    if expression is None:
+        return None
+    try:
+        value = evaluate_fraction(expression)
+        return {
+            "status": "success",
+            "result": to_number(value),
+            "expression": f"{expression} = {format_number(value)}",
+        }
+    except ZeroDivisionError:
+        return {
+            "status": "error",
+            "error_message": "計算中にエラーが発生しました: 0で割ることはできません。",
+        }
+    except (ValueError, ArithmeticError) as e:
+        # 式の形だが計算・表示できないもの（浮動小数点数の範囲外など）はエージェントに任せる
+        logger.info(f"Arithmetic fast path skipped: {e}")
+        return None
+
 
 # 計算機能を実装する関数
 def add_numbers(num1: int, num2: int) -> dict:
@@ -110,9 +370,39 @@ def divide_numbers(num1: int, num2: int) -> dict:
         }
 
 
+# 式を計算する関数
+def evaluate_expression(expression: str) -> dict:
+    """複数の演算を含む式を1回で計算する関数
+
+    四則演算・括弧・べき乗（**）・剰余（%）を含む式を、誤差のない分数で計算します。
+    「×」「÷」などの記号や全角の数字も使用できます。
+
+    Args:
+        expression (str): 計算する式（例: "(3+4)*5/2"）
+
+    Returns:
+        dict: 計算結果を含む辞書
+    """
+    logger.info(f"Evaluating expression: {expression}")
+    try:
+        normalized = normalize_expression(expression)
+        value = evaluate_fraction(normalized)
+        return {
+            "status": "success",
+            "result": to_number(value),
+            "expression": f"{normalized} = {format_number(value)}",
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"計算中にエラーが発生しました: {str(e)}",
+        }
+
+
 calculator_tools_list = [
     add_numbers,
     subtract_numbers,
     multiply_numbers,
     divide_numbers,
+    evaluate_expression,
 ]
@@ -0,0 +1,533 @@
+"""MCPサーバーとの接続管理モジュール
+
+このモジュールは、MCPサーバーとの接続をアプリケーションの稼働中ずっと保持し、
+サイドカーの再起動などで切れた接続を自動的に張り直す仕組みを提供します。
+
+- ManagedMCPTool: エージェントに渡すMCPツール。再接続すると中身のツールだけが
+  新しい接続のものに差し替わるため、エージェントは同じ参照を使い続けられます
+- MCPConnectionManager: サーバーごとの接続（exit スタック）を保持し、切断を検知すると
+  指数バックオフで再接続します。障害が続く間はサーキットブレーカーを開き、
+  ツール呼び出しをタイムアウトまで待たせずにすぐ失敗させます
+
+MCPのSSE接続は anyio のキャンセルスコープを含み、開いたタスクでしか閉じられないため、
+接続ごとに保持用のタスクを起動し、開いてから閉じるまでをそのタスクで行います。
+
+ツールのスキーマのキャッシュ（MCPSchemaCache）がある場合は、キャッシュしたスキーマから
+すぐにツールを作成し、MCPサーバーへの接続はバックグラウンドで行います。
+"""
+
+import asyncio
+import random
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio
+import httpx
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.openapi_tool.openapi_spec_parser.rest_api_tool import (
+    to_gemini_schema,
+)
+from google.genai.types import FunctionDeclaration
+from mcp.types import Tool as McpBaseTool
+
+from config import (
+    MCP_CALL_TIMEOUT_SECONDS,
+    MCP_CIRCUIT_FAILURE_THRESHOLD,
+    MCP_CIRCUIT_RESET_SECONDS,
+    MCP_ENABLED,
+    MCP_RECONNECT_BASE_DELAY_SECONDS,
+    MCP_RECONNECT_MAX_DELAY_SECONDS,
+)
+from src.tools.mcp_integration import MCP_SERVERS, MCPServer, _connect_server
+from src.tools.mcp_schema_cache import MCPSchemaCache, mcp_schema_cache
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("mcp_connection_manager")
+
+# 接続が切れたとみなす例外（MCPのSSEセッション・HTTP接続の異常）
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+    ConnectionError,
+)
+
+ConnectFunc = Callable[
+    [MCPServer], Awaitable[Optional[Tuple[List[Any], AsyncExitStack]]]
+]
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """例外（原因の例外を含む）が接続の異常によるものかどうか
+
+    ADK の MCPTool は、切断時のセッション再作成に失敗すると RuntimeError で
+    包んで送出するため、原因の例外までたどって判定します。
+    """
+    while error is not None:
+        if isinstance(error, CONNECTION_ERRORS):
+            return True
+        error = error.__cause__
+    return False
+
+
+class ManagedMCPTool(BaseTool):
+    """再接続しても同じ参照で使えるMCPツール
+
+    ツールの定義はスキーマから作成し、呼び出しは現在の接続の MCPTool に委ねます。
+    呼び出しは MCPConnectionManager を経由し、タイムアウトと障害の記録を行います。
+    """
+
+    def __init__(
+        self,
+        manager: "MCPConnectionManager",
+        server_name: str,
+        schema: McpBaseTool,
+        tool: Any = None,
+    ):
+        """初期化
+
+        Args:
+            manager: 接続を管理する MCPConnectionManager
+            server_name: ツールを提供するMCPサーバー名
+            schema: ツールのスキーマ
+            tool: 現在の接続の MCPTool（キャッシュから作成し、未接続の場合はNone）
+        """
+        super().__init__(name=schema.name, description=schema.description or "")
+        self.manager = manager
+        self.server_name = server_name
+        self.schema = schema
+        self.tool = tool
+
+    def _get_declaration(self) -> FunctionDeclaration:
+        """スキーマから関数宣言を作成（MCPTool と同じ形式）"""
+        return FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=to_gemini_schema(self.schema.inputSchema),
+        )
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: Any) -> Any:
+        """接続の状態を確認してからツールを呼び出す"""
+        return await self.manager.call_tool(self, args=args, tool_context=tool_context)
+
+
+@dataclass
+class ServerConnection:
+    """1つのMCPサーバーとの接続の状態
+
+    Attributes:
+        server: 接続先のMCPサーバー
+        breaker: サーバーのサーキットブレーカー
+        tools: エージェントに渡したツール（再接続しても同じリストを使い続ける）
+        exit_stack: 現在の接続の exit スタック
+        owner_task: 現在の接続を開き、閉じるまで保持するタスク
+        release: 設定すると保持用のタスクが接続を閉じるイベント
+        connected: 接続中かどうか
+        reconnect_task: 実行中の再接続タスク
+        warm_up_task: キャッシュから起動した場合の、最初の接続のタスク
+    """
+
+    server: MCPServer
+    breaker: CircuitBreaker
+    tools: List[ManagedMCPTool] = field(default_factory=list)
+    exit_stack: Optional[AsyncExitStack] = None
+    owner_task: Optional[asyncio.Task] = None
+    release: Optional[asyncio.Event] = None
+    connected: bool = False
+    reconnect_task: Optional[asyncio.Task] = None
+    warm_up_task: Optional[asyncio.Task] = None
+
+
+class MCPConnectionManager:
+    """MCPサーバーとの接続を保持し、切断時に再接続するクラス"""
+
+    def __init__(
+        self,
+        servers: Optional[List[MCPServer]] = None,
+        call_timeout: float = MCP_CALL_TIMEOUT_SECONDS,
+        reconnect_base_delay: float = MCP_RECONNECT_BASE_DELAY_SECONDS,
+        reconnect_max_delay: float = MCP_RECONNECT_MAX_DELAY_SECONDS,
+        failure_threshold: int = MCP_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = MCP_CIRCUIT_RESET_SECONDS,
+        connect: ConnectFunc = _connect_server,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+        schema_cache: Optional[MCPSchemaCache] = None,
+    ):
+        """初期化
+
+        Args:
+            servers: 接続するMCPサーバー（未指定時は MCP_SERVERS）
+            call_timeout: ツール呼び出しのタイムアウト（秒）
+            reconnect_base_delay: 再接続の待ち時間の基準（秒）
+            reconnect_max_delay: 再接続の待ち時間の上限（秒）
+            failure_threshold: サーキットブレーカーが開くまでの連続失敗回数
+            reset_seconds: サーキットブレーカーが試しの呼び出しを許可するまでの秒数
+            connect: サーバーへ接続する関数（失敗時はNoneを返す）
+            clock: 現在時刻（秒）を返す関数
+            rng: 0以上1未満の乱数を返す関数（待ち時間のばらつき用）
+            schema_cache: ツールのスキーマのキャッシュ（未指定時はキャッシュしない）
+        """
+        self.servers = MCP_SERVERS if servers is None else servers
+        self.call_timeout = call_timeout
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._connect = connect
+        self._clock = clock
+        self._rng = rng
+        self.schema_cache = schema_cache
+        self._connections: Dict[str, ServerConnection] = {}
+        self._started = False
+        self._reset()
+
+    def _reset(self) -> None:
+        """すべてのサーバーを未接続の状態に戻す"""
+        self._started = False
+        self._connections = {
+            server.name: ServerConnection(
+                server=server,
+                breaker=CircuitBreaker(
+                    server.name,
+                    self.failure_threshold,
+                    self.reset_seconds,
+                    self._clock,
+                    metric_prefix="mcp",
+                ),
+            )
+            for server in self.servers
+        }
+
+    def connection(self, name: str) -> ServerConnection:
+        """サーバーの接続の状態を取得"""
+        return self._connections[name]
+
+    def backoff_delay(self, attempt: int) -> float:
+        """再接続の待ち時間（フルジッター付きの指数バックオフ）
+
+        Args:
+            attempt: 何回目の再接続か（0始まり）
+
+        Returns:
+            float: 待ち時間（秒）
+        """
+        ceiling = min(
+            self.reconnect_max_delay, self.reconnect_base_delay * (2**attempt)
+        )
+        return self._rng() * ceiling
+
+    async def start(self) -> Dict[str, List[ManagedMCPTool]]:
+        """すべてのサーバーへ並行して接続
+
+        スキーマがキャッシュにあるサーバーは、キャッシュからツールを作成して接続を待たず、
+        バックグラウンドで接続します。それ以外のサーバーは接続してツールを取得します。
+        接続できなかったサーバーはバックグラウンドで再接続を続けます。
+        起動済みの場合は接続し直さず、保持しているツールを返します。
+
+        Returns:
+            Dict[str, List[ManagedMCPTool]]: サーバー名とツールのマッピング
+                （接続できなかったサーバーは空のリスト）
+        """
+        connections = list(self._connections.values())
+        if self._started:
+            return {conn.server.name: conn.tools for conn in connections}
+        self._started = True
+        started_at = self._clock()
+
+        uncached = []
+        for conn in connections:
+            schemas = self.schema_cache.load(conn.server) if self.schema_cache else None
+            if schemas is None:
+                uncached.append(conn)
+                continue
+            conn.tools.extend(
+                ManagedMCPTool(self, conn.server.name, schema) for schema in schemas
+            )
+            conn.warm_up_task = asyncio.create_task(
+                self._warm_up(conn, started_at), name=f"mcp_warm_up_{conn.server.name}"
+            )
+
+        results = await asyncio.gather(*(self._open(conn) for conn in uncached))
+        for conn, connected in zip(uncached, results):
+            if not connected:
+                self._schedule_reconnect(conn)
+        return {conn.server.name: conn.tools for conn in connections}
+
+    async def _warm_up(self, conn: ServerConnection, started_at: float) -> None:
+        """キャッシュから起動したサーバーへ、バックグラウンドで接続する"""
+        if await self._open(conn):
+            # 起動時に待たずに済んだ接続時間
+            saved = self._clock() - started_at
+            metrics.observe(
+                f"mcp_schema_cache.startup_saved_seconds.{conn.server.name}", saved
+            )
+            logger.info(
+                f"{conn.server.label} MCP connected in background "
+                f"({saved:.3f}s not spent at startup)"
+            )
+        else:
+            self._schedule_reconnect(conn)
+
+    async def _open(self, conn: ServerConnection) -> bool:
+        """サーバーへ接続し、ツールを新しい接続のものに差し替える
+
+        接続は保持用のタスク（_hold_connection）で開き、差し替えた古い接続は
+        それを開いたタスクに閉じさせます。
+
+        Returns:
+            bool: 接続できた場合True
+        """
+        opened: asyncio.Future = asyncio.get_running_loop().create_future()
+        release = asyncio.Event()
+        owner_task = asyncio.create_task(
+            self._hold_connection(conn.server, opened, release),
+            name=f"mcp_connection_{conn.server.name}",
+        )
+        try:
+            result = await opened
+        except asyncio.CancelledError:
+            owner_task.cancel()
+            raise
+        if result is None:
+            conn.breaker.record_failure()
+            return False
+
+        tools, exit_stack = result
+        previous = (conn.release, conn.owner_task)
+        conn.exit_stack = exit_stack
+        conn.owner_task = owner_task
+        conn.release = release
+        self._swap_tools(conn, tools)
+        conn.connected = True
+        conn.breaker.record_success()
+        metrics.set_gauge(f"mcp.connected.{conn.server.name}", 1)
+        if self.schema_cache is not None:
+            self.schema_cache.store(conn.server, [tool.mcp_tool for tool in tools])
+        await self._release(*previous)
+        return True
+
+    async def _hold_connection(
+        self,
+        server: MCPServer,
+        opened: asyncio.Future,
+        release: asyncio.Event,
+    ) -> None:
+        """接続を開いて opened に渡し、release が設定されるまで保持してから閉じる"""
+        try:
+            result = await self._connect(server)
+        except Exception as e:
+            if not opened.done():
+                opened.set_exception(e)
+            return
+        if opened.done():
+            # 接続を待っていた側が取り消された
+            if result is not None:
+                await self._close_quietly(server, result[1])
+            return
+        opened.set_result(result)
+        if result is None:
+            return
+
+        try:
+            await release.wait()
+        finally:
+            await self._close_quietly(server, result[1])
+
+    @staticmethod
+    async def _release(
+        release: Optional[asyncio.Event], owner_task: Optional[asyncio.Task]
+    ) -> None:
+        """保持用のタスクに接続を閉じさせ、閉じ終わるまで待つ"""
+        if release is None or owner_task is None:
+            return
+        release.set()
+        await asyncio.gather(owner_task, return_exceptions=True)
+
+    def _swap_tools(self, conn: ServerConnection, tools: List[Any]) -> None:
+        """エージェントに渡したツールの中身を、新しい接続のツールに差し替える"""
+        managed = {tool.name: tool for tool in conn.tools}
+        for tool in tools:
+            if tool.name in managed:
+                current = managed.pop(tool.name)
+                current.tool = tool
+                current.schema = tool.mcp_tool
+                current.description = tool.mcp_tool.description or ""
+            else:
+                conn.tools.append(
+                    ManagedMCPTool(self, conn.server.name, tool.mcp_tool, tool)
+                )
+        for missing in managed.values():
+            missing.tool = None
+        if managed:
+            # 接続したサーバーにないツールは、呼び出すとエラーになる
+            logger.warning(
+                f"{conn.server.label} MCP tools no longer available: "
+                f"{', '.join(sorted(managed))}"
+            )
+
+    @staticmethod
+    async def _close_quietly(server: MCPServer, exit_stack: AsyncExitStack) -> None:
+        """接続の exit スタックを閉じる（閉じる際のエラーは記録して続行）
+
+        閉じられなかった接続はセッションが残り続けるおそれがあるため、
+        警告として記録し、メトリクスで数えます。
+        """
+        try:
+            await exit_stack.aclose()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            metrics.increment(f"mcp.close_failures.{server.name}")
+            logger.warning(f"Error closing {server.label} MCP connection: {e}")
+
+    def _mark_broken(self, conn: ServerConnection, error: BaseException) -> None:
+        """接続が切れたことを記録し、再接続を始める"""
+        if conn.connected:
+            logger.warning(f"{conn.server.label} MCP connection lost: {error}")
+            metrics.increment(f"mcp.disconnects.{conn.server.name}")
+            metrics.set_gauge(f"mcp.connected.{conn.server.name}", 0)
+        conn.connected = False
+        self._schedule_reconnect(conn)
+
+    def _schedule_reconnect(self, conn: ServerConnection) -> None:
+        """再接続タスクを起動（実行中の場合は何もしない）"""
+        if conn.reconnect_task is not None and not conn.reconnect_task.done():
+            return
+        conn.reconnect_task = asyncio.create_task(
+            self._reconnect(conn), name=f"mcp_reconnect_{conn.server.name}"
+        )
+
+    async def _reconnect(self, conn: ServerConnection) -> None:
+        """接続できるまで、指数バックオフで待ちながら再接続を繰り返す"""
+        attempt = 0
+        while not conn.connected:
+            await asyncio.sleep(self.backoff_delay(attempt))
+            metrics.increment(f"mcp.reconnect_attempts.{conn.server.name}")
+            try:
+                if await self._open(conn):
+                    logger.info(
+                        f"{conn.server.label} MCP reconnected after "
+                        f"{attempt + 1} attempts"
+                    )
+                    metrics.increment(f"mcp.reconnects.{conn.server.name}")
+                    return
+            except Exception as e:
+                conn.breaker.record_failure()
+                logger.warning(f"{conn.server.label} MCP reconnect failed: {e}")
+            attempt += 1
+
+    def _unavailable(self, conn: ServerConnection, reason: str) -> dict:
+        """サーバーを利用できない場合のツールの結果"""
+        return {
+            "status": "error",
+            "error_message": (
+                f"{conn.server.label} MCPサーバーが一時的に利用できません"
+                f"（{reason}）。しばらくしてから再度お試しください。"
+            ),
+        }
+
+    async def call_tool(
+        self, managed: ManagedMCPTool, *, args: Dict[str, Any], tool_context: Any
+    ) -> Any:
+        """接続の状態とサーキットブレーカーを確認してからツールを呼び出す
+
+        接続が切れている場合やサーキットブレーカーが開いている場合は、
+        サーバーへ送らずにすぐエラーの結果を返します。
+
+        Args:
+            managed: 呼び出すツール
+            args: ツールの引数
+            tool_context: ADK のツールコンテキスト
+
+        Returns:
+            Any: ツールの結果（利用できない場合はエラーの辞書）
+        """
+        conn = self._connections[managed.server_name]
+        if conn.warm_up_task is not None and not conn.warm_up_task.done():
+            # キャッシュから起動した直後は、最初の接続を待つ
+            await asyncio.wait({conn.warm_up_task}, timeout=self.call_timeout)
+        if not conn.connected:
+            metrics.increment(f"mcp.calls_rejected.{conn.server.name}")
+            self._schedule_reconnect(conn)
+            return self._unavailable(conn, "再接続中")
+        if not conn.breaker.allow():
+            metrics.increment(f"mcp.calls_rejected.{conn.server.name}")
+            return self._unavailable(conn, "障害が続いています")
+        if managed.tool is None:
+            return self._unavailable(conn, f"ツール {managed.name} がありません")
+
+        try:
+            result = await asyncio.wait_for(
+                managed.tool.run_async(args=args, tool_context=tool_context),
+                timeout=self.call_timeout,
+            )
+        except asyncio.TimeoutError:
+            # 応答のないサーバーは、失敗が続いたら接続を張り直す
+            conn.breaker.record_failure()
+            metrics.increment(f"mcp.call_timeouts.{conn.server.name}")
+            if not conn.breaker.allow():
+                self._mark_broken(conn, TimeoutError("tool calls timed out"))
+            return self._unavailable(
+                conn, f"{self.call_timeout:g}秒以内に応答がありません"
+            )
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            conn.breaker.record_failure()
+            self._mark_broken(conn, e)
+            return self._unavailable(conn, "接続が切れました")
+
+        conn.breaker.record_success()
+        return result
+
+    async def stop(self) -> None:
+        """再接続タスクを止め、すべての接続を閉じる"""
+        tasks = [
+            task
+            for conn in self._connections.values()
+            for task in (conn.warm_up_task, conn.reconnect_task)
+            if task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # 開いた順と逆の順序で閉じる
+        for conn in reversed(list(self._connections.values())):
+            await self._release(conn.release, conn.owner_task)
+        self._reset()
+        logger.info("MCP connections closed")
+
+
+# プロセス全体で共有するMCPサーバーとの接続管理
+mcp_connection_manager = MCPConnectionManager(schema_cache=mcp_schema_cache)
+
+
+async def get_managed_tools_async() -> Tuple[
+    Optional[List[ManagedMCPTool]],
+    Optional[List[ManagedMCPTool]],
+    AsyncExitStack,
+]:
+    """再接続を管理するMCPツールを取得する
+
+    get_tools_async と同じ形式で、FilesystemとNotionのツールを返します。
+    返す exit スタックを閉じると、再接続を止めてすべての接続を閉じます。
+
+    Returns:
+        Tuple[Optional[List[ManagedMCPTool]], Optional[List[ManagedMCPTool]],
+            AsyncExitStack]: (Filesystemツール, Notionツール, exitスタック)
+    """
+    exit_stack = AsyncExitStack()
+    if not MCP_ENABLED:
+        logger.info("MCP is disabled by configuration")
+        return None, None, exit_stack
+
+    tools = await mcp_connection_manager.start()
+    exit_stack.push_async_callback(mcp_connection_manager.stop)
+    return tools.get("filesystem") or None, tools.get("notion") or None, exit_stack
@@ -0,0 +1,236 @@
+"""MCPサーバーの死活監視モジュール
+
+このモジュールは、MCPサーバーの状態をバックグラウンドで定期的に確認し、
+結果をメモリに保持する仕組みを提供します。/health はMCPサーバーに接続せず、
+保持している直近の確認結果から応答します。
+
+確認は、SSEエンドポイントへHTTPで接続して応答ヘッダーを受け取るだけの軽い死活確認です。
+MCPのセッション確立やツール一覧の取得は行いません。
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httpx
+
+from config import (
+    MCP_HEALTH_HISTORY_SIZE,
+    MCP_HEALTH_INTERVAL_SECONDS,
+    MCP_HEALTH_TIMEOUT_SECONDS,
+)
+from src.tools.mcp_integration import MCP_SERVERS, MCPServer
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("mcp_health")
+
+# 直近の確認結果を有効とみなす期間（確認間隔に対する倍率）
+STALE_AFTER_INTERVALS = 3
+
+
+@dataclass
+class ProbeResult:
+    """1回の死活確認の結果
+
+    Attributes:
+        healthy: 応答が正常だったかどうか
+        checked_at: 確認した時刻（UNIX時間・秒）
+        latency_seconds: 応答ヘッダーを受け取るまでの秒数
+        error: 異常だった場合の理由
+    """
+
+    healthy: bool
+    checked_at: float
+    latency_seconds: float
+    error: Optional[str] = None
+
+
+class MCPHealthMonitor:
+    """MCPサーバーの状態を定期的に確認し、結果を保持するクラス"""
+
+    def __init__(
+        self,
+        servers: Optional[List[MCPServer]] = None,
+        interval_seconds: float = MCP_HEALTH_INTERVAL_SECONDS,
+        timeout_seconds: float = MCP_HEALTH_TIMEOUT_SECONDS,
+        history_size: int = MCP_HEALTH_HISTORY_SIZE,
+        clock: Callable[[], float] = time.time,
+        **client_kwargs,
+    ):
+        """初期化
+
+        Args:
+            servers: 確認するMCPサーバー（未指定時は MCP_SERVERS）
+            interval_seconds: 確認の間隔（秒）
+            timeout_seconds: 1回の確認のタイムアウト（秒）
+            history_size: サーバーごとに保持する確認結果の数
+            clock: 現在時刻（UNIX時間・秒）を返す関数
+            **client_kwargs: httpx.AsyncClient に渡す追加の引数
+        """
+        self.servers = MCP_SERVERS if servers is None else servers
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self._clock = clock
+        self._client_kwargs = client_kwargs
+        self._client: Optional[httpx.AsyncClient] = None
+        self._history: Dict[str, Deque[ProbeResult]] = {
+            server.name: deque(maxlen=history_size) for server in self.servers
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """バックグラウンドの確認タスクが実行中かどうか"""
+        return self._task is not None and not self._task.done()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """確認に使うHTTPクライアント（初回に作成し、以降は接続を再利用）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_seconds, **self._client_kwargs
+            )
+        return self._client
+
+    async def probe_server(self, server: MCPServer) -> ProbeResult:
+        """1つのMCPサーバーの死活を確認
+
+        SSEエンドポイントへ接続し、応答ヘッダーを受け取った時点で接続を閉じます。
+
+        Args:
+            server: 確認するMCPサーバー
+
+        Returns:
+            ProbeResult: 確認結果
+        """
+        started_at = time.perf_counter()
+        error = None
+        try:
+            async with self._get_client().stream("GET", server.url) as response:
+                if response.status_code != 200:
+                    error = f"HTTP {response.status_code}"
+        except httpx.TimeoutException:
+            error = f"timed out after {self.timeout_seconds} seconds"
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - started_at
+
+        result = ProbeResult(
+            healthy=error is None,
+            checked_at=self._clock(),
+            latency_seconds=latency,
+            error=error,
+        )
+        self._record(server.name, result)
+        return result
+
+    def _record(self, name: str, result: ProbeResult) -> None:
+        """確認結果を履歴とメトリクスに記録"""
+        history = self._history[name]
+        previous = history[-1] if history else None
+        history.append(result)
+
+        metrics.observe(f"mcp_health.probe_seconds.{name}", result.latency_seconds)
+        metrics.set_gauge(f"mcp_health.healthy.{name}", int(result.healthy))
+        if not result.healthy:
+            metrics.increment(f"mcp_health.failures.{name}")
+        if previous is None or previous.healthy != result.healthy:
+            status = "online" if result.healthy else f"offline ({result.error})"
+            logger.info(f"MCP server {name} is {status}")
+
+    async def probe_all(self) -> Dict[str, bool]:
+        """すべてのMCPサーバーの死活を並行して確認
+
+        Returns:
+            Dict[str, bool]: サーバー名と健全性状態のマッピング
+        """
+        results = await asyncio.gather(
+            *(self.probe_server(server) for server in self.servers)
+        )
+        return {
+            server.name: result.healthy
+            for server, result in zip(self.servers, results)
+        }
+
+    def _is_fresh(self, result: ProbeResult) -> bool:
+        """確認結果が有効期間内かどうか"""
+        max_age = self.interval_seconds * STALE_AFTER_INTERVALS
+        return self._clock() - result.checked_at <= max_age
+
+    def status(self) -> Dict[str, bool]:
+        """保持している直近の確認結果から各サーバーの健全性を取得
+
+        未確認、または確認結果が古い（確認が止まっている）サーバーは異常とみなします。
+
+        Returns:
+            Dict[str, bool]: サーバー名と健全性状態のマッピング
+        """
+        status = {}
+        for name, history in self._history.items():
+            latest = history[-1] if history else None
+            status[name] = bool(latest and latest.healthy and self._is_fresh(latest))
+        return status
+
+    def snapshot(self) -> Dict[str, Any]:
+        """各サーバーの直近の確認結果と、確認にかかった時間の履歴を取得
+
+        Returns:
+            Dict[str, Any]: サーバー名ごとの確認結果と応答時間（ミリ秒）の履歴
+        """
+        now = self._clock()
+        snapshot: Dict[str, Any] = {}
+        for name, history in self._history.items():
+            if not history:
+                snapshot[name] = {"healthy": False, "checked_at": None}
+                continue
+            latest = history[-1]
+            latencies = [result.latency_seconds * 1000 for result in history]
+            snapshot[name] = {
+                "healthy": latest.healthy and self._is_fresh(latest),
+                "checked_at": latest.checked_at,
+                "age_seconds": round(now - latest.checked_at, 3),
+                "error": latest.error,
+                "latency_ms": {
+                    "last": round(latencies[-1], 3),
+                    "avg": round(sum(latencies) / len(latencies), 3),
+                    "max": round(max(latencies), 3),
+                    "history": [round(latency, 3) for latency in latencies],
+                },
+            }
+        return snapshot
+
+    def start(self) -> None:
+        """バックグラウンドの確認タスクを起動（起動済みの場合は何もしない）"""
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run(), name="mcp_health_monitor")
+        logger.info(
+            f"MCP health monitor started (interval: {self.interval_seconds}s, "
+            f"servers: {', '.join(server.name for server in self.servers)})"
+        )
+
+    async def _run(self) -> None:
+        """一定間隔で死活を確認"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.exception(f"MCP health probe failed: {e}")
+
+    async def stop(self) -> None:
+        """バックグラウンドの確認タスクを停止し、HTTPクライアントを閉じる"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("MCP health monitor stopped")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# プロセス全体で共有するMCPサーバーの死活監視
+mcp_health_monitor = MCPHealthMonitor()
@@ -6,13 +6,16 @@ Cloud Run上のMCPサイドカーからツールを取得し、エージェン
 
 import asyncio
 import os
+import time
 from contextlib import AsyncExitStack
-from typing import Dict, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams
 
 from config import MCP_ENABLED, MCP_TIMEOUT_SECONDS
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 # from google.adk.tools.toolbox_tool import ToolboxTool  # 依存関係なしのため無効化
 
@@ -30,85 +33,181 @@ FILESYSTEM_HTTP_URL = os.getenv("FILESYSTEM_HTTP_URL", "http://localhost:8000")
 NOTION_HTTP_URL = os.getenv("NOTION_HTTP_URL", "http://localhost:3001")
 
 
-async def get_tools_async() -> Tuple[
-    Optional[MCPToolset],
-    Optional[MCPToolset],
-    AsyncExitStack,
-]:
-    """Cloud Run上のMCPサイドカーからツールを取得する
+@dataclass(frozen=True)
+class MCPServer:
+    """接続するMCPサーバーの設定
 
-    Google ADKのサンプルコードに基づいて、FilesystemとNotionの
-    MCPサーバーからツールを取得します。タイムアウト機能付き。
+    Attributes:
+        name: サーバー名（"filesystem"、"notion" など）
+        url: SSEエンドポイントのURL
+        label: ログに表示する名前
+        timeout: 接続のタイムアウト秒数（Noneの場合は MCP_TIMEOUT_SECONDS）
+    """
+
+    name: str
+    url: str
+    label: str
+    timeout: Optional[float] = None
+
+
+# 接続するMCPサーバーの一覧（サーバーを追加する場合はここに登録する）
+MCP_SERVERS: List[MCPServer] = [
+    # Filesystem MCP (supergateway@localhost:8000)
+    MCPServer("filesystem", FILESYSTEM_MCP_URL, "Filesystem"),
+    # Notion MCP (localhost:3001)
+    MCPServer("notion", NOTION_MCP_URL, "Notion"),
+]
+
+
+async def _await_in_current_task(awaitable: Awaitable[Any], timeout: float) -> Any:
+    """現在のタスクのまま、タイムアウト付きで待つ
+
+    Python 3.11 より前の asyncio.wait_for は別タスクで実行するため、MCPの接続が
+    入った anyio のキャンセルスコープを、接続を保持するタスクから閉じられなくなります。
+    ここではタイムアウトで現在のタスクを取り消し、TimeoutError に置き換えます。
+
+    Args:
+        awaitable: 待つ対象
+        timeout: タイムアウト（秒）
 
     Returns:
-        Tuple[Optional[MCPToolset], Optional[MCPToolset], AsyncExitStack]:
-            (Filesystemツール, Notionツール, exitスタック)
+        待つ対象の結果
+
+    Raises:
+        asyncio.TimeoutError: タイムアウトした場合
     """
-    exit_stack = AsyncExitStack()
-    filesystem_tools = None
-    notion_tools = None
+    task = asyncio.current_task()
+    timed_out = False
 
-    # MCP機能が無効化されている場合はスキップ
-    if not MCP_ENABLED:
-        logger.info("MCP is disabled by configuration")
-        return filesystem_tools, notion_tools, exit_stack
+    def expire() -> None:
+        nonlocal timed_out
+        timed_out = True
+        task.cancel()
 
-    # Filesystem MCP (supergateway@localhost:8000) へSSEで接続
+    handle = asyncio.get_running_loop().call_later(timeout, expire)
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        if timed_out:
+            raise asyncio.TimeoutError() from None
+        raise
+    finally:
+        handle.cancel()
+
+
+async def _connect_server(
+    server: MCPServer,
+) -> Optional[Tuple[MCPToolset, AsyncExitStack]]:
+    """1つのMCPサーバーへSSEで接続する
+
+    失敗は他のサーバーの接続に影響しないよう、ログに記録してNoneを返します。
+
+    Args:
+        server: 接続するMCPサーバー
+
+    Returns:
+        Optional[Tuple[MCPToolset, AsyncExitStack]]:
+            (ツールセット, 接続のexitスタック)。失敗時はNone
+    """
+    timeout = server.timeout if server.timeout is not None else MCP_TIMEOUT_SECONDS
+    started_at = time.perf_counter()
     try:
         logger.info(
-            "Attempting to connect to MCP Filesystem server (Sidecar)..."
+            f"Attempting to connect to {server.label} MCP server (Sidecar)..."
         )
-        # タイムアウト付きで接続を試行
-        filesystem_tools, fs_exit_stack = await asyncio.wait_for(
+        # タイムアウト付きで接続を試行（exit スタックは呼び出し元のタスクで開く）
+        tools, server_exit_stack = await _await_in_current_task(
             MCPToolset.from_server(
-                connection_params=SseServerParams(url=FILESYSTEM_MCP_URL)
+                connection_params=SseServerParams(url=server.url)
             ),
-            timeout=MCP_TIMEOUT_SECONDS,
+            timeout,
         )
-        await exit_stack.enter_async_context(fs_exit_stack)
-        logger.info("Filesystem MCP Toolset created successfully.")
     except asyncio.TimeoutError:
         logger.warning(
-            f"Filesystem MCP connection timed out after "
-            f"{MCP_TIMEOUT_SECONDS} seconds"
-        )
-        # ToolboxTool フォールバックは無効化（依存関係なし）
-        logger.warning(
-            "Filesystem MCP connection failed, no fallback available"
+            f"{server.label} MCP connection timed out after {timeout} seconds"
         )
     except Exception as e:
-        logger.warning(f"Filesystem MCP connection failed: {e}")
-        # ToolboxTool フォールバックは無効化（依存関係なし）
-        logger.warning(
-            "Filesystem MCP connection failed, no fallback available"
+        logger.warning(f"{server.label} MCP connection failed: {e}")
+    else:
+        metrics.observe(
+            f"mcp.connect_seconds.{server.name}", time.perf_counter() - started_at
         )
+        logger.info(f"{server.label} MCP Toolset created successfully.")
+        return tools, server_exit_stack
+
+    # ToolboxTool フォールバックは無効化（依存関係なし）
+    logger.warning(f"{server.label} MCP connection failed, no fallback available")
+    metrics.increment(f"mcp.connect_failures.{server.name}")
+    return None
 
-    # Notion MCP (localhost:3001) へSSEで接続
+
+async def connect_mcp_servers(
+    servers: Optional[List[MCPServer]] = None,
+) -> Tuple[Dict[str, Optional[MCPToolset]], AsyncExitStack]:
+    """登録されたすべてのMCPサーバーへ並行して接続する
+
+    各サーバーはそれぞれのタイムアウトで接続し、失敗したサーバーのツールはNoneになります。
+    起動にかかる時間は、最も遅いサーバーの接続時間（最大でそのタイムアウト）になります。
+
+    Args:
+        servers: 接続するMCPサーバー（未指定時は MCP_SERVERS）
+
+    Returns:
+        Tuple[Dict[str, Optional[MCPToolset]], AsyncExitStack]:
+            (サーバー名とツールセットのマッピング, exitスタック)
+    """
+    servers = MCP_SERVERS if servers is None else servers
+    exit_stack = AsyncExitStack()
+    tools: Dict[str, Optional[MCPToolset]] = {
+        server.name: None for server in servers
+    }
+
+    started_at = time.perf_counter()
+    tasks = [asyncio.create_task(_connect_server(server)) for server in servers]
     try:
-        logger.info("Attempting to connect to Notion MCP server (Sidecar)...")
-        # タイムアウト付きで接続を試行
-        notion_tools, notion_exit_stack = await asyncio.wait_for(
-            MCPToolset.from_server(
-                connection_params=SseServerParams(url=NOTION_MCP_URL)
-            ),
-            timeout=MCP_TIMEOUT_SECONDS,
-        )
-        await exit_stack.enter_async_context(notion_exit_stack)
-        logger.info("Notion MCP Toolset created successfully.")
-    except asyncio.TimeoutError:
-        logger.warning(
-            f"Notion MCP connection timed out after "
-            f"{MCP_TIMEOUT_SECONDS} seconds"
-        )
-        logger.warning("Notion MCP connection failed, no fallback available")
-        # ToolboxTool フォールバックは無効化（依存関係なし）
-        logger.warning("Notion MCP connection failed, no fallback available")
-    except Exception as e:
-        logger.warning(f"Notion MCP connection failed: {e}")
-        # ToolboxTool フォールバックは無効化（依存関係なし）
-        logger.warning("Notion MCP connection failed, no fallback available")
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # 取り消された場合は、接続済みのサーバーを閉じてから伝える
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None and task.result():
+                await task.result()[1].aclose()
+        raise
+
+    # 登録順に exit スタックへ追加する（終了時は逆順に閉じる）
+    for server, result in zip(servers, results):
+        if result is not None:
+            tools[server.name], server_exit_stack = result
+            await exit_stack.enter_async_context(server_exit_stack)
+
+    metrics.observe("mcp.startup_seconds", time.perf_counter() - started_at)
+    connected = sum(toolset is not None for toolset in tools.values())
+    logger.info(f"Connected to {connected}/{len(servers)} MCP servers")
+    return tools, exit_stack
+
+
+async def get_tools_async() -> Tuple[
+    Optional[MCPToolset],
+    Optional[MCPToolset],
+    AsyncExitStack,
+]:
+    """Cloud Run上のMCPサイドカーからツールを取得する
+
+    Google ADKのサンプルコードに基づいて、FilesystemとNotionの
+    MCPサーバーからツールを取得します。各サーバーへはタイムアウト付きで並行して接続します。
+
+    Returns:
+        Tuple[Optional[MCPToolset], Optional[MCPToolset], AsyncExitStack]:
+            (Filesystemツール, Notionツール, exitスタック)
+    """
+    # MCP機能が無効化されている場合はスキップ
+    if not MCP_ENABLED:
+        logger.info("MCP is disabled by configuration")
+        return None, None, AsyncExitStack()
 
-    return filesystem_tools, notion_tools, exit_stack
+    tools, exit_stack = await connect_mcp_servers()
+    return tools.get("filesystem"), tools.get("notion"), exit_stack
 
 
 async def get_available_mcp_tools() -> Dict[str, Optional[MCPToolset]]:
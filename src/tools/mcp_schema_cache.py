@@ -0,0 +1,179 @@
+"""MCPツールのスキーマのキャッシュモジュール
+
+このモジュールは、MCPサーバーから取得したツールのスキーマ（名前・説明・引数の定義）を
+ローカルのファイルに保存し、次回の起動時に読み込む仕組みを提供します。
+キャッシュがあれば、MCPサーバーとの接続（list_tools のやり取り）を待たずに
+エージェントを作成できます。
+
+キャッシュはサーバーごとに、接続先URLとスキーマから計算したフィンガープリントと一緒に
+保存します。接続先URLが変わった場合や、ファイルの内容が壊れている場合は使いません。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from mcp.types import Tool as McpBaseTool
+
+from config import MCP_SCHEMA_CACHE_PATH
+from src.tools.mcp_integration import MCPServer
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("mcp_schema_cache")
+
+# キャッシュファイルの形式のバージョン（形式を変えた場合は古いキャッシュを使わない）
+CACHE_FORMAT_VERSION = 1
+
+
+def schema_fingerprint(url: str, schemas: List[dict]) -> str:
+    """接続先URLとツールのスキーマから、内容を識別するフィンガープリントを計算
+
+    Args:
+        url: MCPサーバーの接続先URL
+        schemas: ツールのスキーマ（JSONに変換できる辞書）のリスト
+
+    Returns:
+        str: SHA-256 の16進文字列
+    """
+    payload = json.dumps(
+        {"url": url, "tools": schemas}, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dump_schemas(tools: List[McpBaseTool]) -> List[dict]:
+    """ツールのスキーマをJSONに変換できる辞書のリストにする"""
+    return [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+
+
+class MCPSchemaCache:
+    """MCPツールのスキーマをファイルに保存・読み込みするクラス"""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        """初期化
+
+        Args:
+            path: キャッシュファイルのパス
+            clock: 現在時刻（UNIX時間・秒）を返す関数
+        """
+        self.path = path
+        self._clock = clock
+
+    def _read(self) -> Dict[str, dict]:
+        """キャッシュファイルからサーバーごとのエントリーを読み込む"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable MCP schema cache {self.path}: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_FORMAT_VERSION:
+            return {}
+        servers = data.get("servers")
+        return servers if isinstance(servers, dict) else {}
+
+    def _write(self, servers: Dict[str, dict]) -> None:
+        """キャッシュファイルを書き換える
+
+        書き込み途中のファイルを読まないよう、一時ファイルに書いてから置き換えます。
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": CACHE_FORMAT_VERSION, "servers": servers},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, server: MCPServer) -> Optional[List[McpBaseTool]]:
+        """サーバーのツールのスキーマをキャッシュから読み込む
+
+        Args:
+            server: MCPサーバー
+
+        Returns:
+            Optional[List[McpBaseTool]]: ツールのスキーマ（キャッシュがない場合はNone）
+        """
+        entry = self._read().get(server.name)
+        tools = self._validate(server, entry)
+        if tools is None:
+            metrics.increment(f"mcp_schema_cache.misses.{server.name}")
+            return None
+        metrics.increment(f"mcp_schema_cache.hits.{server.name}")
+        logger.info(
+            f"Loaded {len(tools)} cached {server.label} MCP tool schemas "
+            f"(saved at {entry.get('saved_at')})"
+        )
+        return tools
+
+    @staticmethod
+    def _validate(
+        server: MCPServer, entry: Optional[dict]
+    ) -> Optional[List[McpBaseTool]]:
+        """キャッシュのエントリーが使えるか確認し、スキーマを復元する"""
+        if not isinstance(entry, dict) or entry.get("url") != server.url:
+            return None
+        schemas = entry.get("tools")
+        if not isinstance(schemas, list):
+            return None
+        # 手で書き換えられた・壊れたエントリーは使わない
+        if entry.get("fingerprint") != schema_fingerprint(server.url, schemas):
+            return None
+        try:
+            return [McpBaseTool.model_validate(schema) for schema in schemas]
+        except ValueError:
+            return None
+
+    def store(self, server: MCPServer, tools: List[McpBaseTool]) -> bool:
+        """サーバーのツールのスキーマをキャッシュに保存
+
+        内容が保存済みのものと同じ場合は書き込みません。
+
+        Args:
+            server: MCPサーバー
+            tools: MCPサーバーから取得したツールのスキーマ
+
+        Returns:
+            bool: キャッシュを書き換えた場合True
+        """
+        schemas = dump_schemas(tools)
+        fingerprint = schema_fingerprint(server.url, schemas)
+        servers = self._read()
+        entry = servers.get(server.name)
+        if isinstance(entry, dict) and entry.get("fingerprint") == fingerprint:
+            return False
+
+        servers[server.name] = {
+            "url": server.url,
+            "fingerprint": fingerprint,
+            "saved_at": self._clock(),
+            "tools": schemas,
+        }
+        try:
+            self._write(servers)
+        except OSError as e:
+            logger.warning(f"Failed to write MCP schema cache {self.path}: {e}")
+            return False
+        metrics.increment(f"mcp_schema_cache.updates.{server.name}")
+        logger.info(f"Cached {len(tools)} {server.label} MCP tool schemas")
+        return True
+
+
+# プロセス全体で共有するスキーマのキャッシュ（パス未指定時は使わない）
+mcp_schema_cache = (
+    MCPSchemaCache(MCP_SCHEMA_CACHE_PATH) if MCP_SCHEMA_CACHE_PATH else None
+)
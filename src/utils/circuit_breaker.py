@@ -0,0 +1,130 @@
+"""サーキットブレーカーモジュール
+
+このモジュールは、障害が続いている呼び出し先（モデル・MCPサーバーなど）への呼び出しを
+一定時間止め、すぐに失敗させるためのサーキットブレーカーを提供します。
+"""
+
+import threading
+import time
+from enum import Enum
+from typing import Callable, Optional
+
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger("circuit_breaker")
+
+# 開くまでの連続失敗回数と、開いてから試しの呼び出しを許可するまでの秒数の既定値
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+
+class CircuitState(str, Enum):
+    """サーキットブレーカーの状態"""
+
+    CLOSED = "closed"  # 通常どおり呼び出す
+    OPEN = "open"  # 障害中のため呼び出さない
+    HALF_OPEN = "half_open"  # 回復を確認するため試しに呼び出す
+
+
+class CircuitBreaker:
+    """呼び出し先ごとのサーキットブレーカー
+
+    失敗が連続して閾値に達すると開き、一定時間その呼び出し先を避けます。
+    時間が経過すると試しの呼び出しを1件だけ許可し、成功すれば閉じ、失敗すれば再び開きます。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        metric_prefix: str = "circuit",
+    ):
+        """初期化
+
+        Args:
+            name: 対象の呼び出し先の名前（ログ・メトリクス用）
+            failure_threshold: 開くまでの連続失敗回数
+            reset_seconds: 開いてから試しの呼び出しを許可するまでの秒数
+            clock: 現在時刻（秒）を返す関数
+            metric_prefix: メトリクス名の接頭辞
+        """
+        self.name = name
+        self.metric_prefix = metric_prefix
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """現在の状態"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        """経過時間を反映した状態（ロック取得済みで呼び出す）"""
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_seconds
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probe_started_at = None
+        return self._state
+
+    def allow(self) -> bool:
+        """呼び出してよいかどうか（半開状態では試しの呼び出しを1件だけ許可）
+
+        Returns:
+            bool: 呼び出してよい場合True
+        """
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.CLOSED:
+                return True
+            if state is CircuitState.OPEN:
+                return False
+            # 試しの呼び出しの結果が記録されないまま時間が経った場合は再度許可する
+            now = self._clock()
+            if (
+                self._probe_started_at is None
+                or now - self._probe_started_at >= self.reset_seconds
+            ):
+                self._probe_started_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """呼び出しの成功を記録"""
+        with self._lock:
+            if self._state is not CircuitState.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+                metrics.set_gauge(f"{self.metric_prefix}.circuit_open.{self.name}", 0)
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """失敗を記録"""
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state is CircuitState.HALF_OPEN or (
+                state is CircuitState.CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._probe_started_at = None
+                logger.warning(
+                    f"Circuit for {self.name} opened after "
+                    f"{self._failures} consecutive failures"
+                )
+                metrics.increment(f"{self.metric_prefix}.circuit_opened")
+                metrics.set_gauge(f"{self.metric_prefix}.circuit_open.{self.name}", 1)
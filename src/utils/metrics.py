@@ -0,0 +1,103 @@
+"""アプリケーション内メトリクスモジュール
+
+プロセス内で完結する軽量なメトリクスレジストリを提供します。
+カウンター・ゲージ・計測値（処理時間など）を記録し、
+/metrics エンドポイントからスナップショットとして参照できます。
+"""
+
+import threading
+from typing import Any, Dict
+
+
+class MetricsRegistry:
+    """プロセス内メトリクスレジストリ
+
+    カウンター（累積値）、ゲージ（現在値）、計測値（件数・合計・最大・最新）を
+    名前付きで保持します。スレッドプールから呼ばれる場合に備えてロックで保護します。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """カウンターを加算
+
+        Args:
+            name: メトリクス名
+            value: 加算する値
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """ゲージの現在値を設定
+
+        Args:
+            name: メトリクス名
+            value: 現在値
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """計測値を記録
+
+        Args:
+            name: メトリクス名
+            value: 計測値（秒数など）
+        """
+        with self._lock:
+            stats = self._timings.setdefault(
+                name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            )
+            stats["count"] += 1
+            stats["total"] += value
+            stats["max"] = max(stats["max"], value)
+            stats["last"] = value
+
+    def get_counter(self, name: str) -> float:
+        """カウンターの値を取得（未記録なら0）"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_gauge(self, name: str) -> float:
+        """ゲージの値を取得（未記録なら0）"""
+        with self._lock:
+            return self._gauges.get(name, 0)
+
+    def get_timing(self, name: str) -> Dict[str, float]:
+        """計測値の統計を取得（未記録なら空の辞書）"""
+        with self._lock:
+            return dict(self._timings.get(name, {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """すべてのメトリクスのスナップショットを取得
+
+        Returns:
+            Dict[str, Any]: counters / gauges / timings を含む辞書
+        """
+        with self._lock:
+            timings = {}
+            for name, stats in self._timings.items():
+                avg = stats["total"] / stats["count"] if stats["count"] else 0
+                timings[name] = {**stats, "avg": avg}
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+    def reset(self) -> None:
+        """すべてのメトリクスを初期化（主にテスト用）"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# グローバルメトリクスレジストリ
+metrics = MetricsRegistry()
@@ -2,6 +2,28 @@
 import os
 import sys
 
+import pytest
+
 sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 )
+
+
+class FakeClock:
+    """手動で進める時計（time.monotonic などの代わりに渡す）"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """時計を進める"""
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """手動で進める時計"""
+    return FakeClock()
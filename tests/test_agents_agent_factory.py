@@ -1,5 +1,7 @@
 """エージェントファクトリーのテストモジュール"""
 
+import asyncio
+
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from contextlib import AsyncExitStack
@@ -53,8 +55,12 @@ class TestAgentFactory:
         mock_notion_tools = Mock()
         mock_exit_stack = Mock()
         
-        with patch('src.agents.agent_factory.get_tools_async') as mock_get_tools:
-            mock_get_tools.return_value = (mock_fs_tools, mock_notion_tools, mock_exit_stack)
+        with patch(
+            'src.agents.agent_factory.get_managed_tools_async'
+        ) as mock_get_tools:
+            mock_get_tools.return_value = (
+                mock_fs_tools, mock_notion_tools, mock_exit_stack
+            )
             
             await agent_factory._initialize_mcp_tools()
             
@@ -66,7 +72,9 @@ class TestAgentFactory:
     @pytest.mark.asyncio
     async def test_initialize_mcp_tools_failure(self, agent_factory):
         """MCP ツール初期化失敗のテスト"""
-        with patch('src.agents.agent_factory.get_tools_async') as mock_get_tools:
+        with patch(
+            'src.agents.agent_factory.get_managed_tools_async'
+        ) as mock_get_tools:
             mock_get_tools.side_effect = Exception("Connection failed")
             
             await agent_factory._initialize_mcp_tools()
@@ -80,7 +88,9 @@ class TestAgentFactory:
         """MCP ツール重複初期化のテスト"""
         agent_factory._mcp_tools_initialized = True
         
-        with patch('src.agents.agent_factory.get_tools_async') as mock_get_tools:
+        with patch(
+            'src.agents.agent_factory.get_managed_tools_async'
+        ) as mock_get_tools:
             await agent_factory._initialize_mcp_tools()
             
             mock_get_tools.assert_not_called()
@@ -424,4 +434,117 @@ class TestAgentFactory:
             agent = agent_factory.create_root_agent(sub_agents)
             
             mock_llm_agent.assert_called_once()
-            assert agent is not None
\ No newline at end of file
+            assert agent is not None
+
+    @pytest.mark.asyncio
+    async def test_pipeline_is_built_once(self, agent_factory):
+        """パイプラインは1回だけ作成し、同じインスタンスを返す"""
+        agent_factory.notion_mcp_tools = [Mock()]
+        agent_factory._mcp_tools_initialized = True
+
+        with patch('src.agents.agent_factory.LlmAgent'), \
+             patch('src.agents.agent_factory.SequentialAgent') as mock_seq_agent:
+
+            first, second = await asyncio.gather(
+                agent_factory.create_url_recipe_pipeline(),
+                agent_factory.create_url_recipe_pipeline(),
+            )
+            third = await agent_factory.create_url_recipe_pipeline()
+
+            assert first is second is third
+            mock_seq_agent.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_pipeline_raises_for_every_caller(self, agent_factory):
+        """作成に失敗したパイプラインは、呼び出すたびに同じ例外を送出する"""
+        agent_factory.notion_mcp_tools = None
+        agent_factory._mcp_tools_initialized = True
+
+        for _ in range(2):
+            with pytest.raises(
+                RuntimeError, match="Notion MCP Toolset is not available"
+            ):
+                await agent_factory.create_image_recipe_pipeline()
+
+    @pytest.mark.asyncio
+    async def test_initialize_mcp_tools_concurrently(self, agent_factory):
+        """並行して呼び出してもMCPツールの初期化は1回だけ行う"""
+        with patch(
+            'src.agents.agent_factory.get_managed_tools_async'
+        ) as mock_get_tools:
+            mock_get_tools.return_value = ([Mock()], [Mock()], AsyncExitStack())
+
+            await asyncio.gather(
+                agent_factory.get_notion_mcp_tools_async(),
+                agent_factory.get_filesystem_mcp_tools_async(),
+                agent_factory.get_notion_mcp_tools_async(),
+            )
+
+            mock_get_tools.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_create_all_standard_agents_shares_pipelines(self, agent_factory):
+        """ワークフローエージェントと直接実行用のエントリーは同じパイプラインを使う"""
+        agent_factory.notion_mcp_tools = [Mock()]
+        agent_factory.filesystem_mcp_tools = [Mock()]
+        agent_factory._mcp_tools_initialized = True
+
+        with patch('src.agents.agent_factory.Agent'), \
+             patch('src.agents.agent_factory.LlmAgent') as mock_llm_agent, \
+             patch('src.agents.agent_factory.SequentialAgent') as mock_seq_agent:
+            mock_seq_agent.side_effect = lambda **kwargs: Mock(name=kwargs["name"])
+
+            agents = await agent_factory.create_all_standard_agents()
+
+            # URL・画像のパイプラインをそれぞれ1回だけ作成する
+            assert mock_seq_agent.call_count == 2
+            workflow_sub_agents = [
+                call.kwargs["sub_agents"][0]
+                for call in mock_llm_agent.call_args_list
+                if "sub_agents" in call.kwargs
+            ]
+            assert agents["RecipeExtractionPipeline"] in workflow_sub_agents
+            assert agents["ImageRecipeExtractionPipeline"] in workflow_sub_agents
+
+    @pytest.mark.asyncio
+    async def test_create_all_standard_agents_build_report(self, agent_factory):
+        """エージェントごとの作成時間を記録する（失敗したエージェントも含む）"""
+        agent_factory._mcp_tools_initialized = True
+
+        with patch('src.agents.agent_factory.Agent'), \
+             patch('src.agents.agent_factory.LlmAgent'), \
+             patch('src.agents.agent_factory.metrics') as mock_metrics:
+
+            agents = await agent_factory.create_all_standard_agents()
+
+            assert "calc_agent" in agents
+            assert "notion_agent" not in agents
+            assert list(agent_factory.build_report) == [
+                "calc_agent",
+                "google_search_agent",
+                "vision_agent",
+                "notion_agent",
+                "filesystem_agent",
+                "url_recipe_workflow_agent",
+                "image_recipe_workflow_agent",
+                "RecipeExtractionPipeline",
+                "ImageRecipeExtractionPipeline",
+            ]
+            assert all(elapsed >= 0 for elapsed in agent_factory.build_report.values())
+            mock_metrics.observe.assert_any_call(
+                "agent_factory.build_seconds.calc_agent",
+                agent_factory.build_report["calc_agent"],
+            )
+
+    def test_shares_prompt_manager(self, mock_prompts):
+        """指定したプロンプトマネージャーをすべてのエージェントで共有する"""
+        prompt_manager = Mock()
+        factory = AgentFactory(
+            prompts=mock_prompts, config=AGENT_CONFIG, prompt_manager=prompt_manager
+        )
+
+        with patch('src.agents.agent_factory.LlmAgent'):
+            factory.create_root_agent({})
+
+        assert factory.prompt_manager is prompt_manager
+        prompt_manager.get_prompt.assert_called_once()
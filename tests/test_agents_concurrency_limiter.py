@@ -0,0 +1,180 @@
+"""モデル呼び出しの同時実行数制限モジュールのテスト"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents.concurrency_limiter import AdaptiveConcurrencyLimiter
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def make_limiter(clock):
+    """テスト用の同時実行数制限を作成する関数"""
+
+    def factory(initial_limit=2, **kwargs):
+        return AdaptiveConcurrencyLimiter(
+            initial_limit=initial_limit,
+            min_limit=1,
+            max_limit=kwargs.pop("max_limit", 4),
+            clock=clock,
+            **kwargs,
+        )
+
+    return factory
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """AdaptiveConcurrencyLimiterクラスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_free_slot(self, make_limiter):
+        """上限に達すると枠が空くまで待機する"""
+        limiter = make_limiter(initial_limit=1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert limiter.waiting == 1
+        assert metrics.get_gauge("llm_concurrency.waiting") == 1
+
+        limiter.release()
+        await waiter
+
+        assert limiter.in_flight == 1
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_order(self, make_limiter):
+        """待機中の呼び出しは到着順に枠を取得する"""
+        limiter = make_limiter(initial_limit=1)
+        await limiter.acquire()
+        order = []
+
+        async def worker(name):
+            await limiter.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(worker(name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        limiter.release(None)
+        await asyncio.sleep(0)
+        limiter.release(None)
+        await asyncio.gather(*tasks)
+
+        assert order == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_removed(self, make_limiter):
+        """取り消された待機は枠を消費しない"""
+        limiter = make_limiter(initial_limit=1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release(None)
+        assert limiter.in_flight == 0
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase(self, make_limiter):
+        """成功が続くと上限が少しずつ上がり、上限値で頭打ちになる"""
+        limiter = make_limiter(initial_limit=2, max_limit=3)
+
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(False)
+        assert limiter.limit == 3
+
+        for _ in range(10):
+            await limiter.acquire()
+            limiter.release(False)
+        assert metrics.get_gauge("llm_concurrency.limit") == 3
+
+    @pytest.mark.asyncio
+    async def test_multiplicative_decrease_with_cooldown(self, clock, make_limiter):
+        """過負荷では上限を半分にし、冷却時間内の連続した失敗では下げない"""
+        limiter = make_limiter(initial_limit=4)
+
+        for _ in range(2):
+            await limiter.acquire()
+            limiter.release(True)
+        assert limiter.limit == 2
+
+        clock.advance(5)
+        await limiter.acquire()
+        limiter.release(True)
+        assert limiter.limit == 1
+
+        clock.advance(5)
+        await limiter.acquire()
+        limiter.release(True)
+        assert limiter.limit == 1
+        assert metrics.get_counter("llm_concurrency.decreases") == 3
+
+    @pytest.mark.asyncio
+    async def test_callbacks_within_request(self, make_limiter):
+        """コールバックで枠を取得・返却し、応答のエラーコードで上限を調整する"""
+        limiter = make_limiter(initial_limit=4)
+        context = SimpleNamespace(agent_name="agent")
+
+        with limiter.request():
+            await limiter.before_model_callback(context, SimpleNamespace())
+            assert limiter.in_flight == 1
+            limiter.after_model_callback(
+                context, SimpleNamespace(error_code="RESOURCE_EXHAUSTED")
+            )
+
+        assert limiter.in_flight == 0
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_release_pending_after_exception(self, make_limiter):
+        """例外で終わった呼び出しの枠を返却する"""
+        limiter = make_limiter(initial_limit=4)
+        context = SimpleNamespace(agent_name="agent")
+
+        with limiter.request():
+            await limiter.before_model_callback(context, SimpleNamespace())
+            await limiter.before_model_callback(context, SimpleNamespace())
+            limiter.release_pending(overloaded=True)
+            assert limiter.in_flight == 0
+
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_request_exit_releases_remaining_slots(self, make_limiter):
+        """リクエストの終了時に残った枠は上限を変えずに返却する"""
+        limiter = make_limiter(initial_limit=2)
+
+        with pytest.raises(RuntimeError):
+            with limiter.request():
+                await limiter.before_model_callback(None, SimpleNamespace())
+                raise RuntimeError("cancelled")
+
+        assert limiter.in_flight == 0
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_not_limited_outside_request(self, make_limiter):
+        """リクエストの外のモデル呼び出しは制限しない"""
+        limiter = make_limiter(initial_limit=1)
+
+        await limiter.before_model_callback(None, SimpleNamespace())
+        limiter.after_model_callback(None, SimpleNamespace(error_code=None))
+
+        assert limiter.in_flight == 0
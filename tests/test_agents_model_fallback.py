@@ -0,0 +1,227 @@
+"""モデルのフォールバックモジュールのテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents.config import AGENT_CONFIG, DEFAULT_MODEL, SEARCH_MODEL
+from src.agents.model_fallback import (
+    CircuitBreaker,
+    ModelRouter,
+    build_fallback_chains,
+)
+from src.utils.circuit_breaker import CircuitState
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def make_router(clock):
+    """primary → fallback の2段のモデル一覧を持つ振り分けを作成する関数"""
+
+    def factory(failure_threshold=2):
+        return ModelRouter(
+            {"agent": ["primary", "fallback"], "single": ["only"]},
+            failure_threshold=failure_threshold,
+            reset_seconds=30,
+            clock=clock,
+        )
+
+    return factory
+
+
+def call_model(router, agent_name, model):
+    """before_model_callback を呼び出し、呼び出し先のモデルを返す"""
+    request = SimpleNamespace(model=model)
+    router.before_model_callback(SimpleNamespace(agent_name=agent_name), request)
+    return request.model
+
+
+class TestBuildFallbackChains:
+    """build_fallback_chains関数のテスト"""
+
+    def test_agent_config(self):
+        """エージェント設定の入れ子もたどってモデル一覧を作る"""
+        chains = build_fallback_chains(AGENT_CONFIG)
+
+        assert chains["root_agent"] == [DEFAULT_MODEL, SEARCH_MODEL]
+        assert chains["ContentExtractionAgent"] == [DEFAULT_MODEL, SEARCH_MODEL]
+        assert chains["google_search_agent"] == [SEARCH_MODEL]
+        # モデルを持たないパイプラインは対象外
+        assert "RecipeExtractionPipeline" not in chains
+
+    def test_duplicate_fallback_is_ignored(self):
+        """本来のモデルと同じ代替モデルは除く"""
+        config = {"a": {"name": "a", "model": "m1", "fallback_models": ["m1", "m2"]}}
+
+        assert build_fallback_chains(config) == {"a": ["m1", "m2"]}
+
+
+class TestCircuitBreaker:
+    """CircuitBreakerクラスのテスト"""
+
+    def test_opens_after_threshold(self, clock):
+        """連続失敗が閾値に達すると開く"""
+        breaker = CircuitBreaker("m", failure_threshold=2, clock=clock)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow()
+        assert metrics.get_counter("model_fallback.circuit_opened") == 1
+
+    def test_success_resets_failures(self, clock):
+        """成功すると連続失敗の回数が戻る"""
+        breaker = CircuitBreaker("m", failure_threshold=2, clock=clock)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_half_open_allows_single_probe(self, clock):
+        """時間が経つと試しの呼び出しを1件だけ許可する"""
+        breaker = CircuitBreaker(
+            "m", failure_threshold=1, reset_seconds=30, clock=clock
+        )
+        breaker.record_failure()
+
+        clock.advance(30)
+        assert breaker.state is CircuitState.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_failed_probe_reopens(self, clock):
+        """試しの呼び出しが失敗すると再び開く"""
+        breaker = CircuitBreaker(
+            "m", failure_threshold=3, reset_seconds=30, clock=clock
+        )
+        for _ in range(3):
+            breaker.record_failure()
+
+        clock.advance(30)
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow()
+
+
+class TestModelRouter:
+    """ModelRouterクラスのテスト"""
+
+    def test_uses_primary_model(self, make_router):
+        """障害がなければ本来のモデルを使う"""
+        router = make_router()
+
+        with router.request() as route:
+            assert call_model(router, "agent", "primary") == "primary"
+
+        assert route.current_model == "primary"
+        assert not route.degraded
+
+    def test_escalate_routes_to_fallback(self, make_router):
+        """切り替え後の呼び出しは代替モデルを使い、リクエストに記録する"""
+        router = make_router()
+
+        with router.request() as route:
+            assert router.escalate(route)
+            assert call_model(router, "agent", "primary") == "fallback"
+            # 代替モデルを持たないエージェントは本来のモデルのまま
+            assert call_model(router, "single", "only") == "only"
+
+        assert route.fallbacks == [("agent", "primary", "fallback")]
+        assert metrics.get_counter("model_fallback.degraded_requests") == 1
+        assert metrics.get_counter("model_fallback.routed.fallback") == 1
+
+    def test_escalate_without_more_fallbacks(self, make_router):
+        """代替モデルが尽きている場合は切り替え先がない"""
+        router = make_router()
+
+        with router.request() as route:
+            assert router.escalate(route)
+            assert not router.escalate(route)
+            assert call_model(router, "agent", "primary") == "fallback"
+
+    def test_open_circuit_routes_to_fallback(self, make_router):
+        """サーキットブレーカーが開いているモデルは避ける"""
+        router = make_router(failure_threshold=2)
+
+        with router.request() as route:
+            call_model(router, "agent", "primary")
+            router.record_failure(route)
+            router.record_failure(route)
+
+        with router.request() as route:
+            assert call_model(router, "agent", "primary") == "fallback"
+        assert route.degraded
+
+    def test_success_closes_circuit(self, clock, make_router):
+        """応答を受け取ると呼び出したモデルの成功を記録する"""
+        router = make_router(failure_threshold=1)
+
+        with router.request() as route:
+            call_model(router, "agent", "primary")
+            router.record_failure(route)
+
+        clock.advance(30)
+        with router.request():
+            assert call_model(router, "agent", "primary") == "primary"
+            router.after_model_callback(
+                SimpleNamespace(agent_name="agent"), SimpleNamespace(error_code=None)
+            )
+
+        assert router.breaker("primary").state is CircuitState.CLOSED
+
+    def test_without_request_context(self, make_router):
+        """リクエストの外でも呼び出し先のモデルを決められる"""
+        router = make_router()
+
+        assert call_model(router, "agent", "primary") == "primary"
+        assert call_model(router, "unknown", "other") == "other"
+
+    def test_install_on_agent_tree(self, make_router):
+        """サブエージェントと AgentTool のエージェントにコールバックを追加する"""
+        router = make_router()
+        existing = object()
+        tool_agent = SimpleNamespace(
+            model="m",
+            before_model_callback=None,
+            after_model_callback=None,
+        )
+        child = SimpleNamespace(
+            model="m",
+            before_model_callback=existing,
+            after_model_callback=None,
+            sub_agents=[],
+        )
+        pipeline = SimpleNamespace(sub_agents=[child])
+        root = SimpleNamespace(
+            model="m",
+            before_model_callback=None,
+            after_model_callback=None,
+            sub_agents=[pipeline],
+            tools=[SimpleNamespace(agent=tool_agent), SimpleNamespace()],
+        )
+
+        assert router.install(root) == 3
+        assert root.before_model_callback == router.before_model_callback
+        assert child.before_model_callback == [existing, router.before_model_callback]
+        assert tool_agent.after_model_callback == router.after_model_callback
+
+        # 2回追加しても重複しない
+        router.install(root)
+        assert child.before_model_callback == [existing, router.before_model_callback]
@@ -4,7 +4,7 @@ import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from contextlib import AsyncExitStack
 
-from src.agents.root_agent import create_agent
+from src.agents.root_agent import create_agent, get_fast_path_agents
 
 
 class TestRootAgent:
@@ -16,6 +16,7 @@ class TestRootAgent:
         import src.agents.root_agent
         original_root_agent = src.agents.root_agent._root_agent
         original_exit_stack = src.agents.root_agent._exit_stack
+        original_fast_path_agents = src.agents.root_agent._fast_path_agents
         
         # テスト前にリセット
         src.agents.root_agent._root_agent = None
@@ -26,6 +27,7 @@ class TestRootAgent:
         # テスト後に復元
         src.agents.root_agent._root_agent = original_root_agent
         src.agents.root_agent._exit_stack = original_exit_stack
+        src.agents.root_agent._fast_path_agents = original_fast_path_agents
 
     @pytest.mark.asyncio
     async def test_create_agent_success(self, reset_global_variables):
@@ -50,17 +52,27 @@ class TestRootAgent:
             mock_factory_instance.create_root_agent.return_value = mock_root_agent
             mock_factory_instance.exit_stack = mock_exit_stack
             
-            agent, exit_stack = await create_agent()
+            with patch('src.agents.root_agent.model_router') as mock_router, \
+                 patch('src.agents.root_agent.concurrency_limiter') as mock_limiter:
+                agent, exit_stack = await create_agent()
             
             assert agent == mock_root_agent
             assert exit_stack == mock_exit_stack
             
+            # 代替モデルへの切り替えがエージェントツリーに追加されたかチェック
+            mock_router.install.assert_called_once_with(mock_root_agent)
+            mock_limiter.install.assert_called_once_with(mock_root_agent)
+            
             # PromptManagerが正しく使用されたかチェック
             mock_prompt_manager.assert_called_once()
             mock_pm_instance.get_all_prompts.assert_called_once()
             
             # AgentFactoryが正しく使用されたかチェック
-            mock_agent_factory.assert_called_once_with(mock_prompts, mock_agent_factory.call_args[0][1])
+            mock_agent_factory.assert_called_once_with(
+                mock_prompts,
+                mock_agent_factory.call_args[0][1],
+                prompt_manager=mock_pm_instance,
+            )
             mock_factory_instance.create_all_standard_agents.assert_called_once()
             mock_factory_instance.create_root_agent.assert_called_once_with(mock_agents)
 
@@ -222,7 +234,11 @@ class TestRootAgent:
             assert exit_stack == mock_exit_stack
             
             # 空のプロンプト辞書でもAgentFactoryが呼ばれる
-            mock_agent_factory.assert_called_once_with(mock_prompts, mock_agent_factory.call_args[0][1])
+            mock_agent_factory.assert_called_once_with(
+                mock_prompts,
+                mock_agent_factory.call_args[0][1],
+                prompt_manager=mock_pm_instance,
+            )
 
     @pytest.mark.asyncio
     async def test_create_agent_with_empty_agents(self, reset_global_variables):
@@ -253,4 +269,26 @@ class TestRootAgent:
             assert exit_stack == mock_exit_stack
             
             # 空のエージェント辞書でもcreate_root_agentが呼ばれる
-            mock_factory_instance.create_root_agent.assert_called_once_with(mock_agents)
\ No newline at end of file
+            mock_factory_instance.create_root_agent.assert_called_once_with(mock_agents)
+
+    @pytest.mark.asyncio
+    async def test_create_agent_keeps_fast_path_pipelines(self, reset_global_variables):
+        """パイプラインを直接実行用に保持し、コールバックも追加する"""
+        url_pipeline = Mock()
+        mock_agents = {"calc_agent": Mock(), "RecipeExtractionPipeline": url_pipeline}
+        mock_root_agent = Mock()
+
+        with patch('src.agents.root_agent.PromptManager'), \
+             patch('src.agents.root_agent.AgentFactory') as mock_agent_factory, \
+             patch('src.agents.root_agent.model_router') as mock_router, \
+             patch('src.agents.root_agent.concurrency_limiter'):
+            mock_factory_instance = mock_agent_factory.return_value
+            mock_factory_instance.create_all_standard_agents = AsyncMock(
+                return_value=mock_agents
+            )
+            mock_factory_instance.create_root_agent.return_value = mock_root_agent
+
+            await create_agent()
+
+        assert get_fast_path_agents() == {"RecipeExtractionPipeline": url_pipeline}
+        mock_router.install.assert_any_call(url_pipeline)
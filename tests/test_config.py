@@ -63,6 +63,49 @@ class TestConfig:
         assert config.NOTION_HTTP_URL == "http://localhost:3001"
         assert config.MCP_ENABLED is True
         assert config.MCP_TIMEOUT_SECONDS == 10
+        assert config.MCP_HEALTH_INTERVAL_SECONDS == 30.0
+        assert config.MCP_HEALTH_TIMEOUT_SECONDS == 3.0
+        assert config.MCP_HEALTH_HISTORY_SIZE == 20
+        assert config.MCP_CALL_TIMEOUT_SECONDS == 60.0
+        assert config.MCP_RECONNECT_BASE_DELAY_SECONDS == 1.0
+        assert config.MCP_RECONNECT_MAX_DELAY_SECONDS == 30.0
+        assert config.MCP_CIRCUIT_FAILURE_THRESHOLD == 3
+        assert config.MCP_CIRCUIT_RESET_SECONDS == 30.0
+        assert config.MCP_SCHEMA_CACHE_PATH == ""
+        assert config.DISPATCH_WORKER_COUNT == 4
+        assert config.DISPATCH_MAX_QUEUE_SIZE == 100
+        assert config.DISPATCH_MAX_CONCURRENT_EVENTS == 8
+        assert config.WEBHOOK_DEDUP_TTL_SECONDS == 86400
+        assert config.WEBHOOK_DEDUP_DB_PATH == ""
+        assert config.LINE_PROGRESS_MODE == "loading"
+        assert config.SESSION_IDLE_TTL_SECONDS == 3600
+        assert config.SESSION_MAX_TOTAL_BYTES == 256 * 1024 * 1024
+        assert config.SESSION_SWEEP_INTERVAL_SECONDS == 60
+        assert config.SESSION_BACKEND == "memory"
+        assert config.SESSION_DB_PATH == "sessions.db"
+        assert config.SESSION_HOT_CACHE_SIZE == 1000
+        assert config.SESSION_FLUSH_INTERVAL_SECONDS == 1.0
+        assert config.SESSION_FLUSH_BATCH_SIZE == 100
+        assert config.SESSION_DB_TTL_SECONDS == 7 * 24 * 60 * 60
+        assert config.SESSION_SHARED_STORE_URL == ""
+        assert config.SESSION_SHARED_STORE_TIMEOUT_SECONDS == 5.0
+        assert config.HISTORY_MAX_TOKENS == 8000
+        assert config.HISTORY_KEEP_RECENT_TOKENS == 4000
+        assert config.HISTORY_SUMMARY_MAX_TOKENS == 1000
+        assert config.HISTORY_MAX_PART_TOKENS == 2000
+        assert config.MODEL_INPUT_TOKEN_BUDGET == 30000
+        assert config.TOKEN_ENCODING == "cl100k_base"
+        assert config.RETRY_BASE_DELAY_SECONDS == 1.0
+        assert config.RETRY_MAX_DELAY_SECONDS == 20.0
+        assert config.RETRY_BUDGET_CAPACITY == 10.0
+        assert config.RETRY_BUDGET_REFILL_PER_SECOND == 0.5
+        assert config.MODEL_FALLBACK_AFTER_FAILURES == 2
+        assert config.MODEL_CIRCUIT_FAILURE_THRESHOLD == 5
+        assert config.MODEL_CIRCUIT_RESET_SECONDS == 30.0
+        assert config.LLM_CONCURRENCY_INITIAL == 8
+        assert config.LLM_CONCURRENCY_MIN == 1
+        assert config.LLM_CONCURRENCY_MAX == 32
+        assert config.INTENT_FAST_PATH_ENABLED is True
 
     @patch.dict(
         os.environ,
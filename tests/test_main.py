@@ -14,6 +14,17 @@ from tests.mock_google_adk import setup_google_adk_mock
 setup_google_adk_mock()
 
 
+def make_health_monitor(health=None):
+    """MCPサーバーの死活監視のモック"""
+    health = health or {"filesystem": True, "notion": True}
+    monitor = MagicMock()
+    monitor.probe_all = AsyncMock(return_value=health)
+    monitor.stop = AsyncMock()
+    monitor.status.return_value = health
+    monitor.snapshot.return_value = {}
+    return monitor
+
+
 @pytest.fixture
 def mock_dependencies():
     """依存関係をモックするフィクスチャ"""
@@ -22,15 +33,14 @@ def mock_dependencies():
         patch("main.setup_logger") as mock_logger,
         patch("main.init_agent") as mock_init_agent,
         patch("main.cleanup_resources") as mock_cleanup,
-        patch("main.check_mcp_server_health") as mock_mcp_health,
-        patch("main.LineClient") as mock_line_client,
+        patch("main.mcp_health_monitor", make_health_monitor()) as mock_mcp_health,
+        patch("main.AsyncLineClient") as mock_line_client,
         patch("main.LineEventHandler") as mock_line_handler,
     ):
 
         mock_logger.return_value = MagicMock()
         mock_init_agent.return_value = None
         mock_cleanup.return_value = None
-        mock_mcp_health.return_value = {"filesystem": True, "notion": True}
 
         yield {
             "logger": mock_logger,
@@ -69,8 +79,9 @@ class TestLifespan:
     """lifespa関数のテスト"""
 
     @pytest.mark.asyncio
+    @patch("main.MCP_ENABLED", True)
     @patch("main.init_agent")
-    @patch("main.check_mcp_server_health")
+    @patch("main.mcp_health_monitor", new_callable=make_health_monitor)
     @patch("main.setup_logger")
     async def test_lifespan_startup_success(
         self, mock_logger, mock_mcp_health, mock_init_agent
@@ -78,20 +89,42 @@ class TestLifespan:
         """正常な起動時のlifespanテスト"""
         mock_logger.return_value = MagicMock()
         mock_init_agent.return_value = None
-        mock_mcp_health.return_value = {"filesystem": True, "notion": True}
 
         from main import app, lifespan
 
         # lifespanの実行をテスト
         async with lifespan(app):
-            pass
+            # 起動時に1回確認し、以降はバックグラウンドで確認する
+            mock_mcp_health.probe_all.assert_awaited_once()
+            mock_mcp_health.start.assert_called_once()
 
         mock_init_agent.assert_called_once()
-        mock_mcp_health.assert_called_once()
+        mock_mcp_health.stop.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("main.MCP_ENABLED", False)
+    @patch("main.init_agent")
+    @patch("main.mcp_health_monitor", new_callable=make_health_monitor)
+    @patch("main.setup_logger")
+    async def test_lifespan_mcp_disabled(
+        self, mock_logger, mock_mcp_health, mock_init_agent
+    ):
+        """MCP無効時は死活監視を起動しない"""
+        mock_logger.return_value = MagicMock()
+        mock_init_agent.return_value = None
+
+        from main import app, lifespan
+
+        async with lifespan(app):
+            pass
+
+        mock_mcp_health.probe_all.assert_not_called()
+        mock_mcp_health.start.assert_not_called()
 
     @pytest.mark.asyncio
+    @patch("main.MCP_ENABLED", True)
     @patch("main.init_agent")
-    @patch("main.check_mcp_server_health")
+    @patch("main.mcp_health_monitor", new_callable=make_health_monitor)
     @patch("main.setup_logger")
     async def test_lifespan_mcp_health_check_failure(
         self, mock_logger, mock_mcp_health, mock_init_agent
@@ -99,7 +132,7 @@ class TestLifespan:
         """MCPヘルスチェック失敗時のlifespanテスト"""
         mock_logger.return_value = MagicMock()
         mock_init_agent.return_value = None
-        mock_mcp_health.side_effect = Exception("MCP health check failed")
+        mock_mcp_health.probe_all.side_effect = Exception("MCP health check failed")
 
         from main import app, lifespan
 
@@ -242,6 +275,34 @@ class TestCallbackEndpoint:
         assert response.status_code == 200
         assert response.text == '"OK"'
 
+    def test_callback_endpoint_submits_to_dispatch_queue(self, client):
+        """Webhookボディが処理キューに積まれることをテスト"""
+        import main
+
+        headers = {"X-Line-Signature": "test_signature"}
+        data = '{"events": []}'
+
+        with patch("main.dispatch_queue") as mock_queue:
+            response = client.post("/callback", content=data, headers=headers)
+
+        assert response.status_code == 200
+        mock_queue.submit.assert_called_once_with(
+            main.process_events, data, "test_signature"
+        )
+
+    def test_callback_endpoint_queue_full(self, client):
+        """処理キューが満杯の場合に503を返すことをテスト"""
+        from src.services.dispatch_queue import QueueFullError
+
+        headers = {"X-Line-Signature": "test_signature"}
+        data = '{"events": []}'
+
+        with patch("main.dispatch_queue") as mock_queue:
+            mock_queue.submit.side_effect = QueueFullError("full")
+            response = client.post("/callback", content=data, headers=headers)
+
+        assert response.status_code == 503
+
 
 class TestHealthEndpoint:
     """healthエンドポイントのテスト"""
@@ -253,12 +314,12 @@ class TestHealthEndpoint:
 
         return TestClient(main.app)
 
-    @patch("main.check_mcp_server_health")
-    def test_health_endpoint_all_services_ok(
-        self, mock_mcp_health, client
-    ):
+    def test_health_endpoint_all_services_ok(self, mock_dependencies, client):
         """全サービス正常時のヘルスチェックテスト"""
-        mock_mcp_health.return_value = {"filesystem": True, "notion": True}
+        mock_mcp_health = mock_dependencies["mcp_health"]
+        mock_mcp_health.snapshot.return_value = {
+            "notion": {"healthy": True, "latency_ms": {"last": 1.5}}
+        }
 
         response = client.get("/health")
 
@@ -268,13 +329,16 @@ class TestHealthEndpoint:
         assert data["services"]["filesystem"] == "ok"
         assert data["services"]["mcp_filesystem"] == "ok"
         assert data["services"]["mcp_notion"] == "ok"
+        assert data["mcp_probes"]["notion"]["latency_ms"]["last"] == 1.5
+        # MCPサーバーには接続せず、保持している結果から応答する
+        mock_mcp_health.probe_all.assert_not_called()
 
-    @patch("main.check_mcp_server_health")
-    def test_health_endpoint_degraded_services(
-        self, mock_mcp_health, client
-    ):
+    def test_health_endpoint_degraded_services(self, mock_dependencies, client):
         """一部サービス異常時のヘルスチェックテスト"""
-        mock_mcp_health.return_value = {"filesystem": False, "notion": True}
+        mock_dependencies["mcp_health"].status.return_value = {
+            "filesystem": False,
+            "notion": True,
+        }
 
         response = client.get("/health")
 
@@ -285,12 +349,12 @@ class TestHealthEndpoint:
         assert data["services"]["mcp_filesystem"] == "error"
         assert data["services"]["mcp_notion"] == "ok"
 
-    @patch("main.check_mcp_server_health")
-    def test_health_endpoint_mcp_exception(
-        self, mock_mcp_health, client
-    ):
-        """MCPヘルスチェック例外時のテスト"""
-        mock_mcp_health.side_effect = Exception("MCP error")
+    def test_health_endpoint_mcp_unchecked(self, mock_dependencies, client):
+        """MCPサーバーが未確認の場合のテスト"""
+        mock_dependencies["mcp_health"].status.return_value = {
+            "filesystem": False,
+            "notion": False,
+        }
 
         response = client.get("/health")
 
@@ -304,12 +368,33 @@ class TestHealthEndpoint:
     def test_health_endpoint_general_exception(self, client):
         """一般的な例外時のヘルスチェックテスト"""
         # 一般的な例外をシミュレートするためにMCPヘルスチェックをパッチ
-        with patch("main.check_mcp_server_health", side_effect=Exception("Health check error")):
+        with patch("main.mcp_health_monitor") as mock_monitor:
+            mock_monitor.status.side_effect = Exception("Health check error")
             response = client.get("/health")
 
             assert response.status_code == 200
             data = response.json()
-            assert data["status"] == "degraded"
+            assert data["status"] == "error"
+            assert data["error"] == "Health check error"
+
+
+class TestMetricsEndpoint:
+    """metricsエンドポイントのテスト"""
+
+    @pytest.fixture
+    def client(self, mock_dependencies):
+        """TestClientのフィクスチャ"""
+        import main
+
+        return TestClient(main.app)
+
+    def test_metrics_endpoint_returns_snapshot(self, client):
+        """メトリクスのスナップショットが返ることをテスト"""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data.keys()) == {"counters", "gauges", "timings"}
 
 
 class TestMainExecution:
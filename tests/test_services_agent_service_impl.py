@@ -1,19 +1,49 @@
 """統合エージェントサービス実装の正確なテストモジュール"""
 
+import asyncio
+
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
+from google.adk.sessions import InMemorySessionService
 
 from src.services.agent_service_impl import (
+    APP_NAME,
     AgentService,
     COMPLETION_INDICATORS,
+    COMPLETION_STATE_KEYS,
     ERROR_INDICATORS,
     INTERMEDIATE_PATTERNS,
-    MAX_SESSION_HISTORY_SIZE,
+    PROGRESS_MILESTONES,
+    SESSION_LOCK_IDLE_SECONDS,
+    TOKEN_LIMIT_HISTORY_RATIO,
     init_agent,
     call_agent_async,
     call_agent_with_image_async,
     cleanup_resources,
+    create_session_service,
+    create_shared_session_store,
 )
+from src.agents.concurrency_limiter import AdaptiveConcurrencyLimiter
+from src.agents.model_fallback import ModelRouter
+from src.services.history_compactor import HistoryCompactor
+from src.services.retry_policy import RetryBudget
+from src.services.token_budget import TRUNCATION_NOTE, TokenBudget
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class CharEstimator:
+    """1文字1トークンとして数える見積もり"""
+
+    def count(self, text):
+        return len(text)
 
 
 class TestAgentService:
@@ -50,6 +80,168 @@ class TestAgentService:
             assert agent_service.runner is not None
             mock_runner.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_init_agent_preloads_token_encoding(self, agent_service):
+        """初期化時にトークン数の見積もりのエンコーディングを読み込む"""
+        agent_service.token_budget.preload = AsyncMock()
+
+        with patch(
+            'src.services.agent_service_impl.create_agent',
+            return_value=(Mock(), Mock()),
+        ), patch('src.services.agent_service_impl.Runner'):
+            await agent_service.init_agent()
+
+        agent_service.token_budget.preload.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_init_agent_creates_fast_path_runners(self, agent_service):
+        """直接実行用のパイプラインごとにランナーを作成する"""
+        pipeline = Mock()
+
+        with patch(
+            'src.services.agent_service_impl.create_agent',
+            return_value=(Mock(), Mock()),
+        ), patch(
+            'src.services.agent_service_impl.get_fast_path_agents',
+            return_value={"RecipeExtractionPipeline": pipeline},
+        ), patch('src.services.agent_service_impl.Runner') as mock_runner:
+            await agent_service.init_agent()
+
+        assert list(agent_service.fast_path_runners) == ["RecipeExtractionPipeline"]
+        assert mock_runner.call_count == 2
+        assert mock_runner.call_args.kwargs["agent"] is pipeline
+
+    def test_select_fast_path_runner(self, agent_service):
+        """URLのみのメッセージはパイプラインのランナーを選ぶ"""
+        runner = Mock()
+        agent_service.fast_path_runners = {"RecipeExtractionPipeline": runner}
+
+        selected = agent_service._select_fast_path_runner(
+            "https://cookpad.com/recipe/123", has_image=False
+        )
+
+        assert selected is runner
+        assert (
+            metrics.get_counter("intent_router.fast_path.RecipeExtractionPipeline")
+            == 1
+        )
+        assert metrics.get_counter("intent_router.llm_calls_saved") == 2
+
+    def test_select_root_runner(self, agent_service):
+        """意図が明らかでない、またはパイプラインがない場合はルートで実行する"""
+        agent_service.fast_path_runners = {"RecipeExtractionPipeline": Mock()}
+
+        assert agent_service._select_fast_path_runner("こんにちは", False) is None
+        # 画像レシピのパイプラインが作成されていない
+        assert agent_service._select_fast_path_runner("", True) is None
+        assert metrics.get_counter("intent_router.root") == 2
+
+    @pytest.mark.asyncio
+    async def test_arithmetic_answered_without_agent(self, agent_service):
+        """計算式のみのメッセージはエージェントを初期化・実行せずに計算する"""
+        agent_service.init_agent = AsyncMock()
+        agent_service.execute_and_get_response = AsyncMock()
+
+        result = await agent_service.call_agent_text("１２３×４５は？", "U1")
+
+        assert result == "123*45 = 5535"
+        agent_service.init_agent.assert_not_called()
+        agent_service.execute_and_get_response.assert_not_called()
+        assert metrics.get_counter("intent_router.arithmetic") == 1
+        assert metrics.get_counter("intent_router.llm_calls_saved") == 3
+
+    @pytest.mark.asyncio
+    async def test_arithmetic_answer_is_recorded_in_session(self):
+        """計算した応答はやり取りとしてセッションの履歴に記録する"""
+        session = Mock(user_id="U1")
+        session_service = Mock()
+        # 新規セッションを作成した後に取得する
+        session_service.get_session.side_effect = [None, session]
+        service = AgentService(session_service=session_service)
+        service.init_agent = AsyncMock()
+
+        await service.call_agent_text("１２３×４５は？", "U1")
+
+        calls = session_service.append_event.call_args_list
+        assert [call.args[0] for call in calls] == [session, session]
+        events = [call.args[1] for call in calls]
+        assert [event.author for event in events] == ["user", "root_agent"]
+        assert [event.content.role for event in events] == ["user", "model"]
+        assert [event.content.parts[0].text for event in events] == [
+            "１２３×４５は？",
+            "123*45 = 5535",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_arithmetic_answer_is_pushed_to_shared_store(self):
+        """計算した応答もインスタンス間共有ストアに書き戻す"""
+        service = AgentService(
+            session_service=InMemorySessionService(), shared_store=Mock()
+        )
+        service.session_sync = Mock()
+        service.session_sync.pull = AsyncMock()
+        service.session_sync.push = AsyncMock()
+        service.init_agent = AsyncMock()
+
+        assert await service.call_agent_text("1+1", "U1") == "1+1 = 2"
+
+        service.session_sync.pull.assert_awaited_once_with("U1", "session_U1")
+        service.session_sync.push.assert_awaited_once_with("U1", "session_U1")
+        service.init_agent.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_arithmetic_division_by_zero(self, agent_service):
+        """0での割り算はエラーメッセージを返す"""
+        agent_service.init_agent = AsyncMock()
+
+        result = await agent_service.call_agent_text("5÷0", "U1")
+
+        assert "0で割ることはできません" in result
+        agent_service.init_agent.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_non_arithmetic_goes_to_agent(self, agent_service):
+        """文章を含むメッセージ・画像付きのメッセージはエージェントで処理する"""
+        agent_service.init_agent = AsyncMock()
+        agent_service.get_or_create_session = AsyncMock(return_value="session_U1")
+        agent_service.create_message_content = Mock()
+        agent_service.execute_and_get_response = AsyncMock(return_value="応答")
+
+        assert await agent_service.call_agent_text("3人分の材料を2倍にして", "U1") == "応答"
+        assert (
+            await agent_service.call_agent_with_image(
+                "1+1", b"image", "image/jpeg", "U1"
+            )
+            == "応答"
+        )
+        assert agent_service.execute_and_get_response.await_count == 2
+        assert metrics.get_counter("intent_router.arithmetic") == 0
+
+    @pytest.mark.asyncio
+    async def test_single_attempt_uses_given_runner(self, agent_service):
+        """指定されたランナーでエージェントを実行する"""
+
+        async def no_events():
+            return
+            yield
+
+        agent_service.runner = Mock()
+        fast_path_runner = Mock()
+        fast_path_runner.run_async.return_value = no_events()
+        agent_service._handle_fallback_response = Mock(return_value="応答")
+
+        result = await agent_service._execute_single_attempt(
+            "https://cookpad.com/recipe/123",
+            "U1",
+            "session_U1",
+            Mock(),
+            runner=fast_path_runner,
+        )
+
+        assert result == "応答"
+        fast_path_runner.run_async.assert_called_once()
+        agent_service.runner.run_async.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_init_agent_already_initialized(self, agent_service):
         """エージェント重複初期化のテスト"""
@@ -85,27 +277,266 @@ class TestAgentService:
             
             assert result_session_id == session_id
 
-    def test_limit_session_history_over_limit(self, agent_service):
-        """セッション履歴制限（制限超過）のテスト"""
-        mock_session = Mock()
-        mock_session.history = [f"item_{i}" for i in range(10)]  # 10個のアイテム
-        
-        agent_service._limit_session_history(mock_session)
-        
-        # MAX_SESSION_HISTORY_SIZE (3) に制限される
-        assert len(mock_session.history) == MAX_SESSION_HISTORY_SIZE
-        assert mock_session.history == [f"item_{i}" for i in range(7, 10)]
+    @staticmethod
+    def _make_turns(count):
+        """ユーザー発言と応答からなるターンを指定数作成"""
+        events = []
+        for i in range(count):
+            for author in ("user", "RecipeWorkflowAgent"):
+                part = Mock(spec=["text"], text=f"{author} メッセージ{i}" * 10)
+                events.append(
+                    Mock(author=author, timestamp=float(i), content=Mock(parts=[part]))
+                )
+        return events
 
-    def test_limit_session_history_within_limit(self, agent_service):
-        """セッション履歴制限（制限内）のテスト"""
-        mock_session = Mock()
-        original_history = ["item_1", "item_2"]
-        mock_session.history = original_history[:]
-        
-        agent_service._limit_session_history(mock_session)
-        
-        # 制限内なので変更されない
-        assert mock_session.history == original_history
+    def _use_stored_session(self, agent_service, **service_attrs):
+        """保持中のセッションを返すセッションサービスに差し替え"""
+        agent_service.session_service = Mock(spec=list(service_attrs))
+        for name, value in service_attrs.items():
+            setattr(agent_service.session_service, name, value)
+        agent_service.history_compactor = HistoryCompactor(
+            max_tokens=300, keep_recent_tokens=150
+        )
+
+    def test_compact_session_history_over_budget(self, agent_service):
+        """推定トークン数が上限を超えた履歴は保持中のセッションで圧縮される"""
+        session = Mock(id="session_U1", events=self._make_turns(10))
+        self._use_stored_session(
+            agent_service,
+            sessions={APP_NAME: {"U1": {"session_U1": session}}},
+        )
+
+        assert agent_service._compact_session_history("U1", "session_U1")
+
+        assert len(session.events) < 20
+        assert session.events[-1].author == "RecipeWorkflowAgent"
+
+    def test_compact_session_history_within_budget(self, agent_service):
+        """上限内の履歴は変更されない"""
+        events = self._make_turns(1)
+        session = Mock(id="session_U1", events=events[:])
+        get_stored_session = Mock(return_value=session)
+        mark_session_updated = Mock()
+        self._use_stored_session(
+            agent_service,
+            get_stored_session=get_stored_session,
+            mark_session_updated=mark_session_updated,
+        )
+
+        assert not agent_service._compact_session_history("U1", "session_U1")
+        assert session.events == events
+        mark_session_updated.assert_not_called()
+
+    def test_compact_session_history_marks_persistent_backend(self, agent_service):
+        """永続化バックエンドには圧縮後に更新を伝える"""
+        session = Mock(id="session_U1", events=self._make_turns(10))
+        mark_session_updated = Mock()
+        self._use_stored_session(
+            agent_service,
+            get_stored_session=Mock(return_value=session),
+            mark_session_updated=mark_session_updated,
+        )
+
+        assert agent_service._compact_session_history("U1", "session_U1")
+        mark_session_updated.assert_called_once_with(
+            app_name=APP_NAME, user_id="U1", session_id="session_U1"
+        )
+
+    def test_compact_session_history_missing_session(self, agent_service):
+        """保持中のセッションがなければ何もしない"""
+        self._use_stored_session(agent_service, sessions={})
+
+        assert not agent_service._compact_session_history("U1", "session_U1")
+
+    def test_fit_request_within_budget(self, agent_service):
+        """予算内のリクエストは調整しない"""
+        agent_service.token_budget = TokenBudget(1000, estimator=CharEstimator())
+        self._use_stored_session(agent_service, sessions={})
+
+        assert agent_service._fit_request_to_budget("カレー", "U1", "s1") == "カレー"
+        assert metrics.get_counter("token_budget.adjustments") == 0
+
+    def test_fit_request_compacts_history(self, agent_service):
+        """履歴が残りの予算を超える場合は圧縮する"""
+        session = Mock(id="session_U1", events=self._make_turns(10))
+        self._use_stored_session(
+            agent_service, sessions={APP_NAME: {"U1": {"session_U1": session}}}
+        )
+        agent_service.token_budget = TokenBudget(500, estimator=CharEstimator())
+        agent_service._compact_session_history = Mock(return_value=True)
+
+        message = agent_service._fit_request_to_budget("カレー", "U1", "session_U1")
+
+        assert message == "カレー"
+        agent_service._compact_session_history.assert_called_once_with(
+            "U1", "session_U1", 497
+        )
+        assert metrics.get_counter("token_budget.adjustments") == 1
+
+    def test_fit_request_truncates_message(self, agent_service):
+        """大きすぎるメッセージは文の区切りで短縮する"""
+        self._use_stored_session(agent_service, sessions={})
+        agent_service.token_budget = TokenBudget(100, estimator=CharEstimator())
+
+        message = agent_service._fit_request_to_budget("材料。" * 100, "U1", "s1")
+
+        assert len(message) <= 75
+        assert message.endswith(TRUNCATION_NOTE)
+        assert metrics.get_counter("token_budget.message_truncations") == 1
+        assert metrics.get_counter("token_budget.adjustments") == 1
+
+    def test_truncate_message_for_retry(self, agent_service):
+        """リトライ時はトークン数を削減比率まで減らす"""
+        agent_service.token_budget = TokenBudget(1000, estimator=CharEstimator())
+        message = "手順です。" * 40
+
+        truncated = agent_service._truncate_message_for_retry(message)
+
+        assert len(truncated) <= len(message) * 0.8
+        assert truncated.endswith(TRUNCATION_NOTE)
+        assert agent_service._truncate_message_for_retry("短い") == "短い"
+
+    @pytest.mark.asyncio
+    async def test_token_limit_retry_compacts_without_delay(self, agent_service):
+        """トークン制限エラー時は履歴を小さい上限で圧縮し、待機せずに再試行する"""
+        agent_service._execute_single_attempt = AsyncMock(
+            side_effect=[Exception("token limit exceeded"), "登録しました"]
+        )
+        agent_service._compact_session_history = Mock(return_value=True)
+
+        with patch(
+            "src.services.agent_service_impl.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result == "登録しました"
+        mock_sleep.assert_not_awaited()
+        agent_service._compact_session_history.assert_called_once_with(
+            "U1",
+            "session_U1",
+            int(agent_service.history_compactor.max_tokens * TOKEN_LIMIT_HISTORY_RATIO),
+        )
+        assert metrics.get_counter("agent_service.token_limit_retries") == 1
+
+    @pytest.mark.asyncio
+    async def test_server_error_retry_waits(self, agent_service):
+        """サーバーエラー時は待機してから再試行する"""
+        agent_service._execute_single_attempt = AsyncMock(
+            side_effect=[Exception("500 INTERNAL error"), "登録しました"]
+        )
+        agent_service._compact_session_history = Mock()
+
+        with patch(
+            "src.services.agent_service_impl.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result == "登録しました"
+        mock_sleep.assert_awaited_once()
+        agent_service._compact_session_history.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_is_not_retried(self, agent_service):
+        """再試行しても変わらないエラーは1回で諦める"""
+        error = Exception("403 PERMISSION_DENIED")
+        error.code = 403
+        agent_service._execute_single_attempt = AsyncMock(side_effect=error)
+
+        with patch(
+            "src.services.agent_service_impl.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result.startswith("エラーが発生しました")
+        assert agent_service._execute_single_attempt.await_count == 1
+        mock_sleep.assert_not_awaited()
+        assert metrics.get_counter("retry.decisions.non_retryable") == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_exhausted(self, agent_service):
+        """再試行予算が尽きている場合はサーバーエラーでも再試行しない"""
+        agent_service.retry_policy.budget = RetryBudget(
+            capacity=0, refill_per_second=0, request_ratio=0
+        )
+        agent_service._execute_single_attempt = AsyncMock(
+            side_effect=Exception("500 INTERNAL error")
+        )
+
+        with patch(
+            "src.services.agent_service_impl.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result.startswith("エラーが発生しました")
+        assert agent_service._execute_single_attempt.await_count == 1
+        mock_sleep.assert_not_awaited()
+        assert metrics.get_counter("retry.decisions.budget_exhausted") == 1
+
+    @pytest.mark.asyncio
+    async def test_repeated_server_errors_escalate_to_fallback_model(
+        self, agent_service
+    ):
+        """サーバーエラーが続くと代替モデルへ切り替え、待機せずに再試行する"""
+        agent_service.model_router = ModelRouter({"agent": ["primary", "fallback"]})
+        agent_service.retry_policy.budget = RetryBudget(capacity=10)
+        levels = []
+
+        async def attempt(*args):
+            route_level = agent_service.model_router.escalate.call_count
+            levels.append(route_level)
+            if len(levels) < 3:
+                raise Exception("500 INTERNAL error")
+            return "登録しました"
+
+        agent_service.model_router.escalate = Mock(
+            wraps=agent_service.model_router.escalate
+        )
+        agent_service._execute_single_attempt = attempt
+
+        with patch(
+            "src.services.agent_service_impl.MODEL_FALLBACK_AFTER_FAILURES", 2
+        ), patch(
+            "src.services.agent_service_impl.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result == "登録しました"
+        assert levels == [0, 0, 1]
+        # 1回目の失敗は同じモデルで待機、2回目の失敗は代替モデルへ即時に切り替え
+        mock_sleep.assert_awaited_once()
+        assert metrics.get_counter("model_fallback.escalations") == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_model_call_releases_concurrency_slot(self, agent_service):
+        """例外で終わったモデル呼び出しの枠を返却し、過負荷なら上限を下げる"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        agent_service.concurrency_limiter = limiter
+        agent_service.retry_policy.max_attempts = 1
+
+        async def attempt(*args):
+            await limiter.before_model_callback(None, Mock())
+            raise Exception("500 INTERNAL error")
+
+        agent_service._execute_single_attempt = attempt
+
+        with patch("src.services.agent_service_impl.MAX_RETRY_ATTEMPTS", 1):
+            result = await agent_service.execute_and_get_response(
+                "メッセージ", "U1", "session_U1", Mock()
+            )
+
+        assert result.startswith("エラーが発生しました")
+        assert limiter.in_flight == 0
+        assert limiter.limit == 2
 
     def test_get_session_success(self, agent_service):
         """セッション取得成功のテスト"""
@@ -177,7 +608,8 @@ class TestAgentService:
                 user_id="user_id",
                 session_id=None,
                 image_data=None,
-                image_mime_type=None
+                image_mime_type=None,
+                progress_callback=None
             )
 
     @pytest.mark.asyncio
@@ -194,7 +626,8 @@ class TestAgentService:
                 user_id="user_id",
                 session_id=None,
                 image_data=b"image_data",
-                image_mime_type="image/jpeg"
+                image_mime_type="image/jpeg",
+                progress_callback=None
             )
 
     @pytest.mark.asyncio
@@ -209,6 +642,39 @@ class TestAgentService:
         # Note: cleanup doesn't set attributes to None in actual implementation
 
 
+class TestCreateSessionService:
+    """create_session_service関数のテスト"""
+
+    def test_memory_backend(self):
+        """メモリバックエンドのテスト"""
+        with patch(
+            'src.services.agent_service_impl.InMemorySessionService'
+        ) as mock_memory:
+            result = create_session_service("memory")
+            assert result == mock_memory.return_value
+
+    def test_sqlite_backend(self, tmp_path):
+        """SQLiteバックエンドのテスト"""
+        from src.services.sqlite_session_service import SQLiteSessionService
+
+        result = create_session_service("sqlite", str(tmp_path / "s.db"))
+        assert isinstance(result, SQLiteSessionService)
+
+    def test_unknown_backend_falls_back_to_memory(self):
+        """不明なバックエンド指定時にメモリを使うことのテスト"""
+        with patch(
+            'src.services.agent_service_impl.InMemorySessionService'
+        ) as mock_memory:
+            result = create_session_service("redis")
+            assert result == mock_memory.return_value
+
+    def test_agent_service_uses_given_service(self):
+        """指定したセッションサービスが使われることのテスト"""
+        session_service = Mock()
+        service = AgentService(session_service=session_service)
+        assert service.session_service is session_service
+
+
 class TestStaticMethods:
     """静的メソッドのテスト"""
 
@@ -266,6 +732,437 @@ class TestStaticMethods:
             mock_logger.info.assert_called()
 
 
+class TestProgressNotification:
+    """進捗通知のテスト"""
+
+    @staticmethod
+    def make_event(author, text="output"):
+        """テスト用イベントを作成"""
+        event = Mock()
+        event.author = author
+        event.content.parts = [Mock(text=text)]
+        return event
+
+    @pytest.mark.asyncio
+    async def test_notify_progress_for_milestone(self):
+        """進捗通知対象のエージェントで通知されることのテスト"""
+        callback = AsyncMock()
+        reported = set()
+
+        await AgentService.notify_progress(
+            self.make_event("ContentExtractionAgent"), callback, reported
+        )
+
+        callback.assert_awaited_once_with(
+            "ContentExtractionAgent",
+            PROGRESS_MILESTONES["ContentExtractionAgent"],
+        )
+        assert "ContentExtractionAgent" in reported
+
+    @pytest.mark.asyncio
+    async def test_notify_progress_once_per_agent(self):
+        """同じエージェントの進捗は一度だけ通知されることのテスト"""
+        callback = AsyncMock()
+        reported = set()
+        event = self.make_event("DataTransformationAgent")
+
+        await AgentService.notify_progress(event, callback, reported)
+        await AgentService.notify_progress(event, callback, reported)
+
+        callback.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_notify_progress_skips_other_agents(self):
+        """進捗通知対象外のエージェントでは通知されないことのテスト"""
+        callback = AsyncMock()
+
+        await AgentService.notify_progress(
+            self.make_event("root_agent"), callback, set()
+        )
+        await AgentService.notify_progress(
+            self.make_event("ContentExtractionAgent", text=None), callback, set()
+        )
+
+        callback.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_notify_progress_callback_error_is_ignored(self):
+        """コールバックの例外が伝播しないことのテスト"""
+        callback = AsyncMock(side_effect=Exception("push failed"))
+
+        await AgentService.notify_progress(
+            self.make_event("ImageAnalysisAgent"), callback, set()
+        )
+
+        callback.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_execute_single_attempt_reports_progress(self):
+        """エージェント実行中に進捗が通知されることのテスト"""
+        agent_service = AgentService()
+        events = [
+            self.make_event("ContentExtractionAgent", "```json\n{}\n```"),
+            self.make_event("DataTransformationAgent", "```json\n{}\n```"),
+            self.make_event("RecipeWorkflowAgent", "レシピ登録成功 ✅"),
+        ]
+
+        async def run_async(**kwargs):
+            for event in events:
+                yield event
+
+        agent_service.runner = Mock()
+        agent_service.runner.run_async = run_async
+        callback = AsyncMock()
+
+        result = await agent_service._execute_single_attempt(
+            "message", "user_id", "session_id", Mock(),
+            progress_callback=callback,
+        )
+
+        assert result == "レシピ登録成功 ✅"
+        assert [c.args[0] for c in callback.await_args_list] == [
+            "ContentExtractionAgent",
+            "DataTransformationAgent",
+        ]
+
+
+class TestStateCompletion:
+    """状態キーによる完了検出のテスト"""
+
+    @staticmethod
+    def make_event(author, text="output", state_delta=None):
+        """テスト用イベントを作成"""
+        event = Mock()
+        event.author = author
+        event.content.parts = [Mock(text=text)]
+        event.actions.state_delta = state_delta or {}
+        return event
+
+    def test_completion_state_keys(self):
+        """最後のサブエージェントの output_key が完了キーになる"""
+        assert COMPLETION_STATE_KEYS == {"registration_result"}
+
+    def test_get_completion_output(self):
+        """完了キーの値を取得する"""
+        event = self.make_event(
+            "NotionMCPRegistrationAgent",
+            state_delta={"registration_result": "登録しました"},
+        )
+
+        assert AgentService.get_completion_output(event) == "登録しました"
+        assert AgentService.get_completion_output(
+            self.make_event("DataTransformationAgent", state_delta={"x": 1})
+        ) is None
+
+    def test_get_completion_output_structured(self):
+        """構造化された値はJSON文字列にする"""
+        event = self.make_event(
+            "NotionMCPRegistrationAgent",
+            state_delta={"registration_result": {"page_id": "abc"}},
+        )
+
+        assert AgentService.get_completion_output(event) == '{"page_id": "abc"}'
+
+    @pytest.mark.asyncio
+    async def test_run_ends_when_completion_key_written(self):
+        """完了キーが書き込まれた時点で実行を終える"""
+        agent_service = AgentService()
+        consumed = []
+        events = [
+            self.make_event(
+                "ContentExtractionAgent",
+                "```json\n{}\n```",
+                {"extracted_recipe_data": "{}"},
+            ),
+            # 完了を示す語句を含まない登録結果
+            self.make_event(
+                "NotionMCPRegistrationAgent",
+                "カレーのページを作成しました",
+                {"registration_result": "カレーのページを作成しました"},
+            ),
+            self.make_event("RecipeWorkflowAgent", "その他の出力"),
+        ]
+
+        async def run_async(**kwargs):
+            for event in events:
+                consumed.append(event)
+                yield event
+
+        agent_service.runner = Mock()
+        agent_service.runner.run_async = run_async
+
+        result = await agent_service._execute_single_attempt(
+            "message", "user_id", "session_id", Mock()
+        )
+
+        assert result == "カレーのページを作成しました"
+        assert len(consumed) == 2
+        assert metrics.get_counter("agent_service.state_completions") == 1
+        assert metrics.get_counter("agent_service.heuristic_completions") == 0
+
+    @pytest.mark.asyncio
+    async def test_empty_completion_output_uses_previous_response(self):
+        """完了キーの値が空なら直前の応答を返す"""
+        agent_service = AgentService()
+        event = self.make_event(
+            "NotionMCPRegistrationAgent", None, {"registration_result": ""}
+        )
+
+        result = await agent_service._process_final_response(event, ["途中経過"], 0)
+
+        assert result == ("途中経過", ["途中経過"], 0)
+
+
+class TestSessionLock:
+    """セッション単位の実行ロックのテスト"""
+
+    @pytest.fixture
+    def agent_service(self):
+        """エージェント実行をモックしたAgentServiceインスタンス"""
+        service = AgentService()
+        service.init_agent = AsyncMock()
+        service.get_or_create_session = AsyncMock(
+            side_effect=lambda user_id, session_id: session_id
+        )
+        service.create_message_content = Mock()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_same_session_runs_serially(self, agent_service):
+        """同じセッションの実行が直列化されることのテスト"""
+        running = 0
+        max_running = 0
+
+        async def fake_execute(*args):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "response"
+
+        agent_service.execute_and_get_response = fake_execute
+
+        results = await asyncio.gather(
+            agent_service.call_agent_text("first", "user1"),
+            agent_service.call_agent_text("second", "user1"),
+        )
+
+        assert results == ["response", "response"]
+        assert max_running == 1
+        assert metrics.get_counter("agent_service.session_lock_contended") >= 1
+
+    @pytest.mark.asyncio
+    async def test_different_sessions_run_concurrently(self, agent_service):
+        """異なるセッションの実行が並行することのテスト"""
+        running = 0
+        max_running = 0
+
+        async def fake_execute(*args):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "response"
+
+        agent_service.execute_and_get_response = fake_execute
+
+        await asyncio.gather(
+            agent_service.call_agent_text("first", "user1"),
+            agent_service.call_agent_text("second", "user2"),
+        )
+
+        assert max_running == 2
+
+    @pytest.mark.asyncio
+    async def test_lock_released_on_error(self, agent_service):
+        """例外発生時にもロックが解放されることのテスト"""
+        agent_service.execute_and_get_response = AsyncMock(
+            side_effect=Exception("agent error")
+        )
+
+        with pytest.raises(Exception, match="agent error"):
+            await agent_service.call_agent_text("message", "user1")
+
+        assert not agent_service._session_locks["session_user1"].locked()
+        assert agent_service._session_lock_holders["session_user1"] == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_time_is_recorded(self, agent_service):
+        """ロック待ち時間がメトリクスに記録されることのテスト"""
+        agent_service.execute_and_get_response = AsyncMock(return_value="ok")
+
+        await agent_service.call_agent_text("message", "user1")
+
+        timing = metrics.get_timing("agent_service.session_lock_wait_seconds")
+        assert timing["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_locks_are_evicted(self, agent_service):
+        """一定時間使われていないロックが破棄されることのテスト"""
+        agent_service.execute_and_get_response = AsyncMock(return_value="ok")
+        await agent_service.call_agent_text("message", "user1")
+        agent_service._session_lock_last_used["session_user1"] -= (
+            SESSION_LOCK_IDLE_SECONDS + 1
+        )
+
+        await agent_service.call_agent_text("message", "user2")
+
+        assert "session_user1" not in agent_service._session_locks
+        assert "session_user2" in agent_service._session_locks
+        assert metrics.get_counter("agent_service.session_lock_evictions") == 1
+
+
+class TestSharedSessionSync:
+    """インスタンス間のセッション同期のテスト"""
+
+    @pytest.fixture
+    def agent_service(self):
+        """共有ストアを使うAgentServiceインスタンス"""
+        service = AgentService(session_service=Mock(), shared_store=Mock())
+        service.session_sync = Mock()
+        service.session_sync.pull = AsyncMock()
+        service.session_sync.push = AsyncMock()
+        service.init_agent = AsyncMock()
+        service.get_or_create_session = AsyncMock(
+            side_effect=lambda user_id, session_id: session_id
+        )
+        service.create_message_content = Mock()
+        return service
+
+    def test_disabled_by_default(self):
+        """共有ストア未設定時は同期しないことのテスト"""
+        with patch('src.services.agent_service_impl.SESSION_SHARED_STORE_URL', ""):
+            assert AgentService(session_service=Mock()).session_sync is None
+
+    @pytest.mark.asyncio
+    async def test_pull_before_and_push_after_run(self, agent_service):
+        """実行前に取得し、実行後に書き戻すことのテスト"""
+        calls = []
+        agent_service.session_sync.pull.side_effect = lambda *a: calls.append("pull")
+        agent_service.session_sync.push.side_effect = lambda *a: calls.append("push")
+
+        async def fake_execute(*args):
+            calls.append("execute")
+            return "response"
+
+        agent_service.execute_and_get_response = fake_execute
+
+        result = await agent_service.call_agent_text("message", "user1")
+
+        assert result == "response"
+        assert calls == ["pull", "execute", "push"]
+        agent_service.session_sync.push.assert_awaited_once_with(
+            "user1", "session_user1"
+        )
+
+    @pytest.mark.asyncio
+    async def test_push_failure_keeps_response(self, agent_service):
+        """書き戻しに失敗しても応答を返すことのテスト"""
+        agent_service.session_sync.push.side_effect = Exception("store down")
+        agent_service.execute_and_get_response = AsyncMock(return_value="ok")
+
+        result = await agent_service.call_agent_text("message", "user1")
+
+        assert result == "ok"
+        assert metrics.get_counter("shared_session.push_failures") == 1
+
+    @pytest.mark.asyncio
+    async def test_pull_failure_uses_local_session(self, agent_service):
+        """取り込みに失敗してもローカルのセッションで実行することのテスト"""
+        agent_service.session_sync.pull.side_effect = Exception("store down")
+        agent_service.execute_and_get_response = AsyncMock(return_value="ok")
+
+        result = await agent_service.call_agent_text("message", "user1")
+
+        assert result == "ok"
+        assert metrics.get_counter("shared_session.pull_failures") == 1
+        agent_service.session_sync.push.assert_awaited_once_with(
+            "user1", "session_user1"
+        )
+
+    @pytest.mark.asyncio
+    async def test_pull_failure_with_real_store(self):
+        """共有ストアの取得が失敗してもローカルのセッションで応答することのテスト"""
+        store = Mock()
+        store.get = AsyncMock(side_effect=ConnectionError("store down"))
+        store.put = AsyncMock(return_value=1)
+        service = AgentService(
+            session_service=InMemorySessionService(), shared_store=store
+        )
+        service.init_agent = AsyncMock()
+        service.create_message_content = Mock()
+        service.execute_and_get_response = AsyncMock(return_value="ok")
+
+        result = await service.call_agent_text("message", "user1")
+
+        assert result == "ok"
+        assert metrics.get_counter("shared_session.pull_failures") == 1
+
+    def test_sqlite_backend_disables_sync(self, tmp_path):
+        """SQLiteバックエンドでは共有ストアを使わないことのテスト"""
+        from src.services.sqlite_session_service import SQLiteSessionService
+
+        session_service = SQLiteSessionService(str(tmp_path / "s.db"))
+        with patch(
+            'src.services.agent_service_impl.SESSION_SHARED_STORE_URL',
+            "http://store.local",
+        ):
+            service = AgentService(session_service=session_service)
+        assert service.session_sync is None
+        assert (
+            AgentService(
+                session_service=session_service, shared_store=Mock()
+            ).session_sync
+            is None
+        )
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backend_call_with_shared_store(self, tmp_path):
+        """SQLiteバックエンドと共有ストアの組み合わせでも実行できることのテスト"""
+        from src.services.sqlite_session_service import SQLiteSessionService
+
+        session_service = SQLiteSessionService(str(tmp_path / "s.db"))
+        store = Mock()
+        store.get = AsyncMock()
+        service = AgentService(session_service=session_service, shared_store=store)
+        service.init_agent = AsyncMock()
+        service.create_message_content = Mock()
+        service.execute_and_get_response = AsyncMock(return_value="ok")
+
+        result = await service.call_agent_text("message", "user1")
+
+        assert result == "ok"
+        store.get.assert_not_called()
+        await session_service.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backend_preloads_session(self, tmp_path):
+        """SQLiteバックエンドのセッションをイベントループの外で読み込むことのテスト"""
+        from src.services.sqlite_session_service import SQLiteSessionService
+
+        db_path = str(tmp_path / "s.db")
+        writer = SQLiteSessionService(db_path)
+        writer.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        writer.flush()
+        service = AgentService(session_service=SQLiteSessionService(db_path))
+
+        session_id = await service.get_or_create_session("U1", "s1")
+
+        assert session_id == "s1"
+        assert metrics.get_counter("session_store.preloads") == 1
+        assert metrics.get_counter("session_store.hot_misses") == 0
+
+    def test_create_shared_session_store(self):
+        """URL指定時にHTTPストアが作成されることのテスト"""
+        from src.services.shared_session_store import HttpSessionStore
+
+        assert create_shared_session_store("") is None
+        store = create_shared_session_store("http://store.local")
+        assert isinstance(store, HttpSessionStore)
+
+
 class TestModuleFunctions:
     """モジュールレベル関数のテスト"""
 
@@ -290,7 +1187,9 @@ class TestModuleFunctions:
             result = await call_agent_async("message", user_id="user123")
             
             assert result == "response"
-            mock_service.call_agent_text.assert_called_once_with("message", "user123", None)
+            mock_service.call_agent_text.assert_called_once_with(
+                "message", "user123", None, None
+            )
 
     @pytest.mark.asyncio
     async def test_call_agent_with_image_async(self):
@@ -304,7 +1203,7 @@ class TestModuleFunctions:
             
             assert result == "response"
             mock_service.call_agent_with_image.assert_called_once_with(
-                "message", b"image", "image/jpeg", "user123", None
+                "message", b"image", "image/jpeg", "user123", None, None
             )
 
     @pytest.mark.asyncio
@@ -0,0 +1,125 @@
+"""ディスパッチキューのテストモジュール"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.dispatch_queue import EventDispatchQueue, QueueFullError
+from src.utils.metrics import metrics
+
+
+class TestEventDispatchQueue:
+    """EventDispatchQueueクラスのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        """メトリクスを初期化"""
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def test_init_invalid_worker_count(self):
+        """不正なワーカー数のテスト"""
+        with pytest.raises(ValueError):
+            EventDispatchQueue(worker_count=0)
+
+    def test_init_invalid_queue_size(self):
+        """不正なキューサイズのテスト"""
+        with pytest.raises(ValueError):
+            EventDispatchQueue(max_queue_size=0)
+
+    @pytest.mark.asyncio
+    async def test_submit_and_process(self):
+        """キューに積んだ処理が実行されることのテスト"""
+        queue = EventDispatchQueue(worker_count=2, max_queue_size=10)
+        func = AsyncMock()
+
+        queue.start()
+        queue.submit(func, "body", "signature")
+        await queue.stop()
+
+        func.assert_awaited_once_with("body", "signature")
+        assert metrics.get_counter("dispatch_queue.submitted") == 1
+        assert metrics.get_counter("dispatch_queue.completed") == 1
+        assert metrics.get_timing("dispatch_queue.wait_seconds")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_submit_queue_full(self):
+        """キュー満杯時に例外が発生することのテスト"""
+        queue = EventDispatchQueue(worker_count=1, max_queue_size=1)
+        func = AsyncMock()
+
+        queue.submit(func)
+        with pytest.raises(QueueFullError):
+            queue.submit(func)
+
+        assert metrics.get_counter("dispatch_queue.rejected") == 1
+        assert metrics.get_gauge("dispatch_queue.depth") == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_count_limits_concurrency(self):
+        """ワーカー数で同時実行数が制限されることのテスト"""
+        queue = EventDispatchQueue(worker_count=2, max_queue_size=10)
+        running = 0
+        max_running = 0
+
+        async def task():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        queue.start()
+        for _ in range(6):
+            queue.submit(task)
+        await queue.stop()
+
+        assert max_running == 2
+        assert metrics.get_counter("dispatch_queue.completed") == 6
+
+    @pytest.mark.asyncio
+    async def test_failed_task_does_not_stop_worker(self):
+        """処理の失敗がワーカーを止めないことのテスト"""
+        queue = EventDispatchQueue(worker_count=1, max_queue_size=10)
+        failing = AsyncMock(side_effect=Exception("boom"))
+        succeeding = AsyncMock()
+
+        queue.start()
+        queue.submit(failing)
+        queue.submit(succeeding)
+        await queue.stop()
+
+        succeeding.assert_awaited_once()
+        assert metrics.get_counter("dispatch_queue.failed") == 1
+        assert metrics.get_counter("dispatch_queue.completed") == 1
+
+    @pytest.mark.asyncio
+    async def test_start_is_idempotent(self):
+        """二重起動しないことのテスト"""
+        queue = EventDispatchQueue(worker_count=3, max_queue_size=10)
+
+        queue.start()
+        workers = list(queue._workers)
+        queue.start()
+
+        assert queue._workers == workers
+        await queue.stop()
+        assert not queue.is_running
+
+    @pytest.mark.asyncio
+    async def test_stop_drops_items_after_timeout(self):
+        """消化タイムアウト後に未処理分が破棄されることのテスト"""
+        queue = EventDispatchQueue(worker_count=1, max_queue_size=10)
+
+        async def slow_task():
+            await asyncio.sleep(1)
+
+        queue.start()
+        queue.submit(slow_task)
+        queue.submit(slow_task)
+        await queue.stop(drain_timeout=0.01)
+
+        assert queue.depth == 0
+        assert metrics.get_counter("dispatch_queue.dropped") == 1
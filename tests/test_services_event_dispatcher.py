@@ -0,0 +1,159 @@
+"""キー単位イベントディスパッチャーのテストモジュール"""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.services.event_dispatcher import (
+    UNKNOWN_SOURCE_KEY,
+    KeyedEventDispatcher,
+    get_event_key,
+)
+
+
+def make_event(user_id=None, group_id=None, room_id=None, label=""):
+    """テスト用イベントを作成"""
+    event = Mock()
+    event.source.user_id = user_id
+    event.source.group_id = group_id
+    event.source.room_id = room_id
+    event.label = label
+    return event
+
+
+class TestGetEventKey:
+    """get_event_key関数のテスト"""
+
+    def test_user_id(self):
+        """ユーザーIDが優先されることのテスト"""
+        event = make_event(user_id="U1", group_id="G1")
+        assert get_event_key(event) == "U1"
+
+    def test_group_id(self):
+        """ユーザーIDがない場合にグループIDを使うことのテスト"""
+        event = make_event(group_id="G1")
+        assert get_event_key(event) == "G1"
+
+    def test_room_id(self):
+        """ルームIDを使うことのテスト"""
+        event = make_event(room_id="R1")
+        assert get_event_key(event) == "R1"
+
+    def test_unknown_source(self):
+        """送信元がない場合のテスト"""
+        event = Mock(spec=[])
+        assert get_event_key(event) == UNKNOWN_SOURCE_KEY
+
+
+class TestKeyedEventDispatcher:
+    """KeyedEventDispatcherクラスのテスト"""
+
+    def test_init_invalid_concurrency(self):
+        """不正な同時実行数のテスト"""
+        with pytest.raises(ValueError):
+            KeyedEventDispatcher(max_concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_same_key_is_sequential(self):
+        """同じキーのイベントが到着順に直列処理されることのテスト"""
+        dispatcher = KeyedEventDispatcher(max_concurrency=4)
+        order = []
+
+        async def handler(event):
+            order.append(f"start-{event.label}")
+            await asyncio.sleep(0.01)
+            order.append(f"end-{event.label}")
+
+        events = [make_event(user_id="U1", label=str(i)) for i in range(3)]
+        await dispatcher.dispatch_all(events, handler)
+
+        assert order == [
+            "start-0", "end-0", "start-1", "end-1", "start-2", "end-2"
+        ]
+        assert dispatcher.active_keys == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_concurrently(self):
+        """異なるキーのイベントが並行処理されることのテスト"""
+        dispatcher = KeyedEventDispatcher(max_concurrency=4)
+        running = 0
+        max_running = 0
+
+        async def handler(event):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        events = [make_event(user_id=f"U{i}") for i in range(3)]
+        await dispatcher.dispatch_all(events, handler)
+
+        assert max_running == 3
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_cap(self):
+        """全体の同時実行数が制限されることのテスト"""
+        dispatcher = KeyedEventDispatcher(max_concurrency=2)
+        running = 0
+        max_running = 0
+
+        async def handler(event):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        events = [make_event(user_id=f"U{i}") for i in range(5)]
+        await dispatcher.dispatch_all(events, handler)
+
+        assert max_running == 2
+
+    @pytest.mark.asyncio
+    async def test_order_kept_across_batches(self):
+        """バッチをまたいでも同じキーの順序が保たれることのテスト"""
+        dispatcher = KeyedEventDispatcher(max_concurrency=4)
+        order = []
+
+        async def handler(event):
+            await asyncio.sleep(0.02 if event.label == "first" else 0)
+            order.append(event.label)
+
+        await asyncio.gather(
+            dispatcher.dispatch_all(
+                [make_event(user_id="U1", label="first")], handler
+            ),
+            dispatcher.dispatch_all(
+                [make_event(user_id="U1", label="second")], handler
+            ),
+        )
+
+        assert order == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_block_key(self):
+        """失敗したイベントが後続を止めないことのテスト"""
+        dispatcher = KeyedEventDispatcher(max_concurrency=2)
+        handled = []
+
+        async def handler(event):
+            if event.label == "bad":
+                raise RuntimeError("boom")
+            handled.append(event.label)
+
+        events = [
+            make_event(user_id="U1", label="bad"),
+            make_event(user_id="U1", label="good"),
+        ]
+        results = await dispatcher.dispatch_all(events, handler)
+
+        assert handled == ["good"]
+        assert isinstance(results[0], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_dispatch_all_empty(self):
+        """イベントがない場合のテスト"""
+        dispatcher = KeyedEventDispatcher()
+        assert await dispatcher.dispatch_all([], Mock()) == []
@@ -0,0 +1,209 @@
+"""会話履歴圧縮モジュールのテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events.event import Event
+from google.genai import types
+
+from src.services.history_compactor import (
+    IMAGE_TOKENS,
+    SUMMARY_AUTHOR,
+    SUMMARY_HEADER,
+    TRUNCATED_NOTE,
+    HistoryCompactor,
+    estimate_event_tokens,
+    estimate_tokens,
+    split_turns,
+)
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeSession:
+    """イベント一覧を持つセッション"""
+
+    def __init__(self, events):
+        self.id = "session_U1"
+        self.events = events
+
+
+def make_event(author, text, timestamp=0.0):
+    """テキストを持つイベントを作成"""
+    role = "user" if author == "user" else "model"
+    event = Event(
+        author=author,
+        content=types.Content(role=role, parts=[types.Part(text=text)]),
+    )
+    event.timestamp = timestamp
+    return event
+
+
+def make_function_response_event(result):
+    """関数応答を持つイベントを作成"""
+    part = SimpleNamespace(
+        function_response=SimpleNamespace(name="fetch", response={"result": result})
+    )
+    return SimpleNamespace(
+        author="ContentExtractionAgent",
+        timestamp=1.0,
+        content=SimpleNamespace(parts=[part]),
+    )
+
+
+def make_turns(count, text_size=50):
+    """ユーザー発言と応答からなるターンを指定数作成"""
+    events = []
+    for i in range(count):
+        events.append(make_event("user", f"質問{i}" + "あ" * text_size, float(i)))
+        events.append(
+            make_event("RecipeWorkflowAgent", f"回答{i}" + "い" * text_size, i + 0.5)
+        )
+    return events
+
+
+class TestEstimateTokens:
+    """推定トークン数のテスト"""
+
+    def test_empty(self):
+        """空文字は0トークン"""
+        assert estimate_tokens("") == 0
+
+    def test_ascii(self):
+        """ASCII文字は約4文字で1トークン"""
+        assert estimate_tokens("a" * 40) == 10
+
+    def test_japanese(self):
+        """日本語は1文字1トークン"""
+        assert estimate_tokens("レシピを登録") == 6
+
+    def test_event_with_function_response_and_image(self):
+        """関数応答と画像もトークン数に含める"""
+        event = make_function_response_event("本文" * 10)
+        event.content.parts.append(
+            SimpleNamespace(inline_data=SimpleNamespace(data=b"x"))
+        )
+
+        assert estimate_event_tokens(event) > IMAGE_TOKENS + 20
+
+
+class TestSplitTurns:
+    """ターン分割のテスト"""
+
+    def test_split_by_user_event(self):
+        """ユーザー発言ごとにターンを分割する"""
+        turns = split_turns(make_turns(3))
+
+        assert len(turns) == 3
+        assert all(turn[0].author == "user" for turn in turns)
+
+    def test_leading_agent_events(self):
+        """先頭がユーザー発言でない場合もひとつのターンにまとめる"""
+        events = [make_event(SUMMARY_AUTHOR, "要約")] + make_turns(1)
+
+        assert len(split_turns(events)) == 2
+
+
+class TestHistoryCompactor:
+    """HistoryCompactorクラスのテスト"""
+
+    def test_within_budget(self):
+        """上限内であれば変更しない"""
+        events = make_turns(2)
+        session = FakeSession(events[:])
+
+        assert not HistoryCompactor(max_tokens=10000).compact(session)
+        assert session.events == events
+
+    def test_folds_old_turns_into_summary(self):
+        """古いターンを要約エントリーにまとめ、直近のターンは残す"""
+        events = make_turns(10, text_size=200)
+        session = FakeSession(events[:])
+        compactor = HistoryCompactor(
+            max_tokens=4000, keep_recent_tokens=900, summary_max_tokens=4000
+        )
+
+        assert compactor.compact(session)
+
+        summary = session.events[0]
+        assert summary.author == SUMMARY_AUTHOR
+        text = summary.content.parts[0].text
+        assert text.startswith(SUMMARY_HEADER)
+        assert "質問0" in text and "回答0" in text
+        assert session.events[-2:] == events[-2:]
+        assert summary.timestamp <= session.events[1].timestamp
+        assert compactor.count_tokens(session.events) <= 4000
+        assert metrics.get_counter("history.compactions") == 1
+
+    def test_rolling_summary(self):
+        """既存の要約に新しく古くなったターンを追記する"""
+        compactor = HistoryCompactor(
+            max_tokens=4000, keep_recent_tokens=900, summary_max_tokens=4000
+        )
+        session = FakeSession(make_turns(10, text_size=200))
+        compactor.compact(session)
+
+        session.events.extend(make_turns(10, text_size=200)[-8:])
+        assert compactor.compact(session)
+
+        summaries = [e for e in session.events if e.author == SUMMARY_AUTHOR]
+        assert len(summaries) == 1
+        text = summaries[0].content.parts[0].text
+        assert text.count(SUMMARY_HEADER) == 1
+        assert "質問0" in text and "質問6" in text
+
+    def test_summary_drops_oldest_lines(self):
+        """要約が上限を超える場合は古い行から捨てる"""
+        compactor = HistoryCompactor(
+            max_tokens=300, keep_recent_tokens=150, summary_max_tokens=80
+        )
+        session = FakeSession(make_turns(10))
+
+        compactor.compact(session)
+
+        text = session.events[0].content.parts[0].text
+        assert "質問0" not in text
+        assert "質問8" in text
+
+    def test_keeps_latest_turn_over_budget(self):
+        """最新のターンは上限を超えていても残す"""
+        events = make_turns(2, text_size=500)
+        session = FakeSession(events[:])
+
+        assert HistoryCompactor(max_tokens=100, keep_recent_tokens=50).compact(
+            session
+        )
+        assert session.events[-2:] == events[-2:]
+
+    def test_truncates_large_function_response(self):
+        """巨大な関数応答は切り詰める"""
+        large = make_function_response_event("本文" * 1000)
+        session = FakeSession([make_event("user", "URLです"), large])
+
+        assert HistoryCompactor(max_tokens=500, max_part_tokens=100).compact(session)
+
+        response = session.events[-1].content.parts[0].function_response.response
+        assert response["result"].endswith(TRUNCATED_NOTE)
+        assert estimate_event_tokens(session.events[-1]) < 200
+        assert metrics.get_counter("history.truncated_parts") == 1
+
+    def test_override_max_tokens(self):
+        """呼び出し時の上限で圧縮できる"""
+        session = FakeSession(make_turns(4))
+        compactor = HistoryCompactor(max_tokens=10000, keep_recent_tokens=5000)
+
+        assert compactor.compact(session, max_tokens=100)
+        assert session.events[0].author == SUMMARY_AUTHOR
+
+    def test_non_list_events(self):
+        """イベント一覧を持たないセッションは対象外"""
+        session = FakeSession(None)
+
+        assert not HistoryCompactor(max_tokens=1).compact(session)
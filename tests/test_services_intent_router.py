@@ -0,0 +1,48 @@
+"""意図の事前振り分けモジュールのテスト"""
+
+import pytest
+
+from src.services.intent_router import (
+    DEFAULT_IMAGE_MESSAGE,
+    IMAGE_RECIPE_PIPELINE,
+    URL_RECIPE_PIPELINE,
+    detect_fast_path,
+)
+
+
+class TestDetectFastPath:
+    """detect_fast_path関数のテスト"""
+
+    @pytest.mark.parametrize("message", ["", "   ", DEFAULT_IMAGE_MESSAGE])
+    def test_image_only(self, message):
+        """テキストのない画像は画像レシピのパイプライン"""
+        assert detect_fast_path(message, has_image=True) == IMAGE_RECIPE_PIPELINE
+
+    def test_image_with_question(self):
+        """質問付きの画像は判定しない"""
+        assert detect_fast_path("これは何の料理？", has_image=True) is None
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "https://cookpad.com/recipe/123",
+            "  http://example.com/recipes?id=1&lang=ja\n",
+        ],
+    )
+    def test_url_only(self, message):
+        """URLのみのメッセージはURLレシピのパイプライン"""
+        assert detect_fast_path(message, has_image=False) == URL_RECIPE_PIPELINE
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "このレシピを登録して https://cookpad.com/recipe/123",
+            "https://a.example.com https://b.example.com",
+            "cookpad.com/recipe/123",
+            "カレーの作り方を教えて",
+            "",
+        ],
+    )
+    def test_ambiguous_text(self, message):
+        """URL以外を含むテキストは判定しない"""
+        assert detect_fast_path(message, has_image=False) is None
@@ -1,9 +1,9 @@
 """LINEクライアントのテストモジュール"""
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 
-from src.services.line_service.client import LineClient
+from src.services.line_service.client import AsyncLineClient, LineClient
 
 
 class TestLineClient:
@@ -225,4 +225,186 @@ class TestLineClient:
             
             content = line_client.get_message_content(message_id)
             
-            assert content == empty_content
\ No newline at end of file
+            assert content == empty_content
+
+
+# パッチ対象のモジュール
+CLIENT_MODULE = "src.services.line_service.client"
+
+
+def make_client(client_class):
+    """LINEの設定をパッチしてクライアントを作成"""
+    with patch(f"{CLIENT_MODULE}.get_line_config") as mock_config, \
+         patch(f"{CLIENT_MODULE}.Configuration"), \
+         patch(f"{CLIENT_MODULE}.WebhookParser"):
+        mock_config.return_value = ("test_access_token", "test_channel_secret")
+        return client_class()
+
+
+class TestLineClientPush:
+    """LineClient.push_textのテスト"""
+
+    @pytest.fixture
+    def line_client(self):
+        """LineClientインスタンス"""
+        return make_client(LineClient)
+
+    def test_push_text_success(self, line_client):
+        """テキストプッシュ成功のテスト"""
+        mock_api_client = MagicMock()
+        mock_line_api = Mock()
+
+        with patch.object(
+            line_client, "create_api_client", return_value=mock_api_client
+        ), patch(
+            f"{CLIENT_MODULE}.MessagingApi", return_value=mock_line_api
+        ), patch(
+            f"{CLIENT_MODULE}.PushMessageRequest"
+        ) as mock_push_request, patch(
+            f"{CLIENT_MODULE}.TextMessage"
+        ) as mock_text_message:
+
+            line_client.push_text("U1", "Hello")
+
+            mock_push_request.assert_called_once_with(
+                to="U1", messages=[mock_text_message.return_value]
+            )
+            mock_line_api.push_message.assert_called_once_with(
+                mock_push_request.return_value
+            )
+
+    def test_push_text_failure(self, line_client):
+        """テキストプッシュ失敗のテスト"""
+        mock_api_client = MagicMock()
+
+        with patch.object(
+            line_client, "create_api_client", return_value=mock_api_client
+        ), patch(f"{CLIENT_MODULE}.MessagingApi") as mock_messaging_api:
+            mock_messaging_api.return_value.push_message.side_effect = Exception(
+                "API error"
+            )
+
+            with pytest.raises(Exception, match="API error"):
+                line_client.push_text("U1", "Hello")
+
+
+class TestAsyncLineClient:
+    """AsyncLineClientクラスのテスト"""
+
+    @pytest.fixture
+    def async_line_client(self):
+        """AsyncLineClientインスタンス"""
+        return make_client(AsyncLineClient)
+
+    def test_create_api_client_is_shared(self, async_line_client):
+        """APIクライアント（セッション）が再利用されることのテスト"""
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient") as mock_api_client:
+            first = async_line_client.create_api_client()
+            second = async_line_client.create_api_client()
+
+            assert first is second
+            mock_api_client.assert_called_once_with(
+                async_line_client.configuration
+            )
+
+    @pytest.mark.asyncio
+    async def test_reply_text_success(self, async_line_client):
+        """非同期テキスト返信成功のテスト"""
+        mock_line_api = Mock()
+        mock_line_api.reply_message = AsyncMock()
+
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient"), patch(
+            f"{CLIENT_MODULE}.AsyncMessagingApi", return_value=mock_line_api
+        ), patch(
+            f"{CLIENT_MODULE}.ReplyMessageRequest"
+        ) as mock_reply_request, patch(
+            f"{CLIENT_MODULE}.TextMessage"
+        ) as mock_text_message:
+
+            await async_line_client.reply_text("test_reply_token", "Hello")
+
+            mock_text_message.assert_called_once_with(text="Hello")
+            mock_reply_request.assert_called_once_with(
+                reply_token="test_reply_token",
+                messages=[mock_text_message.return_value],
+            )
+            mock_line_api.reply_message.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_reply_text_failure(self, async_line_client):
+        """非同期テキスト返信失敗のテスト"""
+        mock_line_api = Mock()
+        mock_line_api.reply_message = AsyncMock(side_effect=Exception("API error"))
+
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient"), patch(
+            f"{CLIENT_MODULE}.AsyncMessagingApi", return_value=mock_line_api
+        ):
+
+            with pytest.raises(Exception, match="API error"):
+                await async_line_client.reply_text("test_reply_token", "Hello")
+
+    @pytest.mark.asyncio
+    async def test_get_message_content_success(self, async_line_client):
+        """非同期メッセージコンテンツ取得成功のテスト"""
+        mock_blob_api = Mock()
+        mock_blob_api.get_message_content = AsyncMock(return_value=b"image_data")
+
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient"), patch(
+            f"{CLIENT_MODULE}.AsyncMessagingApiBlob", return_value=mock_blob_api
+        ):
+
+            content = await async_line_client.get_message_content("test_message_id")
+
+            assert content == b"image_data"
+            mock_blob_api.get_message_content.assert_awaited_once_with(
+                "test_message_id"
+            )
+
+    @pytest.mark.asyncio
+    async def test_push_text_success(self, async_line_client):
+        """非同期テキストプッシュ成功のテスト"""
+        mock_line_api = Mock()
+        mock_line_api.push_message = AsyncMock()
+
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient"), patch(
+            f"{CLIENT_MODULE}.AsyncMessagingApi", return_value=mock_line_api
+        ), patch(f"{CLIENT_MODULE}.PushMessageRequest") as mock_push_request:
+
+            await async_line_client.push_text("U1", "Hello")
+
+            mock_line_api.push_message.assert_awaited_once_with(
+                mock_push_request.return_value
+            )
+
+    @pytest.mark.asyncio
+    async def test_show_loading_animation(self, async_line_client):
+        """ローディングアニメーション表示のテスト"""
+        mock_line_api = Mock()
+        mock_line_api.show_loading_animation = AsyncMock()
+
+        with patch(f"{CLIENT_MODULE}.AsyncApiClient"), patch(
+            f"{CLIENT_MODULE}.AsyncMessagingApi", return_value=mock_line_api
+        ), patch(f"{CLIENT_MODULE}.ShowLoadingAnimationRequest") as mock_request:
+
+            await async_line_client.show_loading_animation("U1", 60)
+
+            mock_request.assert_called_once_with(chat_id="U1", loading_seconds=60)
+            mock_line_api.show_loading_animation.assert_awaited_once_with(
+                mock_request.return_value
+            )
+
+    @pytest.mark.asyncio
+    async def test_close(self, async_line_client):
+        """セッションのクローズのテスト"""
+        mock_api_client = Mock()
+        mock_api_client.close = AsyncMock()
+
+        with patch(
+            f"{CLIENT_MODULE}.AsyncApiClient", return_value=mock_api_client
+        ):
+            async_line_client.create_api_client()
+            await async_line_client.close()
+            # 二重クローズしない
+            await async_line_client.close()
+
+        mock_api_client.close.assert_awaited_once()
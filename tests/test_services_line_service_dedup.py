@@ -0,0 +1,114 @@
+"""Webhookイベント重複排除のテストモジュール"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.services.line_service.dedup import WebhookEventDeduplicator
+from src.utils.metrics import metrics
+
+
+def make_event(event_id, is_redelivery=False):
+    """テスト用イベントを作成"""
+    event = Mock()
+    event.webhook_event_id = event_id
+    event.delivery_context.is_redelivery = is_redelivery
+    return event
+
+
+class TestWebhookEventDeduplicator:
+    """WebhookEventDeduplicatorクラスのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        """メトリクスを初期化"""
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    @pytest.fixture
+    def deduplicator(self):
+        """メモリのみのWebhookEventDeduplicatorインスタンス"""
+        return WebhookEventDeduplicator(ttl_seconds=60, max_entries=3)
+
+    def test_first_event_is_processed(self, deduplicator):
+        """初回イベントが処理対象になることのテスト"""
+        assert deduplicator.should_process(make_event("E1")) is True
+        assert metrics.get_counter("webhook_dedup.misses") == 1
+
+    def test_redelivered_event_is_skipped(self, deduplicator):
+        """再送イベントがスキップされることのテスト"""
+        deduplicator.should_process(make_event("E1"))
+
+        result = deduplicator.should_process(make_event("E1", True))
+
+        assert result is False
+        assert metrics.get_counter("webhook_dedup.hits") == 1
+        assert metrics.get_counter("webhook_dedup.redeliveries") == 1
+
+    def test_event_without_id_is_processed(self, deduplicator):
+        """イベントIDがない場合は常に処理対象になることのテスト"""
+        event = Mock(spec=[])
+        assert deduplicator.should_process(event) is True
+        assert deduplicator.should_process(event) is True
+        assert len(deduplicator) == 0
+
+    def test_lru_eviction(self, deduplicator):
+        """上限を超えた古いイベントIDが破棄されることのテスト"""
+        for event_id in ["E1", "E2", "E3", "E4"]:
+            deduplicator.should_process(make_event(event_id))
+
+        assert len(deduplicator) == 3
+        assert metrics.get_counter("webhook_dedup.evictions") == 1
+        assert deduplicator.should_process(make_event("E1")) is True
+
+    def test_ttl_expiry(self, deduplicator):
+        """TTLを過ぎたイベントIDが再処理されることのテスト"""
+        with patch("src.services.line_service.dedup.time.time") as mock_time:
+            mock_time.return_value = 1000.0
+            deduplicator.should_process(make_event("E1"))
+
+            mock_time.return_value = 1061.0
+            assert deduplicator.should_process(make_event("E1", True)) is True
+
+    @pytest.mark.asyncio
+    async def test_sqlite_persistence(self, tmp_path):
+        """SQLiteに永続化され再起動後も重複を検出できることのテスト"""
+        db_path = str(tmp_path / "dedup.db")
+        first = WebhookEventDeduplicator(ttl_seconds=60, db_path=db_path)
+        first.should_process(make_event("E1"))
+        first.mark_processed(make_event("E1"))
+        # 処理に成功していないイベントは永続化しない
+        first.should_process(make_event("E3"))
+        await first.close()
+
+        second = WebhookEventDeduplicator(ttl_seconds=60, db_path=db_path)
+
+        # 再送フラグがない場合は永続ストアを参照しない
+        assert second.should_process(make_event("E2")) is True
+        # 再送フラグがある場合は永続ストアを参照する
+        assert second.should_process(make_event("E1", True)) is False
+        assert second.should_process(make_event("E3", True)) is True
+        await second.close()
+
+    def test_release_allows_redelivery(self, deduplicator):
+        """記録を取り消したイベントは再送時に処理されることのテスト"""
+        deduplicator.should_process(make_event("E1"))
+        deduplicator.release(make_event("E1"))
+
+        assert deduplicator.should_process(make_event("E1", True)) is True
+        assert metrics.get_counter("webhook_dedup.releases") == 1
+
+    def test_empty_deduplicator_is_falsy(self, deduplicator):
+        """空のストアは len が0になる（有無の判定に真偽値を使わないこと）"""
+        assert len(deduplicator) == 0
+        assert not deduplicator
+
+    @pytest.mark.asyncio
+    async def test_close_is_idempotent(self, tmp_path):
+        """closeを複数回呼んでもエラーにならないことのテスト"""
+        deduplicator = WebhookEventDeduplicator(
+            db_path=str(tmp_path / "dedup.db")
+        )
+        await deduplicator.close()
+        await deduplicator.close()
@@ -0,0 +1,207 @@
+"""LINE応答配信のテストモジュール"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.services.line_service.delivery import (
+    ReplyContext,
+    ReplyDeliveryManager,
+    get_issued_at,
+    get_push_target,
+)
+from src.utils.metrics import metrics
+
+
+def make_event(reply_token="token", user_id="U1", group_id=None, timestamp=None):
+    """テスト用イベントを作成"""
+    event = Mock()
+    event.reply_token = reply_token
+    event.source.user_id = user_id
+    event.source.group_id = group_id
+    event.source.room_id = None
+    event.timestamp = timestamp
+    return event
+
+
+class TestHelpers:
+    """ヘルパー関数のテスト"""
+
+    def test_get_push_target_user(self):
+        """1対1の場合はユーザーIDを使うことのテスト"""
+        assert get_push_target(make_event(user_id="U1")) == "U1"
+
+    def test_get_push_target_group(self):
+        """グループの場合はグループIDを優先することのテスト"""
+        assert get_push_target(make_event(user_id="U1", group_id="G1")) == "G1"
+
+    def test_get_push_target_none(self):
+        """送信元がない場合のテスト"""
+        assert get_push_target(Mock(spec=[])) is None
+
+    def test_get_issued_at_from_timestamp(self):
+        """ミリ秒タイムスタンプから発行時刻を取得するテスト"""
+        assert get_issued_at(make_event(timestamp=1700000000000)) == 1700000000
+
+    def test_get_issued_at_fallback(self):
+        """タイムスタンプがない場合に現在時刻を使うテスト"""
+        before = time.time()
+        assert get_issued_at(make_event()) >= before
+
+
+class TestReplyDeliveryManager:
+    """ReplyDeliveryManagerクラスのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        """メトリクスを初期化"""
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    @pytest.fixture
+    def line_client(self):
+        """非同期LINEクライアントのモック"""
+        client = Mock()
+        client.reply_text = AsyncMock()
+        client.push_text = AsyncMock()
+        return client
+
+    @pytest.fixture
+    def delivery(self, line_client):
+        """ReplyDeliveryManagerインスタンス"""
+        return ReplyDeliveryManager(
+            line_client, ttl_seconds=0.2, ack_margin_seconds=0.1, ack_message="ack"
+        )
+
+    def test_create_and_get_context(self, delivery):
+        """返信トークンの状態の登録と取得のテスト"""
+        context = delivery.create_context(make_event("token-1"))
+
+        assert delivery.get_context("token-1") is context
+        assert context.push_to == "U1"
+        assert context.used is False
+
+    def test_prune_old_contexts(self, delivery):
+        """古い返信トークンの状態が破棄されることのテスト"""
+        delivery._contexts["old"] = ReplyContext(
+            reply_token="old", push_to="U1", issued_at=time.time() - 10
+        )
+
+        delivery.create_context(make_event("new"))
+
+        assert delivery.get_context("old") is None
+
+    @pytest.mark.asyncio
+    async def test_fast_work_is_replied(self, delivery, line_client):
+        """期限内に終わった処理は返信で送られることのテスト"""
+        context = delivery.create_context(make_event())
+
+        result = await delivery.run_with_deadline(context, asyncio.sleep(0, "done"))
+        path = await delivery.send(context, result)
+
+        assert path == "reply"
+        line_client.reply_text.assert_awaited_once_with("token", "done")
+        line_client.push_text.assert_not_called()
+        assert metrics.get_timing("line_delivery.reply_seconds")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_work_acks_then_pushes(self, delivery, line_client):
+        """期限を超える処理は受付メッセージ後にプッシュで送られることのテスト"""
+        context = delivery.create_context(make_event())
+
+        result = await delivery.run_with_deadline(
+            context, asyncio.sleep(0.2, "done")
+        )
+        path = await delivery.send(context, result)
+
+        assert path == "push"
+        line_client.reply_text.assert_awaited_once_with("token", "ack")
+        line_client.push_text.assert_awaited_once_with("U1", "done")
+        assert metrics.get_counter("line_delivery.ack") == 1
+        assert metrics.get_counter("line_delivery.push") == 1
+
+    @pytest.mark.asyncio
+    async def test_ack_failure_does_not_abort_work(self, delivery, line_client):
+        """受付メッセージの送信失敗で処理が中断されないことのテスト"""
+        line_client.reply_text.side_effect = Exception("expired")
+        context = delivery.create_context(make_event())
+
+        result = await delivery.run_with_deadline(
+            context, asyncio.sleep(0.2, "done")
+        )
+
+        assert result == "done"
+        assert context.used is True
+
+    @pytest.mark.asyncio
+    async def test_reply_failure_falls_back_to_push(self, delivery, line_client):
+        """返信に失敗した場合にプッシュへ切り替えることのテスト"""
+        line_client.reply_text.side_effect = Exception("Invalid reply token")
+        context = delivery.create_context(make_event())
+
+        path = await delivery.send(context, "answer")
+
+        assert path == "push"
+        line_client.push_text.assert_awaited_once_with("U1", "answer")
+        assert metrics.get_counter("line_delivery.reply_fallbacks") == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_token_uses_push(self, delivery, line_client):
+        """期限切れのトークンは使わずにプッシュすることのテスト"""
+        context = ReplyContext(
+            reply_token="token", push_to="U1", issued_at=time.time() - 1
+        )
+
+        path = await delivery.send(context, "answer")
+
+        assert path == "push"
+        line_client.reply_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_no_push_target_raises(self, delivery, line_client):
+        """送信先がない場合に例外が発生することのテスト"""
+        context = ReplyContext(
+            reply_token="token", push_to=None, issued_at=time.time(), used=True
+        )
+
+        with pytest.raises(RuntimeError):
+            await delivery.send(context, "answer")
+
+    @pytest.mark.asyncio
+    async def test_work_exception_is_propagated(self, delivery):
+        """処理の例外がそのまま伝播することのテスト"""
+        context = delivery.create_context(make_event())
+
+        async def failing():
+            raise ValueError("agent error")
+
+        with pytest.raises(ValueError, match="agent error"):
+            await delivery.run_with_deadline(context, failing())
+
+    @pytest.mark.asyncio
+    async def test_cancel_cancels_work(self, delivery):
+        """呼び出し元がキャンセルされた場合に処理もキャンセルされることのテスト"""
+        context = delivery.create_context(make_event())
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.ensure_future(
+            delivery.run_with_deadline(context, slow_work())
+        )
+        await started.wait()
+        caller.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
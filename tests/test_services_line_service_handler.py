@@ -1,8 +1,9 @@
 """LINEイベントハンドラーのテストモジュール"""
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import ANY, Mock, AsyncMock, patch
 
+from src.services.line_service.dedup import WebhookEventDeduplicator
 from src.services.line_service.handler import LineEventHandler
 
 
@@ -64,7 +65,8 @@ class TestLineEventHandler:
             # call_agent_asyncが正しい引数で呼ばれたかチェック
             mock_call_agent.assert_called_once_with(
                 "Hello, world!",
-                user_id="test_user_id"
+                user_id="test_user_id",
+                progress_callback=ANY
             )
             
             # reply_textが呼ばれたかチェック
@@ -182,7 +184,8 @@ class TestLineEventHandler:
                 message="この画像からレシピを抽出してNotionに登録してください",
                 image_data=mock_image_data,
                 image_mime_type="image/jpeg",
-                user_id="test_user_id"
+                user_id="test_user_id",
+                progress_callback=ANY
             )
             
             # reply_textが呼ばれたかチェック
@@ -293,19 +296,21 @@ class TestLineEventHandler:
             # エラーハンドラーが呼ばれる
             mock_error_handler.assert_called_once_with("test_reply_token")
 
-    def test_handle_error_reply_success(self, line_handler):
+    @pytest.mark.asyncio
+    async def test_handle_error_reply_success(self, line_handler):
         """エラー返信処理成功のテスト"""
         reply_token = "test_reply_token"
         
         with patch('src.services.line_service.handler.ERROR_MESSAGE', "Error occurred"):
-            line_handler._handle_error_reply(reply_token)
+            await line_handler._handle_error_reply(reply_token)
             
             line_handler.line_client.reply_text.assert_called_once_with(
                 reply_token,
                 "Error occurred"
             )
 
-    def test_handle_error_reply_failure(self, line_handler):
+    @pytest.mark.asyncio
+    async def test_handle_error_reply_failure(self, line_handler):
         """エラー返信処理失敗のテスト"""
         reply_token = "test_reply_token"
         
@@ -313,9 +318,230 @@ class TestLineEventHandler:
         
         with patch('src.services.line_service.handler.ERROR_MESSAGE', "Error occurred"):
             # エラーが発生してもExceptionは発生しない
-            line_handler._handle_error_reply(reply_token)
+            await line_handler._handle_error_reply(reply_token)
             
             line_handler.line_client.reply_text.assert_called_once_with(
                 reply_token,
                 "Error occurred"
-            )
\ No newline at end of file
+            )
+
+
+class TestLineEventHandlerAsyncClient:
+    """非同期LINEクライアント利用時のLineEventHandlerのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_handle_text_message_awaits_async_client(self):
+        """非同期クライアントの返信がawaitされることのテスト"""
+        async_client = Mock()
+        async_client.reply_text = AsyncMock()
+        handler = LineEventHandler(line_client=async_client)
+
+        mock_event = Mock()
+        mock_event.source.user_id = "test_user_id"
+        mock_event.reply_token = "test_reply_token"
+        mock_text_content = Mock()
+        mock_text_content.text = "Hello"
+
+        with patch(
+            'src.services.line_service.handler.call_agent_async'
+        ) as mock_call_agent:
+            mock_call_agent.return_value = "Agent response"
+            await handler.handle_text_message(mock_event, mock_text_content)
+
+        async_client.reply_text.assert_awaited_once_with(
+            "test_reply_token", "Agent response"
+        )
+
+    @pytest.mark.asyncio
+    async def test_handle_image_message_awaits_async_client(self):
+        """非同期クライアントの画像取得がawaitされることのテスト"""
+        async_client = Mock()
+        async_client.get_message_content = AsyncMock(return_value=b"image")
+        async_client.reply_text = AsyncMock()
+        handler = LineEventHandler(line_client=async_client)
+
+        mock_event = Mock()
+        mock_event.source.user_id = "test_user_id"
+        mock_event.reply_token = "test_reply_token"
+        mock_image_content = Mock()
+        mock_image_content.id = "test_image_id"
+
+        with patch(
+            'src.services.line_service.handler.call_agent_with_image_async'
+        ) as mock_call_agent:
+            mock_call_agent.return_value = "Image result"
+            await handler.handle_image_message(mock_event, mock_image_content)
+
+        async_client.get_message_content.assert_awaited_once_with(
+            "test_image_id"
+        )
+        assert mock_call_agent.call_args.kwargs["image_data"] == b"image"
+        async_client.reply_text.assert_awaited_once_with(
+            "test_reply_token", "Image result"
+        )
+
+
+class TestLineEventHandlerProgress:
+    """LineEventHandlerの進捗通知のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_progress_is_reported_during_agent_call(self):
+        """エージェント処理中の進捗がLINEに通知されることのテスト"""
+        async_client = Mock()
+        async_client.reply_text = AsyncMock()
+        async_client.show_loading_animation = AsyncMock()
+        handler = LineEventHandler(line_client=async_client)
+
+        mock_event = Mock()
+        mock_event.source.user_id = "test_user_id"
+        mock_event.source.group_id = None
+        mock_event.source.room_id = None
+        mock_event.reply_token = "test_reply_token"
+        mock_text_content = Mock()
+        mock_text_content.text = "Hello"
+
+        async def fake_call_agent(message, user_id, progress_callback):
+            await progress_callback("ContentExtractionAgent", "抽出しました")
+            return "Agent response"
+
+        with patch(
+            'src.services.line_service.handler.call_agent_async',
+            side_effect=fake_call_agent,
+        ):
+            await handler.handle_text_message(mock_event, mock_text_content)
+
+        # 開始時に表示し、直後のステップ完了は最小送信間隔内のため間引かれる
+        async_client.show_loading_animation.assert_awaited_once_with(
+            "test_user_id", 60
+        )
+        async_client.reply_text.assert_awaited_once_with(
+            "test_reply_token", "Agent response"
+        )
+
+
+class TestLineEventHandlerDeduplication:
+    """LineEventHandlerの重複排除のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_event_is_skipped(self):
+        """重複イベントが処理されないことのテスト"""
+        deduplicator = Mock()
+        deduplicator.should_process.return_value = False
+        handler = LineEventHandler(
+            line_client=Mock(), deduplicator=deduplicator
+        )
+        handler.handle_text_message = AsyncMock()
+
+        await handler.handle_event(Mock())
+
+        handler.handle_text_message.assert_not_called()
+        handler.line_client.reply_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_new_event_is_processed(self):
+        """未処理イベントが処理されることのテスト"""
+        from linebot.v3.webhooks import TextMessageContent
+
+        deduplicator = Mock()
+        deduplicator.should_process.return_value = True
+        handler = LineEventHandler(
+            line_client=Mock(), deduplicator=deduplicator
+        )
+        handler.handle_text_message = AsyncMock()
+        event = Mock()
+        event.message = Mock(spec=TextMessageContent)
+
+        await handler.handle_event(event)
+
+        handler.handle_text_message.assert_awaited_once_with(
+            event, event.message
+        )
+
+    @staticmethod
+    def make_text_event(event_id):
+        """webhook_event_id を持つテキストメッセージイベント"""
+        from linebot.v3.webhooks import TextMessageContent
+
+        event = Mock()
+        event.webhook_event_id = event_id
+        event.delivery_context.is_redelivery = True
+        event.message = Mock(spec=TextMessageContent)
+        return event
+
+    @pytest.mark.asyncio
+    async def test_real_deduplicator_skips_redelivery(self):
+        """実際の重複排除ストアで、同じイベントの再送が処理されないことのテスト"""
+        handler = LineEventHandler(
+            line_client=Mock(), deduplicator=WebhookEventDeduplicator()
+        )
+        handler.handle_text_message = AsyncMock(return_value=True)
+
+        await handler.handle_event(self.make_text_event("E1"))
+        await handler.handle_event(self.make_text_event("E1"))
+
+        handler.handle_text_message.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_event_can_be_redelivered(self):
+        """処理に失敗したイベントは再送時に処理されることのテスト"""
+        handler = LineEventHandler(
+            line_client=Mock(), deduplicator=WebhookEventDeduplicator()
+        )
+        handler.handle_text_message = AsyncMock(side_effect=[False, True])
+
+        await handler.handle_event(self.make_text_event("E1"))
+        await handler.handle_event(self.make_text_event("E1"))
+        await handler.handle_event(self.make_text_event("E1"))
+
+        assert handler.handle_text_message.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_processed_event_is_persisted(self, tmp_path):
+        """処理に成功したイベントのみ永続ストアに記録されることのテスト"""
+        import asyncio
+
+        db_path = str(tmp_path / "dedup.db")
+        deduplicator = WebhookEventDeduplicator(db_path=db_path)
+        handler = LineEventHandler(line_client=Mock(), deduplicator=deduplicator)
+
+        async def cancelled(*args):
+            raise asyncio.CancelledError()
+
+        handler.handle_text_message = AsyncMock(return_value=True)
+        await handler.handle_event(self.make_text_event("E1"))
+        handler.handle_text_message = AsyncMock(side_effect=cancelled)
+        with pytest.raises(asyncio.CancelledError):
+            await handler.handle_event(self.make_text_event("E2"))
+        await deduplicator.close()
+
+        restarted = WebhookEventDeduplicator(db_path=db_path)
+        assert restarted.should_process(self.make_text_event("E1")) is False
+        assert restarted.should_process(self.make_text_event("E2")) is True
+        await restarted.close()
+
+
+class TestLineEventHandlerDelivery:
+    """LineEventHandlerの応答配信のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_error_after_ack_is_pushed(self):
+        """受付メッセージ送信後のエラーがプッシュで通知されることのテスト"""
+        from src.services.line_service.constants import ERROR_MESSAGE
+
+        line_client = Mock()
+        handler = LineEventHandler(line_client=line_client)
+
+        mock_event = Mock()
+        mock_event.source.user_id = "test_user_id"
+        mock_event.source.group_id = None
+        mock_event.source.room_id = None
+        mock_event.reply_token = "test_reply_token"
+        context = handler.delivery.create_context(mock_event)
+        context.used = True
+
+        await handler._handle_error_reply("test_reply_token")
+
+        line_client.reply_text.assert_not_called()
+        line_client.push_text.assert_called_once_with(
+            "test_user_id", ERROR_MESSAGE
+        )
@@ -0,0 +1,151 @@
+"""LINE進捗通知のテストモジュール"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.services.line_service.constants import (
+    PROGRESS_MODE_LOADING,
+    PROGRESS_MODE_OFF,
+    PROGRESS_MODE_PUSH,
+)
+from src.services.line_service.progress import (
+    ProgressReporter,
+    get_loading_chat_id,
+)
+from src.utils.metrics import metrics
+
+
+def make_event(user_id="U1", group_id=None):
+    """テスト用イベントを作成"""
+    event = Mock()
+    event.source.user_id = user_id
+    event.source.group_id = group_id
+    event.source.room_id = None
+    return event
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def line_client():
+    """非同期LINEクライアントのモック"""
+    client = Mock()
+    client.show_loading_animation = AsyncMock()
+    client.push_text = AsyncMock()
+    return client
+
+
+class TestGetLoadingChatId:
+    """get_loading_chat_id関数のテスト"""
+
+    def test_user_chat(self):
+        """1対1トークではユーザーIDを返すことのテスト"""
+        assert get_loading_chat_id(make_event()) == "U1"
+
+    def test_group_chat(self):
+        """グループではNoneを返すことのテスト"""
+        assert get_loading_chat_id(make_event(group_id="G1")) is None
+
+
+class TestProgressReporter:
+    """ProgressReporterクラスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_start_shows_loading(self, line_client):
+        """処理開始時にローディングアニメーションを表示するテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(), mode=PROGRESS_MODE_LOADING,
+            loading_seconds=60,
+        )
+
+        await reporter.start()
+
+        line_client.show_loading_animation.assert_awaited_once_with("U1", 60)
+
+    @pytest.mark.asyncio
+    async def test_loading_refresh_is_throttled(self, line_client):
+        """最小送信間隔内の更新が間引かれることのテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(), mode=PROGRESS_MODE_LOADING,
+            min_interval_seconds=60,
+        )
+
+        await reporter.start()
+        await reporter("ContentExtractionAgent", "抽出しました")
+
+        line_client.show_loading_animation.assert_awaited_once()
+        assert metrics.get_counter("line_progress.skipped") == 1
+
+    @pytest.mark.asyncio
+    async def test_loading_refresh_after_interval(self, line_client):
+        """最小送信間隔を過ぎた更新は送信されることのテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(), mode=PROGRESS_MODE_LOADING,
+            min_interval_seconds=0,
+        )
+
+        await reporter.start()
+        await reporter("ContentExtractionAgent", "抽出しました")
+
+        assert line_client.show_loading_animation.await_count == 2
+        line_client.push_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_loading_mode_skips_group(self, line_client):
+        """グループではローディングアニメーションを表示しないことのテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(group_id="G1"), mode=PROGRESS_MODE_LOADING
+        )
+
+        await reporter.start()
+        await reporter("ContentExtractionAgent", "抽出しました")
+
+        line_client.show_loading_animation.assert_not_called()
+        line_client.push_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_push_mode(self, line_client):
+        """プッシュ方式で進捗メッセージが送られることのテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(group_id="G1"), mode=PROGRESS_MODE_PUSH,
+            min_interval_seconds=60,
+        )
+
+        await reporter.start()
+        await reporter("ContentExtractionAgent", "抽出しました")
+        await reporter("DataTransformationAgent", "整形しました")
+
+        line_client.push_text.assert_awaited_once_with("G1", "⏳ 抽出しました")
+        line_client.show_loading_animation.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_off_mode(self, line_client):
+        """通知無効時に何も送らないことのテスト"""
+        reporter = ProgressReporter(
+            line_client, make_event(), mode=PROGRESS_MODE_OFF
+        )
+
+        await reporter.start()
+        await reporter("ContentExtractionAgent", "抽出しました")
+
+        line_client.show_loading_animation.assert_not_called()
+        line_client.push_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failure_is_not_propagated(self, line_client):
+        """通知の失敗が伝播しないことのテスト"""
+        line_client.show_loading_animation.side_effect = Exception("API error")
+        reporter = ProgressReporter(
+            line_client, make_event(), mode=PROGRESS_MODE_LOADING
+        )
+
+        await reporter.start()
+
+        assert metrics.get_counter("line_progress.failed") == 1
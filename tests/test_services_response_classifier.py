@@ -0,0 +1,109 @@
+"""エージェント応答分類モジュールのテスト"""
+
+import random
+
+from src.services.agent_service_impl import (
+    COMPLETION_INDICATORS,
+    ERROR_INDICATORS,
+    INTERMEDIATE_PATTERNS,
+    RESPONSE_CLASSIFIER,
+)
+from src.services.response_classifier import (
+    COMPLETION,
+    ERROR,
+    INTERMEDIATE,
+    ResponseClassifier,
+    ResponseLabel,
+)
+
+
+def legacy_is_intermediate(response):
+    """パターンごとに走査する従来の中間応答判定"""
+    if response.strip().startswith("```json") and response.strip().endswith("```"):
+        return True
+    for pattern in INTERMEDIATE_PATTERNS:
+        if pattern in response:
+            return True
+    if len(response.strip()) < 50 and "```" in response:
+        return True
+    return False
+
+
+def legacy_is_completion(response):
+    """パターンごとに走査する従来の最終応答判定"""
+    return any(indicator in response for indicator in COMPLETION_INDICATORS)
+
+
+def legacy_is_error(response):
+    """パターンごとに走査するエラー判定"""
+    return any(indicator in response for indicator in ERROR_INDICATORS)
+
+
+def random_texts(count, seed=0):
+    """パターンの断片・コードブロック・空白を組み合わせたテキストを生成"""
+    rng = random.Random(seed)
+    fragments = (
+        INTERMEDIATE_PATTERNS
+        + COMPLETION_INDICATORS
+        + ERROR_INDICATORS
+        + ["```json", "```", "{\"title\": \"カレー\"}", "  ", "\n", "レシピ", "登録", "エ"]
+    )
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 6)):
+            fragment = rng.choice(fragments)
+            # パターンの一部だけを使い、部分一致の境界も確認する
+            if rng.random() < 0.3 and len(fragment) > 2:
+                start = rng.randrange(len(fragment) - 1)
+                fragment = fragment[start:rng.randrange(start + 1, len(fragment) + 1)]
+            parts.append(fragment)
+        texts.append("".join(parts))
+    return texts
+
+
+class TestResponseClassifier:
+    """ResponseClassifierクラスのテスト"""
+
+    def test_same_decisions_as_legacy(self):
+        """従来の判定とすべて同じ結果になる"""
+        for text in random_texts(3000):
+            label = RESPONSE_CLASSIFIER.classify(text)
+
+            assert label.intermediate == legacy_is_intermediate(text), text
+            assert label.completion == legacy_is_completion(text), text
+            assert label.error == legacy_is_error(text), text
+            assert label.empty == (not text.strip()), text
+
+    def test_overlapping_patterns(self):
+        """重なり合うパターンもすべて検出する"""
+        classifier = ResponseClassifier(["AB"], ["BC"], ["B"])
+
+        assert classifier.match_kinds("ABC") == INTERMEDIATE | COMPLETION | ERROR
+
+    def test_pattern_contained_in_longer_pattern(self):
+        """長いパターンに含まれる短いパターンの種類も検出する"""
+        classifier = ResponseClassifier([], ["❌ レシピ登録エラー"], ["❌"])
+
+        assert classifier.match_kinds("❌ レシピ登録エラー") == COMPLETION | ERROR
+
+    def test_json_only_response(self):
+        """JSON形式のみの応答は中間応答"""
+        text = "```json\n" + "{\"title\": \"カレー\"}" * 10 + "\n```"
+
+        assert RESPONSE_CLASSIFIER.classify(text).intermediate
+
+    def test_final_response(self):
+        """最終応答の分類結果"""
+        label = RESPONSE_CLASSIFIER.classify("✅ レシピ登録成功\nページURL: https://notion.so/x")
+
+        assert label == ResponseLabel(
+            intermediate=False, completion=True, error=False, empty=False
+        )
+
+    def test_empty_patterns(self):
+        """パターンがなくても分類できる"""
+        classifier = ResponseClassifier([], [], [])
+
+        assert classifier.match_kinds("任意のテキスト") == 0
+        assert classifier.classify("   ").empty
@@ -0,0 +1,238 @@
+"""再試行ポリシーモジュールのテスト"""
+
+import asyncio
+import importlib
+
+import httpx
+import pytest
+
+from src.services.retry_policy import (
+    ErrorKind,
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+)
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeAPIError(Exception):
+    """google-genai の APIError と同じ属性を持つ例外"""
+
+    def __init__(self, code, status, message=""):
+        super().__init__(f"{code} {status}. {message}")
+        self.code = code
+        self.status = status
+        self.message = message
+
+
+class TestClassifyError:
+    """classify_error関数のテスト"""
+
+    @pytest.mark.parametrize(
+        "error, expected",
+        [
+            (FakeAPIError(500, "INTERNAL"), ErrorKind.TRANSIENT),
+            (FakeAPIError(503, "UNAVAILABLE"), ErrorKind.TRANSIENT),
+            (FakeAPIError(504, "DEADLINE_EXCEEDED"), ErrorKind.TRANSIENT),
+            (FakeAPIError(429, "RESOURCE_EXHAUSTED"), ErrorKind.RATE_LIMITED),
+            (
+                FakeAPIError(
+                    400,
+                    "INVALID_ARGUMENT",
+                    "The input token count exceeds the maximum number of tokens",
+                ),
+                ErrorKind.TOKEN_LIMIT,
+            ),
+            (FakeAPIError(400, "INVALID_ARGUMENT", "bad request"), ErrorKind.PERMANENT),
+            (FakeAPIError(403, "PERMISSION_DENIED"), ErrorKind.PERMANENT),
+        ],
+    )
+    def test_status_codes(self, error, expected):
+        """ステータスコードとステータスで分類する"""
+        assert classify_error(error) is expected
+
+    def test_google_genai_errors(self):
+        """google-genai の例外クラスを分類する"""
+        errors = importlib.import_module("google.genai.errors")
+
+        server_error = errors.ServerError(
+            503, {"error": {"message": "overloaded", "status": "UNAVAILABLE"}}
+        )
+        client_error = errors.ClientError(
+            404, {"error": {"message": "not found", "status": "NOT_FOUND"}}
+        )
+
+        assert classify_error(server_error) is ErrorKind.TRANSIENT
+        assert classify_error(client_error) is ErrorKind.PERMANENT
+
+    def test_status_code_wins_over_message(self):
+        """ステータスコードがあればメッセージの数字には左右されない"""
+        error = FakeAPIError(404, "NOT_FOUND", "model gemini-500 internal not found")
+
+        assert classify_error(error) is ErrorKind.PERMANENT
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            httpx.ConnectError("connection refused"),
+            httpx.ReadTimeout("timed out"),
+            asyncio.TimeoutError(),
+            ConnectionResetError(),
+        ],
+    )
+    def test_transport_errors(self, error):
+        """接続・タイムアウトの例外は一時的な障害"""
+        assert classify_error(error) is ErrorKind.TRANSIENT
+
+    def test_wrapped_error(self):
+        """ステータスコードを持たない例外は原因の例外で分類する"""
+        try:
+            try:
+                raise FakeAPIError(503, "UNAVAILABLE")
+            except FakeAPIError as cause:
+                raise RuntimeError("agent run failed") from cause
+        except RuntimeError as error:
+            assert classify_error(error) is ErrorKind.TRANSIENT
+
+    def test_message_fallback(self):
+        """ステータスコードがない場合はメッセージで判定する"""
+        assert classify_error(Exception("500 INTERNAL error")) is ErrorKind.TRANSIENT
+        assert classify_error(Exception("Token limit exceeded")) is (
+            ErrorKind.TOKEN_LIMIT
+        )
+        assert classify_error(ValueError("invalid json")) is ErrorKind.PERMANENT
+
+
+class TestRetryBudget:
+    """RetryBudgetクラスのテスト"""
+
+    def test_exhausts_and_refills_over_time(self, clock):
+        """トークンが尽きると再試行できず、時間の経過で補充される"""
+        budget = RetryBudget(capacity=2, refill_per_second=0.5, clock=clock)
+
+        assert budget.try_acquire()
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+        clock.advance(2.0)
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+    def test_requests_refill(self, clock):
+        """新しいリクエストごとに補充される"""
+        budget = RetryBudget(
+            capacity=5, refill_per_second=0, request_ratio=0.5, clock=clock
+        )
+        for _ in range(5):
+            budget.try_acquire()
+
+        budget.record_request()
+        assert not budget.try_acquire()
+        budget.record_request()
+        assert budget.try_acquire()
+
+    def test_capacity_is_upper_bound(self, clock):
+        """補充は容量を超えない"""
+        budget = RetryBudget(capacity=3, refill_per_second=1, clock=clock)
+
+        clock.advance(100.0)
+        budget.record_request()
+
+        assert budget.tokens == 3
+
+
+class TestRetryPolicy:
+    """RetryPolicyクラスのテスト"""
+
+    @pytest.fixture
+    def make_policy(self, clock):
+        """時間で補充されない予算を使うポリシーを作成する関数"""
+
+        def factory(capacity=10, rng=lambda: 0.5):
+            budget = RetryBudget(
+                capacity=capacity, refill_per_second=0, clock=clock
+            )
+            return RetryPolicy(
+                max_attempts=3, base_delay=1.0, max_delay=5.0, budget=budget, rng=rng
+            )
+
+        return factory
+
+    def test_backoff_is_exponential_with_jitter(self, make_policy):
+        """待機時間の上限は試行ごとに倍になり、上限で頭打ちになる"""
+        policy = make_policy(rng=lambda: 0.999999)
+
+        ceilings = [round(policy.backoff_delay(attempt), 3) for attempt in range(5)]
+
+        assert ceilings == [1.0, 2.0, 4.0, 5.0, 5.0]
+        assert make_policy(rng=lambda: 0.0).backoff_delay(2) == 0.0
+
+    def test_rate_limit_waits_longer(self, make_policy):
+        """レート制限は待機時間の基準を長くする"""
+        policy = make_policy()
+
+        assert policy.backoff_delay(0, ErrorKind.RATE_LIMITED) > policy.backoff_delay(
+            0, ErrorKind.TRANSIENT
+        )
+
+    def test_retries_transient_error(self, make_policy):
+        """一時的な障害は待機して再試行する"""
+        policy = make_policy()
+
+        decision = policy.decide(FakeAPIError(503, "UNAVAILABLE"), attempt=0)
+
+        assert decision.retry
+        assert decision.kind is ErrorKind.TRANSIENT
+        assert decision.delay == 0.5
+        assert metrics.get_counter("retry.retried.transient") == 1
+        assert metrics.get_counter("retry.decisions.retried") == 1
+
+    def test_token_limit_retries_without_delay_or_budget(self, make_policy):
+        """トークン制限は待機せず、予算も消費しない"""
+        policy = make_policy(capacity=0)
+
+        decision = policy.decide(Exception("token limit exceeded"), attempt=0)
+
+        assert decision.retry
+        assert decision.delay == 0.0
+
+    def test_permanent_error_is_not_retried(self, make_policy):
+        """再試行しても変わらないエラーは再試行しない"""
+        policy = make_policy()
+
+        decision = policy.decide(FakeAPIError(400, "INVALID_ARGUMENT"), attempt=0)
+
+        assert not decision.retry
+        assert decision.reason == "non_retryable"
+        assert metrics.get_counter("retry.decisions.non_retryable") == 1
+        assert policy.budget.tokens == 10
+
+    def test_attempts_exhausted(self, make_policy):
+        """最後の試行の失敗は再試行しない"""
+        decision = make_policy().decide(
+            FakeAPIError(500, "INTERNAL"), attempt=2
+        )
+
+        assert not decision.retry
+        assert decision.reason == "attempts_exhausted"
+
+    def test_budget_exhausted(self, make_policy):
+        """予算が尽きると一時的な障害でも再試行しない"""
+        policy = make_policy(capacity=1)
+        error = FakeAPIError(503, "UNAVAILABLE")
+
+        assert policy.decide(error, attempt=0).retry
+        decision = policy.decide(error, attempt=0)
+
+        assert not decision.retry
+        assert decision.reason == "budget_exhausted"
+        assert metrics.get_counter("retry.decisions.budget_exhausted") == 1
+        assert metrics.get_counter("retry.errors.transient") == 2
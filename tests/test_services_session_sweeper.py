@@ -0,0 +1,216 @@
+"""エージェントセッション掃除のテストモジュール"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from pydantic import BaseModel
+
+from src.services.session_sweeper import (
+    SessionSweeper,
+    estimate_artifact_bytes,
+    estimate_session_bytes,
+)
+from src.utils.metrics import metrics
+
+APP_NAME = "test_app"
+
+
+class FakeSession(BaseModel):
+    """ADKのSessionと同じ属性を持つテスト用セッション"""
+
+    id: str
+    user_id: str
+    events: list = []
+    last_update_time: float = 0.0
+
+
+class FakeSessionService:
+    """InMemorySessionServiceと同じ保持構造のテスト用サービス"""
+
+    def __init__(self):
+        self.sessions = {}
+
+    def create_session(self, app_name, user_id, session_id):
+        session = FakeSession(id=session_id, user_id=user_id)
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[
+            session_id
+        ] = session
+        return session
+
+
+class FakeArtifactService:
+    """InMemoryArtifactServiceと同じ保持構造のテスト用サービス"""
+
+    def __init__(self):
+        self.artifacts = {}
+
+    def save_artifact(self, app_name, user_id, session_id, filename, artifact):
+        path = f"{app_name}/{user_id}/{session_id}/{filename}"
+        self.artifacts.setdefault(path, []).append(artifact)
+
+
+def make_part(data=None, text=None):
+    """types.Partと同じ属性を持つテスト用パーツ"""
+    inline_data = SimpleNamespace(data=data) if data is not None else None
+    return SimpleNamespace(inline_data=inline_data, text=text)
+
+
+class TestEstimates:
+    """サイズ推定関数のテスト"""
+
+    def test_estimate_session_bytes(self):
+        """セッションのサイズが推定されることのテスト"""
+        session = FakeSession(id="s1", user_id="U1")
+        assert estimate_session_bytes(session) > 0
+
+    def test_estimate_session_bytes_fallback(self):
+        """シリアライズできない場合にreprで推定することのテスト"""
+        assert estimate_session_bytes(object()) > 0
+
+    def test_estimate_artifact_bytes(self):
+        """アーティファクトのサイズが推定されることのテスト"""
+        parts = [make_part(data=b"x" * 100), make_part(text="abc")]
+        assert estimate_artifact_bytes(parts) == 103
+
+
+class TestSessionSweeper:
+    """SessionSweeperクラスのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        """メトリクスを初期化"""
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    @pytest.fixture
+    def session_service(self):
+        """テスト用セッションサービス"""
+        return FakeSessionService()
+
+    @pytest.fixture
+    def artifact_service(self):
+        """テスト用アーティファクトサービス"""
+        return FakeArtifactService()
+
+    def create_session(self, session_service, user_id, last_update_time):
+        """最終更新時刻を指定してセッションを作成"""
+        session_id = f"session_{user_id}"
+        session_service.create_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        stored = session_service.sessions[APP_NAME][user_id][session_id]
+        stored.last_update_time = last_update_time
+        return session_id
+
+    def test_ttl_eviction(self, session_service, artifact_service):
+        """アイドルTTLを過ぎたセッションが破棄されることのテスト"""
+        self.create_session(session_service, "old", 0)
+        self.create_session(session_service, "new", 950)
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME,
+            idle_ttl_seconds=100, clock=lambda: 1000,
+        )
+
+        result = sweeper.sweep()
+
+        assert result["ttl"] == 1
+        assert "old" not in session_service.sessions[APP_NAME]
+        assert "new" in session_service.sessions[APP_NAME]
+        assert metrics.get_counter("session_store.evictions_ttl") == 1
+        assert metrics.get_gauge("session_store.sessions") == 1
+
+    def test_lru_eviction_over_budget(self, session_service, artifact_service):
+        """合計サイズが上限を超えた場合に古い順に破棄されることのテスト"""
+        for i, user_id in enumerate(["u1", "u2", "u3"]):
+            self.create_session(session_service, user_id, 900 + i)
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME,
+            idle_ttl_seconds=1000, clock=lambda: 1000,
+        )
+        one_session = sweeper.collect_entries()[0].size_bytes
+        sweeper.max_total_bytes = one_session * 2
+
+        result = sweeper.sweep()
+
+        assert result["lru"] == 1
+        assert set(session_service.sessions[APP_NAME]) == {"u2", "u3"}
+        assert result["bytes"] <= sweeper.max_total_bytes
+        assert metrics.get_counter("session_store.evictions_lru") == 1
+
+    def test_busy_session_is_kept(self, session_service, artifact_service):
+        """実行中のセッションは破棄されないことのテスト"""
+        self.create_session(session_service, "busy", 0)
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME,
+            idle_ttl_seconds=100, clock=lambda: 1000,
+            is_busy=lambda session_id: session_id == "session_busy",
+        )
+
+        result = sweeper.sweep()
+
+        assert result["ttl"] == 0
+        assert "busy" in session_service.sessions[APP_NAME]
+
+    def test_artifacts_are_evicted(self, session_service, artifact_service):
+        """破棄したセッションのアーティファクトも削除されることのテスト"""
+        session_id = self.create_session(session_service, "U1", 0)
+        part = make_part(text="artifact")
+        artifact_service.save_artifact(
+            app_name=APP_NAME, user_id="U1", session_id=session_id,
+            filename="image.jpg", artifact=part,
+        )
+        artifact_service.save_artifact(
+            app_name=APP_NAME, user_id="U2", session_id="session_U2",
+            filename="image.jpg", artifact=part,
+        )
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME,
+            idle_ttl_seconds=100, clock=lambda: 1000,
+        )
+
+        sweeper.sweep()
+
+        assert list(artifact_service.artifacts) == [
+            f"{APP_NAME}/U2/session_U2/image.jpg"
+        ]
+
+    def test_size_is_cached_until_update(self, session_service, artifact_service):
+        """更新がなければサイズの再計算を行わないことのテスト"""
+        self.create_session(session_service, "U1", 900)
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME, clock=lambda: 1000
+        )
+        sweeper.collect_entries()
+
+        with pytest.MonkeyPatch.context() as mp:
+            estimate = Mock(return_value=1)
+            mp.setattr(
+                "src.services.session_sweeper.estimate_session_bytes", estimate
+            )
+            sweeper.collect_entries()
+            estimate.assert_not_called()
+
+            stored = session_service.sessions[APP_NAME]["U1"]["session_U1"]
+            stored.last_update_time = 950
+            sweeper.collect_entries()
+            estimate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self, session_service, artifact_service):
+        """バックグラウンドタスクの起動と停止のテスト"""
+        self.create_session(session_service, "old", 0)
+        sweeper = SessionSweeper(
+            session_service, artifact_service, APP_NAME,
+            idle_ttl_seconds=100, interval_seconds=0.01,
+        )
+
+        sweeper.start()
+        assert sweeper.is_running
+        await asyncio.sleep(0.05)
+        await sweeper.stop()
+
+        assert not sweeper.is_running
+        assert "old" not in session_service.sessions.get(APP_NAME, {})
@@ -0,0 +1,306 @@
+"""インスタンス間共有セッションストアのテストモジュール"""
+
+import asyncio
+
+import httpx
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.in_memory_session_service import (
+    InMemorySessionService,
+)
+
+from src.services.shared_session_store import (
+    HttpSessionStore,
+    LocalSessionStore,
+    SessionSynchronizer,
+    VersionConflictError,
+    apply_event,
+)
+from src.utils.metrics import metrics
+
+APP_NAME = "test_app"
+USER_ID = "U1"
+SESSION_ID = "session_U1"
+
+
+def make_event(key, value):
+    """状態を更新するテスト用イベントを作成"""
+    return Event(
+        author="agent",
+        invocation_id="inv",
+        actions=EventActions(state_delta={key: value}),
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestLocalSessionStore:
+    """LocalSessionStoreクラスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_put_and_get(self):
+        """保存と取得のテスト"""
+        store = LocalSessionStore()
+
+        version = await store.put("key", b"data", None)
+        stored = await store.get("key")
+
+        assert version == 1
+        assert stored.data == b"data"
+        assert stored.version == 1
+
+    @pytest.mark.asyncio
+    async def test_get_not_modified(self):
+        """手元のバージョンと一致する場合にデータを返さないことのテスト"""
+        store = LocalSessionStore()
+        await store.put("key", b"data", None)
+
+        stored = await store.get("key", known_version=1)
+
+        assert stored.data is None
+        assert stored.version == 1
+
+    @pytest.mark.asyncio
+    async def test_version_conflict(self):
+        """バージョン不一致で保存が拒否されることのテスト"""
+        store = LocalSessionStore()
+        await store.put("key", b"v1", None)
+        await store.put("key", b"v2", 1)
+
+        with pytest.raises(VersionConflictError):
+            await store.put("key", b"stale", 1)
+        with pytest.raises(VersionConflictError):
+            await store.put("key", b"new", None)
+        assert (await store.get("key")).data == b"v2"
+
+    @pytest.mark.asyncio
+    async def test_delete(self):
+        """削除のテスト"""
+        store = LocalSessionStore()
+        await store.put("key", b"data", None)
+
+        await store.delete("key")
+
+        assert await store.get("key") is None
+
+
+class TestHttpSessionStore:
+    """HttpSessionStoreクラスのテスト"""
+
+    @pytest.fixture
+    def store(self):
+        """LocalSessionStoreを使ったスタブサーバーに接続するストア"""
+        backend = LocalSessionStore()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            key = request.url.path.split("/sessions/", 1)[1]
+            if request.method == "GET":
+                known = request.headers.get("If-None-Match")
+                stored = await backend.get(
+                    key, int(known.strip('"')) if known else None
+                )
+                if stored is None:
+                    return httpx.Response(404)
+                if stored.data is None:
+                    return httpx.Response(304)
+                return httpx.Response(
+                    200, content=stored.data,
+                    headers={"ETag": f'"{stored.version}"'},
+                )
+            if request.method == "PUT":
+                if_match = request.headers.get("If-Match")
+                expected = int(if_match.strip('"')) if if_match else None
+                try:
+                    version = await backend.put(key, request.content, expected)
+                except VersionConflictError:
+                    return httpx.Response(412)
+                return httpx.Response(200, headers={"ETag": f'"{version}"'})
+            await backend.delete(key)
+            return httpx.Response(204)
+
+        return HttpSessionStore(
+            "http://store.local/", transport=httpx.MockTransport(handler)
+        )
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, store):
+        """HTTP経由の保存・取得・削除のテスト"""
+        assert await store.get("app/U1/s1") is None
+
+        version = await store.put("app/U1/s1", b"data", None)
+        stored = await store.get("app/U1/s1")
+        not_modified = await store.get("app/U1/s1", known_version=version)
+        await store.delete("app/U1/s1")
+
+        assert version == 1
+        assert stored.data == b"data"
+        assert not_modified.data is None
+        assert await store.get("app/U1/s1") is None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_conflict(self, store):
+        """412応答が競合として扱われることのテスト"""
+        await store.put("key", b"v1", None)
+
+        with pytest.raises(VersionConflictError):
+            await store.put("key", b"v2", 5)
+        await store.close()
+
+
+class TestSessionSynchronizer:
+    """SessionSynchronizerクラスのテスト"""
+
+    @pytest.fixture
+    def store(self):
+        """共有ストア"""
+        return LocalSessionStore()
+
+    def make_instance(self, store):
+        """1インスタンス分のセッションサービスと同期処理を作成"""
+        session_service = InMemorySessionService()
+        return session_service, SessionSynchronizer(
+            session_service, store, APP_NAME
+        )
+
+    def run_turn(self, session_service, key, value):
+        """エージェント実行の代わりにイベントを1件追加"""
+        session = session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
+        )
+        if session is None:
+            session = session_service.create_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
+            )
+        session_service.append_event(session, make_event(key, value))
+
+    def stored_state(self, session_service):
+        """ローカルに保持中のセッションの状態"""
+        return session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
+        ).state
+
+    @pytest.mark.asyncio
+    async def test_session_moves_between_instances(self, store):
+        """別インスタンスで前回の文脈が引き継がれることのテスト"""
+        service_a, sync_a = self.make_instance(store)
+        service_b, sync_b = self.make_instance(store)
+
+        await sync_a.pull(USER_ID, SESSION_ID)
+        self.run_turn(service_a, "turn1", "a")
+        await sync_a.push(USER_ID, SESSION_ID)
+
+        await sync_b.pull(USER_ID, SESSION_ID)
+        self.run_turn(service_b, "turn2", "b")
+        await sync_b.push(USER_ID, SESSION_ID)
+
+        await sync_a.pull(USER_ID, SESSION_ID)
+        assert self.stored_state(service_a) == {"turn1": "a", "turn2": "b"}
+        assert metrics.get_counter("shared_session.conflicts") == 0
+
+    @pytest.mark.asyncio
+    async def test_pull_not_modified(self, store):
+        """更新がなければ再取得しないことのテスト"""
+        service, sync = self.make_instance(store)
+        await sync.pull(USER_ID, SESSION_ID)
+        self.run_turn(service, "turn1", "a")
+        await sync.push(USER_ID, SESSION_ID)
+
+        await sync.pull(USER_ID, SESSION_ID)
+
+        assert metrics.get_counter("shared_session.not_modified") == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_are_rebased(self, store):
+        """同時に書き込んだ場合に両方の更新が残ることのテスト"""
+        service_a, sync_a = self.make_instance(store)
+        service_b, sync_b = self.make_instance(store)
+        await sync_a.pull(USER_ID, SESSION_ID)
+        self.run_turn(service_a, "base", 0)
+        await sync_a.push(USER_ID, SESSION_ID)
+
+        # 両インスタンスが同じバージョンから処理を開始
+        await sync_a.pull(USER_ID, SESSION_ID)
+        await sync_b.pull(USER_ID, SESSION_ID)
+        self.run_turn(service_a, "from_a", 1)
+        self.run_turn(service_b, "from_b", 2)
+        await asyncio.gather(
+            sync_a.push(USER_ID, SESSION_ID),
+            sync_b.push(USER_ID, SESSION_ID),
+        )
+
+        service_c, sync_c = self.make_instance(store)
+        await sync_c.pull(USER_ID, SESSION_ID)
+        session = service_c.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
+        )
+        assert session.state == {"base": 0, "from_a": 1, "from_b": 2}
+        assert len(session.events) == 3
+        assert metrics.get_counter("shared_session.conflicts") == 1
+
+    @pytest.mark.asyncio
+    async def test_push_after_compaction(self, store):
+        """履歴の圧縮後も追加したイベントが積み直されることのテスト"""
+        service_a, sync_a = self.make_instance(store)
+        service_b, sync_b = self.make_instance(store)
+        await sync_a.pull(USER_ID, SESSION_ID)
+        self.run_turn(service_a, "turn1", "a")
+        self.run_turn(service_a, "turn2", "b")
+        await sync_a.push(USER_ID, SESSION_ID)
+
+        # インスタンスAで古いイベントを1件削除し、その後に1件追加する
+        await sync_a.pull(USER_ID, SESSION_ID)
+        await sync_b.pull(USER_ID, SESSION_ID)
+        service_a.sessions[APP_NAME][USER_ID][SESSION_ID].events.pop(0)
+        sync_a.note_compacted(USER_ID, SESSION_ID, 1)
+        self.run_turn(service_a, "from_a", 1)
+        self.run_turn(service_b, "from_b", 2)
+        await sync_b.push(USER_ID, SESSION_ID)
+        await sync_a.push(USER_ID, SESSION_ID)
+
+        service_c, sync_c = self.make_instance(store)
+        await sync_c.pull(USER_ID, SESSION_ID)
+        assert self.stored_state(service_c) == {
+            "turn1": "a", "turn2": "b", "from_a": 1, "from_b": 2
+        }
+
+    @pytest.mark.asyncio
+    async def test_push_without_changes_is_skipped(self, store):
+        """変更がなければ書き込まないことのテスト"""
+        service, sync = self.make_instance(store)
+        await sync.pull(USER_ID, SESSION_ID)
+        self.run_turn(service, "turn1", "a")
+        version = await sync.push(USER_ID, SESSION_ID)
+
+        assert await sync.push(USER_ID, SESSION_ID) == version
+        assert metrics.get_counter("shared_session.pushed") == 1
+
+    @pytest.mark.asyncio
+    async def test_push_without_local_session(self, store):
+        """ローカルにセッションがない場合のテスト"""
+        _, sync = self.make_instance(store)
+        assert await sync.push(USER_ID, SESSION_ID) is None
+
+
+class TestApplyEvent:
+    """apply_event関数のテスト"""
+
+    def test_temp_state_is_skipped(self):
+        """一時状態が反映されないことのテスト"""
+        service = InMemorySessionService()
+        session = service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
+        )
+
+        apply_event(session, make_event("temp:scratch", 1))
+        apply_event(session, make_event("kept", 2))
+
+        assert session.state == {"kept": 2}
+        assert len(session.events) == 2
@@ -0,0 +1,364 @@
+"""SQLite永続化セッションサービスのテストモジュール"""
+
+import asyncio
+import threading
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from src.services.sqlite_session_service import (
+    SQLiteSessionService,
+    deserialize_session,
+    serialize_session,
+)
+from src.utils.metrics import metrics
+
+APP_NAME = "test_app"
+
+
+def make_event(key, value, timestamp=None):
+    """状態を更新するテスト用イベントを作成"""
+    event = Event(
+        author="agent",
+        invocation_id="inv",
+        actions=EventActions(state_delta={key: value}),
+    )
+    if timestamp is not None:
+        event.timestamp = timestamp
+    return event
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """SQLiteファイルのパス"""
+    return str(tmp_path / "sessions.db")
+
+
+@pytest.fixture
+def service(db_path):
+    """SQLiteSessionServiceインスタンス（即時書き込みなし）"""
+    return SQLiteSessionService(
+        db_path, hot_cache_size=10, flush_interval_seconds=3600,
+        flush_batch_size=100,
+    )
+
+
+class TestSerialization:
+    """シリアライズのテスト"""
+
+    def test_round_trip(self, service):
+        """シリアライズしたセッションを復元できることのテスト"""
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        service.append_event(session, make_event("recipe", "カレー"))
+
+        restored = deserialize_session(serialize_session(session))
+
+        assert restored.id == "s1"
+        assert restored.state == {"recipe": "カレー"}
+        assert len(restored.events) == 1
+
+
+class TestSQLiteSessionService:
+    """SQLiteSessionServiceクラスのテスト"""
+
+    def test_init_invalid_cache_size(self, db_path):
+        """不正なキャッシュサイズのテスト"""
+        with pytest.raises(ValueError):
+            SQLiteSessionService(db_path, hot_cache_size=0)
+
+    def test_create_and_get(self, service):
+        """セッションの作成と取得のテスト"""
+        service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1", state={"a": 1}
+        )
+
+        session = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+
+        assert session.id == "s1"
+        assert session.state == {"a": 1}
+        assert service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="missing"
+        ) is None
+
+    def test_get_returns_copy(self, service):
+        """取得したセッションの変更が保持中のセッションに影響しないことのテスト"""
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+
+        session = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        session.state["changed"] = True
+
+        assert "changed" not in service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ).state
+
+    def test_append_event_updates_stored_session(self, service):
+        """イベント追加が保持中のセッションに反映されることのテスト"""
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+
+        service.append_event(session, make_event("step", "extracted"))
+
+        stored = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        assert stored.state == {"step": "extracted"}
+        assert len(stored.events) == 1
+        assert session.state == {"step": "extracted"}
+
+    def test_stored_session_rewrite_is_flushed(self, service, db_path):
+        """保持中のセッションを直接書き換えた内容が書き込まれることのテスト"""
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        service.append_event(session, make_event("step", "extracted"))
+        service.flush()
+
+        stored = service.get_stored_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        stored.events = []
+        service.mark_session_updated(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+
+        assert service.pending_writes == 1
+        service.flush()
+        restored = SQLiteSessionService(db_path).get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        assert restored.events == []
+
+    def test_write_behind_and_reopen(self, service, db_path):
+        """書き込みが遅延され、flush後は再起動しても復元できることのテスト"""
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        service.append_event(session, make_event("step", "done"))
+
+        assert service.pending_writes == 1
+        reopened = SQLiteSessionService(db_path)
+        assert reopened.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is None
+
+        assert service.flush() == 1
+        assert service.pending_writes == 0
+        restored = reopened.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        assert restored.state == {"step": "done"}
+
+    def test_flush_on_batch_size(self, db_path):
+        """一定件数の更新がたまると書き込まれることのテスト"""
+        service = SQLiteSessionService(
+            db_path, flush_interval_seconds=3600, flush_batch_size=2
+        )
+
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        assert service.pending_writes == 1
+        service.create_session(app_name=APP_NAME, user_id="U2", session_id="s2")
+
+        assert service.pending_writes == 0
+        assert metrics.get_counter("session_store.flushes") == 1
+
+    def test_hot_eviction_flushes_dirty_session(self, db_path):
+        """ホット層から追い出す前に未書き込みの更新を書き込むことのテスト"""
+        service = SQLiteSessionService(
+            db_path, hot_cache_size=1, flush_interval_seconds=3600,
+        )
+
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        service.create_session(app_name=APP_NAME, user_id="U2", session_id="s2")
+
+        assert len(service) == 1
+        assert metrics.get_counter("session_store.hot_evictions") == 1
+        session = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        assert session is not None
+        assert metrics.get_counter("session_store.hot_misses") == 1
+
+    def test_get_session_config(self, service):
+        """取得件数と時刻による絞り込みのテスト"""
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        for i in range(3):
+            service.append_event(session, make_event("i", i, timestamp=100 + i))
+
+        recent = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1",
+            config=GetSessionConfig(num_recent_events=2),
+        )
+        after = service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1",
+            config=GetSessionConfig(after_timestamp=102),
+        )
+
+        assert [e.actions.state_delta["i"] for e in recent.events] == [1, 2]
+        assert [e.actions.state_delta["i"] for e in after.events] == [2]
+
+    def test_list_and_delete(self, service):
+        """一覧取得と削除のテスト"""
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s2")
+
+        listed = service.list_sessions(app_name=APP_NAME, user_id="U1")
+        assert sorted(s.id for s in listed.sessions) == ["s1", "s2"]
+
+        service.delete_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+
+        assert service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is None
+        listed = service.list_sessions(app_name=APP_NAME, user_id="U1")
+        assert [s.id for s in listed.sessions] == ["s2"]
+
+    @pytest.mark.asyncio
+    async def test_close_flushes(self, service, db_path):
+        """終了時に未書き込みの更新が書き込まれることのテスト"""
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        service.start()
+
+        await service.close()
+
+        reopened = SQLiteSessionService(db_path)
+        assert reopened.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is not None
+
+    def test_purge_expired(self, service, db_path):
+        """最終更新からTTLを過ぎた行が削除されることのテスト"""
+        old = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="old"
+        )
+        service.append_event(old, make_event("step", "done", timestamp=100))
+        service.create_session(app_name=APP_NAME, user_id="U2", session_id="new")
+        service.flush()
+
+        reopened = SQLiteSessionService(db_path, ttl_seconds=3600)
+
+        assert reopened.purge_expired() == 1
+        assert reopened.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="old"
+        ) is None
+        assert reopened.get_session(
+            app_name=APP_NAME, user_id="U2", session_id="new"
+        ) is not None
+        assert metrics.get_counter("session_store.expired") == 1
+
+    def test_purge_keeps_resident_sessions(self, db_path):
+        """ホット層にあるセッションの行は削除しないことのテスト"""
+        service = SQLiteSessionService(
+            db_path, flush_interval_seconds=3600, ttl_seconds=3600
+        )
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        service.append_event(session, make_event("step", "done", timestamp=100))
+        service.flush()
+
+        assert service.purge_expired() == 0
+        assert SQLiteSessionService(db_path).get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is not None
+
+    def test_purge_disabled(self, db_path):
+        """TTLが0の場合は削除しないことのテスト"""
+        service = SQLiteSessionService(db_path, ttl_seconds=0)
+        session = service.create_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        service.append_event(session, make_event("step", "done", timestamp=100))
+        service.flush()
+
+        assert SQLiteSessionService(db_path, ttl_seconds=0).purge_expired() == 0
+
+    @pytest.mark.asyncio
+    async def test_preload_session(self, service, db_path):
+        """事前読み込みしたセッションがホット層から取得できることのテスト"""
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        service.flush()
+        reopened = SQLiteSessionService(db_path)
+
+        await reopened.preload_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        )
+        await reopened.preload_session(
+            app_name=APP_NAME, user_id="U1", session_id="missing"
+        )
+
+        assert reopened.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is not None
+        assert metrics.get_counter("session_store.preloads") == 1
+        assert metrics.get_counter("session_store.hot_misses") == 0
+
+    @pytest.mark.asyncio
+    async def test_background_flush_runs_off_event_loop(self, db_path):
+        """起動後の書き込みがワーカースレッドで行われることのテスト"""
+        service = SQLiteSessionService(
+            db_path, flush_interval_seconds=3600, flush_batch_size=1
+        )
+        flush = service.flush
+        flush_threads = []
+
+        def recording_flush():
+            flush_threads.append(threading.get_ident())
+            return flush()
+
+        service.flush = recording_flush
+        service.start()
+
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        assert service.pending_writes == 1
+
+        for _ in range(100):
+            if service.pending_writes == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        assert service.pending_writes == 0
+        assert flush_threads
+        assert threading.get_ident() not in flush_threads
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_eviction_waits_for_background_flush(self, db_path):
+        """起動後は未書き込みのセッションを書き込み後に追い出すことのテスト"""
+        service = SQLiteSessionService(
+            db_path, hot_cache_size=1, flush_interval_seconds=3600
+        )
+        service.start()
+
+        service.create_session(app_name=APP_NAME, user_id="U1", session_id="s1")
+        service.create_session(app_name=APP_NAME, user_id="U2", session_id="s2")
+        assert len(service) == 2
+
+        for _ in range(100):
+            if len(service) == 1:
+                break
+            await asyncio.sleep(0.01)
+
+        assert len(service) == 1
+        assert service.get_session(
+            app_name=APP_NAME, user_id="U1", session_id="s1"
+        ) is not None
+        await service.close()
@@ -0,0 +1,163 @@
+"""入力トークン予算モジュールのテスト"""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.services.history_compactor import IMAGE_TOKENS
+from src.services.token_budget import (
+    TRUNCATION_NOTE,
+    TokenBudget,
+    TokenEstimator,
+    fit_text,
+    sentence_boundaries,
+)
+
+
+class CharEstimator:
+    """1文字1トークンとして数える見積もり"""
+
+    def count(self, text):
+        return len(text)
+
+
+def char_count(text):
+    """1文字1トークン"""
+    return len(text)
+
+
+class TestTokenEstimator:
+    """TokenEstimatorクラスのテスト"""
+
+    def test_uses_tiktoken(self):
+        """tiktoken のエンコーディングで数える"""
+        encoding = Mock()
+        encoding.encode.return_value = [1, 2, 3]
+
+        with patch("tiktoken.get_encoding", return_value=encoding) as get_encoding:
+            estimator = TokenEstimator("cl100k_base")
+            assert estimator.count("レシピ") == 3
+            assert estimator.count("カレー") == 3
+            assert estimator.backend == "tiktoken"
+
+        get_encoding.assert_called_once_with("cl100k_base")
+
+    def test_falls_back_to_heuristic(self):
+        """エンコーディングを読み込めない場合は概算する"""
+        with patch("tiktoken.get_encoding", side_effect=OSError("offline")):
+            estimator = TokenEstimator()
+            assert estimator.count("レシピを登録") == 6
+            assert estimator.backend == "heuristic"
+
+    @pytest.mark.asyncio
+    async def test_preload(self):
+        """preload でエンコーディングを別スレッドで読み込み、以降は読み込まない"""
+        encoding = Mock()
+        encoding.encode.return_value = [1, 2]
+
+        with patch("tiktoken.get_encoding", return_value=encoding) as get_encoding:
+            budget = TokenBudget(estimator=TokenEstimator("cl100k_base"))
+            with patch(
+                "src.services.token_budget.asyncio.to_thread",
+                wraps=asyncio.to_thread,
+            ) as to_thread:
+                await budget.preload()
+                await budget.preload()
+            assert budget.count("レシピ") == 2
+
+        get_encoding.assert_called_once_with("cl100k_base")
+        to_thread.assert_called_once()
+
+    def test_empty_text(self):
+        """空文字は読み込みなしで0トークン"""
+        with patch("tiktoken.get_encoding") as get_encoding:
+            assert TokenEstimator().count("") == 0
+        get_encoding.assert_not_called()
+
+
+class TestFitText:
+    """fit_text関数のテスト"""
+
+    def test_within_budget(self):
+        """上限内のテキストはそのまま"""
+        assert fit_text("短い文。", 100, char_count) == "短い文。"
+
+    def test_cuts_at_sentence_boundary(self):
+        """上限内で最後の文の区切りで切る"""
+        text = "一文目です。" * 20
+        budget = 40 + len(TRUNCATION_NOTE)
+
+        fitted = fit_text(text, budget, char_count)
+
+        assert fitted == "一文目です。" * 6 + TRUNCATION_NOTE
+        assert char_count(fitted) <= budget
+
+    def test_cuts_by_characters_without_boundary(self):
+        """区切りがない場合は文字単位で切る"""
+        text = "あ" * 100
+        budget = 30 + len(TRUNCATION_NOTE)
+
+        assert fit_text(text, budget, char_count) == "あ" * 30 + TRUNCATION_NOTE
+
+    def test_ignores_boundary_too_far_back(self):
+        """区切りが手前すぎる場合は文字単位で切る"""
+        text = "短い。" + "あ" * 100
+        budget = 50 + len(TRUNCATION_NOTE)
+
+        assert fit_text(text, budget, char_count) == text[:50] + TRUNCATION_NOTE
+
+    def test_budget_smaller_than_note(self):
+        """注記も収まらない場合は注記のみ"""
+        assert fit_text("あ" * 100, 3, char_count) == TRUNCATION_NOTE
+
+    def test_binary_search_calls(self):
+        """トークン数の計算は二分探索の回数で済む"""
+        count = Mock(side_effect=len)
+
+        fit_text("あ" * 10000, 1000, count)
+
+        assert count.call_count < 20
+
+    def test_sentence_boundaries(self):
+        """文の区切りの直後の位置を返す"""
+        assert sentence_boundaries("はい。そうです！\n本当？") == [3, 8, 9, 12]
+
+
+class TestTokenBudget:
+    """TokenBudgetクラスのテスト"""
+
+    def make_budget(self, max_input_tokens=1000):
+        """1文字1トークンで数える予算"""
+        return TokenBudget(max_input_tokens, estimator=CharEstimator())
+
+    def test_plan_within_budget(self):
+        """予算内であれば調整しない"""
+        plan = self.make_budget().plan("あ" * 100, history_tokens=500)
+
+        assert plan.message == "あ" * 100
+        assert plan.history_budget == 900
+        assert not plan.adjusted
+
+    def test_plan_compacts_history(self):
+        """メッセージが上限割合内なら履歴の予算を減らす"""
+        plan = self.make_budget().plan("あ" * 300, history_tokens=900)
+
+        assert not plan.truncated
+        assert plan.needs_compaction
+        assert plan.history_budget == 700
+
+    def test_plan_truncates_large_message(self):
+        """メッセージが上限割合を超える場合は短縮する"""
+        plan = self.make_budget().plan("あ。" * 1000, history_tokens=100)
+
+        assert plan.truncated
+        assert plan.message.endswith(TRUNCATION_NOTE)
+        assert plan.message_tokens <= 750
+        assert plan.history_budget == 1000 - plan.message_tokens
+
+    def test_plan_reserves_image_tokens(self):
+        """画像を含む場合は画像分を差し引く"""
+        plan = self.make_budget().plan("あ", history_tokens=0, has_image=True)
+
+        assert plan.history_budget == 1000 - IMAGE_TOKENS - 1
@@ -2,6 +2,7 @@
 計算ツール機能のテストモジュール
 """
 
+from fractions import Fraction
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -11,11 +12,17 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.tools.calculator_tools import (
+from src.tools.calculator_tools import (  # noqa: E402
     add_numbers,
     calculator_tools_list,
     divide_numbers,
+    evaluate_arithmetic,
+    evaluate_expression,
+    evaluate_fraction,
+    format_number,
     multiply_numbers,
+    normalize_expression,
+    parse_arithmetic,
     subtract_numbers,
 )
 
@@ -343,6 +350,226 @@ class TestDivideNumbers:
         mock_logger.info.assert_called_once_with("Dividing numbers: 10 / 0")
 
 
+class TestNormalizeExpression:
+    """normalize_expression関数のテストクラス"""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("123*45は？", "123*45"),
+            ("１２３×４５", "123*45"),
+            ("３ひく５は何？", "3-5"),
+            ("10わる4", "10/4"),
+            ("2^10", "2**10"),
+            ("1,000*3", "1000*3"),
+            ("1+2を計算して", "1+2"),
+            ("計算して：1+1", "1+1"),
+        ],
+    )
+    def test_normalize(self, text, expected):
+        """日本語の演算子・全角文字・問いかけを正規化する"""
+        assert normalize_expression(text) == expected
+
+
+class TestParseArithmetic:
+    """parse_arithmetic関数のテストクラス"""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "カレーの作り方",
+            "2025",
+            "3人分の材料を2倍にして",
+            "2025/10/17",
+            "090-1234-5678",
+            "10/17",
+            "１０/１７",
+            "12-25",
+            "7-11",
+            "2025-10",
+            "1-800-555-1212",
+            "3-2-1",
+            "",
+        ],
+    )
+    def test_not_arithmetic(self, text):
+        """計算式でないメッセージはNoneを返す"""
+        assert parse_arithmetic(text) is None
+
+    def test_arithmetic(self):
+        """計算式のみのメッセージは正規化した式を返す"""
+        assert parse_arithmetic("(3+4)×5") == "(3+4)*5"
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "10/17は？",
+            "10÷17",
+            "10割る17",
+            "100/17",
+            "13/5",
+            "5/0",
+            "12-25は？",
+            "7引く11",
+            "3-2-1は？",
+            "100-25",
+        ],
+    )
+    def test_explicit_division(self, text):
+        """問いかけや演算子の言葉がある・日付や番号にならない式は計算式とみなす"""
+        assert parse_arithmetic(text) is not None
+
+
+class TestEvaluateFraction:
+    """evaluate_fraction関数のテストクラス"""
+
+    def test_exact_decimal(self):
+        """小数を誤差なく計算する"""
+        assert evaluate_fraction("0.1+0.2") == Fraction(3, 10)
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["__import__('os')", "x+1", "[1, 2]", "1 if 1 else 2", "abs(-1)", "1+"],
+    )
+    def test_rejects_disallowed_syntax(self, expression):
+        """数値と演算子以外の構文は評価しない"""
+        with pytest.raises(ValueError):
+            evaluate_fraction(expression)
+
+    def test_rejects_huge_power(self):
+        """巨大なべき乗は計算しない"""
+        with pytest.raises(ValueError):
+            evaluate_fraction("2**100000")
+        with pytest.raises(ValueError):
+            evaluate_fraction("(10**500)**3")
+
+    def test_rejects_long_expression(self):
+        """長すぎる式は評価しない"""
+        with pytest.raises(ValueError):
+            evaluate_fraction("+".join(["1"] * 101))
+
+    def test_division_by_zero(self):
+        """0で割るとZeroDivisionErrorを送出する"""
+        with pytest.raises(ZeroDivisionError):
+            evaluate_fraction("1/(2-2)")
+
+
+class TestFormatNumber:
+    """format_number関数のテストクラス"""
+
+    def test_format(self):
+        """割り切れない結果は丸めて省略記号を付ける"""
+        assert format_number(Fraction(35, 2)) == "17.5"
+        assert format_number(Fraction(1, 3)) == "0.3333333333…"
+        assert format_number(Fraction(6)) == "6"
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (Fraction(10**30, 7), "142857142857142857142857142857.1428571429…"),
+            (Fraction(10**21, 7), "142857142857142857142.8571428571…"),
+            (Fraction(-2, 3), "-0.6666666667…"),
+            (Fraction(10**12 + 1, 10**11), "10…"),
+        ],
+    )
+    def test_format_large_values(self, value, expected):
+        """整数部の桁数が多い値も丸めて表示する"""
+        assert format_number(value) == expected
+
+
+class TestEvaluateArithmetic:
+    """evaluate_arithmetic関数のテストクラス"""
+
+    def test_success(self):
+        """計算ツールと同じ形式で結果を返す"""
+        result = evaluate_arithmetic("(3+4)*5/2は？")
+
+        assert result == {
+            "status": "success",
+            "result": 17.5,
+            "expression": "(3+4)*5/2 = 17.5",
+        }
+
+    def test_division_by_zero(self):
+        """0で割った場合はエラーを返す"""
+        result = evaluate_arithmetic("5/0")
+
+        assert result["status"] == "error"
+        assert "0で割ることはできません" in result["error_message"]
+
+    def test_uncomputable_is_left_to_agent(self):
+        """式の形でも計算できない場合はNoneを返す"""
+        assert evaluate_arithmetic("2^100000") is None
+        assert evaluate_arithmetic("1..2+3") is None
+
+    @pytest.mark.parametrize("text", ["10**30/7", "1000000000000000000000/7"])
+    def test_large_quotient(self, text):
+        """整数部の桁数が多い割り算も計算する"""
+        result = evaluate_arithmetic(text)
+
+        assert result["status"] == "success"
+        assert result["expression"].startswith(f"{text} = 142857142857")
+
+    @pytest.mark.parametrize("text", ["12-25", "7-11", "1-800-555-1212"])
+    def test_dates_and_numbers_are_left_to_agent(self, text):
+        """日付や電話番号とも読めるハイフン区切りの数字はNoneを返す"""
+        assert evaluate_arithmetic(text) is None
+
+    def test_float_overflow_is_left_to_agent(self):
+        """浮動小数点数で表せない結果はNoneを返す"""
+        assert evaluate_arithmetic("10**400/7") is None
+
+
+class TestEvaluateExpression:
+    """evaluate_expression関数のテストクラス"""
+
+    def test_compound_expression(self):
+        """複数の演算を含む式を1回で計算する"""
+        result = evaluate_expression("(3+4)*5/2")
+
+        assert result["status"] == "success"
+        assert result["result"] == 17.5
+        assert result["expression"] == "(3+4)*5/2 = 17.5"
+
+    def test_symbols_and_full_width(self):
+        """記号・全角文字・べき乗を含む式を計算する"""
+        result = evaluate_expression("２^１０ ÷ ４ − 6 % 4")
+
+        assert result["status"] == "success"
+        assert result["result"] == 254
+
+    def test_large_quotient(self):
+        """整数部の桁数が多い割り算も計算する"""
+        result = evaluate_expression("10**30/7")
+
+        assert result["status"] == "success"
+        assert result["result"] == pytest.approx(10**30 / 7)
+
+    def test_division_by_zero(self):
+        """0で割った場合はエラーを返す"""
+        result = evaluate_expression("10/(5-5)")
+
+        assert result["status"] == "error"
+        assert "0で割ることはできません" in result["error_message"]
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["__import__('os').system('ls')", "2**100000", "1 +", "10**400/7"],
+    )
+    def test_rejected_expression(self, expression):
+        """許可しない構文・巨大な計算・不正な式はエラーを返す"""
+        result = evaluate_expression(expression)
+
+        assert result["status"] == "error"
+        assert "計算中にエラーが発生しました" in result["error_message"]
+
+    @patch("src.tools.calculator_tools.logger")
+    def test_logging(self, mock_logger):
+        """ログ出力のテスト"""
+        evaluate_expression("1+2*3")
+        mock_logger.info.assert_called_once_with("Evaluating expression: 1+2*3")
+
+
 class TestCalculatorToolsList:
     """calculator_tools_list のテストクラス"""
 
@@ -353,9 +580,10 @@ class TestCalculatorToolsList:
             subtract_numbers,
             multiply_numbers,
             divide_numbers,
+            evaluate_expression,
         ]
 
-        assert len(calculator_tools_list) == 4
+        assert len(calculator_tools_list) == 5
         for func in expected_functions:
             assert func in calculator_tools_list
 
@@ -371,6 +599,7 @@ class TestCalculatorToolsList:
             subtract_numbers,
             multiply_numbers,
             divide_numbers,
+            evaluate_expression,
         ]
 
         assert calculator_tools_list == expected_order
@@ -0,0 +1,489 @@
+"""MCPサーバーとの接続管理モジュールのテスト"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from unittest.mock import patch
+
+import anyio
+import pytest
+from mcp.types import Tool as McpBaseTool
+
+from src.tools.mcp_connection_manager import (
+    MCPConnectionManager,
+    ManagedMCPTool,
+    get_managed_tools_async,
+    is_connection_error,
+)
+from src.tools.mcp_integration import MCPServer
+from src.tools.mcp_schema_cache import MCPSchemaCache
+from src.utils.circuit_breaker import CircuitState
+from src.utils.metrics import metrics
+
+SERVERS = [
+    MCPServer("filesystem", "http://fs.local/sse", "Filesystem"),
+    MCPServer("notion", "http://notion.local/sse", "Notion"),
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeTool:
+    """接続ごとに作られるMCPツールの代わり"""
+
+    def __init__(self, name, generation, result=None, error=None, delay=0):
+        self.name = name
+        self.mcp_tool = McpBaseTool(
+            name=name,
+            description=f"{name} tool v{generation}",
+            inputSchema={"type": "object", "properties": {"path": {"type": "string"}}},
+        )
+        self.generation = generation
+        self.result = result or {"generation": generation}
+        self.error = error
+        self.delay = delay
+        self.calls = []
+
+    async def run_async(self, *, args, tool_context):
+        self.calls.append(args)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class FakeConnector:
+    """接続のたびに新しいツールと exit スタックを返す接続関数"""
+
+    def __init__(self, tool_names=("read_file",), latency=0, close_error=None):
+        self.tool_names = {server.name: list(tool_names) for server in SERVERS}
+        self.latency = latency
+        self.close_error = close_error
+        self.down = set()
+        self.connects = {server.name: 0 for server in SERVERS}
+        self.closed = []
+        self.tools = {}
+
+    async def __call__(self, server):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if server.name in self.down:
+            return None
+        self.connects[server.name] += 1
+        generation = self.connects[server.name]
+        tools = [FakeTool(name, generation) for name in self.tool_names[server.name]]
+        self.tools[server.name] = tools
+        exit_stack = AsyncExitStack()
+        exit_stack.callback(self.closed.append, (server.name, generation))
+        if self.close_error is not None:
+            exit_stack.callback(self.fail_close)
+        # SSE接続と同じく、開いたタスクでしか閉じられないキャンセルスコープを含む
+        exit_stack.enter_context(anyio.CancelScope())
+        return tools, exit_stack
+
+    def fail_close(self):
+        """接続を閉じる際のエラーを発生させる"""
+        raise self.close_error
+
+
+@pytest.fixture
+def make_manager(clock):
+    """スタブの接続関数を使う接続管理（再接続の待ち時間なし）を作成する関数"""
+
+    def factory(connector, **kwargs):
+        return MCPConnectionManager(
+            servers=SERVERS,
+            call_timeout=kwargs.pop("call_timeout", 1),
+            reconnect_base_delay=0,
+            reconnect_max_delay=0,
+            failure_threshold=kwargs.pop("failure_threshold", 2),
+            reset_seconds=30,
+            connect=connector,
+            clock=clock,
+            **kwargs,
+        )
+
+    return factory
+
+
+async def wait_until(condition, timeout=1.0):
+    """条件を満たすまで待つ"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition was not met")
+        await asyncio.sleep(0.001)
+
+
+async def call(tool, **args):
+    """ツールを呼び出す"""
+    return await tool.run_async(args=args, tool_context=None)
+
+
+class TestIsConnectionError:
+    """is_connection_error関数のテスト"""
+
+    def test_connection_errors(self):
+        """接続の異常とそれ以外を判別する"""
+        assert is_connection_error(anyio.ClosedResourceError())
+        assert is_connection_error(ConnectionResetError("reset"))
+        assert not is_connection_error(ValueError("bad args"))
+
+    def test_wrapped_error(self):
+        """ADK が包んだ例外も原因までたどって判定する"""
+        try:
+            try:
+                raise anyio.ClosedResourceError()
+            except anyio.ClosedResourceError as e:
+                raise RuntimeError("Error reinitializing") from e
+        except RuntimeError as error:
+            assert is_connection_error(error)
+
+
+class TestMCPConnectionManager:
+    """MCPConnectionManagerクラスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_start(self, make_manager):
+        """各サーバーへ接続し、ツールを返す"""
+        connector = FakeConnector(tool_names=("read_file", "write_file"))
+        manager = make_manager(connector)
+
+        tools = await manager.start()
+
+        assert [tool.name for tool in tools["filesystem"]] == [
+            "read_file",
+            "write_file",
+        ]
+        assert all(isinstance(tool, ManagedMCPTool) for tool in tools["notion"])
+        declaration = tools["notion"][0]._get_declaration()
+        assert declaration.name == "read_file"
+        assert declaration.description == "read_file tool v1"
+        assert await call(tools["notion"][0], path="a") == {"generation": 1}
+        assert metrics.get_gauge("mcp.connected.notion") == 1
+
+        # 起動済みの場合は接続し直さない
+        assert await manager.start() == tools
+        assert connector.connects == {"filesystem": 1, "notion": 1}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_reconnect_keeps_tool_references(self, make_manager):
+        """接続が切れると再接続し、同じツールのまま新しい接続で呼び出す"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+        tools = await manager.start()
+        notion_tool = tools["notion"][0]
+        connector.tools["notion"][0].error = anyio.ClosedResourceError()
+
+        result = await call(notion_tool)
+
+        assert result["status"] == "error"
+        assert "Notion MCPサーバーが一時的に利用できません" in result["error_message"]
+        await wait_until(lambda: manager.connection("notion").connected)
+        assert tools["notion"][0] is notion_tool
+        assert notion_tool.tool.generation == 2
+        assert notion_tool.description == "read_file tool v2"
+        assert await call(notion_tool) == {"generation": 2}
+        # 切れた接続は閉じる
+        assert ("notion", 1) in connector.closed
+        assert metrics.get_counter("mcp.disconnects.notion") == 1
+        assert metrics.get_counter("mcp.reconnects.notion") == 1
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_replaced_connection_closed_cleanly(self, make_manager):
+        """差し替えた接続は、それを開いたタスクで閉じる"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+        tools = await manager.start()
+        first_owner = manager.connection("notion").owner_task
+        connector.tools["notion"][0].error = anyio.ClosedResourceError()
+
+        await call(tools["notion"][0])
+        await wait_until(lambda: manager.connection("notion").connected)
+
+        assert first_owner.done()
+        assert manager.connection("notion").owner_task is not first_owner
+        assert ("notion", 1) in connector.closed
+        assert metrics.get_counter("mcp.close_failures.notion") == 0
+        await manager.stop()
+        assert metrics.get_counter("mcp.close_failures.filesystem") == 0
+
+    @pytest.mark.asyncio
+    async def test_close_failure_is_counted(self, make_manager):
+        """接続を閉じられなかった場合は警告として記録し、数える"""
+        connector = FakeConnector(close_error=RuntimeError("close failed"))
+        manager = make_manager(connector)
+        await manager.start()
+
+        with patch("src.tools.mcp_connection_manager.logger") as mock_logger:
+            await manager.stop()
+
+        assert metrics.get_counter("mcp.close_failures.notion") == 1
+        assert metrics.get_counter("mcp.close_failures.filesystem") == 1
+        assert mock_logger.warning.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_fails_fast_while_disconnected(self, make_manager):
+        """再接続中はサーバーへ送らずにすぐ失敗させる"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+        tools = await manager.start()
+        connector.down.add("notion")
+        old_tool = connector.tools["notion"][0]
+        old_tool.error = anyio.BrokenResourceError()
+
+        await call(tools["notion"][0])
+        result = await call(tools["notion"][0])
+
+        assert "再接続中" in result["error_message"]
+        assert len(old_tool.calls) == 1
+        assert metrics.get_counter("mcp.calls_rejected.notion") == 1
+        # 他のサーバーのツールには影響しない
+        assert await call(tools["filesystem"][0]) == {"generation": 1}
+
+        connector.down.clear()
+        await wait_until(lambda: manager.connection("notion").connected)
+        assert await call(tools["notion"][0]) == {"generation": 2}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_timeouts_open_circuit(self, make_manager):
+        """タイムアウトが続くとサーキットブレーカーを開き、接続を張り直す"""
+        connector = FakeConnector()
+        manager = make_manager(connector, call_timeout=0.01, failure_threshold=2)
+        tools = await manager.start()
+        connector.tools["notion"][0].delay = 1
+
+        first = await call(tools["notion"][0])
+        assert "0.01秒以内に応答がありません" in first["error_message"]
+        assert manager.connection("notion").connected
+        assert manager.connection("notion").breaker.state is CircuitState.CLOSED
+
+        await call(tools["notion"][0])
+        assert metrics.get_counter("mcp.call_timeouts.notion") == 2
+        assert metrics.get_counter("mcp.circuit_opened") == 1
+
+        # 再接続に成功するとサーキットブレーカーは閉じる
+        await wait_until(lambda: manager.connection("notion").connected)
+        assert manager.connection("notion").breaker.state is CircuitState.CLOSED
+        assert await call(tools["notion"][0]) == {"generation": 2}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_rejects_calls(self, clock, make_manager):
+        """サーキットブレーカーが開いている間はすぐ失敗させる"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+        tools = await manager.start()
+        breaker = manager.connection("notion").breaker
+        breaker.record_failure()
+        breaker.record_failure()
+
+        result = await call(tools["notion"][0])
+
+        assert "障害が続いています" in result["error_message"]
+        assert connector.tools["notion"][0].calls == []
+
+        # 一定時間が経つと試しの呼び出しを許可し、成功すれば閉じる
+        clock.advance(30)
+        assert await call(tools["notion"][0]) == {"generation": 1}
+        assert breaker.state is CircuitState.CLOSED
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_other_errors_propagate(self, make_manager):
+        """接続の異常以外のエラーはそのまま送出する"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+        tools = await manager.start()
+        connector.tools["notion"][0].error = ValueError("bad args")
+
+        with pytest.raises(ValueError):
+            await call(tools["notion"][0])
+
+        assert manager.connection("notion").connected
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_server_down_at_startup(self, make_manager):
+        """起動時に接続できなかったサーバーはバックグラウンドで接続し直す"""
+        connector = FakeConnector()
+        connector.down.add("notion")
+        manager = make_manager(connector)
+
+        tools = await manager.start()
+
+        assert tools["notion"] == []
+        assert len(tools["filesystem"]) == 1
+        connector.down.clear()
+        await wait_until(lambda: manager.connection("notion").connected)
+        assert [tool.name for tool in tools["notion"]] == ["read_file"]
+        await manager.stop()
+
+    def test_backoff_delay(self):
+        """待ち時間は上限まで倍々に伸び、ばらつきを加える"""
+        manager = MCPConnectionManager(
+            servers=SERVERS,
+            reconnect_base_delay=1,
+            reconnect_max_delay=30,
+            rng=lambda: 0.5,
+        )
+
+        delays = [manager.backoff_delay(attempt) for attempt in range(7)]
+
+        assert delays == [0.5, 1, 2, 4, 8, 15, 15]
+
+    @pytest.mark.asyncio
+    async def test_stop(self):
+        """再接続を止め、すべての接続を閉じる"""
+        connector = FakeConnector()
+        connector.down.add("notion")
+        manager = MCPConnectionManager(
+            servers=SERVERS,
+            reconnect_base_delay=60,
+            reconnect_max_delay=60,
+            connect=connector,
+            rng=lambda: 1,
+        )
+        await manager.start()
+        reconnect_task = manager.connection("notion").reconnect_task
+
+        await manager.stop()
+
+        assert reconnect_task.cancelled()
+        assert connector.closed == [("filesystem", 1)]
+        assert not manager.connection("filesystem").connected
+
+        # 停止後は再び起動できる
+        connector.down.clear()
+        tools = await manager.start()
+        assert len(tools["notion"]) == 1
+        await manager.stop()
+
+
+class TestSchemaCacheStartup:
+    """スキーマのキャッシュを使った起動のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_cold_start_stores_schemas(self, make_manager, tmp_path):
+        """キャッシュがない場合は接続してツールを取得し、スキーマを保存する"""
+        cache = MCPSchemaCache(str(tmp_path / "cache.json"))
+        manager = make_manager(FakeConnector(), schema_cache=cache)
+
+        await manager.start()
+
+        assert metrics.get_counter("mcp_schema_cache.misses.notion") == 1
+        assert [tool.name for tool in cache.load(SERVERS[1])] == ["read_file"]
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_warm_start_does_not_wait_for_connection(
+        self, clock, make_manager, tmp_path
+    ):
+        """キャッシュがある場合は接続を待たずにツールを返し、最初の呼び出しで接続を待つ"""
+        cache = MCPSchemaCache(str(tmp_path / "cache.json"))
+        for server in SERVERS:
+            cache.store(server, [FakeTool("read_file", 0).mcp_tool])
+        connector = FakeConnector(latency=0.05)
+        manager = make_manager(connector, schema_cache=cache)
+
+        tools = await manager.start()
+
+        notion_tool = tools["notion"][0]
+        assert connector.connects == {"filesystem": 0, "notion": 0}
+        assert notion_tool.tool is None
+        assert notion_tool._get_declaration().description == "read_file tool v0"
+        assert metrics.get_counter("mcp_schema_cache.hits.notion") == 1
+
+        clock.advance(2)
+        assert await call(notion_tool) == {"generation": 1}
+        assert notion_tool.description == "read_file tool v1"
+        saved = metrics.get_timing("mcp_schema_cache.startup_saved_seconds.notion")
+        assert saved["count"] == 1
+        assert saved["total"] == 2
+        # 変わったスキーマでキャッシュを更新する
+        assert cache.load(SERVERS[1])[0].description == "read_file tool v1"
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_warm_start_with_server_down(self, make_manager, tmp_path):
+        """キャッシュから起動したサーバーに接続できない場合はすぐ失敗させる"""
+        cache = MCPSchemaCache(str(tmp_path / "cache.json"))
+        cache.store(SERVERS[1], [FakeTool("read_file", 0).mcp_tool])
+        connector = FakeConnector()
+        connector.down.add("notion")
+        manager = make_manager(connector, schema_cache=cache)
+
+        tools = await manager.start()
+        result = await call(tools["notion"][0])
+
+        assert "再接続中" in result["error_message"]
+        connector.down.clear()
+        await wait_until(lambda: manager.connection("notion").connected)
+        assert await call(tools["notion"][0]) == {"generation": 1}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_cached_tool_missing_on_server(self, make_manager, tmp_path):
+        """キャッシュにあってサーバーにないツールは呼び出すとエラーになる"""
+        cache = MCPSchemaCache(str(tmp_path / "cache.json"))
+        cache.store(
+            SERVERS[1],
+            [FakeTool("read_file", 0).mcp_tool, FakeTool("old_tool", 0).mcp_tool],
+        )
+        manager = make_manager(FakeConnector(), schema_cache=cache)
+
+        tools = await manager.start()
+        result = await call(tools["notion"][1])
+
+        assert "ツール old_tool がありません" in result["error_message"]
+        assert await call(tools["notion"][0]) == {"generation": 1}
+        await manager.stop()
+
+
+class TestGetManagedToolsAsync:
+    """get_managed_tools_async関数のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_returns_tools_and_stack(self, make_manager):
+        """FilesystemとNotionのツールを返し、exitスタックで接続を閉じる"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+
+        with patch("src.tools.mcp_connection_manager.mcp_connection_manager", manager):
+            filesystem_tools, notion_tools, exit_stack = (
+                await get_managed_tools_async()
+            )
+
+            assert filesystem_tools[0].server_name == "filesystem"
+            assert notion_tools[0].server_name == "notion"
+            await exit_stack.aclose()
+
+        assert sorted(connector.closed) == [("filesystem", 1), ("notion", 1)]
+
+    @pytest.mark.asyncio
+    async def test_mcp_disabled(self, make_manager):
+        """MCP無効時は接続しない"""
+        connector = FakeConnector()
+        manager = make_manager(connector)
+
+        with (
+            patch("src.tools.mcp_connection_manager.MCP_ENABLED", False),
+            patch("src.tools.mcp_connection_manager.mcp_connection_manager", manager),
+        ):
+            filesystem_tools, notion_tools, exit_stack = (
+                await get_managed_tools_async()
+            )
+
+        assert filesystem_tools is None
+        assert notion_tools is None
+        assert isinstance(exit_stack, AsyncExitStack)
+        assert connector.connects == {"filesystem": 0, "notion": 0}
@@ -0,0 +1,139 @@
+"""MCPサーバーの死活監視モジュールのテスト"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.tools.mcp_health import MCPHealthMonitor
+from src.tools.mcp_integration import MCPServer
+from src.utils.metrics import metrics
+
+SERVERS = [
+    MCPServer("filesystem", "http://fs.local/sse", "Filesystem"),
+    MCPServer("notion", "http://notion.local/sse", "Notion"),
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def make_monitor(clock):
+    """スタブのHTTP応答で確認する死活監視を作成する関数"""
+
+    def factory(handler, **kwargs):
+        return MCPHealthMonitor(
+            servers=SERVERS,
+            interval_seconds=kwargs.pop("interval_seconds", 10),
+            timeout_seconds=1,
+            history_size=kwargs.pop("history_size", 3),
+            clock=clock,
+            transport=httpx.MockTransport(handler),
+            **kwargs,
+        )
+
+    return factory
+
+
+def sse_ok(request):
+    """SSEエンドポイントの正常な応答"""
+    return httpx.Response(200, headers={"content-type": "text/event-stream"})
+
+
+class TestMCPHealthMonitor:
+    """MCPHealthMonitorクラスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_probe_all(self, make_monitor):
+        """各サーバーの死活を確認し、異常の理由を記録する"""
+
+        def handler(request):
+            if request.url.host == "notion.local":
+                raise httpx.ConnectError("connection refused")
+            return sse_ok(request)
+
+        monitor = make_monitor(handler)
+
+        assert await monitor.probe_all() == {"filesystem": True, "notion": False}
+        assert monitor.status() == {"filesystem": True, "notion": False}
+        snapshot = monitor.snapshot()
+        assert "ConnectError" in snapshot["notion"]["error"]
+        assert metrics.get_counter("mcp_health.failures.notion") == 1
+        assert metrics.get_gauge("mcp_health.healthy.filesystem") == 1
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_error_status_and_timeout(self, make_monitor):
+        """エラー応答・タイムアウトは異常とみなす"""
+
+        def handler(request):
+            if request.url.host == "notion.local":
+                raise httpx.ReadTimeout("timed out")
+            return httpx.Response(503)
+
+        monitor = make_monitor(handler)
+        await monitor.probe_all()
+
+        snapshot = monitor.snapshot()
+        assert snapshot["filesystem"]["error"] == "HTTP 503"
+        assert snapshot["notion"]["error"] == "timed out after 1 seconds"
+        await monitor.stop()
+
+    def test_unchecked_servers_are_unhealthy(self, make_monitor):
+        """未確認のサーバーは異常とみなす"""
+        monitor = make_monitor(sse_ok)
+
+        assert monitor.status() == {"filesystem": False, "notion": False}
+        assert monitor.snapshot()["notion"] == {"healthy": False, "checked_at": None}
+
+    @pytest.mark.asyncio
+    async def test_stale_result_is_unhealthy(self, clock, make_monitor):
+        """確認が止まり結果が古くなったサーバーは異常とみなす"""
+        monitor = make_monitor(sse_ok)
+        await monitor.probe_all()
+
+        clock.advance(30)
+        assert monitor.status()["filesystem"] is True
+        clock.advance(1)
+        assert monitor.status()["filesystem"] is False
+        assert monitor.snapshot()["filesystem"]["age_seconds"] == 31
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_latency_history_is_bounded(self, make_monitor):
+        """応答時間の履歴は指定した数だけ保持する"""
+        monitor = make_monitor(sse_ok, history_size=3)
+
+        for _ in range(5):
+            await monitor.probe_all()
+
+        latency = monitor.snapshot()["filesystem"]["latency_ms"]
+        assert len(latency["history"]) == 3
+        assert latency["max"] >= latency["avg"] >= 0
+        assert metrics.get_timing("mcp_health.probe_seconds.filesystem")["count"] == 5
+        await monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_background_probes(self, make_monitor):
+        """バックグラウンドで一定間隔ごとに確認し、停止できる"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.host)
+            return sse_ok(request)
+
+        monitor = make_monitor(handler, interval_seconds=0.01)
+        monitor.start()
+        monitor.start()  # 起動済みの場合は何もしない
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert not monitor.is_running
+        assert requests.count("fs.local") >= 2
+        assert monitor.status() == {"filesystem": True, "notion": True}
@@ -3,15 +3,70 @@
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 import asyncio
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, contextmanager
 
 from src.tools.mcp_integration import (
+    MCPServer,
+    _await_in_current_task,
+    _connect_server,
+    connect_mcp_servers,
     get_tools_async,
     get_available_mcp_tools,
     check_mcp_server_health,
     FILESYSTEM_MCP_URL,
     NOTION_MCP_URL
 )
+from src.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeServerExitStack:
+    """閉じた順序を記録するサーバーの exit スタック"""
+
+    def __init__(self, name, closed):
+        self.name = name
+        self.closed = closed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed.append(self.name)
+
+    async def aclose(self):
+        self.closed.append(self.name)
+
+
+def fake_from_server(delays, closed):
+    """URLごとに指定秒数待ってから接続する from_server"""
+
+    async def from_server(connection_params):
+        url = connection_params.url
+        await asyncio.sleep(delays[url])
+        if delays[url] < 0:
+            raise ConnectionError("refused")
+        return f"tools:{url}", FakeServerExitStack(url, closed)
+
+    return from_server
+
+
+@contextmanager
+def patch_from_server(delays, closed):
+    """MCPToolset.from_server を fake_from_server に差し替える"""
+    with patch('src.tools.mcp_integration.MCPToolset') as mock_toolset, \
+         patch(
+             'src.tools.mcp_integration.SseServerParams',
+             side_effect=lambda url: Mock(url=url),
+         ):
+        mock_toolset.from_server = fake_from_server(delays, closed)
+        yield
 
 
 class TestMCPIntegration:
@@ -312,4 +367,99 @@ class TestMCPIntegration:
             
             # SseServerParamsが正しいURLで呼ばれる
             mock_sse_params.assert_any_call(url=FILESYSTEM_MCP_URL)
-            mock_sse_params.assert_any_call(url=NOTION_MCP_URL)
\ No newline at end of file
+            mock_sse_params.assert_any_call(url=NOTION_MCP_URL)
+
+
+class TestConnectServer:
+    """_connect_server関数のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_opens_in_calling_task(self):
+        """接続は呼び出し元のタスクで開く（同じタスクで閉じられるように）"""
+        tasks = []
+
+        async def from_server(connection_params):
+            tasks.append(asyncio.current_task())
+            return "tools", AsyncExitStack()
+
+        with patch('src.tools.mcp_integration.MCPToolset') as mock_toolset:
+            mock_toolset.from_server = from_server
+
+            tools, _ = await _connect_server(MCPServer("a", "a", "A"))
+
+        assert tools == "tools"
+        assert tasks == [asyncio.current_task()]
+
+    @pytest.mark.asyncio
+    async def test_await_in_current_task_timeout(self):
+        """タイムアウトは TimeoutError、外からの取り消しはそのまま伝える"""
+        with pytest.raises(asyncio.TimeoutError):
+            await _await_in_current_task(asyncio.sleep(1), 0.01)
+
+        task = asyncio.create_task(_await_in_current_task(asyncio.sleep(1), 10))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert await _await_in_current_task(asyncio.sleep(0, "done"), 1) == "done"
+
+
+class TestConnectMCPServers:
+    """connect_mcp_servers関数のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_servers_connect_concurrently(self):
+        """各サーバーへ並行して接続し、最も遅いサーバーの時間で完了する"""
+        servers = [MCPServer(name, name, name) for name in ("a", "b", "c")]
+        closed = []
+
+        with patch_from_server({"a": 0.2, "b": 0.2, "c": 0.2}, closed):
+
+            started_at = asyncio.get_running_loop().time()
+            tools, exit_stack = await connect_mcp_servers(servers)
+            elapsed = asyncio.get_running_loop().time() - started_at
+
+        assert tools == {"a": "tools:a", "b": "tools:b", "c": "tools:c"}
+        assert elapsed < 0.4
+        assert metrics.get_timing("mcp.startup_seconds")["count"] == 1
+
+        # 登録と逆の順序で閉じる
+        await exit_stack.aclose()
+        assert closed == ["c", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_failure_are_isolated(self):
+        """サーバーごとのタイムアウト・失敗は他のサーバーに影響しない"""
+        servers = [
+            MCPServer("slow", "slow", "Slow", timeout=0.05),
+            MCPServer("broken", "broken", "Broken"),
+            MCPServer("ok", "ok", "Ok"),
+        ]
+
+        with patch_from_server({"slow": 1, "broken": -1, "ok": 0}, []):
+
+            tools, _ = await connect_mcp_servers(servers)
+
+        assert tools == {"slow": None, "broken": None, "ok": "tools:ok"}
+        assert metrics.get_counter("mcp.connect_failures.slow") == 1
+        assert metrics.get_counter("mcp.connect_failures.broken") == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_closes_connected_servers(self):
+        """接続中に取り消されると、接続済みのサーバーを閉じる"""
+        servers = [
+            MCPServer("fast", "fast", "Fast"),
+            MCPServer("slow", "slow", "Slow"),
+        ]
+        closed = []
+
+        with patch_from_server({"fast": 0, "slow": 10}, closed):
+
+            task = asyncio.create_task(connect_mcp_servers(servers))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert closed == ["fast"]
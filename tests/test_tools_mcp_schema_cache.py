@@ -0,0 +1,112 @@
+"""MCPツールのスキーマのキャッシュモジュールのテスト"""
+
+import json
+
+import pytest
+from mcp.types import Tool as McpBaseTool
+
+from src.tools.mcp_integration import MCPServer
+from src.tools.mcp_schema_cache import MCPSchemaCache, schema_fingerprint
+from src.utils.metrics import metrics
+
+SERVER = MCPServer("notion", "http://notion.local/sse", "Notion")
+
+TOOLS = [
+    McpBaseTool(
+        name="search",
+        description="ページを検索",
+        inputSchema={"type": "object", "properties": {"query": {"type": "string"}}},
+    ),
+    McpBaseTool(name="list_pages", inputSchema={"type": "object"}),
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """メトリクスを初期化"""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """一時ディレクトリのキャッシュ"""
+    return MCPSchemaCache(str(tmp_path / "cache" / "mcp.json"), clock=lambda: 1000.0)
+
+
+class TestSchemaFingerprint:
+    """schema_fingerprint関数のテスト"""
+
+    def test_depends_on_url_and_schemas(self):
+        """接続先URLかスキーマが変わるとフィンガープリントも変わる"""
+        schemas = [{"name": "search", "inputSchema": {"type": "object"}}]
+        fingerprint = schema_fingerprint(SERVER.url, schemas)
+
+        assert fingerprint == schema_fingerprint(SERVER.url, [dict(schemas[0])])
+        assert fingerprint != schema_fingerprint("http://other/sse", schemas)
+        assert fingerprint != schema_fingerprint(SERVER.url, [])
+
+
+class TestMCPSchemaCache:
+    """MCPSchemaCacheクラスのテスト"""
+
+    def test_store_and_load(self, cache):
+        """保存したスキーマを読み込める"""
+        assert cache.store(SERVER, TOOLS)
+
+        loaded = cache.load(SERVER)
+
+        assert loaded == TOOLS
+        assert metrics.get_counter("mcp_schema_cache.hits.notion") == 1
+        assert metrics.get_counter("mcp_schema_cache.updates.notion") == 1
+
+    def test_missing_file(self, cache):
+        """キャッシュファイルがない場合は使わない"""
+        assert cache.load(SERVER) is None
+        assert metrics.get_counter("mcp_schema_cache.misses.notion") == 1
+
+    def test_unchanged_schemas_are_not_rewritten(self, cache):
+        """内容が変わらない場合は書き込まない"""
+        cache.store(SERVER, TOOLS)
+
+        assert not cache.store(SERVER, TOOLS)
+        assert cache.store(SERVER, TOOLS[:1])
+        assert cache.load(SERVER) == TOOLS[:1]
+
+    def test_servers_are_kept_separately(self, cache):
+        """サーバーごとに保存する"""
+        other = MCPServer("filesystem", "http://fs.local/sse", "Filesystem")
+        cache.store(SERVER, TOOLS)
+        cache.store(other, TOOLS[1:])
+
+        assert cache.load(SERVER) == TOOLS
+        assert cache.load(other) == TOOLS[1:]
+
+    def test_url_change_invalidates(self, cache):
+        """接続先URLが変わった場合は使わない"""
+        cache.store(SERVER, TOOLS)
+        moved = MCPServer("notion", "http://notion2.local/sse", "Notion")
+
+        assert cache.load(moved) is None
+
+    def test_tampered_entry_is_ignored(self, cache):
+        """フィンガープリントと内容が合わないエントリーは使わない"""
+        cache.store(SERVER, TOOLS)
+        with open(cache.path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["servers"]["notion"]["tools"][0]["name"] = "renamed"
+        with open(cache.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        assert cache.load(SERVER) is None
+
+    def test_corrupt_file_is_ignored(self, cache, tmp_path):
+        """壊れたファイルは使わず、保存時に書き直す"""
+        (tmp_path / "cache").mkdir()
+        with open(cache.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+
+        assert cache.load(SERVER) is None
+        assert cache.store(SERVER, TOOLS)
+        assert cache.load(SERVER) == TOOLS
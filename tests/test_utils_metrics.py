@@ -0,0 +1,71 @@
+"""メトリクスレジストリのテストモジュール"""
+
+import pytest
+
+from src.utils.metrics import MetricsRegistry, metrics
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryクラスのテスト"""
+
+    @pytest.fixture
+    def registry(self):
+        """MetricsRegistryインスタンス"""
+        return MetricsRegistry()
+
+    def test_increment(self, registry):
+        """カウンター加算のテスト"""
+        registry.increment("requests")
+        registry.increment("requests", 2)
+
+        assert registry.get_counter("requests") == 3
+
+    def test_get_counter_default(self, registry):
+        """未記録カウンターのデフォルト値テスト"""
+        assert registry.get_counter("unknown") == 0
+
+    def test_set_gauge(self, registry):
+        """ゲージ設定のテスト"""
+        registry.set_gauge("depth", 5)
+        registry.set_gauge("depth", 2)
+
+        assert registry.get_gauge("depth") == 2
+
+    def test_observe(self, registry):
+        """計測値記録のテスト"""
+        registry.observe("latency", 0.5)
+        registry.observe("latency", 1.5)
+
+        stats = registry.get_timing("latency")
+        assert stats["count"] == 2
+        assert stats["total"] == 2.0
+        assert stats["max"] == 1.5
+        assert stats["last"] == 1.5
+
+    def test_snapshot(self, registry):
+        """スナップショット取得のテスト"""
+        registry.increment("requests")
+        registry.set_gauge("depth", 1)
+        registry.observe("latency", 2.0)
+        registry.observe("latency", 4.0)
+
+        snapshot = registry.snapshot()
+
+        assert snapshot["counters"] == {"requests": 1}
+        assert snapshot["gauges"] == {"depth": 1}
+        assert snapshot["timings"]["latency"]["avg"] == 3.0
+
+    def test_reset(self, registry):
+        """初期化のテスト"""
+        registry.increment("requests")
+        registry.reset()
+
+        assert registry.snapshot() == {
+            "counters": {},
+            "gauges": {},
+            "timings": {},
+        }
+
+    def test_global_registry(self):
+        """グローバルレジストリのテスト"""
+        assert isinstance(metrics, MetricsRegistry)